@@ -0,0 +1,25 @@
+# apps/api/gunicorn.conf.py
+# Multi-worker serving for the story API:
+#   gunicorn -c apps/api/gunicorn.conf.py apps.api.server.main:app
+# gunicorn supervises WEB_CONCURRENCY uvicorn workers (restarting any that die); each worker runs
+# the app's lifespan and opens its own share of the database pool (apps/api/server/serving.py).
+# `uvicorn apps.api.server.main:app --workers N` works too, without the supervision.
+# Without DATABASE_URL the API keeps players in memory, per process, so it runs one worker.
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+if os.getenv("DATABASE_URL"):
+    workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+else:
+    workers = 1
+# serving.py sizes each worker's pool from this
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# SSE streams stay open indefinitely; gunicorn's worker timeout only watches the event loop
+timeout = 60
+graceful_timeout = 20
+keepalive = 15
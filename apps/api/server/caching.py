@@ -0,0 +1,81 @@
+# apps/api/server/caching.py
+# Conditional requests and an in-process cache of rendered payloads for the story API.
+# A step payload is a pure function of (section content, step, the placeholders its text uses,
+# the flags a dyn_choice reads), so identical renders share one cached, already-encoded JSON body
+# and its ETag, and skip building and serializing the Pydantic model again.
+# Clients that send If-None-Match with the ETag they already hold get a 304 and no body.
+# Responses are `Cache-Control: private, no-cache`: the browser keeps a copy but revalidates it on
+# every request, so fetch() in apps/web gets the 304s without any client-side code.
+
+from __future__ import annotations
+import hashlib
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+class ResponseCache:
+    """LRU of encoded JSON bodies and their ETags."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes) -> Tuple[bytes, str]:
+        entry = self._entries[key] = (body, etag_for(body))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def matches(request: Optional[Request], etag: Optional[str]) -> bool:
+    """True if the request's If-None-Match already names this ETag (weak comparison)."""
+    if request is None or not etag:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    return any((tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()) == wanted
+               for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"Cache-Control": CACHE_CONTROL, "ETag": etag})
+
+
+def json_response(body: bytes, etag: Optional[str], request: Optional[Request] = None) -> Response:
+    """The body with its ETag, or a bodiless 304 if the request already has that version."""
+    if matches(request, etag):
+        return not_modified(etag)
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Rendered step payloads, shared by all players
+step_cache = ResponseCache()
@@ -0,0 +1,231 @@
+# apps/api/server/events.py
+# Server-sent events for the web client: step updates and player state (energy, flags, main pet)
+# pushed over one long-lived GET /story/stream per tab, instead of polling /player/state.
+# Each connected client is one small _Subscriber: a dict of the latest payload per event type and
+# an asyncio.Event. Publishing overwrites the pending payload of that type, so a slow or stalled
+# client never builds a backlog — it just gets the newest state when it catches up (backpressure
+# by coalescing). An idle client costs one suspended coroutine; a heartbeat comment every
+# SSE_HEARTBEAT_SECONDS keeps proxies from closing the connection.
+# Changes made outside this process (the Discord bot spending energy, another API worker) arrive
+# through Postgres LISTEN/NOTIFY on the player_state channel (migration 016); the hub reloads
+# only players that have a client connected. Every notification also goes to the on_change hooks
+# (the per-worker player cache, core/repository.CachedRepository), connected or not. Bulk writes
+# (maintenance ticks, live-ops) send one '*' notification instead of one per player (migration
+# 018): the on_change_all hooks run and every connected client's player is reloaded.
+# If the LISTEN connection drops (database restart, network), the hub reconnects with backoff.
+# Notifications sent meanwhile are lost, so the on_listening hooks hear about the gap (the player
+# cache empties itself and reads through until it's over) and every connected client's player is
+# reloaded once LISTEN is back.
+
+from __future__ import annotations
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from apps.api.server.caching import etag_for
+
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "10000"))
+SSE_MAX_CLIENTS_PER_USER = int(os.getenv("SSE_MAX_CLIENTS_PER_USER", "5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+NOTIFY_CHANNEL = "player_state"
+NOTIFY_ALL = "*"  # payload of a bulk write: any player may have changed
+
+
+class _Subscriber:
+    __slots__ = ("user_id", "pending", "last_sent", "wakeup")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.pending: Dict[str, bytes] = {}    # event type -> newest unsent payload
+        self.last_sent: Dict[str, str] = {}    # event type -> ETag of the payload last sent
+        self.wakeup = asyncio.Event()
+
+    def offer(self, event: str, payload: bytes):
+        self.pending[event] = payload
+        self.wakeup.set()
+
+
+class EventHub:
+    """Per-user fan-out of JSON payloads to connected SSE clients."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[_Subscriber]] = {}
+        self.clients = 0
+        self.published = 0
+        self._pool = None
+        self._listen_con = None
+        self._refreshing: Dict[int, bool] = {}  # user_id -> another NOTIFY arrived mid-refresh
+        self._tasks: Set[asyncio.Task] = set()
+        # Set by the app: reloads a player after a NOTIFY and publishes its state
+        self.refresh: Optional[Callable[[int], Awaitable[None]]] = None
+        # Called with the user id of every change notification, before any refresh
+        self.on_change: List[Callable[[int], None]] = []
+        # Called for a bulk change notification, which doesn't say which players changed
+        self.on_change_all: List[Callable[[], None]] = []
+        # Called with False when the LISTEN connection is lost and True once it is back
+        self.on_listening: List[Callable[[bool], None]] = []
+        self.listening = False
+        self.reconnects = 0
+
+    def has(self, user_id: int) -> bool:
+        return user_id in self._subscribers
+
+    def subscribe(self, user_id: int) -> Optional[_Subscriber]:
+        """A new subscriber, or None if the server or this user is at its client limit."""
+        subs = self._subscribers.get(user_id, set())
+        if self.clients >= SSE_MAX_CLIENTS or len(subs) >= SSE_MAX_CLIENTS_PER_USER:
+            return None
+        sub = _Subscriber(user_id)
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        self.clients += 1
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        subs = self._subscribers.get(sub.user_id)
+        if subs and sub in subs:
+            subs.discard(sub)
+            self.clients -= 1
+            if not subs:
+                del self._subscribers[sub.user_id]
+
+    def publish(self, user_id: int, event: str, payload: bytes):
+        for sub in self._subscribers.get(user_id, ()):
+            sub.offer(event, payload)
+            self.published += 1
+
+    async def stream(self, sub: _Subscriber):
+        """The SSE byte stream for one subscriber; runs until the client disconnects."""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(sub.wakeup.wait(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                sub.wakeup.clear()
+                pending, sub.pending = sub.pending, {}
+                for event, payload in pending.items():
+                    etag = etag_for(payload)
+                    if sub.last_sent.get(event) == etag:
+                        continue  # the same state again (our own write, echoed by NOTIFY)
+                    sub.last_sent[event] = etag
+                    yield b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    # -------------------------
+    # Cross-process changes
+    # -------------------------
+    async def listen(self, pool):
+        """LISTENs for player_state notifications on a dedicated connection from the pool."""
+        self._pool = pool
+        await self._connect()
+        self.listening = True
+
+    async def _connect(self):
+        con = await self._pool.acquire()
+        try:
+            await con.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        except BaseException:
+            await self._pool.release(con)
+            raise
+        con.add_termination_listener(self._on_terminated)
+        self._listen_con = con
+
+    def _on_terminated(self, connection):
+        if connection is not self._listen_con:
+            return
+        self._listen_con = None
+        print("--- [EVENTS] LISTEN connection lost; reconnecting")
+        self._set_listening(False)
+        self._spawn(self._reconnect(connection))
+
+    async def _reconnect(self, lost_con):
+        try:
+            await self._pool.release(lost_con)
+        except Exception:
+            pass  # already gone with the pool
+        delay = 0.5
+        while self._pool is not None:
+            try:
+                await self._connect()
+                break
+            except Exception as e:
+                print(f"--- [EVENTS] LISTEN reconnect failed ({type(e).__name__}: {e}); retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        else:
+            return
+        self.reconnects += 1
+        print("--- [EVENTS] LISTEN connection restored")
+        self._set_listening(True)
+        # Whatever changed while we weren't listening: reload every player with a client connected
+        self._refresh_all()
+
+    def _refresh_all(self):
+        for user_id in list(self._subscribers):
+            self._schedule_refresh(user_id)
+
+    def _set_listening(self, listening: bool):
+        self.listening = listening
+        for hook in self.on_listening:
+            hook(listening)
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if payload == NOTIFY_ALL:
+            for hook in self.on_change_all:
+                hook()
+            self._refresh_all()
+            return
+        try:
+            user_id = int(payload)
+        except ValueError:
+            return
+        for hook in self.on_change:
+            hook(user_id)
+        self._schedule_refresh(user_id)
+
+    def _schedule_refresh(self, user_id: int):
+        if self.refresh is None or not self.has(user_id):
+            return
+        if user_id in self._refreshing:
+            self._refreshing[user_id] = True  # a burst of writes becomes one more reload
+            return
+        self._refreshing[user_id] = False
+        self._spawn(self._refresh_loop(user_id))
+
+    async def _refresh_loop(self, user_id: int):
+        try:
+            while True:
+                try:
+                    await self.refresh(user_id)
+                except Exception as e:
+                    print(f"--- [EVENTS] refresh for {user_id} failed: {type(e).__name__}: {e}")
+                if not self._refreshing.get(user_id):
+                    return
+                self._refreshing[user_id] = False
+        finally:
+            self._refreshing.pop(user_id, None)
+
+    async def close(self):
+        pool, self._pool = self._pool, None  # stops a reconnect in progress
+        con, self._listen_con = self._listen_con, None
+        if con is not None:
+            con.remove_termination_listener(self._on_terminated)
+            await con.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            await pool.release(con)
+        self.listening = False
+
+    def stats(self) -> dict:
+        return {"clients": self.clients, "users": len(self._subscribers), "published": self.published,
+                "listening": self.listening, "reconnects": self.reconnects}
+
+
+# One per API worker
+event_hub = EventHub()
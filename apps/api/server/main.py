@@ -2,24 +2,69 @@
 
 from __future__ import annotations
 import os, sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional, List
-from fastapi.responses import RedirectResponse
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import RedirectResponse, StreamingResponse
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-import asyncpg
 
 # ---- import your shared engine/data ----
 # main.py lives in apps/api/server → parents: [server, api, apps, <repo_root>]
 REPO_ROOT = Path(__file__).resolve().parents[3]
 sys.path.append(str(REPO_ROOT))
 
-from core.repository import SqlRepository, MemoryRepository
+from core.repository import SqlRepository, MemoryRepository, CachedRepository
 from core.narrative import Narrative
+from core.unit_of_work import StoryUnitOfWork
+from core.story_graph import story_library
+from apps.api.server.caching import json_response, matches, not_modified, step_cache
+from apps.api.server.events import event_hub
+from apps.api.server import serving
+from utils.db import create_pool
 from data.section_0.story import STORY as STORY_SECTION_0
 
-app = FastAPI(title="Aethelgard API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db_url = os.getenv("DATABASE_URL")
+    pool = None
+    if db_url:
+        pool = await create_pool(dsn=db_url, **serving.pool_kwargs())
+        repo = SqlRepository(pool)
+        await repo.prepare()
+        print(f"API repo: SqlRepository (worker {os.getpid()}, pool {serving.pool_limits()})")
+        if serving.API_PLAYER_CACHE:
+            repo = CachedRepository(repo, max_entries=serving.API_PLAYER_CACHE_SIZE)
+            event_hub.on_change.append(repo.invalidate)
+            event_hub.on_change_all.append(repo.invalidate_all)
+            event_hub.on_listening.append(repo.set_listening)
+            print("API repo: player cache on, invalidated by player_state notifications")
+        app.state.repo = repo
+        # Changes from the bot or other workers reach this worker's SSE clients via NOTIFY
+        await event_hub.listen(pool)
+        event_hub.refresh = refresh_user
+    else:
+        app.state.repo = MemoryRepository()
+        print("API repo: MemoryRepository (DATABASE_URL not set)")
+        if serving.WEB_CONCURRENCY > 1:
+            print("--- [API] WARNING: MemoryRepository is per process; run one worker without DATABASE_URL")
+    app.state.narr = Narrative(STORY_SECTION_0, app.state.repo, library=story_library)
+
+    if serving.API_STARTUP_BENCHMARK > 0:
+        await serving.startup_benchmark(app, serving.API_STARTUP_BENCHMARK)
+    try:
+        yield
+    finally:
+        await event_hub.close()
+        if isinstance(app.state.repo, CachedRepository):
+            event_hub.on_change.remove(app.state.repo.invalidate)
+            event_hub.on_change_all.remove(app.state.repo.invalidate_all)
+            event_hub.on_listening.remove(app.state.repo.set_listening)
+        if pool is not None:
+            await pool.close()
+
+app = FastAPI(title="Aethelgard API", lifespan=lifespan)
 origins_env = os.getenv("CORS_ORIGINS", "")
 ALLOW_ORIGINS = [o.strip() for o in origins_env.split(",") if o.strip()]
 
@@ -39,6 +84,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 @app.get("/", include_in_schema=False)
@@ -46,24 +92,6 @@ async def root():
     # Send people to the interactive docs
     return RedirectResponse(url="/docs")
 
-@app.on_event("startup")
-async def startup():
-    db_url = os.getenv("DATABASE_URL")
-    if db_url:
-        pool = await asyncpg.create_pool(dsn=db_url, min_size=1, max_size=5)
-        app.state.repo = SqlRepository(pool)
-        print("API repo: SqlRepository")
-    else:
-        app.state.repo = MemoryRepository()
-        print("API repo: MemoryRepository (DATABASE_URL not set)")
-    app.state.narr = Narrative(STORY_SECTION_0, app.state.repo)
-
-@app.on_event("shutdown")
-async def shutdown():
-    repo = app.state.repo
-    if isinstance(repo, SqlRepository):
-        await repo.pool.close()
-
 def get_repo():
     return app.state.repo
 
@@ -86,39 +114,85 @@ class StepState(BaseModel):
     needs_input: bool = False
 
 # ------------ helpers ------------
-async def ensure_player(repo, narr: Narrative, user_id: int):
-    p = await repo.get_player(user_id)
-    if not p:
-        await repo.create_player(user_id, {
-            "name": f"Adventurer {user_id}",
-            "section_id": "section_0",
-            "story_step_id": narr.first_step_id(),
-            "energy": 10, "max_energy": 10
-        })
-
-def render_text(t: Optional[str], player_name: str, fallback: str = "") -> str:
-    if not t:
-        return fallback
-    return t.replace("{player_name}", player_name or "Adventurer")
-
-async def serialize_step(repo, narr: Narrative, user_id: int) -> StepState:
-    player = await repo.get_player(user_id)
-    state = await repo.get_story_state(user_id)
-    step = narr.get_step(state["story_step_id"])
-    stype = step.get("type")
+async def open_story(repo, narr: Narrative, user_id: int) -> StoryUnitOfWork:
+    """Loads (creating on first visit) the player once for this request."""
+    uow = StoryUnitOfWork(repo, user_id)
+    await uow.load(defaults={
+        "name": f"Adventurer {user_id}",
+        "section_id": "section_0",
+        "story_step_id": narr.first_step_id(),
+        "energy": 10, "max_energy": 10
+    })
+    return uow
+
+async def commit_step(uow: StoryUnitOfWork, narr: Narrative) -> Response:
+    """Writes the request's changes in one transaction and serializes the step from memory."""
+    if not await uow.commit():
+        # Another request (a double click) moved the story on first: show where it actually is
+        await uow.load()
+    publish_state(narr, uow.player)
+    return step_response(narr, uow.player)
+
+def publish_state(narr: Narrative, player: dict):
+    """Pushes the player's step and state to their connected stream clients, if any."""
+    user_id = player["id"]
+    if not event_hub.has(user_id):
+        return
+    event_hub.publish(user_id, "step", step_response(narr, player).body)
+    event_hub.publish(user_id, "player", get_player_state(player).model_dump_json().encode())
+
+async def refresh_user(user_id: int):
+    """Reloads a player after a change made elsewhere (NOTIFY) and pushes it to their clients."""
+    player = await app.state.repo.get_player(user_id)
+    if player:
+        publish_state(app.state.narr, player)
+
+def starter_pet(player: dict) -> Optional[str]:
+    flags = player.get("flags", set())
+    if not isinstance(flags, set):
+        flags = set(flags or [])
+    return next((f.split(":",1)[1] for f in flags
+                 if isinstance(f, str) and f.startswith("starter_pet:")), None)
+
+def step_response(narr: Narrative, player: dict, request: Optional[Request] = None) -> Response:
+    """
+    The step as a JSON response with its ETag. The encoded body is cached under everything it
+    depends on, so identical renders skip StepState and Pydantic serialization entirely.
+    """
+    section_id = player.get("section_id", "section_0")
+    section = narr.section(section_id)
+    cstep = narr.compiled_step(player["story_step_id"], section_id)
+    key = (
+        section_id,
+        section.content_hash if section else None,
+        cstep.id,
+        player.get("name") if cstep.text_fields else None,
+        starter_pet(player) if cstep.type == "dyn_choice" else None,
+    )
+    cached = step_cache.get(key)
+    if cached is None:
+        cached = step_cache.put(key, serialize_step(narr, player).model_dump_json().encode())
+    body, etag = cached
+    return json_response(body, etag, request)
+
+def serialize_step(narr: Narrative, player: dict) -> StepState:
+    section_id = player.get("section_id", "section_0")
+    cstep = narr.compiled_step(player["story_step_id"], section_id)
+    step = cstep.step
+    stype = cstep.type
 
     if stype == "narration":
         return StepState(
-            section_id=state.get("section_id", "section_0"),
+            section_id=section_id,
             step_id=step["id"],
             kind="narration",
-            text=render_text(step.get("text"), player.get("name")),
+            text=cstep.render_text(player_name=player.get("name")),
             can_continue=bool(step.get("next")),
         )
 
     if stype == "modal":
         return StepState(
-            section_id=state.get("section_id", "section_0"),
+            section_id=section_id,
             step_id=step["id"],
             kind="modal",
             prompt=step.get("modal_title", "Enter value"),
@@ -126,9 +200,9 @@ async def serialize_step(repo, narr: Narrative, user_id: int) -> StepState:
         )
 
     if stype == "choice":
-        opts = [Option(id=o["id"], label=o["label"]) for o in step.get("options", [])]
+        opts = [Option(id=oid, label=label) for oid, label in cstep.options]
         return StepState(
-            section_id=state.get("section_id", "section_0"),
+            section_id=section_id,
             step_id=step["id"],
             kind="choice",
             prompt=step.get("prompt", "Choose:"),
@@ -136,16 +210,11 @@ async def serialize_step(repo, narr: Narrative, user_id: int) -> StepState:
         )
 
     if stype == "dyn_choice":
-        player = await repo.get_player(user_id)
-        flags = player.get("flags", set())
-        if not isinstance(flags, set):
-            flags = set(flags or [])
-        starter = next((f.split(":",1)[1] for f in flags
-                        if isinstance(f, str) and f.startswith("starter_pet:")), None)
+        starter = starter_pet(player)
         from data.abilities import STARTER_TALENTS
         opts = [Option(id=t["mechanic_name"], label=t["name"]) for t in STARTER_TALENTS.get(starter, [])]
         return StepState(
-            section_id=state.get("section_id", "section_0"),
+            section_id=section_id,
             step_id=step["id"],
             kind="dyn_choice",
             prompt=step.get("prompt", "Choose:"),
@@ -153,7 +222,7 @@ async def serialize_step(repo, narr: Narrative, user_id: int) -> StepState:
         )
 
     return StepState(
-        section_id=state.get("section_id", "section_0"),
+        section_id=section_id,
         step_id=step["id"],
         kind=stype or "unknown",
         text="🚧 This branch isn’t written yet. Thanks for testing!",
@@ -163,23 +232,51 @@ async def serialize_step(repo, narr: Narrative, user_id: int) -> StepState:
 # ------------ endpoints ------------
 @app.get("/health")
 async def health():
-    return {"ok": True}
+    # The worker pid tells apart the processes behind a multi-worker deployment
+    return {"ok": True, "worker": os.getpid()}
+
+@app.get("/story/step", response_model=StepState)
+async def story_step(user_id: int, request: Request, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
+    """The current step, read-only: poll this with If-None-Match for 304s."""
+    uow = await open_story(repo, narr, user_id)
+    return step_response(narr, uow.player, request)
+
+@app.get("/story/stream")
+async def story_stream(user_id: int, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
+    """
+    Server-sent events: `step` and `player` events (same JSON as /story/step and /player/state),
+    sent once on connect and again whenever either changes.
+    """
+    sub = event_hub.subscribe(user_id)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many open streams.", headers={"Retry-After": "10"})
+    try:
+        uow = await open_story(repo, narr, user_id)
+    except BaseException:
+        event_hub.unsubscribe(sub)
+        raise
+    sub.offer("step", step_response(narr, uow.player).body)
+    sub.offer("player", get_player_state(uow.player).model_dump_json().encode())
+    return StreamingResponse(
+        event_hub.stream(sub), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/session/start", response_model=StepState)
 async def session_start(user_id: int, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
-    await ensure_player(repo, narr, user_id)
-    return await serialize_step(repo, narr, user_id)
+    uow = await open_story(repo, narr, user_id)
+    return step_response(narr, uow.player)
 
 @app.post("/story/continue", response_model=StepState)
 async def story_continue(user_id: int, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
-    await ensure_player(repo, narr, user_id)
-    state = await repo.get_story_state(user_id)
-    step = narr.get_step(state["story_step_id"])
+    uow = await open_story(repo, narr, user_id)
+    section_id = uow.player["section_id"]
+    step = narr.get_step(uow.player["story_step_id"], section_id)
     if step.get("type") != "narration" or not step.get("next"):
         raise HTTPException(status_code=400, detail="Cannot continue from this step.")
-    await narr.apply_effects(user_id, step.get("effects"))
-    await repo.set_story_state(user_id, "section_0", step["next"])
-    return await serialize_step(repo, narr, user_id)
+    narr.plan_effects(uow.plan, step.get("effects"))
+    uow.plan.set_story_state(section_id, step["next"])
+    return await commit_step(uow, narr)
 
 class SubmitBody(BaseModel):
     user_id: int
@@ -188,23 +285,23 @@ class SubmitBody(BaseModel):
 
 @app.post("/story/submit", response_model=StepState)
 async def story_submit(body: SubmitBody, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
-    await ensure_player(repo, narr, body.user_id)
-    state = await repo.get_story_state(body.user_id)
-    step = narr.get_step(state["story_step_id"])
+    uow = await open_story(repo, narr, body.user_id)
+    section_id = uow.player["section_id"]
+    step = narr.get_step(uow.player["story_step_id"], section_id)
 
     # If the client sent the step_id and it doesn’t match, just return the real current step
     if body.step_id and body.step_id != step["id"]:
-        return await serialize_step(repo, narr, body.user_id)
+        return step_response(narr, uow.player)
 
     if step.get("type") != "modal":
         # Be forgiving: return current step instead of error
-        return await serialize_step(repo, narr, body.user_id)
+        return step_response(narr, uow.player)
 
-    await narr.apply_effects(body.user_id, step.get("effects"), modal_value=body.value)
+    narr.plan_effects(uow.plan, step.get("effects"), modal_value=body.value)
     next_id = step.get("next")
     if next_id:
-        await repo.set_story_state(body.user_id, "section_0", next_id)
-    return await serialize_step(repo, narr, body.user_id)
+        uow.plan.set_story_state(section_id, next_id)
+    return await commit_step(uow, narr)
 
 class ChooseBody(BaseModel):
     user_id: int
@@ -213,33 +310,33 @@ class ChooseBody(BaseModel):
 
 @app.post("/story/choose", response_model=StepState)
 async def story_choose(body: ChooseBody, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
-    await ensure_player(repo, narr, body.user_id)
-    state = await repo.get_story_state(body.user_id)
-    step = narr.get_step(state["story_step_id"])
+    uow = await open_story(repo, narr, body.user_id)
+    section_id = uow.player["section_id"]
+    step = narr.get_step(uow.player["story_step_id"], section_id)
 
     # If client’s idea of the step doesn’t match, just return the real current step
     if body.step_id and body.step_id != step["id"]:
-        return await serialize_step(repo, narr, body.user_id)
+        return step_response(narr, uow.player)
 
     st = step.get("type")
     if st not in ("choice", "dyn_choice"):
         # Be forgiving: return current step instead of error
-        return await serialize_step(repo, narr, body.user_id)
+        return step_response(narr, uow.player)
 
     if st == "choice":
-        choice = next((o for o in step.get("options", []) if o["id"] == body.option_id), None)
+        choice = narr.compiled_step(step["id"], section_id).option_by_id.get(body.option_id)
         if not choice:
             # If the option isn’t valid anymore, also just return current step
-            return await serialize_step(repo, narr, body.user_id)
-        await narr.apply_effects(body.user_id, choice.get("effects"))
+            return step_response(narr, uow.player)
+        narr.plan_effects(uow.plan, choice.get("effects"))
         next_id = choice.get("next") or step.get("next") or step["id"]
     else:
         # dyn_choice: flag the selected talent
-        await narr.apply_effects(body.user_id, [{"op": "set_flag", "flag": f"starter_talent:{body.option_id}"}])
+        narr.plan_effects(uow.plan, [{"op": "set_flag", "flag": f"starter_talent:{body.option_id}"}])
         next_id = step.get("next") or step["id"]
 
-    await repo.set_story_state(body.user_id, "section_0", next_id)
-    return await serialize_step(repo, narr, body.user_id)
+    uow.plan.set_story_state(section_id, next_id)
+    return await commit_step(uow, narr)
 
 class PlayerState(BaseModel):
     name: str
@@ -249,8 +346,7 @@ class PlayerState(BaseModel):
     flags: list[str] = []
 
 # --- helper to get flags as list ---
-async def get_player_state(repo, user_id: int) -> PlayerState:
-    p = await repo.get_player(user_id)
+def get_player_state(p: dict) -> PlayerState:
     flags = p.get("flags", set())
     if not isinstance(flags, set):
         flags = set(flags or [])
@@ -264,53 +360,18 @@ async def get_player_state(repo, user_id: int) -> PlayerState:
 
 # --- endpoints ---
 @app.get("/player/state", response_model=PlayerState)
-async def player_state(user_id: int, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
-    await ensure_player(repo, narr, user_id)
-    return await get_player_state(repo, user_id)
+async def player_state(user_id: int, request: Request, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
+    uow = await open_story(repo, narr, user_id)
+    version = uow.player.get("state_version")
+    # Keyed by the per-player state version: a 304 needs no PlayerState built at all
+    etag = f'W/"{user_id}-{version}"' if version is not None else None
+    if matches(request, etag):
+        return not_modified(etag)
+    return json_response(get_player_state(uow.player).model_dump_json().encode(), etag)
 
 @app.post("/session/reset")
 async def session_reset(user_id: int, repo=Depends(get_repo), narr: Narrative = Depends(get_narr)):
-    first = narr.first_step_id()
-    if hasattr(repo, "pool"):  # SqlRepository path
-        async with repo.pool.acquire() as con:
-            # detect the players PK column just like the repo does
-            rows = await con.fetch(
-                "SELECT column_name FROM information_schema.columns "
-                "WHERE table_name = 'players' AND column_name = ANY($1::text[])",
-                ['id', 'player_id', 'user_id']
-            )
-            cols = {r['column_name'] for r in rows}
-            if 'id' in cols:        pk = 'id'
-            elif 'player_id' in cols: pk = 'player_id'
-            elif 'user_id' in cols: pk = 'user_id'
-            else:
-                raise HTTPException(status_code=500, detail="players table missing PK column")
-
-            async with con.transaction():
-                await con.execute("DELETE FROM pets WHERE player_id=$1", user_id)
-                await con.execute(
-                    "DELETE FROM player_flags WHERE player_id=$1 "
-                    "AND (flag LIKE 'starter_pet:%' OR flag LIKE 'starter_talent:%')",
-                    user_id
-                )
-                await con.execute(
-                    f"UPDATE players SET story_step_id=$1, section_id='section_0', main_pet_species=NULL "
-                    f"WHERE {pk}=$2",
-                    first, user_id
-                )
-    else:
-        p = await repo.get_player(user_id)
-        if p:
-            p["story_step_id"] = first
-            p["section_id"] = "section_0"
-            p["main_pet_species"] = None
-            if isinstance(p.get("flags"), set):
-                p["flags"] = {f for f in p["flags"]
-                              if not (isinstance(f, str) and (f.startswith("starter_pet:") or f.startswith("starter_talent:")))}
-            else:
-                p["flags"] = [f for f in (p.get("flags") or [])
-                              if not (isinstance(f, str) and (f.startswith("starter_pet:") or f.startswith("starter_talent:")))]
-            await repo.save_player(user_id, p)
-
-    await repo.set_story_state(user_id, "section_0", first)
-    return await serialize_step(repo, narr, user_id)
+    await repo.reset_story(user_id, "section_0", narr.first_step_id())
+    uow = await open_story(repo, narr, user_id)
+    publish_state(narr, uow.player)
+    return step_response(narr, uow.player)
@@ -0,0 +1,100 @@
+# apps/api/server/serving.py
+# Production serving settings for the story API: how big each worker's database pool is, whether
+# workers keep a player cache, and a startup benchmark.
+# Several workers (gunicorn with uvicorn workers, see apps/api/gunicorn.conf.py, or
+# `uvicorn --workers N`) each open their own asyncpg pool, so the pool size is derived from a total
+# connection budget split across WEB_CONCURRENCY workers instead of a fixed number per process —
+# adding workers doesn't exhaust Postgres' max_connections.
+# Workers share state through Postgres only. MemoryRepository lives inside one process, so without
+# DATABASE_URL the API must run a single worker.
+# With API_STARTUP_BENCHMARK=N each worker pushes N requests through the app in-process (a
+# throwaway MemoryRepository, no sockets) before serving and prints its requests per second: a
+# quick check of a deployment's per-worker throughput.
+
+from __future__ import annotations
+import asyncio
+import os
+import time
+
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+# Connections all API workers may hold together; each worker gets its share
+API_DB_MAX_CONNECTIONS = int(os.getenv("API_DB_MAX_CONNECTIONS", "20"))
+API_DB_POOL_MIN = int(os.getenv("API_DB_POOL_MIN", "1"))
+API_DB_POOL_MAX = int(os.getenv("API_DB_POOL_MAX", "0"))  # 0 = derived from the budget
+API_DB_COMMAND_TIMEOUT = float(os.getenv("API_DB_COMMAND_TIMEOUT", "10"))
+API_PLAYER_CACHE = os.getenv("API_PLAYER_CACHE", "false").lower() in ("1", "true", "yes")
+API_PLAYER_CACHE_SIZE = int(os.getenv("API_PLAYER_CACHE_SIZE", "10000"))
+API_STARTUP_BENCHMARK = int(os.getenv("API_STARTUP_BENCHMARK", "0"))
+
+
+def pool_limits() -> tuple[int, int]:
+    """(min_size, max_size) of this worker's pool. One connection is the SSE LISTEN connection."""
+    max_size = API_DB_POOL_MAX or API_DB_MAX_CONNECTIONS // WEB_CONCURRENCY
+    max_size = max(2, max_size)
+    return min(API_DB_POOL_MIN, max_size), max_size
+
+
+def pool_kwargs() -> dict:
+    min_size, max_size = pool_limits()
+    return {
+        "min_size": min_size,
+        "max_size": max_size,
+        "command_timeout": API_DB_COMMAND_TIMEOUT,
+        # Idle connections above min_size are closed, so a quiet worker gives its share back
+        "max_inactive_connection_lifetime": 60.0,
+    }
+
+
+# -------------------------
+# Startup benchmark
+# -------------------------
+# One round per simulated player: the calls a web client makes while reading a scene
+_BENCH_ROUND = (
+    ("POST", "/session/start"),
+    ("GET", "/story/step"),
+    ("GET", "/player/state"),
+    ("POST", "/story/continue"),
+    ("GET", "/story/step"),
+    ("POST", "/session/reset"),
+)
+_BENCH_CONCURRENCY = 32
+
+
+async def startup_benchmark(app, requests: int) -> None:
+    """Runs about `requests` requests through the app against a temporary MemoryRepository."""
+    try:
+        import httpx
+    except ImportError:
+        print("--- [API] API_STARTUP_BENCHMARK needs httpx; skipped")
+        return
+    from core.narrative import Narrative
+    from core.repository import MemoryRepository
+
+    saved = app.state.repo, app.state.narr
+    app.state.repo = MemoryRepository()
+    app.state.narr = Narrative(saved[1].story, app.state.repo, library=saved[1].library)
+    rounds = max(1, requests // len(_BENCH_ROUND))
+    # Negative ids: never a real Discord user, so nothing is published to real stream clients
+    user_ids = iter(range(-1, -rounds - 1, -1))
+    sent = 0
+
+    async def player(client):
+        nonlocal sent
+        for user_id in user_ids:
+            for method, path in _BENCH_ROUND:
+                r = await client.request(method, path, params={"user_id": user_id})
+                r.raise_for_status()
+                sent += 1
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(player(client) for _ in range(min(_BENCH_CONCURRENCY, rounds))))
+            elapsed = time.perf_counter() - started
+        print(f"--- [API] worker {os.getpid()}: {sent} requests in {elapsed:.2f}s = "
+              f"{sent / elapsed:.0f} req/s (in-process, memory repository, {_BENCH_CONCURRENCY} concurrent)")
+    except Exception as e:
+        print(f"--- [API] startup benchmark failed: {type(e).__name__}: {e}")
+    finally:
+        app.state.repo, app.state.narr = saved
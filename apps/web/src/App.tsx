@@ -123,9 +123,19 @@ export default function App() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [uid]);
 
-  // whenever step changes (e.g., after choose/submit), refresh player state
+  // live updates: the API pushes step and player state over SSE, including changes made in Discord
+  const streaming = typeof EventSource !== "undefined";
   useEffect(() => {
-    if (step) fetchPlayer();
+    if (!streaming) return;
+    const es = new EventSource(`${API_BASE}/story/stream?user_id=${encodeURIComponent(uid)}`);
+    es.addEventListener("player", (e) => setPlayer(JSON.parse((e as MessageEvent).data)));
+    es.addEventListener("step", (e) => setStep(JSON.parse((e as MessageEvent).data)));
+    return () => es.close();
+  }, [uid, streaming]);
+
+  // without SSE: whenever step changes (e.g., after choose/submit), refresh player state
+  useEffect(() => {
+    if (step && !streaming) fetchPlayer();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [step?.step_id]);
 
@@ -1,9 +1,10 @@
 import discord, os, asyncio
-import asyncpg
 from discord.ext import commands
 from core import config
+from utils.db import create_pool
 from core.repository import MemoryRepository, SqlRepository
 from core.validator import validate_all
+from core.executor import process_pool, shutdown_pools
 
 async def force_clear_all_guild_commands(bot: commands.Bot):
     """
@@ -28,7 +29,7 @@ async def build_repo():
     if not has_db:
         return MemoryRepository()
 
-    pool = await asyncpg.create_pool(
+    pool = await create_pool(
         host=config.DB_HOST,
         port=int(config.DB_PORT or 5432),
         user=config.DB_USER,
@@ -52,8 +53,8 @@ async def sync_commands_global(bot: commands.Bot):
 
 class GuildBot(commands.Bot):
     async def setup_hook(self):
-        # 1) validate content first
-        validate_all()
+        # 1) validate content first (in a worker process; a failure still aborts startup)
+        await process_pool.run(validate_all)
 
         # 2) Load DB cog FIRST so it creates the Postgres pool / runs migrations
         try:
@@ -67,6 +68,7 @@ class GuildBot(commands.Bot):
         pool = getattr(db_cog, "pool", None)
         if pool:
             self.repo = SqlRepository(pool)
+            self.repo.on_inventory_change.append(db_cog.invalidate_inventory)
             print("  > Repository: SqlRepository (asyncpg pool from Database cog)")
         else:
             self.repo = MemoryRepository()
@@ -87,6 +89,10 @@ class GuildBot(commands.Bot):
 
         print("✅ Startup complete — ready for commands.")
 
+    async def close(self):
+        await super().close()
+        shutdown_pools()
+
 # intents & bot
 intents = discord.Intents.default()
 bot = GuildBot(command_prefix=commands.when_mentioned, intents=intents)
@@ -121,10 +127,12 @@ async def on_ready():
                     pass
                 await db_cog.clear_active_battle(record['user_id'])
             if orphaned:
-                print(f"🧹 Cleaned up {len(orphaned)} orphaned battle panel(s).")
+                print(f"🧹 Cleaned up {len(orphaned)} orphaned battle panel(s). Their battles can be continued with /resume.")
         except Exception as e:
             print(f"⚠️ Battle cleanup error: {e}")
 
-bot.run(config.DISCORD_TOKEN)
+if __name__ == "__main__":
+    # Worker processes (core/executor.py) import this module too; only the real entry point runs the bot
+    bot.run(config.DISCORD_TOKEN)
 
 
@@ -7,6 +7,8 @@ import math
 import random
 import json
 import io
+import asyncio
+from typing import Optional
 
 # --- REFACTORED IMPORTS ---
 # The data imports are already correct. We just need to fix the view import.
@@ -17,6 +19,9 @@ from data.skills import PET_SKILLS
 from data.quests import QUESTS
 from .views.combat import CombatView # <-- Path updated for new structure
 from data.towns import TOWNS
+from core.executor import thread_pool
+from core.liveops import BulkOperation, LiveOpsRun, PlayerFilter
+from utils.checks import NotOwner, owner_only, reply_not_owner
 
 async def recipe_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
     choices = []
@@ -45,6 +50,7 @@ class ResetView(discord.ui.View):
     async def confirm_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
         await self.bot.repo.delete_player(self.user_id)
+        self.bot.get_cog('Database').invalidate_inventory(self.user_id)
 
         for item in self.children:
             item.disabled = True
@@ -62,9 +68,13 @@ class ResetView(discord.ui.View):
         await interaction.edit_original_response(content="Reset cancelled.", view=self)
         self.stop()
 
+def _csv(value: str | None) -> list[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
 class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.liveops_run = None  # the bulk run in progress, one at a time
 
     @app_commands.command(name='heal', description='(Admin Only) Heals your main pet to full HP.')
     @commands.is_owner()
@@ -358,8 +368,8 @@ class Admin(commands.Cog):
             "quests": await db_cog.get_active_quests(user.id)
         }
 
-        # Convert the data to a JSON string
-        json_data = json.dumps(all_data, indent=4)
+        # Convert the data to a JSON string off the event loop (pickling it to a process would cost more)
+        json_data = await thread_pool.run(json.dumps, all_data, indent=4)
 
         # Create an in-memory file-like object
         data_stream = io.BytesIO(json_data.encode('utf-8'))
@@ -384,10 +394,118 @@ class Admin(commands.Cog):
 
         await interaction.followup.send(f"Successfully learned recipe: {RECIPES[recipe_id]['name']}.", ephemeral=True)
 
+    @app_commands.command(name='liveops', description='(Admin Only) Grants an item, coins or a flag to every matching player.')
+    @app_commands.describe(
+        operation="What to grant", value="Item ID, coin amount or flag",
+        quantity="Items per player (grant_item only)",
+        has_flags="Only players with all of these flags (comma-separated)",
+        lacks_flags="Only players with none of these flags (comma-separated)",
+        locations="Only players in one of these towns (comma-separated town IDs)",
+        quest_id="Only players who have this quest", quest_status="...in this status (e.g. in_progress, completed)",
+        run_key="Marks each player done, so re-running the same key skips them",
+        dry_run="Only count the matching players (default)")
+    @app_commands.choices(operation=[
+        app_commands.Choice(name="Grant item", value="grant_item"),
+        app_commands.Choice(name="Add coins", value="add_coins"),
+        app_commands.Choice(name="Set flag", value="set_flag"),
+    ])
+    @owner_only()
+    async def liveops(self, interaction: discord.Interaction, operation: str, value: str, quantity: int = 1,
+                      has_flags: str = None, lacks_flags: str = None, locations: str = None,
+                      quest_id: str = None, quest_status: str = None, run_key: str = None,
+                      dry_run: bool = True):
+        """Bulk live-ops run: targets players by filter and applies the change in batches (see core/liveops.py)."""
+        await interaction.response.defer(ephemeral=True)
+        if operation == "grant_item" and value not in ITEMS:
+            return await interaction.followup.send(f"Error: Item ID '{value}' not found.", ephemeral=True)
+        if operation == "grant_item" and quantity < 1:
+            return await interaction.followup.send("Error: Quantity must be at least 1.", ephemeral=True)
+        if operation == "add_coins" and not value.lstrip("-").isdigit():
+            return await interaction.followup.send("Error: Coin amount must be a whole number.", ephemeral=True)
+        unknown_towns = [town_id for town_id in _csv(locations) if town_id not in TOWNS]
+        if unknown_towns:
+            return await interaction.followup.send(f"Error: Town ID(s) not found: {', '.join(unknown_towns)}.", ephemeral=True)
+
+        db_cog = self.bot.get_cog('Database')
+        player_filter = PlayerFilter(has_flags=_csv(has_flags), lacks_flags=_csv(lacks_flags),
+                                     locations=_csv(locations), quest_id=quest_id, quest_status=quest_status)
+        bulk = BulkOperation(operation, value, quantity)
+        run = LiveOpsRun(db_cog.pool, player_filter, bulk, run_key=run_key)
+        target = f"**{bulk.describe()}** → {player_filter.describe()}"
+        if not dry_run:
+            if self.liveops_run is not None:
+                return await interaction.followup.send("A live-ops run is already in progress. Use `/liveopscancel` to stop it.", ephemeral=True)
+            # Claimed before the first await, so two commands can't both get past the check
+            self.liveops_run = run
+        try:
+            done = await self._liveops_apply(interaction, run, target, dry_run, operation == "grant_item")
+        finally:
+            if self.liveops_run is run:
+                self.liveops_run = None
+        if done is None:
+            return
+        print(f"--- [LIVEOPS] {interaction.user} ran {bulk.describe()} for {player_filter.describe()}: "
+              f"{done} players in {run.batches} batches (run key: {run_key or '-'})")
+
+    async def _liveops_apply(self, interaction: discord.Interaction, run: LiveOpsRun, target: str,
+                             dry_run: bool, grants_items: bool) -> Optional[int]:
+        """Counts the targets, then (unless dry_run) applies the run with progress reports. Returns the players changed."""
+        db_cog = self.bot.get_cog('Database')
+        total = await run.count()
+
+        if dry_run:
+            await interaction.followup.send(
+                f"🧪 Dry run: {target}\n**{total}** player(s) would be changed. "
+                f"Run again with `dry_run: False` to apply.", ephemeral=True)
+            return None
+        if not total:
+            await interaction.followup.send(f"No players match {run.filter.describe()}.", ephemeral=True)
+            return None
+
+        message = await interaction.followup.send(f"⏳ Live-ops: {target}\nStarting ({total} players)...", ephemeral=True, wait=True)
+        last_edit = 0.0
+
+        async def on_batch(run: LiveOpsRun, user_ids: list[int]):
+            nonlocal last_edit
+            if grants_items:
+                for user_id in user_ids:
+                    db_cog.invalidate_inventory(user_id)
+            now = asyncio.get_running_loop().time()
+            if now - last_edit >= 2:  # Discord rate-limits message edits; a progress bar doesn't need more
+                last_edit = now
+                filled = min(10, run.done * 10 // max(1, run.total))
+                try:
+                    await message.edit(content=f"⏳ Live-ops: {target}\n"
+                                               f"{'🟦' * filled}{'⬛' * (10 - filled)} `{run.done}/{run.total}`")
+                except discord.HTTPException:
+                    pass  # Progress is cosmetic; a failed edit (or an expired token) must not stop the run
+
+        done = await run.run(on_batch)
+        status = "🛑 Cancelled" if run.cancelled else "✅ Done"
+        report = (f"{status}: {target}\n**{done}**/{run.total} player(s) changed "
+                  f"in {run.batches} batch(es), {run.throttled_seconds:.1f}s throttled.")
+        try:
+            await message.edit(content=report)
+        except discord.HTTPException:
+            # The interaction token lasts 15 minutes; a longer run reports by DM instead
+            try:
+                await interaction.user.send(report)
+            except discord.HTTPException:
+                pass
+        return done
+
+    @app_commands.command(name='liveopscancel', description='(Admin Only) Stops the live-ops run in progress.')
+    @owner_only()
+    async def liveops_cancel(self, interaction: discord.Interaction):
+        if self.liveops_run is None:
+            return await interaction.response.send_message("No live-ops run is in progress.", ephemeral=True)
+        self.liveops_run.cancel()
+        await interaction.response.send_message("Stopping after the current batch. Players already changed stay changed.", ephemeral=True)
+
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         """Handles errors for all commands in this cog."""
-        if isinstance(error, app_commands.NotOwner):
-            await interaction.response.send_message("This is an admin-only command.", ephemeral=True)
+        if isinstance(error, NotOwner):
+            await reply_not_owner(interaction)
         else:
             # It's good practice to log the full error to your console
             print(f"An unhandled error occurred in the Admin cog: {error}")
@@ -16,9 +16,11 @@ from data.abilities import SHARED_PASSIVES_BY_TYPE
 from data.explore_events import get_zone_events, get_zone_loot
 from utils.helpers import get_status_bar, get_town_embed, get_remnant_embed, check_quest_progress, get_notification, is_remnant
 from core.battle_engine import BattleState  # <-- Key Change: Importing from core
+from core.user_locks import user_locks
 from .resources import ACTION_COSTS
 from .views.towns import TownView, WildsView, RemnantView
 from .views.combat import CombatView
+from utils.spectator import spectator_broadcaster
 
 
 def choose_wild_species(possible_pets):
@@ -75,6 +77,58 @@ class Adventure(commands.Cog):
         if view:
             view.message = message
 
+    @app_commands.command(name='resume', description='Resume a battle that was interrupted.')
+    async def resume_battle(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        user_id = interaction.user.id
+        async with user_locks.hold(user_id, "resume"):
+            if user_id in CombatView.live_battles:
+                return await interaction.followup.send("Your battle is still open — scroll up to find it.", ephemeral=True)
+            # Claim the battle before the first await, so a second /resume can't open the same snapshot
+            # again; the CombatView takes the slot over in initial_setup()
+            claim = object()
+            CombatView.live_battles[user_id] = claim
+            try:
+                await self._resume_battle(interaction, user_id)
+            finally:
+                if CombatView.live_battles.get(user_id) is claim:
+                    del CombatView.live_battles[user_id]
+
+    async def _resume_battle(self, interaction: discord.Interaction, user_id: int):
+        db_cog = self.bot.get_cog('Database')
+        record = await db_cog.get_battle_snapshot(user_id)
+        if not record:
+            return await interaction.followup.send("You don't have a battle to resume.", ephemeral=True)
+
+        state = record['state']
+        battle = BattleState.from_snapshot(self.bot, user_id, state.get('battle', {}))
+        if battle is None:
+            await db_cog.delete_battle_snapshot(user_id)
+            return await interaction.followup.send("That battle can no longer be resumed.", ephemeral=True)
+
+        spectator_message = None
+        if not spectator_broadcaster.live_board:
+            spectator_embed = discord.Embed(title="⚔️ A battle resumes...", description="Loading...",
+                                            color=discord.Color.dark_grey())
+            spectator_message = await interaction.channel.send(embed=spectator_embed)
+
+        combat_view = CombatView(
+            bot=self.bot,
+            user_id=user_id,
+            player_roster=battle.player_roster,
+            wild_pet=battle.wild_pet,
+            spectator_message=spectator_message,
+            parent_interaction=interaction,
+            origin_location_id=record['origin_location_id'],
+            initial_log_message=state.get('battle_log') or "> The battle resumes!",
+            player_name=state.get('player_name'),
+            battle=battle
+        )
+        control_message = await interaction.followup.send("⚔️ **It's your turn!**", view=combat_view, ephemeral=True)
+        combat_view.message = control_message
+        await combat_view.initial_setup()
+
+    @user_locks.serialized("explore")
     async def explore(self, interaction: discord.Interaction, location_id: str, view_context=None):
         # This function's internal logic is already quite good.
         # The main change is that the things it calls (like CombatView, check_quest_progress)
@@ -125,8 +179,7 @@ class Adventure(commands.Cog):
             # Check for quest items that should drop in this zone
             from data.quests import QUESTS as QUEST_DATA
             quest_item_to_drop = None
-            player_inventory = await db_cog.get_player_inventory(user_id)
-            owned_item_ids = {i['item_id'] for i in player_inventory}
+            inventory = await db_cog.get_inventory(user_id)
             for quest in active_quests:
                 q_data = next((d for town in QUEST_DATA.values() for qid, d in town.items() if qid == quest['quest_id']), None)
                 if not q_data:
@@ -144,7 +197,7 @@ class Adventure(commands.Cog):
                             if current_count < required_count:
                                 quest_item_to_drop = obj['target']
                                 break
-                        elif obj['target'] not in owned_item_ids:
+                        elif not inventory.has_item(obj['target']):
                             quest_item_to_drop = obj['target']
                             break
 
@@ -310,9 +363,12 @@ class Adventure(commands.Cog):
                 if resource_cog:
                     await resource_cog.spend_resources(user_id, "battle")
 
-                spectator_embed = discord.Embed(title="⚔️ A battle is starting...", description="Loading...",
-                                                color=discord.Color.dark_grey())
-                spectator_message = await interaction.channel.send(embed=spectator_embed)
+                # With the live board on, battles share one board message instead of their own panel
+                spectator_message = None
+                if not spectator_broadcaster.live_board:
+                    spectator_embed = discord.Embed(title="⚔️ A battle is starting...", description="Loading...",
+                                                    color=discord.Color.dark_grey())
+                    spectator_message = await interaction.channel.send(embed=spectator_embed)
 
                 # Create the CombatView, passing it all the necessary information
                 combat_view = CombatView(
@@ -324,7 +380,8 @@ class Adventure(commands.Cog):
                     parent_interaction=interaction,
                     origin_location_id=location_id,
                     view_context=view_context,
-                    initial_log_message=f"A wild Level {wild_pet_instance['level']} **{wild_pet_instance['species']}** appeared!"
+                    initial_log_message=f"A wild Level {wild_pet_instance['level']} **{wild_pet_instance['species']}** appeared!",
+                    player_name=player_data.get('username')
                 )
 
                 control_message = await interaction.followup.send("⚔️ **It's your turn!**", view=combat_view,
@@ -395,54 +452,51 @@ class Adventure(commands.Cog):
         if not outcome:
             return
 
-        player_data = await db_cog.get_player(user_id)
-
-        # Energy change
-        if "energy" in outcome:
-            delta = outcome["energy"]
-            current = player_data.get("energy", 0)
-            max_e = player_data.get("max_energy", 10)
-            new_energy = max(0, min(max_e, current + delta))
-            await db_cog.update_player(user_id, energy=new_energy)
-            if delta > 0:
-                log_list.append(f"*(+{delta} Energy)*")
-            elif delta < 0:
-                log_list.append(f"*({delta} Energy)*")
-
-        # HP change (as % of max HP)
-        if "hp" in outcome:
-            pct = outcome["hp"]  # e.g. -8 means lose 8% of max HP
-            if player_data.get("main_pet_id"):
-                pet_data = await db_cog.get_pet(player_data["main_pet_id"])
-                if pet_data:
-                    delta_hp = max(1, int(pet_data["max_hp"] * abs(pct) / 100))
-                    if pct < 0:
-                        new_hp = max(1, pet_data["current_hp"] - delta_hp)
-                        await db_cog.update_pet(pet_data["pet_id"], current_hp=new_hp)
-                        log_list.append(f"*({pct}% HP — {pet_data['name']} takes a hit)*")
-                    else:
-                        new_hp = min(pet_data["max_hp"], pet_data["current_hp"] + delta_hp)
-                        await db_cog.update_pet(pet_data["pet_id"], current_hp=new_hp)
-                        log_list.append(f"*(+{pct}% HP restored to {pet_data['name']})*")
-
-        # Item grant or cost
-        if "item" in outcome:
-            item_cfg = outcome["item"]
-            item_id = item_cfg.get("item_id")
-            qty = item_cfg.get("qty", 1)
-            if item_id and qty != 0:
-                item_name = ITEMS.get(item_id, {}).get("name", item_id)
-                if qty > 0:
-                    await db_cog.add_item_to_inventory(user_id, item_id, qty)
-                    log_list.append(f"*(+{qty}× {item_name})*")
-                    quest_updates = await check_quest_progress(self.bot, user_id, "item_pickup", {"item_id": item_id})
-                    if quest_updates:
-                        log_list.extend(quest_updates)
-                else:
-                    # Negative qty = cost; silently skip if player doesn't have it
-                    await db_cog.remove_item_from_inventory(user_id, item_id, abs(qty))
-                    log_list.append(f"*(-{abs(qty)}× {item_name})*")
+        async with user_locks.hold(user_id, "event_outcome"):
+            player_data = await db_cog.get_player(user_id)
 
+            # Energy change
+            if "energy" in outcome:
+                delta = outcome["energy"]
+                await db_cog.add_energy(user_id, delta)  # relative, so a concurrent regen tick isn't lost
+                if delta > 0:
+                    log_list.append(f"*(+{delta} Energy)*")
+                elif delta < 0:
+                    log_list.append(f"*({delta} Energy)*")
+
+            # HP change (as % of max HP)
+            if "hp" in outcome:
+                pct = outcome["hp"]  # e.g. -8 means lose 8% of max HP
+                if player_data.get("main_pet_id"):
+                    pet_data = await db_cog.get_pet(player_data["main_pet_id"])
+                    if pet_data:
+                        delta_hp = max(1, int(pet_data["max_hp"] * abs(pct) / 100))
+                        if pct < 0:
+                            new_hp = max(1, pet_data["current_hp"] - delta_hp)
+                            await db_cog.update_pet(pet_data["pet_id"], current_hp=new_hp)
+                            log_list.append(f"*({pct}% HP — {pet_data['name']} takes a hit)*")
+                        else:
+                            new_hp = min(pet_data["max_hp"], pet_data["current_hp"] + delta_hp)
+                            await db_cog.update_pet(pet_data["pet_id"], current_hp=new_hp)
+                            log_list.append(f"*(+{pct}% HP restored to {pet_data['name']})*")
+
+            # Item grant or cost
+            if "item" in outcome:
+                item_cfg = outcome["item"]
+                item_id = item_cfg.get("item_id")
+                qty = item_cfg.get("qty", 1)
+                if item_id and qty != 0:
+                    item_name = ITEMS.get(item_id, {}).get("name", item_id)
+                    if qty > 0:
+                        await db_cog.add_item_to_inventory(user_id, item_id, qty)
+                        log_list.append(f"*(+{qty}× {item_name})*")
+                        quest_updates = await check_quest_progress(self.bot, user_id, "item_pickup", {"item_id": item_id})
+                        if quest_updates:
+                            log_list.extend(quest_updates)
+                    else:
+                        # Negative qty = cost; silently skip if player doesn't have it
+                        await db_cog.remove_item_from_inventory(user_id, item_id, abs(qty))
+                        log_list.append(f"*(-{abs(qty)}× {item_name})*")
 
 class ExploreChoiceView(discord.ui.View):
     """Temporary view for choice-based explore events."""
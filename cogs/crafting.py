@@ -61,13 +61,12 @@ class Crafting(commands.Cog):
             asyncio.create_task(_auto_delete(msg, 30))
             return
 
-        player_inventory = await db_cog.get_player_inventory(interaction.user.id)
-        player_inventory_dict = {item['item_id']: item['quantity'] for item in player_inventory}
+        inventory = await db_cog.get_inventory(interaction.user.id)
 
         # The core logic for checking ingredients remains the same, as it was well-written.
         missing_items = []
         for ingredient_id, required_qty in recipe['ingredients'].items():
-            if player_inventory_dict.get(ingredient_id, 0) < required_qty:
+            if inventory.get_quantity(ingredient_id) < required_qty:
                 missing_items.append(f"{required_qty}x {ITEMS[ingredient_id]['name']}")
 
         if missing_items:
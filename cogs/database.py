@@ -1,17 +1,21 @@
 # cogs/database.py (PostgreSQL Version)
 import os
 import importlib.util
-import json
 import asyncio
 import asyncpg
 from discord.ext import commands
 from typing import Any, Dict, List, Optional
 import random
+import time
+from collections import OrderedDict
 
 from core import config
 from data.items import ITEMS
 from core.pet_system import Pet
+from core.inventory import Inventory
+from core.time_advance import TIME_SENSITIVE_QUESTS, TimeAdvance, compute_time_advance
 from data.pets import PET_DATABASE, get_pet_data
+from utils.db import create_pool, json_dumps
 
 
 class Database(commands.Cog):
@@ -23,11 +27,21 @@ class Database(commands.Cog):
     def __init__(self, bot: commands.Bot, pool: asyncpg.Pool):
         self.bot = bot
         self.pool = pool
+        # {user_id: (loaded_at, Inventory)} — filled on first read, then kept in step with every
+        # add/remove below. LRU-bounded (INVENTORY_CACHE_SIZE). Other writers in this process call
+        # invalidate_inventory (the bot's SqlRepository via on_inventory_change, /liveops per batch).
+        # The story API runs in its own process and sends no notification, so an entry is also
+        # dropped INVENTORY_CACHE_TTL_SECONDS after it was loaded: that is how long an item granted
+        # on the web can take to show up in the bot.
+        self.inventory_cache: "OrderedDict[int, tuple[float, Inventory]]" = OrderedDict()
+        # {user_id: [loads in flight, writes seen meanwhile]} — a load that overlapped a write may
+        # have read the inventory from before it, so its result isn't cached
+        self._inventory_loads: Dict[int, List[int]] = {}
 
     @classmethod
     async def create(cls, bot: commands.Bot):
         """A factory method to create an instance of the Database cog with an active connection pool."""
-        pool = await asyncpg.create_pool(
+        pool = await create_pool(
             host=config.DB_HOST,
             port=config.DB_PORT,
             user=config.DB_USER,
@@ -80,10 +94,10 @@ class Database(commands.Cog):
             for item_id, item_data in ITEMS.items():
 
                 # --- THIS IS THE FIX ---
-                # We check if the category is a list and convert it to a JSON string if it is.
+                # items.category is plain TEXT, so list categories are stored as a JSON string.
                 category = item_data.get('category')
                 if isinstance(category, list):
-                    category = json.dumps(category)
+                    category = json_dumps(category)
 
                 await conn.execute(
                     '''INSERT INTO items (item_id, name, description, category, price)
@@ -109,18 +123,15 @@ class Database(commands.Cog):
 
     # --- Player Management ---
     async def add_player(self, user_id: int, username: str, gender: str) -> None:
-        unlocked_towns_json = json.dumps(["oakhavenOutpost"])
         await self.pool.execute(
             'INSERT INTO players (user_id, username, gender, unlocked_towns) VALUES ($1, $2, $3, $4)',
-            user_id, username, gender, unlocked_towns_json
+            user_id, username, gender, ["oakhavenOutpost"]
         )
 
     async def get_player(self, user_id: int) -> Optional[Dict[str, Any]]:
         record = await self.pool.fetchrow('SELECT * FROM players WHERE user_id = $1', user_id)
         player = self._record_to_dict(record)
         if player:
-            if 'unlocked_towns' in player and isinstance(player['unlocked_towns'], str):
-                player['unlocked_towns'] = json.loads(player['unlocked_towns'])
             # Load flags as a set so callers can do `flag in player['flags']`
             flag_records = await self.pool.fetch(
                 'SELECT flag FROM player_flags WHERE player_id = $1', user_id
@@ -184,24 +195,84 @@ class Database(commands.Cog):
         )
         return [dict(r) for r in records]
 
+    async def save_battle_snapshot(self, user_id: int, origin_location_id: str, turn_count: int,
+                                   state: Dict[str, Any]) -> None:
+        """Upserts the player's in-progress battle (written at every round boundary)."""
+        await self.pool.execute(
+            '''INSERT INTO battle_snapshots (player_id, origin_location_id, turn_count, state, updated_at)
+               VALUES ($1, $2, $3, $4, NOW())
+               ON CONFLICT (player_id) DO UPDATE
+               SET origin_location_id = EXCLUDED.origin_location_id, turn_count = EXCLUDED.turn_count,
+                   state = EXCLUDED.state, updated_at = NOW()''',
+            user_id, origin_location_id, turn_count, state
+        )
+
+    async def get_battle_snapshot(self, user_id: int) -> Optional[Dict[str, Any]]:
+        record = await self.pool.fetchrow(
+            'SELECT origin_location_id, turn_count, state, updated_at FROM battle_snapshots WHERE player_id = $1',
+            user_id
+        )
+        return self._record_to_dict(record)
+
+    async def delete_battle_snapshot(self, user_id: int) -> None:
+        await self.pool.execute('DELETE FROM battle_snapshots WHERE player_id = $1', user_id)
+
     async def get_player_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         record = await self.pool.fetchrow('SELECT * FROM players WHERE username = $1', username)
         return self._record_to_dict(record)
 
     async def update_player(self, user_id: int, **kwargs: Any) -> None:
         if not kwargs: return
-        if 'unlocked_towns' in kwargs:
-            kwargs['unlocked_towns'] = json.dumps(kwargs['unlocked_towns'])
-
         set_clauses = [f"{key} = ${i + 1}" for i, key in enumerate(kwargs.keys())]
         values = list(kwargs.values()) + [user_id]
         query = f'UPDATE players SET {", ".join(set_clauses)} WHERE user_id = ${len(values)}'
         await self.pool.execute(query, *values)
 
+    async def travel(self, user_id: int, destination_id: str, energy_cost: int,
+                     town_id: Optional[str] = None) -> Optional[int]:
+        """
+        Moves the player and charges the energy in one guarded UPDATE. Arriving at a town (town_id)
+        also makes it the respawn point and unlocks it for journeys. Returns the energy left, or
+        None if the player couldn't afford it (nothing is changed then).
+        """
+        return await self.pool.fetchval(
+            """UPDATE players
+                  SET current_location = $2,
+                      energy = energy - $3,
+                      last_town_id = COALESCE($4, last_town_id),
+                      unlocked_towns = CASE
+                          WHEN $4::text IS NULL OR COALESCE(unlocked_towns, '[]'::jsonb) ? $4 THEN unlocked_towns
+                          ELSE COALESCE(unlocked_towns, '[]'::jsonb) || to_jsonb($4::text) END
+                WHERE user_id = $1 AND energy >= $3
+            RETURNING energy""",
+            user_id, destination_id, energy_cost, town_id
+        )
+
     async def add_coins(self, user_id: int, amount: int) -> None:
         await self.pool.execute('UPDATE players SET coins = coins + $1 WHERE user_id = $2', amount, user_id)
 
+    async def add_energy(self, user_id: int, amount: int) -> Optional[int]:
+        """
+        Changes energy by amount (negative to spend) in one relative UPDATE, so a concurrent change
+        (e.g. the energy_regen maintenance tick) isn't overwritten. Never below 0; a gain stops at
+        max_energy. Returns the new energy, or None if there is no such player.
+        """
+        return await self.pool.fetchval(
+            """UPDATE players SET energy = GREATEST(0, LEAST(GREATEST(max_energy, energy), energy + $2))
+                WHERE user_id = $1
+            RETURNING energy""",
+            user_id, amount
+        )
+
+    async def add_pet_hunger(self, pet_id: int, amount: int) -> Optional[int]:
+        """Changes a pet's hunger by amount (negative to spend) in one relative UPDATE, never below 0."""
+        return await self.pool.fetchval(
+            'UPDATE pets SET hunger = GREATEST(0, hunger + $2) WHERE pet_id = $1 RETURNING hunger',
+            pet_id, amount
+        )
+
     async def delete_player_data(self, user_id: int) -> None:
+        self.invalidate_inventory(user_id)
         async with self.pool.acquire() as conn:
             async with conn.transaction():
                 await conn.execute('DELETE FROM inventory WHERE player_id = $1', user_id)
@@ -212,6 +283,7 @@ class Database(commands.Cog):
                     await conn.execute('DELETE FROM player_crests WHERE user_id = $1', user_id)
                 except Exception:
                     pass
+                await conn.execute('DELETE FROM battle_snapshots WHERE player_id = $1', user_id)
                 await conn.execute('DELETE FROM pets WHERE player_id = $1', user_id)
                 await conn.execute('DELETE FROM players WHERE user_id = $1', user_id)
 
@@ -244,8 +316,6 @@ class Database(commands.Cog):
         elif isinstance(passive_ability, str):
             passive_to_save = passive_ability
 
-        skills_json = json.dumps(skills if skills else [])
-        pet_type_to_save = json.dumps(pet_type) if isinstance(pet_type, list) else pet_type
         query = '''INSERT INTO pets (player_id, name, species, description, rarity, pet_type, skills,
                                      current_hp, max_hp, attack, defense, special_attack, special_defense, speed,
                                      base_hp, base_attack, base_defense, base_special_attack, base_special_defense,
@@ -253,37 +323,34 @@ class Database(commands.Cog):
                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21)
                    RETURNING pet_id'''
         return await self.pool.fetchval(
-            query, owner_id, name, species, description, rarity, pet_type_to_save, skills_json,
+            query, owner_id, name, species, description, rarity, self._normalize_pet_type(pet_type), skills or [],
             current_hp, max_hp, attack, defense, special_attack, special_defense, speed,
             base_hp, base_attack, base_defense, base_special_attack, base_special_defense,
             base_speed, passive_to_save
         )
 
+    @staticmethod
+    def _normalize_pet_type(pet_type: Any) -> List[str]:
+        """pets.pet_type is a JSONB array (migration 013); single types are stored as a one-item list."""
+        if isinstance(pet_type, list):
+            return pet_type
+        if isinstance(pet_type, str) and '/' in pet_type:
+            return pet_type.split('/')
+        return [pet_type] if pet_type else []
+
     async def get_pet(self, pet_id: int) -> Optional[Dict[str, Any]]:
+        # skills and pet_type are JSONB — the pool's codec decodes them into lists
         record = await self.pool.fetchrow('SELECT * FROM pets WHERE pet_id = $1', pet_id)
-        pet_dict = self._record_to_dict(record)
-        if pet_dict:
-            if 'skills' in pet_dict and isinstance(pet_dict['skills'], str):
-                pet_dict['skills'] = json.loads(pet_dict['skills'])
-            if 'pet_type' in pet_dict and isinstance(pet_dict['pet_type'], str) and pet_dict['pet_type'].startswith(
-                    '['):
-                pet_dict['pet_type'] = json.loads(pet_dict['pet_type'])
-        return pet_dict
+        return self._record_to_dict(record)
 
     async def get_all_pets(self, user_id: int) -> List[Dict[str, Any]]:
         records = await self.pool.fetch('SELECT * FROM pets WHERE player_id = $1', user_id)
-        pet_list = self._records_to_list_of_dicts(records)
-        for pet in pet_list:
-            if 'skills' in pet and isinstance(pet['skills'], str):
-                pet['skills'] = json.loads(pet['skills'])
-            if 'pet_type' in pet and isinstance(pet['pet_type'], str) and pet['pet_type'].startswith('['):
-                pet['pet_type'] = json.loads(pet['pet_type'])
-        return pet_list
+        return self._records_to_list_of_dicts(records)
 
     async def update_pet(self, pet_id: int, **kwargs: Any) -> None:
         if not kwargs: return
-        if 'skills' in kwargs and isinstance(kwargs['skills'], list):
-            kwargs['skills'] = json.dumps(kwargs['skills'])
+        if 'pet_type' in kwargs:
+            kwargs['pet_type'] = self._normalize_pet_type(kwargs['pet_type'])
         set_clauses = [f"{key} = ${i + 1}" for i, key in enumerate(kwargs.keys())]
         values = list(kwargs.values()) + [pet_id]
         query = f'UPDATE pets SET {", ".join(set_clauses)} WHERE pet_id = ${len(values)}'
@@ -356,12 +423,11 @@ class Database(commands.Cog):
         """
         if item_data:
             # This is a unique item (e.g., a Skill Tome). Always insert a new row.
-            data_json = json.dumps(item_data)
             query = '''
                 INSERT INTO inventory (player_id, item_id, qty, item_data)
                 VALUES ($1, $2, $3, $4)
             '''
-            await self.pool.execute(query, user_id, item_id, quantity, data_json)
+            await self.pool.execute(query, user_id, item_id, quantity, item_data)
         else:
             # This is a regular, stackable item. Use ON CONFLICT with the correct columns.
             query = '''
@@ -372,6 +438,11 @@ class Database(commands.Cog):
             '''
             await self.pool.execute(query, user_id, item_id, quantity)
 
+        self._inventory_written(user_id)
+        inventory = self._cached_inventory(user_id)
+        if inventory is not None:
+            inventory.add_item(item_id, quantity, item_data)
+
     async def remove_item_from_inventory(self, user_id: int, item_id: str, quantity: int = 1,
                                          item_data: Optional[Dict] = None) -> None:
         """
@@ -388,56 +459,151 @@ class Database(commands.Cog):
                 # If specific item_data is provided (like for a Skill Tome),
                 # add it to the query to target the exact item row.
                 if item_data:
-                    data_json = json.dumps(item_data)
                     update_query += ' AND item_data = $4'
                     delete_query += ' AND item_data = $3'  # Note: param index changes for delete
-                    params.append(data_json)
+                    params.append(item_data)
                     # Parameters for the delete query are different
-                    delete_params = [user_id, item_id, data_json]
+                    delete_params = [user_id, item_id, item_data]
                 else:
                     delete_params = [user_id, item_id]
 
                 await conn.execute(update_query, *params)
                 await conn.execute(delete_query, *delete_params)
 
+        self._inventory_written(user_id)
+        inventory = self._cached_inventory(user_id)
+        if inventory is not None:
+            inventory.remove_item(item_id, quantity, item_data)
+
     async def get_player_inventory(self, user_id: int) -> List[Dict[str, Any]]:
         # qty aliased as quantity so all downstream code using item['quantity'] still works
         records = await self.pool.fetch(
             'SELECT item_id, qty AS quantity, item_data FROM inventory WHERE player_id = $1', user_id
         )
-        inventory = self._records_to_list_of_dicts(records)
-        # The database driver (asyncpg) automatically parses JSONB into dicts
+        # item_data is decoded into a dict by the pool's JSONB codec
+        return self._records_to_list_of_dicts(records)
+
+    async def get_inventory(self, user_id: int) -> Inventory:
+        """
+        Returns the player's cached Inventory (buckets, quantities, craftable recipes, sellable items).
+        Only the first call per player (and the first after the entry ages out) hits the database;
+        add/remove keep it current in between.
+        """
+        inventory = self._cached_inventory(user_id)
+        if inventory is None:
+            loads = self._inventory_loads.setdefault(user_id, [0, 0])
+            loads[0] += 1
+            writes = loads[1]
+            try:
+                inventory = Inventory(user_id, await self.get_player_inventory(user_id))
+            finally:
+                loads[0] -= 1
+                if not loads[0]:
+                    del self._inventory_loads[user_id]
+            if loads[1] == writes:
+                self.inventory_cache[user_id] = (time.monotonic(), inventory)
+                while len(self.inventory_cache) > config.INVENTORY_CACHE_SIZE:
+                    self.inventory_cache.popitem(last=False)
         return inventory
 
+    def _cached_inventory(self, user_id: int) -> Optional[Inventory]:
+        """The cached Inventory if it is younger than INVENTORY_CACHE_TTL_SECONDS, else None (and dropped)."""
+        entry = self.inventory_cache.get(user_id)
+        if entry is None:
+            return None
+        loaded_at, inventory = entry
+        if time.monotonic() - loaded_at > config.INVENTORY_CACHE_TTL_SECONDS:
+            del self.inventory_cache[user_id]
+            return None
+        self.inventory_cache.move_to_end(user_id)
+        return inventory
+
+    def invalidate_inventory(self, user_id: int) -> None:
+        """Drops a cached Inventory, e.g. after the inventory table was changed outside this cog."""
+        self._inventory_written(user_id)
+        self.inventory_cache.pop(user_id, None)
+
+    def _inventory_written(self, user_id: int) -> None:
+        loads = self._inventory_loads.get(user_id)
+        if loads is not None:
+            loads[1] += 1
+
     # --- Quest & Crest Management ---
     async def add_quest(self, user_id: int, quest_id: str, progress: Optional[Dict] = None) -> None:
-        prog_json = json.dumps(progress or {"status": "in_progress", "count": 0})
         await self.pool.execute(
             'INSERT INTO player_quests (user_id, quest_id, progress) VALUES ($1, $2, $3) ON CONFLICT DO NOTHING',
-            user_id, quest_id, prog_json
+            user_id, quest_id, progress or {"status": "in_progress", "count": 0}
         )
 
     async def get_active_quests(self, user_id: int) -> List[Dict[str, Any]]:
         records = await self.pool.fetch('SELECT * FROM player_quests WHERE user_id = $1', user_id)
-        quests = self._records_to_list_of_dicts(records)
-        for q in quests:
-            if isinstance(q['progress'], str):
-                q['progress'] = json.loads(q['progress'])
-        return quests
+        return self._records_to_list_of_dicts(records)
 
     async def update_quest_progress(self, user_id: int, quest_id: str, new_progress: Dict[str, Any]) -> None:
         await self.pool.execute(
             'UPDATE player_quests SET progress = $1 WHERE user_id = $2 AND quest_id = $3',
-            json.dumps(new_progress), user_id, quest_id
+            new_progress, user_id, quest_id
         )
 
     async def complete_quest(self, user_id: int, quest_id: str) -> None:
         """Marks a quest as complete. Keeps the record so the quest log can show it."""
         await self.pool.execute(
             "UPDATE player_quests SET progress = $1 WHERE user_id = $2 AND quest_id = $3",
-            json.dumps({"status": "completed"}), user_id, quest_id
+            {"status": "completed"}, user_id, quest_id
         )
 
+    # --- Time Advance (resting) ---
+    async def advance_time(self, user_id: int, restore_details: Dict[str, Any]) -> Optional[TimeAdvance]:
+        """
+        One rest, in one transaction: a single snapshot query (player row locked, its time-sensitive
+        quests and main pet), compute_time_advance() on it, then one batched write per table.
+        Returns None if the player doesn't exist.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                record = await conn.fetchrow(
+                    """SELECT p.day_of_cycle, p.energy, p.max_energy,
+                              pet.pet_id, pet.name AS pet_name, pet.current_hp, pet.max_hp,
+                              (SELECT COALESCE(jsonb_agg(jsonb_build_object('quest_id', q.quest_id,
+                                                                            'progress', q.progress)), '[]'::jsonb)
+                                 FROM player_quests q
+                                WHERE q.user_id = p.user_id AND q.quest_id = ANY($2::text[])) AS quests
+                       FROM players p
+                       LEFT JOIN pets pet ON pet.pet_id = p.main_pet_id
+                       WHERE p.user_id = $1
+                       FOR UPDATE OF p""",
+                    user_id, list(TIME_SENSITIVE_QUESTS)
+                )
+                if record is None:
+                    return None
+                main_pet = None
+                if record['pet_id'] is not None:
+                    main_pet = {"pet_id": record['pet_id'], "name": record['pet_name'],
+                                "current_hp": record['current_hp'], "max_hp": record['max_hp']}
+                result = compute_time_advance(dict(record), record['quests'], main_pet, restore_details)
+
+                await conn.execute(
+                    'UPDATE players SET day_of_cycle = $2, energy = $3 WHERE user_id = $1',
+                    user_id, result.new_time, result.energy
+                )
+                if result.pet_id is not None:
+                    await conn.execute('UPDATE pets SET current_hp = $2 WHERE pet_id = $1', result.pet_id, result.pet_hp)
+                if result.quest_progress:
+                    await conn.execute(
+                        """UPDATE player_quests q SET progress = u.progress::jsonb
+                           FROM unnest($2::text[], $3::text[]) AS u(quest_id, progress)
+                           WHERE q.user_id = $1 AND q.quest_id = u.quest_id""",
+                        user_id, list(result.quest_progress),
+                        [json_dumps(progress) for progress in result.quest_progress.values()]
+                    )
+                if result.flags:
+                    await conn.execute(
+                        """INSERT INTO player_flags (player_id, flag)
+                           SELECT $1::bigint, unnest($2::text[]) ON CONFLICT DO NOTHING""",
+                        user_id, result.flags
+                    )
+        return result
+
     async def get_player_crests(self, user_id: int) -> List[str]:
         records = await self.pool.fetch('SELECT crest_name FROM player_crests WHERE user_id = $1', user_id)
         return [row['crest_name'] for row in records]
@@ -445,6 +611,42 @@ class Database(commands.Cog):
     async def count_player_crests(self, user_id: int) -> int:
         return await self.pool.fetchval('SELECT COUNT(*) FROM player_crests WHERE user_id = $1', user_id)
 
+    # --- Dialogue Facts ---
+    _DIALOGUE_FACT_COLUMNS = {
+        "flags": "ARRAY(SELECT flag FROM player_flags WHERE player_id = $1) AS flags",
+        "quests": "(SELECT COALESCE(jsonb_object_agg(quest_id, progress), '{}'::jsonb) "
+                  "FROM player_quests WHERE user_id = $1) AS quests",
+        "time": "(SELECT day_of_cycle FROM players WHERE user_id = $1) AS time",
+        "crests": "(SELECT COUNT(*) FROM player_crests WHERE user_id = $1) AS crests",
+        "items": "ARRAY(SELECT item_id FROM inventory WHERE player_id = $1) AS items",
+    }
+
+    async def get_dialogue_facts(self, user_id: int, needs) -> Dict[str, Any]:
+        """
+        Fetches only the player facts a dialogue tree depends on (see core/dialogue.py), in one query.
+        Owned items come from the cached Inventory when there is one.
+        """
+        facts = {}
+        needs = set(needs)
+        inventory = self._cached_inventory(user_id) if "items" in needs else None
+        if inventory is not None:
+            facts["items"] = inventory.quantities.keys()
+            needs.discard("items")
+        if needs:
+            columns = ", ".join(self._DIALOGUE_FACT_COLUMNS[name] for name in sorted(needs))
+            record = await self.pool.fetchrow(f'SELECT {columns}', user_id)
+            if "flags" in needs:
+                facts["flags"] = set(record['flags'])
+            if "items" in needs:
+                facts["items"] = set(record['items'])
+            if "quests" in needs:
+                facts["quests"] = record['quests']
+            if "time" in needs:
+                facts["time"] = record['time'] or 'morning'
+            if "crests" in needs:
+                facts["crests"] = record['crests']
+        return facts
+
     # --- Combined & Game Settings ---
     async def get_player_and_pet_data(self, user_id: int) -> Optional[Dict]:
         player_data = await self.get_player(user_id)
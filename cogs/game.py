@@ -12,6 +12,7 @@ from utils.constants import PET_DESCRIPTIONS
 from data.pets import PET_DATABASE
 from utils.helpers import get_pet_image_url, get_status_bar
 from data.abilities import STARTER_TALENTS
+from utils.interaction_guard import ack_deadline
 
 # Only starter pets shown during /start
 STARTER_PETS_LIST = [pet for pet in PET_DATABASE.values() if pet.get('rarity') == 'Starter']
@@ -364,6 +365,7 @@ class Game(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name='start', description='Begin your journey as a Guild Adventurer!')
+    @ack_deadline(None)  # opens a modal, which must be the first response
     async def start_adventure(self, interaction: discord.Interaction):
         db_cog = self.bot.get_cog('Database')
         if not db_cog:
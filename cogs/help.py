@@ -10,6 +10,7 @@ PLAYER_COMMANDS = [
     # (name, description)
     ("/start",      "Create your character and choose your starter pet."),
     ("/adventure",  "Open your current location — explore, fight, rest, travel."),
+    ("/resume",     "Pick up a battle that was paused or interrupted."),
     ("/character",  "View your profile, pet status, bag, and crafting bench."),
     ("/bag",        "Open your inventory bag directly."),
     ("/search",     "Look up any pet, skill, item, passive, or personality."),
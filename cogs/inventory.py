@@ -13,7 +13,7 @@ class Inventory(commands.Cog):
         player_data = await db_cog.get_player(user_id)
         if not player_data:
             return None, None
-        inventory = await db_cog.get_player_inventory(user_id)
+        inventory = await db_cog.get_inventory(user_id)
         main_pet_data = None
         if player_data.get('main_pet_id'):
             main_pet_data = await db_cog.get_pet(player_data['main_pet_id'])
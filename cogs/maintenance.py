@@ -0,0 +1,81 @@
+# cogs/maintenance.py
+# Schedules the world-wide maintenance ticks from core/maintenance.py (energy regen, hunger decay)
+# and shows their timings to admins. Every bot process runs the scheduler; the ticks' advisory
+# locks make sure each tick is applied once per interval however many processes there are.
+
+import time
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from core.maintenance import default_ticks
+from utils.checks import NotOwner, owner_only, reply_not_owner
+
+
+class Maintenance(commands.Cog):
+    """Runs due maintenance ticks once a minute."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.ticks = default_ticks()
+
+    async def cog_load(self):
+        self.scheduler.start()
+
+    async def cog_unload(self):
+        self.scheduler.cancel()
+
+    @tasks.loop(minutes=1)
+    async def scheduler(self):
+        db_cog = self.bot.get_cog('Database')
+        if not db_cog:
+            return
+        now = time.monotonic()
+        for tick in self.ticks:
+            if not tick.due(now):
+                continue
+            try:
+                result = await tick.run(db_cog.pool)
+            except Exception as e:
+                print(f"--- [MAINTENANCE] {tick.name} failed: {type(e).__name__}: {e}")
+                continue
+            if result:
+                print(f"--- [MAINTENANCE] {tick.name}: {result['changed']} rows in "
+                      f"{result['chunks']} chunk(s), {result['ms']:.0f}ms")
+
+    @scheduler.before_loop
+    async def before_scheduler(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name='maintenance', description='(Admin Only) Shows the world maintenance ticks and their timings.')
+    @owner_only()
+    async def maintenance(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        embed = discord.Embed(title="🛠️ Maintenance Ticks", color=discord.Color.dark_teal())
+        for tick in self.ticks:
+            if not tick.enabled:
+                embed.add_field(name=tick.name, value="Off", inline=False)
+                continue
+            last = tick.last
+            lines = [f"Every {tick.interval.total_seconds() / 60:g} min, amount {tick.amount}"]
+            if last:
+                lines.append(f"Last run here <t:{int(last['at'])}:R>: {last['changed']} rows, "
+                             f"{last['chunks']} chunk(s), {last['ms']:.0f}ms")
+            else:
+                lines.append("Not run by this process yet.")
+            snap = tick.histogram.snapshot()
+            if snap["count"]:
+                lines.append(f"p95 ≤ {tick.histogram.percentile(95):g}ms over {snap['count']} run(s)")
+            if tick.skipped:
+                lines.append(f"Skipped {tick.skipped}× (another process had it)")
+            embed.add_field(name=tick.name, value="\n".join(lines), inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, NotOwner):
+            await reply_not_owner(interaction)
+
+
+async def setup(bot):
+    await bot.add_cog(Maintenance(bot))
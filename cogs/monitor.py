@@ -0,0 +1,105 @@
+# cogs/monitor.py
+# Starts the event-loop monitor and the interaction ack guard, and exposes their numbers to admins.
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from core import config
+from core.executor import POOLS
+from core.loop_monitor import LoopMonitor
+from core.metrics import format_report
+from core.user_locks import user_locks
+from utils.checks import NotOwner, owner_only, reply_not_owner
+from utils.interaction_guard import ack_guard
+
+
+class Monitor(commands.Cog):
+    """Loop-lag sampling, slow-callback detection, interaction ack deadlines and periodic metric reports."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.loop_monitor = LoopMonitor(
+            sample_interval=config.LOOP_LAG_SAMPLE_SECONDS,
+            slow_callback_ms=config.SLOW_CALLBACK_MS,
+        )
+        # Other systems (and the load harness) read the monitor from the bot
+        bot.loop_monitor = self.loop_monitor
+        bot.ack_guard = ack_guard
+
+    async def cog_load(self):
+        self.loop_monitor.start()
+        ack_guard.install()
+        self.report_metrics.change_interval(minutes=config.METRICS_REPORT_MINUTES)
+        self.report_metrics.start()
+
+    async def cog_unload(self):
+        self.report_metrics.cancel()
+        self.loop_monitor.stop()
+        ack_guard.uninstall()
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        ack_guard.watch(interaction)
+
+    @tasks.loop(minutes=15)
+    async def report_metrics(self):
+        print("--- Metrics Report ---")
+        print(format_report())
+        for tag, stats in self.loop_monitor.worst_offenders():
+            print(f"  > {tag}: {stats['count']} slow callback(s), max {stats['max_ms']:.0f}ms")
+        for tag, stats in ack_guard.slowest_handlers():
+            print(f"  > {tag}: ack max {stats['ack_max_ms']:.0f}ms, first response max "
+                  f"{stats['first_max_ms']:.0f}ms, auto-acked {stats['auto_acks']}/{stats['count']}")
+        print("----------------------")
+
+    @report_metrics.before_loop
+    async def before_report(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name='perf', description='(Admin Only) Shows event-loop lag and slow handlers.')
+    @owner_only()
+    async def perf(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        snap = self.loop_monitor.snapshot()
+        lag = snap["loop_lag"]
+
+        embed = discord.Embed(title="📈 Event Loop Health", color=discord.Color.blurple())
+        embed.add_field(
+            name="Loop Lag",
+            value=f"p50 ≤ {lag['p50']}ms • p95 ≤ {lag['p95']}ms • p99 ≤ {lag['p99']}ms • max {lag['max']}ms",
+            inline=False
+        )
+        offenders = self.loop_monitor.worst_offenders()
+        offender_lines = [
+            f"`{tag}` — {stats['count']}×, max {stats['max_ms']:.0f}ms" for tag, stats in offenders
+        ]
+        embed.add_field(name="Slowest Handlers", value="\n".join(offender_lines) or "None so far.", inline=False)
+        ack_lines = [
+            f"`{tag}` — ack max {stats['ack_max_ms']:.0f}ms, reply max {stats['first_max_ms']:.0f}ms"
+            + (f", auto-acked {stats['auto_acks']}×" if stats['auto_acks'] else "")
+            for tag, stats in ack_guard.slowest_handlers()
+        ]
+        embed.add_field(name="Slowest to Acknowledge", value="\n".join(ack_lines) or "None so far.", inline=False)
+        pool_lines = [
+            f"`{stats['name']}` ({stats['kind']}, {stats['workers']} workers) — "
+            f"{stats['pending']} running/queued, {stats['waiting']} held back"
+            for stats in (pool.stats() for pool in POOLS.values())
+        ]
+        embed.add_field(name="Worker Pools", value="\n".join(pool_lines), inline=False)
+        lock_stats = user_locks.stats()
+        embed.add_field(
+            name="User Locks",
+            value=f"{lock_stats['held']} held, {lock_stats['waiting']} waiting ({lock_stats['users']} users)",
+            inline=False
+        )
+        embed.add_field(name="All Metrics", value=f"```\n{format_report()[:1000]}\n```", inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, NotOwner):
+            await reply_not_owner(interaction)
+
+
+async def setup(bot):
+    await bot.add_cog(Monitor(bot))
@@ -2,6 +2,8 @@
 import discord
 from discord.ext import commands
 
+from core.user_locks import user_locks
+
 # This dictionary defines the costs for each action.
 ACTION_COSTS = {
     "explore": {"energy": 2, "hunger": 1},
@@ -25,18 +27,17 @@ class Resources(commands.Cog):
         if not costs:
             return
 
-        # Update Player Energy
-        player_data = await db_cog.get_player(user_id)
-        new_energy = max(0, player_data.get('energy', 0) - costs.get('energy', 0))
-        await db_cog.update_player(user_id, energy=new_energy)
-
-        # Update Pet Hunger
-        main_pet_id = player_data.get('main_pet_id')
-        if main_pet_id:
-            pet_data = await db_cog.get_pet(main_pet_id)
-            if pet_data:
-                new_hunger = max(0, pet_data.get('hunger', 0) - costs.get('hunger', 0))
-                await db_cog.update_pet(main_pet_id, hunger=new_hunger)
+        # Relative updates, so the maintenance ticks (energy regen, hunger decay) landing in between
+        # aren't overwritten; the user's lock still keeps two of the player's actions in order
+        async with user_locks.hold(user_id, f"spend:{action_type}"):
+            # Update Player Energy
+            await db_cog.add_energy(user_id, -costs.get('energy', 0))
+
+            # Update Pet Hunger
+            player_data = await db_cog.get_player(user_id)
+            main_pet_id = player_data.get('main_pet_id') if player_data else None
+            if main_pet_id and costs.get('hunger'):
+                await db_cog.add_pet_hunger(main_pet_id, -costs['hunger'])
 
     async def can_pet_passively_heal(self, pet_data: dict) -> bool:
         """
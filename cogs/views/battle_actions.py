@@ -4,6 +4,7 @@ import asyncio
 from data.pets import PET_DATABASE
 from data.skills import PET_SKILLS
 from utils.helpers import get_pet_image_url
+from utils.message_editor import edit_scheduler
 
 class SkillChoiceView(discord.ui.View):
     """
@@ -104,13 +105,13 @@ class EvolvingView(discord.ui.View):
 
         embed = discord.Embed(title=f"What?! {pet_data['name']} is evolving!", color=discord.Color.gold())
         embed.set_image(url=get_pet_image_url(pet_data['species']))
-        await self.message.edit(content=None, embed=embed, view=self)
+        await edit_scheduler.edit(self.message, content=None, embed=embed, view=self)
         await asyncio.sleep(2.5)
 
         embed.title = f"Congratulations! Your {pet_data['name']} evolved into a {new_species}!"
         embed.set_image(url=get_pet_image_url(new_species))
         self.confirm_button.disabled = False
-        await self.message.edit(embed=embed, view=self)
+        await edit_scheduler.edit(self.message, embed=embed, view=self)
 
     async def confirm_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
@@ -15,6 +15,7 @@ from .inventory import BagView
 from .modals import RenamePetModal
 from utils.helpers import get_status_bar, get_player_rank_info, _create_progress_bar, get_pet_image_url, _pet_tuple_to_dict
 from utils.constants import CREST_DATA, UNEARNED_CREST_EMOJI, RANK_DISPLAY_DATA
+from utils.interaction_guard import ack_deadline
 
 
 # (SetMainPetView and ProfileView are good as they are, so they are omitted for brevity)
@@ -356,6 +357,7 @@ class PetView(discord.ui.View):
             new_embed = await self.get_pet_status_embed()
             await interaction.edit_original_response(embed=new_embed, view=self)
 
+    @ack_deadline(None)  # opens a modal, which must be the first response
     async def rename_button_callback(self, interaction: discord.Interaction):
         modal = RenamePetModal(
             bot=self.bot,
@@ -498,7 +500,7 @@ class CharacterView(discord.ui.View):
         await interaction.response.defer(ephemeral=True)
         db_cog = self.bot.get_cog('Database')
         player_and_pet_data = await db_cog.get_player_and_pet_data(self.user_id)
-        inventory_data = await db_cog.get_player_inventory(self.user_id)
+        inventory_data = await db_cog.get_inventory(self.user_id)
         bag_view = BagView(
             self.bot, self.user_id,
             player_and_pet_data['player_data'],
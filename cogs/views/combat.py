@@ -5,7 +5,10 @@ import discord
 import math
 
 # --- REFACTORED IMPORTS ---
+from core import config
+from core.battle_ai import is_elite_encounter
 from core.battle_engine import BattleState
+from core.user_locks import user_locks
 from utils.helpers import get_pet_image_url, get_status_bar, _create_progress_bar, check_quest_progress, \
     get_type_multiplier, _pet_tuple_to_dict, format_log_block, get_notification, get_location_display_name
 from .battle_actions import ForcedSwitchView, EvolvingView, LearnSkillView, SkillChoiceView
@@ -14,10 +17,15 @@ from data.items import ITEMS
 from data.pets import PET_DATABASE
 from data.skills import PET_SKILLS
 from utils.constants import TYPE_EMOJIS
+from utils.message_editor import edit_scheduler
+from utils.spectator import spectator_broadcaster
 
 class CombatView(discord.ui.View):
+    # {user_id: view} for battles open in this process, so /resume can't open a second copy
+    live_battles = {}
+
     def __init__(self, bot, user_id, player_roster, wild_pet, spectator_message, parent_interaction, origin_location_id,
-                 view_context=None, initial_log_message=None):
+                 view_context=None, initial_log_message=None, player_name=None, battle=None):
         super().__init__(timeout=300)
         self.bot = bot
         self.user_id = user_id
@@ -25,7 +33,11 @@ class CombatView(discord.ui.View):
         self.spectator_message = spectator_message
         self.parent_interaction = parent_interaction
         self.origin_location_id = origin_location_id
-        self.battle = BattleState(bot, user_id, player_roster, [wild_pet])
+        self.player_name = player_name  # in-game name for public posts, so a win needs no extra lookup
+        # A resumed battle passes in the BattleState rebuilt from its snapshot
+        self.battle = battle or BattleState(bot, user_id, player_roster, [wild_pet])
+        if battle is None:
+            self.battle.search_ai = config.SEARCH_AI_ENABLED and is_elite_encounter(wild_pet, origin_location_id)
         self.view_context = view_context
 
 
@@ -35,13 +47,14 @@ class CombatView(discord.ui.View):
         self.selected_pet_to_switch = None
         self.selected_skill_id = None
         self.battle_log = initial_log_message or "> What will you do next?"
-        self.is_processing = False
 
         self.view_context = view_context
 
     async def initial_setup(self):
         """Builds the initial UI and sends the first embed."""
+        CombatView.live_battles[self.user_id] = self
         await self._update_display()
+        await self._save_snapshot()
         # Track the spectator message in DB so we can clean it up if the bot restarts
         if self.spectator_message:
             db_cog = self.bot.get_cog('Database')
@@ -118,9 +131,9 @@ class CombatView(discord.ui.View):
             self.add_item(use_skill_button)
 
         elif self.current_menu == "bag":
-            inventory = await self.battle.db_cog.get_player_inventory(self.user_id)
-            usable_items = [{'id': i['item_id'], 'name': ITEMS[i['item_id']]['name'], 'quantity': i['quantity']} for
-                                i in inventory if ITEMS.get(i['item_id'], {}).get('category') == 'Consumables']
+            inventory = await self.battle.db_cog.get_inventory(self.user_id)
+            usable_items = [{'id': row['item_id'], 'name': ITEMS[row['item_id']]['name'], 'quantity': row['quantity']}
+                            for bucket in ("Consumables", "Orbs") for _, row in inventory.in_bucket(bucket)]
             if usable_items:
                 options = [
                     discord.SelectOption(
@@ -225,9 +238,47 @@ class CombatView(discord.ui.View):
             if effectiveness_text:
                 private_message_content += f"\n\n{effectiveness_text}"
 
-        await self.spectator_message.edit(embed=embed)
-        if self.message:
-            await self.message.edit(content=private_message_content, view=self)
+        # The public side is throttled by the broadcaster; the private edit goes through the shared
+        # scheduler, so a queued "disable buttons" edit from a turn callback is merged into it
+        self._publish_spectator(embed)
+        await edit_scheduler.edit(self.message, content=private_message_content, view=self)
+
+    async def _save_snapshot(self):
+        """Persists the battle at a round boundary so it can be resumed with /resume."""
+        db_cog = self.bot.get_cog('Database')
+        if not db_cog:
+            return
+        state = {
+            "battle": self.battle.to_snapshot(),
+            "battle_log": self.battle_log,
+            "player_name": self.player_name,
+        }
+        try:
+            await db_cog.save_battle_snapshot(self.user_id, self.origin_location_id, self.battle.turn_count, state)
+        except Exception as e:
+            print(f"--- [BATTLE SNAPSHOT ERROR] --- Could not save battle for {self.user_id}: {e}")
+
+    def _publish_spectator(self, embed: discord.Embed):
+        channel = getattr(self.parent_interaction, 'channel', None)
+        if spectator_broadcaster.live_board and channel:
+            spectator_broadcaster.set_board_entry(channel, self.user_id, self._board_line())
+        else:
+            spectator_broadcaster.update_panel(self.spectator_message, embed)
+
+    def _board_line(self) -> str:
+        """One-line summary of this battle for the channel's live battles board."""
+        player_pet, wild_pet = self.battle.player_pet, self.battle.wild_pet
+        name = self.player_name or self.parent_interaction.user.display_name
+        return (f"**{name}** — {player_pet['name']} ({player_pet['current_hp']}/{player_pet['max_hp']} HP) vs. "
+                f"wild {wild_pet['species']} ({wild_pet['current_hp']}/{wild_pet['max_hp']} HP) • "
+                f"turn {self.battle.turn_count}")
+
+    def _release_spectator(self):
+        """Stops queued public refreshes before the panel is deleted or the board entry removed."""
+        spectator_broadcaster.close_panel(self.spectator_message)
+        channel = getattr(self.parent_interaction, 'channel', None)
+        if spectator_broadcaster.live_board and channel:
+            spectator_broadcaster.remove_board_entry(channel, self.user_id)
 
     async def main_button_callback(self, interaction: discord.Interaction):
         action = interaction.data['custom_id']
@@ -249,30 +300,28 @@ class CombatView(discord.ui.View):
 
     async def use_item_callback(self, interaction: discord.Interaction):
         """Handles using an item (including orbs)."""
-        if self.is_processing:
+        if user_locks.busy(self.user_id):
             await interaction.response.send_message("Processing... Please wait.", ephemeral=True, delete_after=3)
             return
 
-        try:
-            self.is_processing = True
-            for item in self.children:
-                item.disabled = True
-            await interaction.response.defer()
-            await self.message.edit(view=self)
-
-            # --- FIX: We check the item_id BEFORE parsing it ---
-            if 'orb' in self.selected_item_id:
-                await self.attempt_capture(self.selected_item_id)
-            else:
-                # Regular items don't need parsing here
-                results = await self.battle.process_player_item_use(self.selected_item_id)
-                await self._update_view(interaction, results)
+        async with user_locks.hold(self.user_id, "battle"):
+            try:
+                for item in self.children:
+                    item.disabled = True
+                await interaction.response.defer()
+                edit_scheduler.schedule(self.message, view=self)
+
+                # --- FIX: We check the item_id BEFORE parsing it ---
+                if 'orb' in self.selected_item_id:
+                    await self.attempt_capture(self.selected_item_id)
+                else:
+                    # Regular items don't need parsing here
+                    results = await self.battle.process_player_item_use(self.selected_item_id)
+                    await self._update_view(interaction, results)
 
-        except Exception as e:
-            traceback.print_exc()
-            self.stop()
-        finally:
-            self.is_processing = False
+            except Exception as e:
+                traceback.print_exc()
+                self.stop()
 
     async def _update_view(self, interaction: discord.Interaction, results: dict):
         """
@@ -285,6 +334,7 @@ class CombatView(discord.ui.View):
             log_list = [log_list]
 
         if not results.get("is_over"):
+            await self._save_snapshot()
             log_list.append("\n> **It's your turn!**")
             # This now passes the complete log list to the display updater
             await self._update_display(interaction, log_list=log_list)
@@ -306,32 +356,38 @@ class CombatView(discord.ui.View):
             # Failsafe in case the button is enabled incorrectly
             return
 
-        if self.is_processing:
+        if user_locks.busy(self.user_id):
             await interaction.response.send_message("Processing... Please wait.", ephemeral=True, delete_after=3)
             return
 
         try:
-            # 1. Lock the view for the duration of the turn
-            self.is_processing = True
-            for item in self.children:
-                item.disabled = True
-            await interaction.response.defer()
-            await self.message.edit(view=self)
-
-            # 2. Process the combat round — keep selected_skill_id so next turn is one click
-            results = await self.battle.process_round(self.selected_skill_id)
-
-            # Immediately update the internal log with what just happened
-            self.battle_log = results['log']
-            self.battle.turn_log = results['log'].split('\n')  # Also update the engine's turn log
+            async with user_locks.hold(self.user_id, "battle"):
+                # 1. Disable the buttons for the duration of the turn (the user lock is held)
+                for item in self.children:
+                    item.disabled = True
+                await interaction.response.defer()
+                edit_scheduler.schedule(self.message, view=self)
+
+                # 2. Process the combat round — keep selected_skill_id so next turn is one click.
+                # Elite opponents pick their move with the search AI first (off the event loop).
+                ai_skill_id = await self.battle.plan_ai_move()
+                results = await self.battle.process_round(self.selected_skill_id, ai_skill_id=ai_skill_id)
+
+                # Immediately update the internal log with what just happened
+                self.battle_log = results['log']
+                self.battle.turn_log = results['log'].split('\n')  # Also update the engine's turn log
+
+                # 3. Check for a definitive end to the battle
+                if results.get("is_over"):
+                    if results.get("win"):
+                        await self._handle_win(results)
+                    else:
+                        await self._handle_loss(results)
+                    return  # The battle is over, stop here.
 
-            # 3. Check for a definitive end to the battle
-            if results.get("is_over"):
-                if results.get("win"):
-                    await self._handle_win(results)
-                else:
-                    await self._handle_loss(results)
-                return  # The battle is over, stop here.
+            # From here on the player may be asked to choose (a pet, a skill). Those waits run with
+            # the lock released, so their other actions aren't stuck behind a 3-minute prompt; the
+            # combat buttons stay disabled meanwhile and each choice is applied under the lock.
 
             # 4. Check if the player's pet fainted and a switch is required
             if results.get("switch_required") and results.get("fainted_side") == "player":
@@ -340,21 +396,24 @@ class CombatView(discord.ui.View):
                     "Your pet has fainted! Choose your next companion.", view=switch_view, ephemeral=True)
                 await switch_view.wait()
 
-                if switch_view.chosen_pet_id:
-                    switch_log = await self.battle.set_active_player_pet(switch_view.chosen_pet_id)
-                    self.battle.turn_log.append(switch_log)
-                    ai_results = await self.battle.process_ai_turn()
-                    self.battle.turn_log.append(ai_results['log'])
-                else:  # Timeout on switch is a forfeit
-                    await self._handle_loss({"log": "Forfeited by not choosing a pet."})
-                    return
+                async with user_locks.hold(self.user_id, "battle"):
+                    if switch_view.chosen_pet_id:
+                        switch_log = await self.battle.set_active_player_pet(switch_view.chosen_pet_id)
+                        self.battle.turn_log.append(switch_log)
+                        ai_results = await self.battle.process_ai_turn()
+                        self.battle.turn_log.append(ai_results['log'])
+                    else:  # Timeout on switch is a forfeit
+                        await self._handle_loss({"log": "Forfeited by not choosing a pet."})
+                        return
                 await switch_message.delete()
 
             # 5. After the turn is resolved, handle any pending evolutions or skill learns
             await self._handle_pending_actions(interaction)
 
-            # 6. Perform a single, final update to the display
-            await self._update_display(log="\n".join(self.battle.turn_log))
+            # 6. Save the round, then perform a single, final update to the display
+            async with user_locks.hold(self.user_id, "battle"):
+                await self._save_snapshot()
+                await self._update_display(log="\n".join(self.battle.turn_log))
 
         except Exception as e:
             print(f"An error occurred in skill_button_callback: {e}")
@@ -367,9 +426,6 @@ class CombatView(discord.ui.View):
             except Exception:
                 pass
             self.stop()
-        finally:
-            # 7. ALWAYS unlock the view for the next turn
-            self.is_processing = False
 
     async def attempt_capture(self, unique_orb_id: str):
         """
@@ -383,70 +439,63 @@ class CombatView(discord.ui.View):
             orb_id = unique_orb_id
 
         for item in self.children: item.disabled = True
-        await self.message.edit(view=self)
+        edit_scheduler.schedule(self.message, view=self)
         results = await self.battle.attempt_capture(orb_id)
         await self._update_view(self.parent_interaction, results)
 
     async def confirm_switch_callback(self, interaction: discord.Interaction):
         """Callback for the 'Confirm Switch' button."""
-        if self.is_processing:
+        if user_locks.busy(self.user_id):
             await interaction.response.send_message("Processing... Please wait.", ephemeral=True, delete_after=3)
             return
 
-        try:
-            self.is_processing = True
-            for item in self.children: item.disabled = True
-            await interaction.response.defer()
-            await self.message.edit(view=self)
+        async with user_locks.hold(self.user_id, "battle"):
+            try:
+                for item in self.children: item.disabled = True
+                await interaction.response.defer()
+                edit_scheduler.schedule(self.message, view=self)
 
-            if not self.selected_pet_to_switch:
-                # Handle case where nothing is selected, then unlock and return
-                self.is_processing = False
-                await self._update_display(interaction)
-                return
+                if not self.selected_pet_to_switch:
+                    # Nothing selected — just redraw
+                    await self._update_display(interaction)
+                    return
 
-            # This is the corrected logic: call the main engine function
-            results = await self.battle.process_player_switch(self.selected_pet_to_switch)
+                # This is the corrected logic: call the main engine function
+                results = await self.battle.process_player_switch(self.selected_pet_to_switch)
 
-            # Update the view with the results from the engine
-            await self._update_view(interaction, results)
+                # Update the view with the results from the engine
+                await self._update_view(interaction, results)
 
-        except Exception as e:
-            traceback.print_exc()
-            # Ensure view stops on error to prevent being stuck
-            self.stop()
-        finally:
-            # This now correctly unlocks the view for the next turn
-            self.is_processing = False
+            except Exception as e:
+                traceback.print_exc()
+                # Ensure view stops on error to prevent being stuck
+                self.stop()
 
     async def flee_button_callback(self, interaction: discord.Interaction):
-        if self.is_processing:
+        if user_locks.busy(self.user_id):
             await interaction.response.send_message("Processing... Please wait.", ephemeral=True, delete_after=3)
             return
 
-        try:
-            self.is_processing = True
-            for item in self.children: item.disabled = True
-            await interaction.response.defer()
-            await self.message.edit(view=self)
+        async with user_locks.hold(self.user_id, "battle"):
+            try:
+                for item in self.children: item.disabled = True
+                await interaction.response.defer()
+                edit_scheduler.schedule(self.message, view=self)
 
-            # Call the new flee logic from your battle engine
-            flee_result = await self.battle.attempt_flee()
+                # Call the new flee logic from your battle engine
+                flee_result = await self.battle.attempt_flee()
 
-            if flee_result['success']:
-                await self._return_to_wilds([f"🏃 **Fled**\n*You escaped from the battle.*"])
-                # No need to unlock here, the view is being replaced
-                return
-            else:
-                # On failure, update the combat UI with the failure log and the enemy's attack
-                # This logic now correctly passes the results to _update_view
-                await self._update_view(interaction, flee_result)
+                if flee_result['success']:
+                    await self._return_to_wilds([f"🏃 **Fled**\n*You escaped from the battle.*"])
+                    return
+                else:
+                    # On failure, update the combat UI with the failure log and the enemy's attack
+                    # This logic now correctly passes the results to _update_view
+                    await self._update_view(interaction, flee_result)
 
-        except Exception as e:
-            traceback.print_exc()
-            self.stop()
-        finally:
-            self.is_processing = False
+            except Exception as e:
+                traceback.print_exc()
+                self.stop()
 
     async def get_battle_embed(self, turn_summary: list[str] = None, preview_orb_id: str = None):
 
@@ -520,8 +569,8 @@ class CombatView(discord.ui.View):
         gloom_bar = '🟪' * gloom_filled + '⬛' * gloom_empty
         embed.add_field(name="Gloom Meter", value=f"{gloom_bar} `{self.battle.gloom_meter}%`", inline=False)
 
-        inventory = await self.battle.db_cog.get_player_inventory(self.user_id)
-        orbs = [i['item_id'] for i in inventory if 'orb' in i['item_id']]
+        inventory = await self.battle.db_cog.get_inventory(self.user_id)
+        orbs = [row['item_id'] for _, row in inventory.in_bucket("Orbs")]
         baseline_orb = "tether_orb" if "tether_orb" in orbs else (orbs[0] if orbs else None)
 
         orb_to_display = baseline_orb
@@ -552,9 +601,7 @@ class CombatView(discord.ui.View):
             wild_pet = self.battle.wild_pet
             user = self.parent_interaction.user
             # Use in-game username if available, fall back to Discord display name
-            player_data = await self.battle.db_cog.get_player(self.user_id)
-            player_name = player_data.get('username') if player_data else None
-            player_name = player_name or user.display_name
+            player_name = self.player_name or user.display_name
 
             location_name = get_location_display_name(self.origin_location_id)
             if captured:
@@ -575,7 +622,7 @@ class CombatView(discord.ui.View):
             embed.set_footer(text=f"Aethelgard", icon_url=user.display_avatar.url)
 
             channel = self.parent_interaction.channel
-            await channel.send(embed=embed)
+            await spectator_broadcaster.post_result(channel, embed=embed)
         except Exception:
             pass  # Never let a vanity post break the game flow
 
@@ -609,12 +656,23 @@ class CombatView(discord.ui.View):
         summary = [f"💔 **Defeated**\n*{get_notification('BATTLE_DEFEAT')}*"]
         await self._return_to_wilds(summary, [])
 
+    def _save_action_log(self):
+        """Writes the battle's replay log when BATTLE_LOG_DIR is set."""
+        if not config.BATTLE_LOG_DIR:
+            return
+        try:
+            self.battle.action_log.save(self.battle, config.BATTLE_LOG_DIR)
+        except Exception as e:
+            print(f"--- [BATTLE LOG ERROR] --- {type(e).__name__}: {e}")
+
     async def _return_to_wilds(self, result_log_list: list[str], quest_updates: list[str] = []):
         """
         Cleans up all battle messages and returns control to the previous view.
         """
         # --- START OF CORRECTED LOGIC ---
         # Safely delete both the private and public messages
+        CombatView.live_battles.pop(self.user_id, None)
+        self._release_spectator()
         try:
             await self.message.delete()
         except (discord.NotFound, AttributeError):
@@ -625,14 +683,27 @@ class CombatView(discord.ui.View):
         except (discord.NotFound, AttributeError):
             pass  # Ignore if it's already gone
 
-        # Clear the battle record from DB now that it ended cleanly
+        self._save_action_log()
+
+        # Clear the battle record and snapshot from DB now that it ended cleanly
         db_cog = self.bot.get_cog('Database')
         if db_cog:
             await db_cog.clear_active_battle(self.user_id)
+            await db_cog.delete_battle_snapshot(self.user_id)
 
-        # Update the original view (WildsView/TownView) with the battle outcome
+        # Update the original view (WildsView/TownView) with the battle outcome.
+        # A resumed battle has no view to return to, so the outcome is sent on its own.
         if hasattr(self.view_context, 'update_with_activity_log'):
             await self.view_context.update_with_activity_log(result_log_list)
+        elif result_log_list:
+            try:
+                from utils.helpers import format_log_block
+                await self.parent_interaction.followup.send(
+                    embed=discord.Embed(description=format_log_block(result_log_list), color=discord.Color.dark_teal()),
+                    ephemeral=True
+                )
+            except Exception:
+                pass
 
         # Quest updates get their own guaranteed followup — the embed edit above can
         # fail silently, but quest progress is too important to lose in the noise
@@ -650,14 +721,17 @@ class CombatView(discord.ui.View):
         self.stop()
 
     async def _handle_pending_actions(self, interaction: discord.Interaction):
-        """A loop that handles all pending actions (evo, skills) until none are left."""
+        """
+        A loop that handles all pending actions (evo, skills) until none are left.
+        Call it without the user's lock: it waits for the player's choices, then takes the lock to apply each one.
+        """
         while True:
             pending_action = self.battle.check_for_pending_actions()
             if not pending_action:
                 break
 
             for item in self.children: item.disabled = True
-            await self.message.edit(view=self)
+            edit_scheduler.schedule(self.message, view=self)
 
             if pending_action['type'] == 'evolution':
                 evolving_view = EvolvingView(self.bot, self.battle, pending_action['pet_id'])
@@ -666,7 +740,8 @@ class CombatView(discord.ui.View):
                 evolving_view.message = evo_message
                 await evolving_view.wait()
 
-                await self.battle.finalize_evolution(pending_action['pet_id'])
+                async with user_locks.hold(self.user_id, "battle"):
+                    await self.battle.finalize_evolution(pending_action['pet_id'])
                 await evo_message.delete()
 
             elif pending_action['type'] == 'skill_choice':
@@ -681,25 +756,8 @@ class CombatView(discord.ui.View):
                 await choice_view.wait()
                 await choice_msg.delete()
 
-                pet_id = pending_action['pet_id']
-                self.battle.pending_skill_choices.pop(pet_id, None)
-
-                if choice_view.chosen_skill:
-                    chosen = choice_view.chosen_skill
-                    skill_name = PET_SKILLS.get(chosen, {}).get('name', chosen)
-                    await self.battle.db_cog.add_skill_to_library(pet_id, chosen)
-
-                    current_skills = self.battle.player_pet.get('skills', [])
-                    if len(current_skills) < 4:
-                        new_skills = current_skills + [chosen]
-                        await self.battle.db_cog.update_pet(pet_id, skills=new_skills)
-                        self.battle.player_pet['skills'] = new_skills
-                        self.battle.turn_log.append(f"› **{self.battle.player_pet['name']} learned {skill_name}!**")
-                    else:
-                        # Pet is full — queue for replacement
-                        self.battle.pending_skill_learns[pet_id] = chosen
-                else:
-                    self.battle.turn_log.append(f"› **{self.battle.player_pet['name']}** held off on learning a new skill.")
+                async with user_locks.hold(self.user_id, "battle"):
+                    await self.battle.finalize_skill_choice(pending_action['pet_id'], choice_view.chosen_skill)
 
             elif pending_action['type'] == 'learn_skill':
                 learn_view = LearnSkillView(self.battle.player_pet, pending_action['skill_id'])
@@ -710,27 +768,32 @@ class CombatView(discord.ui.View):
                 )
                 await learn_view.wait()
 
-                if learn_view.chosen_skill_to_forget:
-                    await self.battle.finalize_skill_learn(
-                        pet_id=pending_action['pet_id'],
-                        new_skill=pending_action['skill_id'],
-                        skill_to_forget=learn_view.chosen_skill_to_forget
-                    )
-                else:
-                    self.battle.clear_pending_skill_learn(pending_action['pet_id'])
-                    self.battle.turn_log.append(f"› {self.battle.player_pet['name']} did not learn the new skill.")
+                async with user_locks.hold(self.user_id, "battle"):
+                    if learn_view.chosen_skill_to_forget:
+                        await self.battle.finalize_skill_learn(
+                            pet_id=pending_action['pet_id'],
+                            new_skill=pending_action['skill_id'],
+                            skill_to_forget=learn_view.chosen_skill_to_forget
+                        )
+                    else:
+                        self.battle.clear_pending_skill_learn(pending_action['pet_id'])
+                        self.battle.turn_log.append(f"› {self.battle.player_pet['name']} did not learn the new skill.")
 
                 await skill_message.delete()
 
     async def on_timeout(self):
-        """Battle timed out due to inactivity — clean up and return player to safety."""
+        """Battle timed out due to inactivity — pause it (the snapshot stays) and return player to safety."""
         # Delete spectator panel
+        CombatView.live_battles.pop(self.user_id, None)
+        self._release_spectator()
         try:
             await self.spectator_message.delete()
         except (discord.NotFound, AttributeError):
             pass
 
-        # Save pet HP as-is and clear the battle DB record
+        # Save pet HP as-is and clear the panel record; the battle snapshot is kept for /resume
+        await self._save_snapshot()
+        self._save_action_log()
         db_cog = self.bot.get_cog('Database')
         if db_cog:
             try:
@@ -743,7 +806,7 @@ class CombatView(discord.ui.View):
             await db_cog.clear_active_battle(self.user_id)
 
         # Return player to location view with a timeout notice
-        timeout_log = ["⏱️ **Battle Timed Out**\n*You retreated from the battle due to inactivity.*"]
+        timeout_log = ["⏱️ **Battle Paused**\n*You stepped away from the battle. Use `/resume` to pick it up where you left off.*"]
         if hasattr(self.view_context, 'update_with_activity_log'):
             try:
                 await self.view_context.update_with_activity_log(timeout_log)
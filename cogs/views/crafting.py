@@ -6,6 +6,9 @@ from cogs.views.modals import QuantityModal
 from data.recipes import RECIPES
 from data.items import ITEMS # <-- Add ITEMS import
 from utils.helpers import get_status_bar, format_log_block, get_notification
+from utils.message_editor import edit_scheduler
+from utils.interaction_guard import ack_deadline
+from core.user_locks import user_locks
 
 
 class CraftingView(discord.ui.View):
@@ -23,7 +26,7 @@ class CraftingView(discord.ui.View):
         self.selected_recipe_id = None
 
         self.known_recipes = []
-        self.player_inventory = {}
+        self.inventory = None  # the cached Inventory from the Database cog; it stays current by itself
         self.filtered_recipes = []
 
     async def initial_setup(self):
@@ -32,8 +35,7 @@ class CraftingView(discord.ui.View):
 
         self.known_recipes = await db_cog.get_player_recipes(self.user_id)
 
-        inventory_list = await db_cog.get_player_inventory(self.user_id)
-        self.player_inventory = {item['item_id']: item['quantity'] for item in inventory_list}
+        self.inventory = await db_cog.get_inventory(self.user_id)
 
         # Give the player a default recipe if they have none
         if not self.known_recipes:
@@ -62,7 +64,7 @@ class CraftingView(discord.ui.View):
             # Build the checklist string
             checklist_items = []
             for ingredient_id, required in recipe_data.get("ingredients", {}).items():
-                owned = self.player_inventory.get(ingredient_id, 0)
+                owned = self.inventory.get_quantity(ingredient_id)
                 emoji = "✅" if owned >= required else "❌"
                 ingredient_name = ITEMS.get(ingredient_id, {}).get("name", "Unknown Item")
                 checklist_items.append(f"{emoji} {ingredient_name}: {owned}/{required}")
@@ -111,25 +113,15 @@ class CraftingView(discord.ui.View):
             recipe_data = RECIPES.get(recipe_id, {})
             if self.current_discipline != "All" and recipe_data.get("discipline") != self.current_discipline:
                 continue
-            if self.show_craftable_only:
-                can_craft = True
-                for ingredient, required_qty in recipe_data.get("ingredients", {}).items():
-                    if self.player_inventory.get(ingredient, 0) < required_qty:
-                        can_craft = False
-                        break
-                if not can_craft:
-                    continue
+            if self.show_craftable_only and recipe_id not in self.inventory.craftable:
+                continue
             self.filtered_recipes.append(recipe_id)
 
     def add_recipe_dropdown(self):
         options = []
         for recipe_id in self.filtered_recipes:
             recipe_data = RECIPES.get(recipe_id, {})
-            can_craft_emoji = "✅"
-            for ingredient, required_qty in recipe_data.get("ingredients", {}).items():
-                if self.player_inventory.get(ingredient, 0) < required_qty:
-                    can_craft_emoji = "❌"
-                    break
+            can_craft_emoji = "✅" if recipe_id in self.inventory.craftable else "❌"
             options.append(discord.SelectOption(
                 label=f"{can_craft_emoji} {recipe_data.get('name', 'Unknown Recipe')}",
                 value=recipe_id,
@@ -153,13 +145,7 @@ class CraftingView(discord.ui.View):
         button_disabled = False
 
         # Determine if the player can craft at least one
-        can_craft_one = True
-        for ingredient, required in recipe_data.get("ingredients", {}).items():
-            if self.player_inventory.get(ingredient, 0) < required:
-                can_craft_one = False
-                break
-
-        if not can_craft_one:
+        if self.selected_recipe_id not in self.inventory.craftable:
             button_disabled = True
 
         if recipe_data.get("type") == "Master":
@@ -177,10 +163,6 @@ class CraftingView(discord.ui.View):
         """Helper function to defer, rebuild, and edit the message."""
         await interaction.response.defer()
 
-        db_cog = self.bot.get_cog('Database')
-        inventory_list = await db_cog.get_player_inventory(self.user_id)
-        self.player_inventory = {item['item_id']: item['quantity'] for item in inventory_list}
-
         self.rebuild_ui()
         # It passes the log_list to the embed creator
         embed = self.create_embed(log_list=log_list)
@@ -200,16 +182,13 @@ class CraftingView(discord.ui.View):
         self.selected_recipe_id = interaction.data["values"][0]
         await self._update_view(interaction)
 
+    @ack_deadline(None)  # opens a modal, which must be the first response
     async def craft_item_callback(self, interaction: discord.Interaction):
         recipe_id = self.selected_recipe_id
         recipe_data = RECIPES.get(recipe_id, {})
 
-        # --- Modal and Quantity Logic (Unchanged) ---
-        max_craftable = 999
-        for ingredient_id, required_qty in recipe_data.get("ingredients", {}).items():
-            owned_qty = self.player_inventory.get(ingredient_id, 0)
-            if required_qty > 0:
-                max_craftable = min(max_craftable, owned_qty // required_qty)
+        # --- Modal and Quantity Logic ---
+        max_craftable = min(999, self.inventory.max_craftable(recipe_id))
 
         if max_craftable == 0:
             await interaction.response.send_message("You no longer have the materials to craft this item.",
@@ -225,28 +204,35 @@ class CraftingView(discord.ui.View):
         if 0 < quantity_to_craft <= max_craftable:
             db_cog = self.bot.get_cog('Database')
 
-            # 1. Consume ingredients
-            for ingredient_id, required_qty in recipe_data.get("ingredients", {}).items():
-                await db_cog.remove_item_from_inventory(self.user_id, ingredient_id, required_qty * quantity_to_craft)
+            async with user_locks.hold(self.user_id, "craft"):
+                # Re-check against the live inventory: materials may have been spent while the modal was open
+                inventory = await db_cog.get_inventory(self.user_id)
+                if inventory.max_craftable(recipe_id) < quantity_to_craft:
+                    await interaction.followup.send("You no longer have the materials to craft this item.",
+                                                    ephemeral=True)
+                    return
+
+                # 1. Consume ingredients
+                for ingredient_id, required_qty in recipe_data.get("ingredients", {}).items():
+                    await db_cog.remove_item_from_inventory(self.user_id, ingredient_id, required_qty * quantity_to_craft)
 
-            # 2. Add crafted items
-            await db_cog.add_item_to_inventory(self.user_id, recipe_id, quantity_to_craft)
+                # 2. Add crafted items
+                await db_cog.add_item_to_inventory(self.user_id, recipe_id, quantity_to_craft)
 
             # 3. Animate the process log
             log_list = []
             process_keys = recipe_data.get("process_log_keys", [])
 
-            # Disable buttons during the "animation"
+            # Disable buttons during the "animation" (merged with the first frame below)
             self.clear_items()
             self.add_item(discord.ui.Button(label="Crafting...", disabled=True, row=2))
-            embed = self.create_embed()
-            await self.message.edit(embed=embed, view=self)
+            edit_scheduler.schedule(self.message, embed=self.create_embed(), view=self)
 
             for key in process_keys:
                 # Get a random notification for each key
                 log_list.append(get_notification(key))
                 embed = self.create_embed(log_list=log_list)
-                await self.message.edit(embed=embed)
+                await edit_scheduler.edit(self.message, embed=embed)
                 await asyncio.sleep(1.5)
 
             # 4. Show the final success message and rebuild the UI
@@ -266,13 +252,9 @@ class CraftingView(discord.ui.View):
         """A simple version that uses self.message to edit."""
         if not self.message: return
 
-        db_cog = self.bot.get_cog('Database')
-        inventory_list = await db_cog.get_player_inventory(self.user_id)
-        self.player_inventory = {item['item_id']: item['quantity'] for item in inventory_list}
-
         self.rebuild_ui()
         embed = self.create_embed(log_list=log_list)
-        await self.message.edit(embed=embed, view=self)
+        await edit_scheduler.edit(self.message, embed=embed, view=self)
 
     async def on_timeout(self):
         if self.message:
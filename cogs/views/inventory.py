@@ -9,6 +9,8 @@ from data.items import ITEMS
 from data.skills import PET_SKILLS
 from .modals import QuantityModal
 from utils.helpers import get_notification, format_log_block, apply_effect, get_status_bar, check_quest_progress
+from utils.interaction_guard import ack_deadline
+from core.user_locks import user_locks
 
 ACTION_ORDER = ["use", "equip", "unequip", "inspect", "drop"]
 
@@ -20,7 +22,7 @@ class BagView(discord.ui.View):
         self.user_id = user_id
         self.player_data = player_data
         self.main_pet_data = main_pet_data
-        self.inventory = inventory
+        self.inventory = inventory  # core.inventory.Inventory — selections are its row keys
         self.channel = channel
         self.message = None
         self.current_filter = "Consumables"
@@ -53,16 +55,11 @@ class BagView(discord.ui.View):
         try:
             db_cog = self.bot.get_cog('Database')
             self.player_data = await db_cog.get_player(self.user_id)
-            self.inventory = await db_cog.get_player_inventory(self.user_id)
+            self.inventory = await db_cog.get_inventory(self.user_id)
 
-            # --- FIX: Properly check if the selected item still exists ---
-            if self.selected_item_id:
-                try:
-                    inventory_index = int(self.selected_item_id.split(':')[0])
-                    if inventory_index >= len(self.inventory):
-                        self.selected_item_id = None
-                except (ValueError, IndexError):
-                    self.selected_item_id = None
+            # --- Clear the selection if that stack was used up ---
+            if self.selected_item_id and not self.inventory.get_row(self.selected_item_id):
+                self.selected_item_id = None
 
             await self.rebuild_ui()
             embed = self.create_embed(log_list=log_list)
@@ -101,15 +98,20 @@ class BagView(discord.ui.View):
         else:
             self.add_action_buttons()
 
+    def get_selected_row(self):
+        """Returns (item_id, row) for the selected stack, or (None, None)."""
+        row = self.inventory.get_row(self.selected_item_id) if self.selected_item_id else None
+        if not row:
+            return None, None
+        return row['item_id'], row
+
     def add_item_dropdown(self):
-        # This function is correct.
         options = []
-        for i, item_instance in enumerate(self.inventory):
+        for row_key, item_instance in self.inventory.in_bucket(self.current_filter):
             item_id = item_instance['item_id']
             quantity = item_instance['quantity']
             item_data_from_db = item_instance.get('item_data')
             base_item_data = ITEMS.get(item_id, {})
-            category = base_item_data.get('category')
             display_name = base_item_data.get('name', 'Unknown')
             display_desc = base_item_data.get('dropdown_description', '')
             if item_id == 'skill_tome' and item_data_from_db:
@@ -118,21 +120,9 @@ class BagView(discord.ui.View):
                     skill_name = PET_SKILLS.get(skill_id, {}).get('name', 'Unknown Skill')
                     display_name = f"Tome of {skill_name}"
                     display_desc = f"Teaches the skill '{skill_name}'."
-            is_in_category = False
-            if self.current_filter == "Orbs":
-                if category == "Consumables" and 'orb_data' in base_item_data: is_in_category = True
-            elif self.current_filter == "Consumables":
-                if category == "Consumables" and 'orb_data' not in base_item_data: is_in_category = True
-            else:
-                if isinstance(category, list) and self.current_filter in category:
-                    is_in_category = True
-                elif isinstance(category, str) and self.current_filter == category:
-                    is_in_category = True
-            if is_in_category:
-                unique_value = f"{i}:{item_id}"
-                options.append(
-                    discord.SelectOption(label=f"{display_name} (x{quantity})", value=unique_value,
-                                         description=display_desc, default=(self.selected_item_id == unique_value)))
+            options.append(
+                discord.SelectOption(label=f"{display_name} (x{quantity})", value=row_key,
+                                     description=display_desc, default=(self.selected_item_id == row_key)))
         if options:
             select = discord.ui.Select(placeholder="Select an item to see details...", options=options, row=1)
             select.callback = self.item_select_callback
@@ -149,26 +139,22 @@ class BagView(discord.ui.View):
                          f"**Boots:** {ITEMS.get(self.player_data.get('equipped_boots'), {}).get('name', 'None')}\n"
                          f"**Accessory:** {ITEMS.get(self.player_data.get('equipped_accessory'), {}).get('name', 'None')}")
         embed.add_field(name="🛡️ Adventurer's Gear", value=equipped_text, inline=False)
-        if self.selected_item_id:
-            try:
-                inventory_index, item_id = self.selected_item_id.split(':')
-                item_instance = self.inventory[int(inventory_index)]
-                base_item_data = ITEMS.get(item_id, {})
-                quantity = item_instance['quantity']
-                display_name = base_item_data.get('name', 'Unknown')
-                if item_id == 'skill_tome' and item_instance.get('item_data'):
-                    skill_id = item_instance.get('item_data', {}).get('skill')
-                    if skill_id:
-                        skill_name = PET_SKILLS.get(skill_id, {}).get('name', 'Unknown Skill')
-                        display_name = f"Tome of {skill_name}"
-                if image_url := base_item_data.get("image_url"):
-                    embed.set_thumbnail(url=image_url)
-                display_description = base_item_data.get('menu_description',
-                                                         base_item_data.get('description', 'No description.'))
-                selected_item_text = f"**{display_name} (x{quantity})**\n_{display_description}_"
-                embed.add_field(name="👉 Selected Item", value=selected_item_text, inline=False)
-            except (ValueError, IndexError):
-                self.selected_item_id = None
+        item_id, item_instance = self.get_selected_row()
+        if item_instance:
+            base_item_data = ITEMS.get(item_id, {})
+            quantity = item_instance['quantity']
+            display_name = base_item_data.get('name', 'Unknown')
+            if item_id == 'skill_tome' and item_instance.get('item_data'):
+                skill_id = item_instance.get('item_data', {}).get('skill')
+                if skill_id:
+                    skill_name = PET_SKILLS.get(skill_id, {}).get('name', 'Unknown Skill')
+                    display_name = f"Tome of {skill_name}"
+            if image_url := base_item_data.get("image_url"):
+                embed.set_thumbnail(url=image_url)
+            display_description = base_item_data.get('menu_description',
+                                                     base_item_data.get('description', 'No description.'))
+            selected_item_text = f"**{display_name} (x{quantity})**\n_{display_description}_"
+            embed.add_field(name="👉 Selected Item", value=selected_item_text, inline=False)
         if log_list:
             embed.add_field(name="Activity Log", value=format_log_block(log_list), inline=False)
         status_bar = get_status_bar(self.player_data, self.main_pet_data)
@@ -187,17 +173,14 @@ class BagView(discord.ui.View):
         self.is_selecting_pet = False
         await self.rebuild_and_edit()
 
+    @ack_deadline(None)  # opens a modal, which must be the first response
     async def handle_action_callback(self, interaction: discord.Interaction):
         # This function is correct.
         action = interaction.data['custom_id'].split('_')[1]
         db_cog = self.bot.get_cog('Database')
-        if not self.selected_item_id: return
-        try:
-            inventory_index, item_id = self.selected_item_id.split(':')
-            item_instance = self.inventory[int(inventory_index)]
-            base_item_data = ITEMS.get(item_id, {})
-        except (ValueError, IndexError):
-            return
+        item_id, item_instance = self.get_selected_row()
+        if not item_instance: return
+        base_item_data = ITEMS.get(item_id, {})
         effect_type = base_item_data.get('effect', {}).get('type')
         if (action == "use" and effect_type in ['heal_pet', 'teach_skill', 'restore_hunger']) or \
                 (action == "equip" and base_item_data.get('slot') == "charm"):
@@ -219,20 +202,22 @@ class BagView(discord.ui.View):
             quantity_to_use = modal.quantity
             log_list = []
             if 0 < quantity_to_use <= max_qty:
-                if action == "use":
-                    await db_cog.remove_item_from_inventory(self.user_id, item_id, quantity_to_use,
-                                                            item_instance.get('item_data'))
-                    log_list.append(get_notification("ITEM_USE_SUCCESS", quantity=quantity_to_use,
-                                                     item_name=base_item_data['name']))
-                    quest_updates = await check_quest_progress(self.bot, self.user_id, "item_use", {"item_id": item_id},
-                                                               channel=self.channel)
-                    if quest_updates:
-                        log_list.extend(quest_updates)
-                elif action == "drop":
-                    await db_cog.remove_item_from_inventory(self.user_id, item_id, quantity_to_use,
-                                                            item_instance.get('item_data'))
-                    log_list.append(get_notification("ITEM_DROP_SUCCESS", quantity=quantity_to_use,
-                                                     item_name=base_item_data['name']))
+                # Only the inventory write is serialized; the modal wait above is not
+                async with user_locks.hold(self.user_id, f"item_{action}"):
+                    if action == "use":
+                        await db_cog.remove_item_from_inventory(self.user_id, item_id, quantity_to_use,
+                                                                item_instance.get('item_data'))
+                        log_list.append(get_notification("ITEM_USE_SUCCESS", quantity=quantity_to_use,
+                                                         item_name=base_item_data['name']))
+                        quest_updates = await check_quest_progress(self.bot, self.user_id, "item_use", {"item_id": item_id},
+                                                                   channel=self.channel)
+                        if quest_updates:
+                            log_list.extend(quest_updates)
+                    elif action == "drop":
+                        await db_cog.remove_item_from_inventory(self.user_id, item_id, quantity_to_use,
+                                                                item_instance.get('item_data'))
+                        log_list.append(get_notification("ITEM_DROP_SUCCESS", quantity=quantity_to_use,
+                                                         item_name=base_item_data['name']))
             else:
                 log_list.append(get_notification("ACTION_FAIL_INVALID_QUANTITY", max_quantity=max_qty))
             await self.rebuild_and_edit(log_list=log_list)
@@ -251,17 +236,11 @@ class BagView(discord.ui.View):
             await self.rebuild_and_edit(log_list=[log_message])
 
     def add_action_buttons(self):
-        if not self.selected_item_id:
+        item_id, item_instance = self.get_selected_row()
+        if not item_instance:
             self.add_item(discord.ui.Button(label="Select an item", disabled=True, row=2))
             return
-
-        # --- FIX: Parse unique ID to get correct data for buttons ---
-        try:
-            inventory_index, item_id = self.selected_item_id.split(':')
-            base_item_data = ITEMS.get(item_id, {})
-        except (ValueError, IndexError):
-            self.add_item(discord.ui.Button(label="Error reading item", disabled=True, row=2))
-            return
+        base_item_data = ITEMS.get(item_id, {})
 
         possible_actions = base_item_data.get("actions", [])
         possible_actions.sort(key=lambda action: ACTION_ORDER.index(action) if action in ACTION_ORDER else 99)
@@ -298,6 +277,7 @@ class BagView(discord.ui.View):
             button.callback = self.handle_action_callback
             self.add_item(button)
 
+    @user_locks.serialized("use_item")
     async def give_item_to_pet_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         target_pet_id = int(interaction.data['values'][0])
@@ -305,10 +285,9 @@ class BagView(discord.ui.View):
         target_pet = await db_cog.get_pet(target_pet_id)
         log_list = []
 
-        if target_pet and self.selected_item_id:
-            # --- FIX: Parse unique ID ---
-            inventory_index, item_id = self.selected_item_id.split(':')
-            item_instance = self.inventory[int(inventory_index)]
+        item_id, item_instance = self.get_selected_row()
+
+        if target_pet and item_instance:
             base_item_data = ITEMS.get(item_id, {})
 
             healed_amount = await apply_effect(db_cog, target_pet, base_item_data.get('effect', {}))
@@ -323,6 +302,7 @@ class BagView(discord.ui.View):
         self.pending_action = None
         await self.rebuild_and_edit(log_list=log_list)
 
+    @user_locks.serialized("use_item")
     async def equip_charm_on_pet_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         target_pet_id = int(interaction.data['values'][0])
@@ -330,9 +310,9 @@ class BagView(discord.ui.View):
         target_pet = await db_cog.get_pet(target_pet_id)
         log_list = []
 
-        if target_pet and self.selected_item_id:
-            # --- FIX: Parse unique ID ---
-            inventory_index, item_id = self.selected_item_id.split(':')
+        item_id, item_instance = self.get_selected_row()
+
+        if target_pet and item_instance:
             base_item_data = ITEMS.get(item_id, {})
 
             await db_cog.update_pet(target_pet_id, equipped_charm=item_id)
@@ -351,6 +331,7 @@ class BagView(discord.ui.View):
         self.pending_action = None
         await self.rebuild_and_edit()
 
+    @user_locks.serialized("use_item")
     async def teach_skill_to_pet_callback(self, interaction: discord.Interaction):
         # This function is correct.
         await interaction.response.defer()
@@ -358,9 +339,8 @@ class BagView(discord.ui.View):
         db_cog = self.bot.get_cog('Database')
         target_pet = await db_cog.get_pet(target_pet_id)
         log_list = []
-        if target_pet and self.selected_item_id:
-            inventory_index, item_id = self.selected_item_id.split(':')
-            tome_instance = self.inventory[int(inventory_index)]
+        item_id, tome_instance = self.get_selected_row()
+        if target_pet and tome_instance:
             skill_id_to_learn = tome_instance.get('item_data', {}).get('skill')
             if skill_id_to_learn:
                 await db_cog.add_skill_to_library(target_pet_id, skill_id_to_learn)
@@ -3,6 +3,8 @@
 import discord
 from data.items import ITEMS
 from .modals import QuantityModal
+from core.user_locks import user_locks
+from utils.interaction_guard import ack_deadline
 
 
 class ShopView(discord.ui.View):
@@ -39,14 +41,11 @@ class ShopView(discord.ui.View):
             )
 
         else:  # sell mode
-            inventory = await db_cog.get_player_inventory(self.user_id)
+            inventory = await db_cog.get_inventory(self.user_id)
             lines = []
-            for inv_item in inventory:
-                item = ITEMS.get(inv_item['item_id'], {})
-                price = item.get('price')
-                if not price or price <= 0:
-                    continue
-                sell_price = max(1, price // 2)
+            for _, inv_item in inventory.sellable_rows():
+                item = ITEMS[inv_item['item_id']]
+                sell_price = max(1, item['price'] // 2)
                 lines.append(
                     f"**{item['name']}** (x{inv_item['quantity']}) — {sell_price} 🪙 each"
                 )
@@ -97,22 +96,19 @@ class ShopView(discord.ui.View):
             self.add_item(buy_btn)
 
         else:  # sell mode
-            inventory = await db_cog.get_player_inventory(self.user_id)
-            sellable = [
-                (i, ITEMS[i['item_id']])
-                for i in inventory
-                if ITEMS.get(i['item_id'], {}).get('price', 0) > 0
-            ]
+            inventory = await db_cog.get_inventory(self.user_id)
+            sellable = inventory.sellable_rows()
 
             if sellable:
                 options = []
-                for inv_item, item_data in sellable:
+                for row_key, inv_item in sellable:
+                    item_data = ITEMS[inv_item['item_id']]
                     sell_price = max(1, item_data['price'] // 2)
                     options.append(discord.SelectOption(
                         label=f"{item_data['name']} (x{inv_item['quantity']})",
-                        value=inv_item['item_id'],
+                        value=row_key,
                         description=f"Sell for {sell_price} 🪙 each",
-                        default=(inv_item['item_id'] == self.selected_item_id)
+                        default=(row_key == self.selected_item_id)
                     ))
                 select = discord.ui.Select(
                     placeholder="Choose an item to sell...",
@@ -126,8 +122,9 @@ class ShopView(discord.ui.View):
                     label="Nothing to sell", disabled=True, row=0
                 ))
 
+            selected_row = inventory.get_row(self.selected_item_id) if self.selected_item_id else None
             sell_btn = discord.ui.Button(
-                label=f"Sell{' ' + ITEMS[self.selected_item_id]['name'] if self.selected_item_id and self.selected_item_id in ITEMS else ''}",
+                label=f"Sell{' ' + ITEMS[selected_row['item_id']]['name'] if selected_row else ''}",
                 style=discord.ButtonStyle.red,
                 disabled=not self.selected_item_id,
                 row=1
@@ -178,6 +175,7 @@ class ShopView(discord.ui.View):
         self.selected_item_id = None
         await self.refresh(interaction)
 
+    @ack_deadline(None)  # opens a modal, which must be the first response
     async def buy_callback(self, interaction: discord.Interaction):
         if not self.selected_item_id:
             return
@@ -197,34 +195,36 @@ class ShopView(discord.ui.View):
             return
 
         db_cog = self.bot.get_cog('Database')
-        player_data = await db_cog.get_player(self.user_id)
         total_cost = price * quantity
+        # The coin check and the purchase run under the user's lock, not the modal wait above
+        async with user_locks.hold(self.user_id, "shop_buy"):
+            player_data = await db_cog.get_player(self.user_id)
+            if player_data['coins'] < total_cost:
+                await self.message.edit(
+                    content=f"❌ Not enough coins. You need **{total_cost} 🪙** but only have **{player_data['coins']} 🪙**.",
+                    embed=await self.build_embed(), view=self
+                )
+                return
 
-        if player_data['coins'] < total_cost:
-            await self.message.edit(
-                content=f"❌ Not enough coins. You need **{total_cost} 🪙** but only have **{player_data['coins']} 🪙**.",
-                embed=await self.build_embed(), view=self
-            )
-            return
-
-        await db_cog.add_coins(self.user_id, -total_cost)
-        await db_cog.add_item_to_inventory(self.user_id, self.selected_item_id, quantity)
+            await db_cog.add_coins(self.user_id, -total_cost)
+            await db_cog.add_item_to_inventory(self.user_id, self.selected_item_id, quantity)
         await self.message.edit(
             content=f"✅ Bought **{quantity}x {item['name']}** for **{total_cost} 🪙**.",
             embed=await self.build_embed(), view=self
         )
 
+    @ack_deadline(None)  # opens a modal, which must be the first response
     async def sell_callback(self, interaction: discord.Interaction):
         if not self.selected_item_id:
             return
         db_cog = self.bot.get_cog('Database')
-        item = ITEMS.get(self.selected_item_id, {})
-        sell_price = max(1, item.get('price', 0) // 2)
-
-        inventory = await db_cog.get_player_inventory(self.user_id)
-        inv_item = next((i for i in inventory if i['item_id'] == self.selected_item_id), None)
+        inventory = await db_cog.get_inventory(self.user_id)
+        inv_item = inventory.get_row(self.selected_item_id)
         if not inv_item:
             return
+        item_id = inv_item['item_id']
+        item = ITEMS.get(item_id, {})
+        sell_price = max(1, item.get('price', 0) // 2)
 
         modal = QuantityModal(item_name=item['name'], max_quantity=inv_item['quantity'])
         modal.title = f"Sell {item['name']}"
@@ -236,9 +236,18 @@ class ShopView(discord.ui.View):
         if quantity <= 0:
             return
 
-        await db_cog.remove_item_from_inventory(self.user_id, self.selected_item_id, quantity, inv_item.get('item_data'))
         total_earned = sell_price * quantity
-        await db_cog.add_coins(self.user_id, total_earned)
+        async with user_locks.hold(self.user_id, "shop_sell"):
+            # Re-read: the stack may have been used or sold while the modal was open
+            inv_item = (await db_cog.get_inventory(self.user_id)).get_row(self.selected_item_id)
+            if not inv_item or inv_item['quantity'] < quantity:
+                await self.message.edit(
+                    content=f"❌ You no longer have **{quantity}x {item['name']}** to sell.",
+                    embed=await self.build_embed(), view=self
+                )
+                return
+            await db_cog.remove_item_from_inventory(self.user_id, item_id, quantity, inv_item.get('item_data'))
+            await db_cog.add_coins(self.user_id, total_earned)
         self.selected_item_id = None
         await self.message.edit(
             content=f"✅ Sold **{quantity}x {item['name']}** for **{total_earned} 🪙**.",
@@ -13,11 +13,37 @@ from data.items import ITEMS
 from data.towns import TOWNS
 from data.remnants import REMNANTS
 from data.dialogues import DIALOGUES
+from core.dialogue import get_dialogue_node
+from core.user_locks import user_locks
 from utils.helpers import (
     get_status_bar, get_town_embed, get_remnant_embed,
     check_quest_progress, get_notification, format_log_block,
-    get_location_data, get_connections, is_remnant, get_travel_cost,
+    get_location_data, get_connections, is_remnant,
 )
+from core.world_graph import WorldGraph
+
+
+# Roads, costs and requirements from data/towns.py and data/remnants.py, indexed once
+world_graph = WorldGraph(TOWNS, REMNANTS, default_cost=ACTION_COSTS.get("travel", {}).get("energy", 10))
+
+
+def build_travel_options(exits, player_energy: int) -> list[discord.SelectOption]:
+    """Select options for world_graph.exits(): one per road, 🔒 when the player can't afford it."""
+    options = []
+    for loc_id, name, cost in exits:
+        loc_data = get_location_data(loc_id)
+        gloom = loc_data.get('gloom_level', 0)
+        desc_parts = [f"⚡ {cost} energy"]
+        if gloom > 0:
+            desc_parts.append(f"Gloom: {gloom}%")
+        desc_parts.append("Town" if loc_id in TOWNS else "Remnant")
+        options.append(discord.SelectOption(
+            label=name if player_energy >= cost else f"🔒 {name}",
+            value=loc_id,
+            description=" · ".join(desc_parts),
+            emoji=loc_data.get('emoji'),
+        ))
+    return options
 
 
 def build_on_enter_embed(location_info: dict, entry: dict, text: str) -> discord.Embed:
@@ -161,42 +187,24 @@ class WildsView(discord.ui.View):
 
 
 class TravelView(discord.ui.View):
-    def __init__(self, bot, original_interaction, connections, main_message_to_edit,
+    def __init__(self, bot, original_interaction, exits, main_message_to_edit,
                  from_location_id: str = None, player_energy: int = 0):
         super().__init__(timeout=60)
         self.bot = bot
         self.original_interaction = original_interaction
-        self.connections = connections
+        self.connections = {loc_id: name for loc_id, name, _ in exits}
         self.main_message_to_edit = main_message_to_edit
         self.from_location_id = from_location_id
         self.message = None  # set by travel_callback after send
 
-        default_cost = ACTION_COSTS.get("travel", {}).get("energy", 10)
-
         # Store per-route costs so select_callback can deduct the right amount
-        self.route_costs = {}
-        options = []
-        for loc_id, name in connections.items():
-            cost = get_travel_cost(from_location_id, loc_id, default=default_cost) if from_location_id else default_cost
-            self.route_costs[loc_id] = cost
-            can_afford = player_energy >= cost
-            loc_data = get_location_data(loc_id)
-            gloom = loc_data.get('gloom_level', 0)
-            loc_type = "Town" if loc_id in TOWNS else "Remnant"
-            desc_parts = [f"⚡ {cost} energy"]
-            if gloom > 0:
-                desc_parts.append(f"Gloom: {gloom}%")
-            desc_parts.append(loc_type)
-            options.append(discord.SelectOption(
-                label=name if can_afford else f"🔒 {name}",
-                value=loc_id,
-                description=" · ".join(desc_parts),
-                emoji=loc_data.get('emoji'),
-            ))
+        self.route_costs = {loc_id: cost for loc_id, _, cost in exits}
+        options = build_travel_options(exits, player_energy)
         select = discord.ui.Select(placeholder="Choose a destination...", options=options)
         select.callback = self.select_callback
         self.add_item(select)
 
+    @user_locks.serialized("travel")
     async def select_callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         destination_id = interaction.data['values'][0]
@@ -204,27 +212,25 @@ class TravelView(discord.ui.View):
         user_id = self.original_interaction.user.id
 
         energy_cost = self.route_costs.get(destination_id, ACTION_COSTS.get("travel", {}).get("energy", 10))
-        player_data = await db_cog.get_player(user_id)
-        current_energy = player_data.get('energy', 0)
 
-        # Block travel if player selected a locked (unaffordable) route
-        if current_energy < energy_cost:
+        # Move and pay in one statement; arriving at a town also makes it the respawn point
+        town_id = destination_id if destination_id in world_graph.town_ids else None
+        if await db_cog.travel(user_id, destination_id, energy_cost, town_id) is None:
+            # Block travel if player selected a locked (unaffordable) route
+            player_data = await db_cog.get_player(user_id)
             dest_name = self.connections.get(destination_id, destination_id)
             await interaction.followup.send(
                 f"🔒 You don't have enough energy to reach **{dest_name}**. "
-                f"You need **{energy_cost}** energy but only have **{current_energy}**.",
+                f"You need **{energy_cost}** energy but only have **{player_data.get('energy', 0)}**.",
                 ephemeral=True
             )
             return
 
-        new_energy = max(0, current_energy - energy_cost)
-
-        # Track last town so defeat can respawn the player there
-        update_kwargs = {"current_location": destination_id, "energy": new_energy}
-        if destination_id in TOWNS and not get_location_data(destination_id).get('is_wilds'):
-            update_kwargs["last_town_id"] = destination_id
+        await self.arrive(interaction, user_id, destination_id, [destination_id])
 
-        await db_cog.update_player(user_id, **update_kwargs)
+    async def arrive(self, interaction: discord.Interaction, user_id: int, destination_id: str, stops: list[str]):
+        """Shows the destination in the main message once the move is paid for. stops: every place passed, in order."""
+        db_cog = self.bot.get_cog('Database')
         destination_data = get_location_data(destination_id)
 
         # Determine what kind of location we're arriving at
@@ -262,11 +268,13 @@ class TravelView(discord.ui.View):
         except (discord.NotFound, discord.HTTPException):
             pass
 
-        # Check if arriving here completes a travel quest objective
-        quest_updates = await check_quest_progress(
-            self.bot, user_id, "travel", {"location_id": destination_id},
-            channel=self.original_interaction.channel
-        )
+        # Check if arriving here (or passing through on a journey) completes a travel quest objective
+        quest_updates = []
+        for stop_id in stops:
+            quest_updates += await check_quest_progress(
+                self.bot, user_id, "travel", {"location_id": stop_id},
+                channel=self.original_interaction.channel
+            ) or []
         if quest_updates:
             try:
                 await self.original_interaction.followup.send(
@@ -289,6 +297,66 @@ class TravelView(discord.ui.View):
                 pass
 
 
+class JourneyView(TravelView):
+    """
+    Travel to any unlocked town in one go, along the cheapest open route (core/world_graph.py).
+    The route is re-validated against the player's current flags when chosen, then the whole
+    journey's energy is charged in the same statement that moves the player.
+    """
+
+    def __init__(self, bot, original_interaction, routes, main_message_to_edit,
+                 from_location_id: str, player_energy: int = 0):
+        discord.ui.View.__init__(self, timeout=60)
+        self.bot = bot
+        self.original_interaction = original_interaction
+        self.main_message_to_edit = main_message_to_edit
+        self.from_location_id = from_location_id
+        self.message = None
+        self.routes = {route.destination: route for route in routes[:25]}
+        self.connections = {town_id: world_graph.name(town_id) for town_id in self.routes}
+
+        options = []
+        for town_id, route in self.routes.items():
+            via = ", ".join(world_graph.name(stop) for stop in route.via)
+            description = f"⚡ {route.total} energy" + (f" · via {via}" if via else "")
+            options.append(discord.SelectOption(
+                label=self.connections[town_id] if player_energy >= route.total else f"🔒 {self.connections[town_id]}",
+                value=town_id,
+                description=description[:100],
+                emoji=get_location_data(town_id).get('emoji'),
+            ))
+        select = discord.ui.Select(placeholder="Choose a town...", options=options)
+        select.callback = self.select_callback
+        self.add_item(select)
+
+    @user_locks.serialized("travel")
+    async def select_callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        destination_id = interaction.data['values'][0]
+        route = self.routes[destination_id]
+        db_cog = self.bot.get_cog('Database')
+        user_id = self.original_interaction.user.id
+        player_data = await db_cog.get_player(user_id)
+
+        # The whole route, in one pass: still starting here, and every road still open
+        problem = None
+        if player_data.get('current_location') not in (None, route.stops[0]):
+            problem = "you are no longer where this journey starts"
+        else:
+            problem = world_graph.validate(route, player_data.get('flags', set()))
+        if problem:
+            return await interaction.followup.send(f"🚧 You can't take this journey: {problem}.", ephemeral=True)
+
+        if await db_cog.travel(user_id, destination_id, route.total, destination_id) is None:
+            return await interaction.followup.send(
+                f"🔒 You don't have enough energy to reach **{self.connections[destination_id]}**. "
+                f"The journey costs **{route.total}** energy but you only have **{player_data.get('energy', 0)}**.",
+                ephemeral=True
+            )
+
+        await self.arrive(interaction, user_id, destination_id, route.stops[1:])
+
+
 class RemnantView(discord.ui.View):
     """
     View for Remnant road stops.
@@ -423,34 +491,11 @@ class RemnantView(discord.ui.View):
                 self.add_item(btn)
 
             # Inline travel dropdown — replaces Travel button
-            connections = remnant.get('connections', {})
-            connection_reqs = remnant.get('connection_requirements', {})
-            visible_connections = {
-                loc_id: name for loc_id, name in connections.items()
-                if loc_id not in connection_reqs or connection_reqs[loc_id] in player_flags
-            }
-            if visible_connections:
-                default_cost = ACTION_COSTS.get("travel", {}).get("energy", 10)
-                travel_options = []
-                for loc_id, name in visible_connections.items():
-                    cost = get_travel_cost(self.remnant_id, loc_id, default_cost)
-                    can_afford = player_energy >= cost
-                    loc_data = get_location_data(loc_id)
-                    gloom = loc_data.get('gloom_level', 0)
-                    loc_type = "Town" if loc_id in TOWNS else "Remnant"
-                    desc_parts = [f"⚡ {cost} energy"]
-                    if gloom > 0:
-                        desc_parts.append(f"Gloom: {gloom}%")
-                    desc_parts.append(loc_type)
-                    travel_options.append(discord.SelectOption(
-                        label=name if can_afford else f"🔒 {name}",
-                        value=loc_id,
-                        description=" · ".join(desc_parts),
-                        emoji=loc_data.get('emoji'),
-                    ))
+            exits = world_graph.exits(self.remnant_id, player_flags)
+            if exits:
                 travel_select = discord.ui.Select(
                     placeholder="🗺️ Travel to...",
-                    options=travel_options,
+                    options=build_travel_options(exits, player_energy),
                 )
                 travel_select.callback = self.inline_travel_callback
                 self.add_item(travel_select)
@@ -785,78 +830,7 @@ class RemnantView(discord.ui.View):
     async def _get_dialogue_node(self, npc_id):
         """Resolves the active dialogue node for an NPC from data/dialogues.py.
         Mirrors TownView._get_dialogue_node."""
-        npc_data = DIALOGUES.get(npc_id, {})
-        dialogue_tree = npc_data.get('dialogue_tree', [])
-        db_cog = self.bot.get_cog('Database')
-        player_quests = await db_cog.get_active_quests(self.user_id)
-        player_data = await db_cog.get_player(self.user_id)
-        player_flags = player_data.get('flags', set())
-        time_of_day = player_data.get('day_of_cycle', 'morning')
-
-        inventory = await db_cog.get_player_inventory(self.user_id)
-        owned_items = {i['item_id'] for i in inventory}
-
-        from utils.helpers import get_player_rank_info
-        from utils.constants import CREST_RANKS
-        num_crests = await db_cog.count_player_crests(self.user_id)
-        player_rank = get_player_rank_info(num_crests)['rank']
-        rank_order = [r['rank'] for r in CREST_RANKS]
-        player_rank_index = rank_order.index(player_rank) if player_rank in rank_order else 0
-
-        _req_keys = ("required_flag", "required_item", "required_quest_status",
-                     "required_quest_step", "required_time", "required_rank")
-
-        for node in dialogue_tree:
-            if "required_flag" in node:
-                if node["required_flag"] not in player_flags:
-                    continue
-
-            if "required_item" in node:
-                if node["required_item"] not in owned_items:
-                    continue
-
-            if "required_quest_status" in node:
-                req = node["required_quest_status"]
-                status = req['status']
-                qid   = req['quest_id']
-                if status == 'active':
-                    if not any(q['quest_id'] == qid for q in player_quests):
-                        continue
-                else:
-                    if f"quest_{qid}_{status}" not in player_flags:
-                        continue
-
-            if "required_quest_step" in node:
-                req = node["required_quest_step"]
-                quest = next((q for q in player_quests if q['quest_id'] == req['quest_id']), None)
-                if not (quest and quest['progress'].get('count', 0) == req['step']):
-                    continue
-
-            if "required_time" in node:
-                if time_of_day not in node["required_time"]:
-                    continue
-
-            if "required_rank" in node:
-                req_rank = node["required_rank"]
-                req_rank_index = rank_order.index(req_rank) if req_rank in rank_order else 0
-                if player_rank_index < req_rank_index:
-                    continue
-
-            if any(k in node for k in _req_keys):
-                return node, npc_data
-
-        grant_quest_node = next(
-            (n for n in dialogue_tree
-             if n.get("action") == "grant_quest"
-             and not any(k in n for k in _req_keys)
-             and not any(q['quest_id'] == n.get("quest_id") for q in player_quests)),
-            None,
-        )
-        if grant_quest_node:
-            return grant_quest_node, npc_data
-
-        default_node = next((n for n in dialogue_tree if "default" in n), None)
-        return default_node, npc_data
+        return await get_dialogue_node(self.bot.get_cog('Database'), self.user_id, npc_id)
 
     async def explore_callback(self, interaction: discord.Interaction):
         remnant = REMNANTS.get(self.remnant_id, {})
@@ -898,6 +872,7 @@ class RemnantView(discord.ui.View):
         msg = await interaction.followup.send(embed=embed, view=shop_view, ephemeral=True)
         shop_view.message = msg
 
+    @user_locks.serialized("rest")
     async def rest_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         db_cog = self.bot.get_cog('Database')
@@ -907,47 +882,42 @@ class RemnantView(discord.ui.View):
         energy_restore = rest_cfg.get('energy_restore', 20)
         flavor = rest_cfg.get('flavor', "You take a moment to catch your breath.")
 
-        player_data = await db_cog.get_player(self.user_id)
-        max_energy = player_data.get('max_energy', 100)
-        current_energy = player_data.get('energy', 0)
-        restored = min(energy_restore, max_energy - current_energy)
-        await db_cog.update_player(self.user_id, energy=current_energy + restored)
+        # Relative update: a regen tick or another action landing meanwhile isn't overwritten
+        new_energy = await db_cog.add_energy(self.user_id, energy_restore)
+        if new_energy is None:
+            return
 
         new_embed = await self._build_sublocation_embed(location_info)
         new_embed.add_field(
             name="🔥 Rested",
-            value=f"*{flavor}*\n\n+**{restored} energy** restored.",
+            value=f"*{flavor}*\n\nEnergy restored: now **{new_energy}**.",
             inline=False
         )
         await interaction.edit_original_response(embed=new_embed, view=self)
 
+    @user_locks.serialized("travel")
     async def inline_travel_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         destination_id = interaction.data['values'][0]
         db_cog = self.bot.get_cog('Database')
         player_data = await db_cog.get_player(self.user_id)
 
-        default_cost = ACTION_COSTS.get("travel", {}).get("energy", 10)
-        energy_cost = get_travel_cost(self.remnant_id, destination_id, default_cost)
-        current_energy = player_data.get('energy', 0)
+        road = next((e for e in world_graph.exits(self.remnant_id, player_data.get('flags', set()))
+                     if e[0] == destination_id), None)
+        if road is None:
+            return await interaction.followup.send("That road is closed to you.", ephemeral=True)
+        _, dest_name, energy_cost = road
 
-        # Block if locked route selected
-        if current_energy < energy_cost:
-            remnant = REMNANTS.get(self.remnant_id, {})
-            dest_name = remnant.get('connections', {}).get(destination_id, destination_id)
+        town_id = destination_id if destination_id in world_graph.town_ids else None
+        if await db_cog.travel(self.user_id, destination_id, energy_cost, town_id) is None:
+            # Block if locked route selected
             await interaction.followup.send(
                 f"🔒 Not enough energy to reach **{dest_name}**. "
-                f"Need **{energy_cost}** — you have **{current_energy}**.",
+                f"Need **{energy_cost}** — you have **{player_data.get('energy', 0)}**.",
                 ephemeral=True
             )
             return
 
-        new_energy = max(0, current_energy - energy_cost)
-        update_kwargs = {"current_location": destination_id, "energy": new_energy}
-        if destination_id in TOWNS and not get_location_data(destination_id).get('is_wilds'):
-            update_kwargs["last_town_id"] = destination_id
-        await db_cog.update_player(self.user_id, **update_kwargs)
-
         destination_data = get_location_data(destination_id)
         if destination_data.get('is_wilds'):
             new_embed = discord.Embed(
@@ -1065,6 +1035,7 @@ class TownView(discord.ui.View):
         # Cached player state for build_ui (sync) — refreshed in initial_setup and key callbacks
         self._player_energy = 0
         self._player_flags = set()
+        self._unlocked_towns = []
 
     async def initial_setup(self):
         """Asynchronously fetch player state then build the UI."""
@@ -1073,6 +1044,7 @@ class TownView(discord.ui.View):
         if player_data:
             self._player_energy = player_data.get('energy', 0)
             self._player_flags = player_data.get('flags', set())
+            self._unlocked_towns = [t for t in (player_data.get('unlocked_towns') or []) if t != self.town_id]
         self.build_ui()
 
     # --- NEW HELPER TO BUILD THE SUB-LOCATION EMBED ---
@@ -1226,33 +1198,10 @@ class TownView(discord.ui.View):
                 self.add_item(select)
 
             # Inline travel dropdown — replaces Travel button
-            all_connections = town_info.get('connections', {})
-            connection_reqs = town_info.get('connection_requirements', {})
-            travel_connections = {
-                loc_id: name for loc_id, name in all_connections.items()
-                if not get_location_data(loc_id).get('is_wilds')
-                and (loc_id not in connection_reqs or connection_reqs[loc_id] in self._player_flags)
-            }
-            if travel_connections:
-                default_cost = ACTION_COSTS.get("travel", {}).get("energy", 10)
-                travel_options = []
-                for loc_id, name in travel_connections.items():
-                    cost = get_travel_cost(self.town_id, loc_id, default_cost)
-                    can_afford = self._player_energy >= cost
-                    loc_data = get_location_data(loc_id)
-                    gloom = loc_data.get('gloom_level', 0)
-                    loc_type = "Town" if loc_id in TOWNS else "Remnant"
-                    desc_parts = [f"⚡ {cost} energy"]
-                    if gloom > 0:
-                        desc_parts.append(f"Gloom: {gloom}%")
-                    desc_parts.append(loc_type)
-                    travel_options.append(discord.SelectOption(
-                        label=name if can_afford else f"🔒 {name}",
-                        value=loc_id,
-                        description=" · ".join(desc_parts),
-                        emoji=loc_data.get('emoji'),
-                    ))
-                travel_select = discord.ui.Select(placeholder="🗺️ Travel to...", options=travel_options)
+            exits = world_graph.exits(self.town_id, self._player_flags)
+            if exits:
+                travel_select = discord.ui.Select(placeholder="🗺️ Travel to...",
+                                                  options=build_travel_options(exits, self._player_energy))
                 travel_select.callback = self.inline_travel_callback
                 self.add_item(travel_select)
 
@@ -1265,6 +1214,11 @@ class TownView(discord.ui.View):
                 explore_wilds_button.callback = self.explore_wilds_callback
                 self.add_item(explore_wilds_button)
 
+            if self._unlocked_towns:
+                journey_button = discord.ui.Button(label="Journey", style=discord.ButtonStyle.blurple, emoji="🧭")
+                journey_button.callback = self.journey_callback
+                self.add_item(journey_button)
+
     async def explore_wilds_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         db_cog = self.bot.get_cog('Database')
@@ -1282,6 +1236,7 @@ class TownView(discord.ui.View):
         await interaction.edit_original_response(embed=new_embed, view=new_view)
         new_view.message = await interaction.original_response()
 
+    @user_locks.serialized("rest")
     async def rest_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         time_cog = self.bot.get_cog('Time')
@@ -1435,33 +1390,29 @@ class TownView(discord.ui.View):
         self.build_ui()
         await interaction.edit_original_response(embed=new_embed, view=self)
 
+    @user_locks.serialized("travel")
     async def inline_travel_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         destination_id = interaction.data['values'][0]
         db_cog = self.bot.get_cog('Database')
         player_data = await db_cog.get_player(self.user_id)
 
-        default_cost = ACTION_COSTS.get("travel", {}).get("energy", 10)
-        energy_cost = get_travel_cost(self.town_id, destination_id, default_cost)
-        current_energy = player_data.get('energy', 0)
+        road = next((e for e in world_graph.exits(self.town_id, player_data.get('flags', set()))
+                     if e[0] == destination_id), None)
+        if road is None:
+            return await interaction.followup.send("That road is closed to you.", ephemeral=True)
+        energy_cost = road[2]
 
-        if current_energy < energy_cost:
+        # Update last_town_id if destination is a real town (not wilds)
+        dest_data = get_location_data(destination_id)
+        town_id = destination_id if destination_id in world_graph.town_ids else None
+        if await db_cog.travel(self.user_id, destination_id, energy_cost, town_id) is None:
             await interaction.followup.send(
-                f"🔒 Not enough energy to travel there. You need **{energy_cost}** but have **{current_energy}**.",
+                f"🔒 Not enough energy to travel there. You need **{energy_cost}** but have **{player_data.get('energy', 0)}**.",
                 ephemeral=True
             )
             return
 
-        new_energy = max(0, current_energy - energy_cost)
-        update_kwargs = {"current_location": destination_id, "energy": new_energy}
-
-        # Update last_town_id if destination is a real town (not wilds)
-        dest_data = get_location_data(destination_id)
-        if destination_id in TOWNS and not dest_data.get('is_wilds'):
-            update_kwargs["last_town_id"] = destination_id
-
-        await db_cog.update_player(self.user_id, **update_kwargs)
-
 
         if destination_id in TOWNS:
             if dest_data.get('is_wilds'):
@@ -1502,35 +1453,41 @@ class TownView(discord.ui.View):
         db_cog = self.bot.get_cog('Database')
         player_data = await db_cog.get_player(self.user_id)
 
-        town_data = get_location_data(self.town_id)
-        all_connections = town_data.get('connections', {})
-        connection_reqs = town_data.get('connection_requirements', {})
-        player_flags = player_data.get('flags', set())
-
-        # Filter out wilds zones and locked destinations
-        connections = {
-            loc_id: name for loc_id, name in all_connections.items()
-            if not get_location_data(loc_id).get('is_wilds')
-            and (loc_id not in connection_reqs or connection_reqs[loc_id] in player_flags)
-        }
+        # Roads open to the player (wilds are entered from the town, not travelled to)
+        exits = world_graph.exits(self.town_id, player_data.get('flags', set()))
 
-        if not connections:
+        if not exits:
             return await interaction.followup.send("There's nowhere to travel to from here.", ephemeral=True)
 
         # Check player has enough energy for at least one route
-        default_cost = ACTION_COSTS.get("travel", {}).get("energy", 10)
-        min_cost = min(get_travel_cost(self.town_id, loc_id, default_cost) for loc_id in connections)
+        min_cost = min(cost for _, _, cost in exits)
         if player_data.get('energy', 0) < min_cost:
             return await interaction.followup.send(
                 f"You're too exhausted to travel. You need at least **{min_cost} energy** for the nearest road.",
                 ephemeral=True
             )
 
-        travel_view = TravelView(self.bot, self.parent_interaction, connections, self.message,
+        travel_view = TravelView(self.bot, self.parent_interaction, exits, self.message,
                                  from_location_id=self.town_id, player_energy=player_data.get('energy', 0))
         travel_msg = await interaction.followup.send("Where would you like to travel?", view=travel_view, ephemeral=True)
         travel_view.message = travel_msg
 
+    async def journey_callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        db_cog = self.bot.get_cog('Database')
+        player_data = await db_cog.get_player(self.user_id)
+
+        routes = world_graph.journeys(self.town_id, player_data.get('unlocked_towns') or [],
+                                      player_data.get('flags', set()))
+        if not routes:
+            return await interaction.followup.send("None of the towns you know can be reached from here.", ephemeral=True)
+
+        journey_view = JourneyView(self.bot, self.parent_interaction, routes, self.message,
+                                   from_location_id=self.town_id, player_energy=player_data.get('energy', 0))
+        journey_msg = await interaction.followup.send("Which town would you like to journey to?", view=journey_view, ephemeral=True)
+        journey_view.message = journey_msg
+
+    @user_locks.serialized("starter_pack")
     async def starter_pack_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         db_cog = self.bot.get_cog('Database')
@@ -1678,91 +1635,8 @@ class TownView(discord.ui.View):
         return talk_callback
 
     async def _get_dialogue_node(self, npc_id):
-        npc_data = DIALOGUES.get(npc_id, {})
-        dialogue_tree = npc_data.get('dialogue_tree', [])
-        db_cog = self.bot.get_cog('Database')
-        player_quests = await db_cog.get_active_quests(self.user_id)
-        player_data = await db_cog.get_player(self.user_id)
-        player_flags = player_data.get('flags', set())
-        time_of_day = player_data.get('day_of_cycle', 'morning')
-
-        # Build owned item set for required_item checks
-        inventory = await db_cog.get_player_inventory(self.user_id)
-        owned_items = {i['item_id'] for i in inventory}
-
-        # Build player rank for required_rank checks
-        from utils.helpers import get_player_rank_info
-        from utils.constants import CREST_RANKS
-        num_crests = await db_cog.count_player_crests(self.user_id)
-        player_rank = get_player_rank_info(num_crests)['rank']
-        rank_order = [r['rank'] for r in CREST_RANKS]
-        player_rank_index = rank_order.index(player_rank) if player_rank in rank_order else 0
-
-        _req_keys = ("required_flag", "required_item", "required_quest_status",
-                     "required_quest_step", "required_time", "required_rank")
-
-        for node in dialogue_tree:
-            # --- required_flag ---
-            if "required_flag" in node:
-                if node["required_flag"] not in player_flags:
-                    continue
-
-            # --- required_item ---
-            if "required_item" in node:
-                if node["required_item"] not in owned_items:
-                    continue
-
-            # --- required_quest_status ---
-            # status "active"   → quest is in the active_quests list right now
-            # status "completed"/"failed" → persistent flag set after the quest ends
-            if "required_quest_status" in node:
-                req = node["required_quest_status"]
-                status = req['status']
-                qid   = req['quest_id']
-                if status == 'active':
-                    if not any(q['quest_id'] == qid for q in player_quests):
-                        continue
-                else:
-                    if f"quest_{qid}_{status}" not in player_flags:
-                        continue
-
-            # --- required_quest_step ---
-            if "required_quest_step" in node:
-                req = node["required_quest_step"]
-                quest = next((q for q in player_quests if q['quest_id'] == req['quest_id']), None)
-                if not (quest and quest['progress'].get('count', 0) == req['step']):
-                    continue
-
-            # --- required_time: list of valid time-of-day phases ---
-            if "required_time" in node:
-                if time_of_day not in node["required_time"]:
-                    continue
-
-            # --- required_rank: minimum rank (by CREST_RANKS order) ---
-            if "required_rank" in node:
-                req_rank = node["required_rank"]
-                req_rank_index = rank_order.index(req_rank) if req_rank in rank_order else 0
-                if player_rank_index < req_rank_index:
-                    continue
-
-            # Node passed all checks — return it if it has any required key
-            if any(k in node for k in _req_keys):
-                return node, npc_data
-
-        # Fallback 1: unconditional grant_quest nodes (quest not yet active)
-        grant_quest_node = next(
-            (n for n in dialogue_tree
-             if n.get("action") == "grant_quest"
-             and not any(k in n for k in _req_keys)
-             and not any(q['quest_id'] == n.get("quest_id") for q in player_quests)),
-            None,
-        )
-        if grant_quest_node:
-            return grant_quest_node, npc_data
-
-        # Fallback 2: default node
-        default_node = next((n for n in dialogue_tree if "default" in n), None)
-        return default_node, npc_data
+        # Conditions are precompiled in core/dialogue.py; only the facts this NPC needs are fetched
+        return await get_dialogue_node(self.bot.get_cog('Database'), self.user_id, npc_id)
 
     async def _handle_dialogue_action(self, interaction, npc_data, node, npc_id):
         if not node:
@@ -0,0 +1,241 @@
+# core/battle_ai.py
+# Search-based opponent AI for boss and elite encounters (gloom-touched pets, high-Gloom remnants).
+# utils.helpers.get_ai_move picks moves from per-personality rules. This tier instead plays the
+# wild pet's candidate moves forward on throwaway copies of the battle (BattleState.from_snapshot
+# — the same headless engine scripts/simulate_battles.py drives) and picks the move that holds up
+# best: Monte Carlo tree search (UCT) over the wild pet's moves, with the player's replies
+# sampled uniformly and the dice rolled by each copy's own seed.
+# Tree nodes live in a transposition table keyed on the battle position, so lines that reach the
+# same position through different moves share their statistics, and the next round's search
+# starts from what this round's already learned.
+# The search runs in the shared process pool (core/executor.py) under a strict wall-clock budget;
+# the event loop only awaits the result, and falls back to get_ai_move if it doesn't arrive in time.
+# It does NOT handle Discord UI.
+
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from core import config
+from core.battle_replay import NullLog
+from core.executor import process_pool
+from core.metrics import get_histogram
+from utils.helpers import get_location_data
+
+# Rounds played forward from the current position before the position is scored
+SEARCH_DEPTH = 4
+# UCT exploration constant (values are in [-1, 1])
+EXPLORATION = 1.2
+# Battles whose transposition tables a worker keeps between rounds, and positions per table
+TABLES_PER_WORKER = 64
+MAX_POSITIONS = 50_000
+
+_search_wait_histogram = get_histogram("battle_ai.search_wait_ms")
+_rollouts_histogram = get_histogram("battle_ai.rollouts", buckets=(10, 25, 50, 100, 250, 500, 1000, 2500), unit="")
+
+
+def is_elite_encounter(wild_pet, location_id: Optional[str]) -> bool:
+    """Boss/elite fights: gloom-touched pets, or any battle in a location with heavy Gloom."""
+    if wild_pet.get("is_gloom_touched"):
+        return True
+    location = get_location_data(location_id) if location_id else {}
+    gloom_level = location.get("gloom_level") or location.get("services", {}).get("gloom_level") or 0
+    return gloom_level >= config.SEARCH_AI_MIN_GLOOM
+
+
+# -------------------------
+# Rollouts
+# -------------------------
+class _SearchDatabase:
+    """Stands in for the Database cog inside rollouts: nothing is read or written."""
+
+    async def add_xp(self, pet_id, amount):
+        return None, False, None
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            return None
+        return call
+
+
+class _SearchBot:
+    def __init__(self):
+        self.database = _SearchDatabase()
+
+    def get_cog(self, name):
+        return self.database if name == "Database" else None
+
+
+def _run(coro):
+    """Runs an engine coroutine to completion without an event loop (rollouts never really wait)."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("battle search awaited real I/O")
+
+
+def position_key(battle) -> tuple:
+    """Everything about a battle position that can change during it — the transposition table key."""
+    def effects(effect_list):
+        return tuple(sorted((e.get("type"), e.get("status_effect"), e.get("stat"),
+                             e.get("modifier"), e.get("duration")) for e in effect_list))
+
+    return (
+        tuple(pet["current_hp"] for pet in battle.player_roster),
+        tuple(pet["current_hp"] for pet in battle.opponent_roster),
+        battle.player_pet.get("pet_id"),
+        effects(battle.player_pet_effects),
+        effects(battle.wild_pet_effects),
+        effects(battle.field_effects["player"]) + effects(battle.field_effects["opponent"]),
+        battle.gloom_meter,
+        tuple(battle.disabled_moves),
+    )
+
+
+def evaluate(battle) -> float:
+    """Score in [-1, 1] from the wild pet's side: its HP share minus the player team's."""
+    wild = battle.wild_pet
+    wild_share = max(0, wild["current_hp"]) / max(1, wild["max_hp"])
+    player_hp = sum(max(0, pet["current_hp"]) for pet in battle.player_roster)
+    player_max = sum(max(1, pet["max_hp"]) for pet in battle.player_roster)
+    return wild_share - player_hp / player_max
+
+
+class _Node:
+    """Move statistics for one position: {skill_id: [visits, total value]}."""
+
+    __slots__ = ("visits", "moves")
+
+    def __init__(self, skills: List[str]):
+        self.visits = 0
+        self.moves: Dict[str, List[float]] = {skill_id: [0, 0.0] for skill_id in skills}
+
+    def select(self) -> str:
+        for skill_id, (visits, _) in self.moves.items():
+            if not visits:
+                return skill_id
+        log_visits = math.log(self.visits)
+        return max(self.moves, key=lambda skill_id: (
+            self.moves[skill_id][1] / self.moves[skill_id][0]
+            + EXPLORATION * math.sqrt(log_visits / self.moves[skill_id][0])
+        ))
+
+    def update(self, skill_id: str, value: float):
+        self.visits += 1
+        stats = self.moves[skill_id]
+        stats[0] += 1
+        stats[1] += value
+
+
+def _play_round(battle, player_skill: str, ai_skill: str) -> Optional[float]:
+    """Plays one round on a rollout copy. Returns the final score if the battle ended, else None."""
+    result = _run(battle.process_round(player_skill, ai_skill_id=ai_skill))
+    if result.get("is_over"):
+        return -1.0 if result.get("win") else 1.0
+    if result.get("switch_required"):
+        if result.get("fainted_side") == "opponent":
+            return -1.0  # the boss went down; what comes next doesn't matter to it
+        next_pet = next((p for p in battle.player_roster if p["current_hp"] > 0), None)
+        if next_pet is None:
+            return 1.0
+        _run(battle.set_active_player_pet(next_pet["pet_id"]))
+    return None
+
+
+# One table per battle, per worker process: {battle_key: {position_key: _Node}}
+_tables: "OrderedDict[tuple, Dict[tuple, _Node]]" = OrderedDict()
+
+
+def _table_for(battle_key: tuple) -> Dict[tuple, _Node]:
+    table = _tables.pop(battle_key, None)
+    if table is None or len(table) > MAX_POSITIONS:
+        table = {}
+    _tables[battle_key] = table  # most recently used last
+    while len(_tables) > TABLES_PER_WORKER:
+        _tables.popitem(last=False)
+    return table
+
+
+def search_move(snapshot: dict, battle_key: tuple, budget_ms: float, seed: int) -> Tuple[Optional[str], int]:
+    """
+    Runs UCT from the snapshot's position until the budget is spent.
+    Returns (the wild pet's most-visited move, rollouts played). Runs inside a worker process.
+    """
+    from core.battle_engine import BattleState  # the engine imports this module
+
+    deadline = time.perf_counter() + budget_ms / 1000
+    rng = random.Random(seed)
+    bot = _SearchBot()
+    table = _table_for(battle_key)
+
+    root = BattleState.from_snapshot(bot, 0, snapshot)
+    if root is None or not root.wild_pet.get("skills"):
+        return None, 0
+    root_key = position_key(root)
+
+    rollouts = 0
+    while time.perf_counter() < deadline:
+        battle = BattleState.from_snapshot(bot, 0, snapshot, seed=rng.getrandbits(63))
+        battle.action_log = NullLog()
+        path: List[Tuple[_Node, str]] = []
+        value = None
+        key = root_key
+        for _ in range(SEARCH_DEPTH):
+            node = table.get(key)
+            if node is None:
+                node = table[key] = _Node(battle.wild_pet.get("skills") or ["scratch"])
+            ai_skill = node.select()
+            player_skill = rng.choice(battle.player_pet.get("skills") or ["scratch"])
+            path.append((node, ai_skill))
+            try:
+                value = _play_round(battle, player_skill, ai_skill)
+            except Exception:
+                value = None  # an engine error in a rollout scores the position as it stands
+                break
+            if value is not None:
+                break
+            key = position_key(battle)
+        if value is None:
+            value = evaluate(battle)
+        for node, ai_skill in path:
+            node.update(ai_skill, value)
+        rollouts += 1
+
+    root_node = table.get(root_key)
+    if root_node is None or not root_node.visits:
+        return None, rollouts
+    best = max(root_node.moves, key=lambda skill_id: root_node.moves[skill_id][0])
+    return best, rollouts
+
+
+# -------------------------
+# Event-loop side
+# -------------------------
+
+async def choose_search_move(battle) -> Optional[str]:
+    """
+    The search AI's move for the coming round, or None (the caller then uses get_ai_move).
+    Waits at most a little over the budget; a slow or failed search just falls back.
+    """
+    if not config.SEARCH_AI_ENABLED:
+        return None
+    budget_ms = config.SEARCH_AI_BUDGET_MS
+    # Same battle, same table: the worker reuses what earlier rounds' searches learned
+    battle_key = (battle.user_id, battle.seed)
+    # Not battle.rng — the search must not shift the battle's own random stream (replays)
+    search_seed = random.getrandbits(63)
+    started = time.perf_counter()
+    try:
+        future = process_pool.run(search_move, battle.to_snapshot(), battle_key, budget_ms, search_seed)
+        skill_id, rollouts = await asyncio.wait_for(future, timeout=budget_ms / 1000 * 2 + 0.5)
+    except Exception as e:
+        print(f"--- [BATTLE AI] search failed, using heuristic AI: {type(e).__name__}: {e}")
+        return None
+    _search_wait_histogram.observe((time.perf_counter() - started) * 1000)
+    _rollouts_histogram.observe(rollouts)
+    return skill_id
@@ -19,26 +19,49 @@ from core.effect_system import (
     apply_effect,
     tick_effects_for_pet,
     EFFECT_HANDLERS, format_pet_name,
+    EVENT_ON_DAMAGE_CALCULATION,
 )
+from core.battle_types import BattlePet, EffectList
+from core.battle_replay import BattleLog, recorded_action
+
+def _roster_index(roster: List[dict], pet: dict) -> int:
+    """Position of the active pet in its roster (by identity, falling back to pet_id)."""
+    for index, member in enumerate(roster):
+        if member is pet:
+            return index
+    for index, member in enumerate(roster):
+        if pet.get('pet_id') and member.get('pet_id') == pet.get('pet_id'):
+            return index
+    return 0
+
+
+# Bump when the snapshot layout changes; older snapshots are then discarded instead of resumed
+SNAPSHOT_VERSION = 1
 
 
 class BattleState:
-    def __init__(self, bot, user_id, player_roster: List[dict], opponent_roster: List[dict]):
+    def __init__(self, bot, user_id, player_roster: List[dict], opponent_roster: List[dict],
+                 seed: Optional[int] = None):
         self.bot = bot
         self.db_cog = bot.get_cog('Database')
         self.user_id = user_id
 
-        # Store the full rosters
-        self.player_roster = player_roster
-        self.opponent_roster = opponent_roster
+        # Every random draw in the battle comes from this stream, so seed + inputs replay it exactly
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.action_log = BattleLog(self.seed, user_id)
+
+        # Store the full rosters (as BattlePets; plain dict rows are wrapped)
+        self.player_roster = [BattlePet.wrap(pet) for pet in player_roster]
+        self.opponent_roster = [BattlePet.wrap(pet) for pet in opponent_roster]
 
         # The active pets are the first in each roster
         self.player_pet = self.player_roster[0]
         self.wild_pet = self.opponent_roster[0]  # Renaming to opponent_pet might be clearer later
 
-        self.player_pet_effects: List[dict] = []
-        self.wild_pet_effects: List[dict] = []
-        self.field_effects: Dict[str, List[dict]] = {"player": [], "opponent": []}
+        self.player_pet_effects = EffectList()
+        self.wild_pet_effects = EffectList()
+        self.field_effects: Dict[str, EffectList] = {"player": EffectList(), "opponent": EffectList()}
         self.turn_count = 1
         self.turn_log: List[str] = []
         self.gloom_meter = 0
@@ -48,28 +71,88 @@ class BattleState:
         self.purify_charges = 1
         self.pending_player_heal = 0.0
         self.disabled_moves: List[str] = []
+        self.search_ai = False  # elite encounter: the wild pet's moves come from core.battle_ai
 
-        # -------------------------
+    # -------------------------
+    # Snapshots (save/resume)
+    # -------------------------
+    def to_snapshot(self) -> dict:
+        """
+        Everything needed to rebuild this battle at a round boundary, as plain JSON-safe data.
+        The turn log is left out — it's only the last round's text.
+        """
+        return {
+            "v": SNAPSHOT_VERSION,
+            "player_roster": [pet.to_dict() for pet in self.player_roster],
+            "opponent_roster": [pet.to_dict() for pet in self.opponent_roster],
+            "player_index": _roster_index(self.player_roster, self.player_pet),
+            "opponent_index": _roster_index(self.opponent_roster, self.wild_pet),
+            "player_pet_effects": self.player_pet_effects.to_dicts(),
+            "wild_pet_effects": self.wild_pet_effects.to_dicts(),
+            "field_effects": {side: effects.to_dicts() for side, effects in self.field_effects.items()},
+            "turn_count": self.turn_count,
+            "gloom_meter": self.gloom_meter,
+            "pending_skill_learns": self.pending_skill_learns,
+            "pending_skill_choices": self.pending_skill_choices,
+            "pending_evolutions": self.pending_evolutions,
+            "purify_charges": self.purify_charges,
+            "pending_player_heal": self.pending_player_heal,
+            "disabled_moves": self.disabled_moves,
+            "search_ai": self.search_ai,
+        }
+
+    @classmethod
+    def from_snapshot(cls, bot, user_id, snapshot: dict, seed: Optional[int] = None) -> Optional["BattleState"]:
+        """Rebuilds a battle from to_snapshot() output. Returns None for snapshots from an older layout."""
+        if snapshot.get("v") != SNAPSHOT_VERSION:
+            return None
+        battle = cls(bot, user_id, snapshot["player_roster"], snapshot["opponent_roster"], seed=seed)
+        battle.player_pet = battle.player_roster[snapshot.get("player_index", 0)]
+        battle.wild_pet = battle.opponent_roster[snapshot.get("opponent_index", 0)]
+        battle.player_pet_effects = EffectList(snapshot.get("player_pet_effects", []))
+        battle.wild_pet_effects = EffectList(snapshot.get("wild_pet_effects", []))
+        field_effects = snapshot.get("field_effects", {})
+        battle.field_effects = {side: EffectList(field_effects.get(side, [])) for side in ("player", "opponent")}
+        battle.turn_count = snapshot.get("turn_count", 1)
+        battle.gloom_meter = snapshot.get("gloom_meter", 0)
+        # JSON object keys come back as strings; pet ids are ints everywhere else
+        battle.pending_skill_learns = {int(k): v for k, v in snapshot.get("pending_skill_learns", {}).items()}
+        battle.pending_skill_choices = {int(k): v for k, v in snapshot.get("pending_skill_choices", {}).items()}
+        battle.pending_evolutions = snapshot.get("pending_evolutions", [])
+        battle.purify_charges = snapshot.get("purify_charges", 1)
+        battle.pending_player_heal = snapshot.get("pending_player_heal", 0.0)
+        battle.disabled_moves = snapshot.get("disabled_moves", [])
+        battle.search_ai = snapshot.get("search_ai", False)
+        return battle
+
+    def _notify(self, key: str, **kwargs) -> str:
+        return get_notification(key, rng=self.rng, **kwargs)
+
+    async def _read(self, call: str, *args):
+        """A database read whose answer the battle depends on; the answer is kept in the action log."""
+        result = await getattr(self.db_cog, call)(*args)
+        self.action_log.db_result(call, result)
+        return result
+
+    # -------------------------
     # Stats with modifiers
     # -------------------------
-    def _get_modified_stat(self, pet: dict, stat: str, is_player: bool) -> int:
+    def _get_modified_stat(self, pet: BattlePet, stat: str, is_player: bool) -> int:
         """Return modified stat after checking for null_field."""
         base_value = pet.get(stat, 0)
 
         # --- Check for Null Field ---
-        is_null_field_active = any(eff.get("status_effect") == "null_field" for eff in self.field_effects["player"])
-        if is_null_field_active:
+        if self.field_effects["player"].has_status("null_field"):
             return math.floor(base_value)  # Return base stat if field is null
 
         final_value = float(base_value)
         effects_list = self.player_pet_effects if is_player else self.wild_pet_effects
-        for effect in effects_list:
-            if effect.get("type") == "stat_change" and effect.get("stat") == stat:
-                final_value *= effect.get("modifier", 1.0)
+        for effect in effects_list.stat_changes(stat):
+            final_value *= effect.modifier
         return math.floor(final_value)
 
     # -------------------------
-    # Event trigger dispatcher (scans active statuses and field effects)
+    # Event trigger dispatcher (runs the subject's effects subscribed to the event)
     # -------------------------
     async def trigger_event(self, event_name: str, subject_pet: dict, source_pet: dict = None,
                             context: Optional[dict] = None) -> any:
@@ -90,85 +173,71 @@ class BattleState:
         is_player_subject = is_player_pet(subject_pet)
         effects_list = self.player_pet_effects if is_player_subject else self.wild_pet_effects
 
-        for active_effect in effects_list[:]:
-            trigger_data = active_effect.get(event_name)
-            if not trigger_data:
+        skill_info = context.get("skill_info", {})
+
+        # Only this event's subscribers; copied since consumed effects are removed below.
+        # Their if_* conditions were compiled into one predicate when the effect was applied.
+        for active_effect in tuple(effects_list.subscribers(event_name)):
+            if not active_effect.triggers[event_name](context):
                 continue
+            trigger_data = active_effect.extra[event_name]
+
+            # --- Event-Specific Logic ---
+            if event_name == "on_action_attempt" and "chance_to_fail" in trigger_data:
+                if self.rng.random() < trigger_data["chance_to_fail"]:
+                    subject_name = f"**{subject_pet.get('name', subject_pet.get('species'))}**"
+                    prevention_log = f"› {subject_name}'s action was thwarted by {active_effect.get('status_effect')}!"
+                    action_prevented = True
+                    break
+
+            if event_name == "on_being_hit" and "damage_modifier" in trigger_data:
+                modifier = trigger_data["damage_modifier"]
+                modified_damage = math.floor(modified_damage * modifier)
+                self.turn_log.append(
+                    f"› {subject_pet.get('name')}'s {active_effect.get('status_effect')} softened the blow!")
+
+            if event_name == "on_switch_out" and "heal_next_pet_percent" in trigger_data:
+                self.pending_player_heal = trigger_data["heal_next_pet_percent"]
+
+            if event_name == "on_faint" and trigger_data.get("from_damaging_move"):
+                then_effect = trigger_data.get("then_effect", {})
+                if then_effect.get("type") == "disable_attacker_move":
+                    last_move_id = context.get("last_move_id")
+                    if last_move_id:
+                        self.disabled_moves.append(last_move_id)
+                        skill_name = PET_SKILLS.get(last_move_id, {}).get("name", "the last move")
+                        self.turn_log.append(
+                            f"› {format_pet_name(subject_pet)}'s Grudge disabled {format_pet_name(source_pet)}'s {skill_name}!")
+
+            # --- Generic "then_effect" Application ---
+            then_effect_data = trigger_data.get("then_effect")
+            if then_effect_data:
+                for effect_data in normalize_effects(then_effect_data):
+                    if effect_data.get("type") in ["reflect_debuffs"]:
+                        skill_name = skill_info.get("name", "unknown_skill")
+                        effect_data["source_skill_id"] = skill_name.lower().replace(" ", "_")
+
+                    target_pet = subject_pet if effect_data.get("target") == "self" else source_pet
+                    if target_pet is None: continue
+
+                    target_is_player = is_player_pet(target_pet)
+                    target_effects_list = self.player_pet_effects if target_is_player else self.wild_pet_effects
+
+                    await apply_effect(
+                        effect_data.get("type"), target=target_pet, target_effects_list=target_effects_list,
+                        effect_data=effect_data, turn_log_lines=self.turn_log,
+                        damage_dealt=context.get("damage", 0),
+                        attacker=subject_pet, battle_state=self,
+                    )
 
-            # --- Conditional Checks ---
-            conditions_met = True
-            skill_info = context.get("skill_info", {})
-
-            if "if_move_category" in trigger_data and skill_info.get("category") != trigger_data["if_move_category"]:
-                conditions_met = False
-            if "if_attack_category" in trigger_data and skill_info.get("category") != trigger_data[
-                "if_attack_category"]:
-                conditions_met = False
-            if "if_attack_type" in trigger_data:
-                required_types = trigger_data["if_attack_type"]
-                if not isinstance(required_types, list): required_types = [required_types]
-                if skill_info.get("type") not in required_types: conditions_met = False
-            if trigger_data.get("if_attack_damaging") and context.get("damage", 0) <= 0:
-                conditions_met = False
-            # --- End Conditional Checks ---
-
-            if conditions_met:
-                # --- Event-Specific Logic ---
-                if event_name == "on_action_attempt" and "chance_to_fail" in trigger_data:
-                    if random.random() < trigger_data["chance_to_fail"]:
-                        subject_name = f"**{subject_pet.get('name', subject_pet.get('species'))}**"
-                        prevention_log = f"› {subject_name}'s action was thwarted by {active_effect.get('status_effect')}!"
-                        action_prevented = True
-                        break
-
-                if event_name == "on_being_hit" and "damage_modifier" in trigger_data:
-                    modifier = trigger_data["damage_modifier"]
-                    modified_damage = math.floor(modified_damage * modifier)
+            # --- Effect Consumption ---
+            if trigger_data.get("consume_on_trigger"):
+                try:
+                    effects_list.remove(active_effect)
                     self.turn_log.append(
-                        f"› {subject_pet.get('name')}'s {active_effect.get('status_effect')} softened the blow!")
-
-                if event_name == "on_switch_out" and "heal_next_pet_percent" in trigger_data:
-                    self.pending_player_heal = trigger_data["heal_next_pet_percent"]
-
-                if event_name == "on_faint" and trigger_data.get("from_damaging_move"):
-                    then_effect = trigger_data.get("then_effect", {})
-                    if then_effect.get("type") == "disable_attacker_move":
-                        last_move_id = context.get("last_move_id")
-                        if last_move_id:
-                            self.disabled_moves.append(last_move_id)
-                            skill_name = PET_SKILLS.get(last_move_id, {}).get("name", "the last move")
-                            self.turn_log.append(
-                                f"› {format_pet_name(subject_pet)}'s Grudge disabled {format_pet_name(source_pet)}'s {skill_name}!")
-
-                # --- Generic "then_effect" Application ---
-                then_effect_data = trigger_data.get("then_effect")
-                if then_effect_data:
-                    for effect_data in normalize_effects(then_effect_data):
-                        if effect_data.get("type") in ["reflect_debuffs"]:
-                            skill_name = skill_info.get("name", "unknown_skill")
-                            effect_data["source_skill_id"] = skill_name.lower().replace(" ", "_")
-
-                        target_pet = subject_pet if effect_data.get("target") == "self" else source_pet
-                        if target_pet is None: continue
-
-                        target_is_player = is_player_pet(target_pet)
-                        target_effects_list = self.player_pet_effects if target_is_player else self.wild_pet_effects
-
-                        await apply_effect(
-                            effect_data.get("type"), target=target_pet, target_effects_list=target_effects_list,
-                            effect_data=effect_data, turn_log_lines=self.turn_log,
-                            damage_dealt=context.get("damage", 0),
-                            attacker=subject_pet, battle_state=self,
-                        )
-
-                # --- Effect Consumption ---
-                if trigger_data.get("consume_on_trigger"):
-                    try:
-                        effects_list.remove(active_effect)
-                        self.turn_log.append(
-                            f"› {subject_pet.get('name')}'s {active_effect.get('status_effect')} was consumed.")
-                    except ValueError:
-                        pass
+                        f"› {subject_pet.get('name')}'s {active_effect.get('status_effect')} was consumed.")
+                except ValueError:
+                    pass
 
         # --- Final Return Logic ---
         if event_name == "on_action_attempt":
@@ -181,9 +250,9 @@ class BattleState:
     # -------------------------
     # Core attack routine (uses helpers)
     # -------------------------
-    async def perform_attack(self, attacker: dict, defender: dict, skill_id: str, is_player: bool):
-        skill_info = PET_SKILLS.get(skill_id,
-                                    {"name": "Struggle", "power": 35, "type": "Normal", "category": "Physical"})
+    async def perform_attack(self, attacker: BattlePet, defender: BattlePet, skill_id: str, is_player: bool):
+        skill_info = (attacker.skill(skill_id) or
+                      {"name": "Struggle", "power": 35, "type": "Normal", "category": "Physical"})
 
         log_list = []
         attacker_name = f"**{attacker['name']}**" if is_player else f"The wild **{attacker['species']}**"
@@ -195,17 +264,17 @@ class BattleState:
         skill_verb_type = skill_info.get("verb_type")
 
         # --- Gloom and Passive Logic (Goes first) ---
-        if self.wild_pet.get('is_gloom_touched', False):
+        if self.wild_pet.is_gloom_touched:
             if not is_player:
                 gloom_increase = 15
                 self.gloom_meter = min(100, self.gloom_meter + gloom_increase)
-                log_list.append(get_notification("COMBAT_GLOOM_INCREASE", amount=gloom_increase))
+                log_list.append(self._notify("COMBAT_GLOOM_INCREASE", amount=gloom_increase))
             else:
                 gloom_reduction = 10
                 self.gloom_meter = max(0, self.gloom_meter - gloom_reduction)
-                log_list.append(get_notification("COMBAT_GLOOM_DECREASE", amount=gloom_reduction))
+                log_list.append(self._notify("COMBAT_GLOOM_DECREASE", amount=gloom_reduction))
 
-        attacker_passive = attacker.get('passive_ability')
+        attacker_passive = attacker.passive_ability
         if isinstance(attacker_passive, dict) and attacker_passive.get(
                 'name') == "Singeing Fury" and skill_type == 'Fire':
             log_list.append(f"› {attacker_name}'s Singeing Fury intensifies!")
@@ -217,11 +286,11 @@ class BattleState:
             is_self_target = effects and effects[0].get('target') == 'self'
 
             if is_self_target:
-                verb_phrase = random.choice(NOTIFICATIONS["COMBAT_ACTION_VERBS"].get("Self", ["prepares itself"]))
+                verb_phrase = self.rng.choice(NOTIFICATIONS["COMBAT_ACTION_VERBS"].get("Self", ["prepares itself"]))
                 log_list.append(f"› {attacker_name} uses **{skill_name}** and {verb_phrase}!")
             else:
                 log_list.append(
-                    get_notification("COMBAT_STATUS_TEMPLATES", attacker_name=attacker_name, skill_name=skill_name))
+                    self._notify("COMBAT_STATUS_TEMPLATES", attacker_name=attacker_name, skill_name=skill_name))
 
         else:  # Damaging Moves (Physical & Special)
             power = skill_info.get("power", 0)
@@ -265,9 +334,9 @@ class BattleState:
             hit_chance = base_skill_accuracy * (attacker_accuracy_mod / defender_evasion_mod)
             hit_chance = max(0.1, min(1.0, hit_chance))  # Clamp the chance between 10% and 100%
 
-            if random.random() > hit_chance:
+            if self.rng.random() > hit_chance:
                 # The attack missed!
-                miss_verb = random.choice(NOTIFICATIONS["COMBAT_ACTION_VERBS"]["Miss"]).format(
+                miss_verb = self.rng.choice(NOTIFICATIONS["COMBAT_ACTION_VERBS"]["Miss"]).format(
                     defender_name=defender_name)
                 log_list.append(f"› {attacker_name}'s **{skill_name}** {miss_verb}!")
 
@@ -299,8 +368,7 @@ class BattleState:
                 defense = self._get_modified_stat(defender, defense_stat_name, not is_player)
             # --- End
 
-            types = defender.get('pet_type', []) if isinstance(defender.get('pet_type'), list) else [
-                defender.get('pet_type')]
+            types = defender.pet_type if isinstance(defender.pet_type, list) else [defender.get('pet_type')]
 
             # --- Type Matchup Calculation ---
             defender_effects = self.wild_pet_effects if is_player else self.player_pet_effects
@@ -308,18 +376,18 @@ class BattleState:
                                              active_effects=defender_effects)  # Pass the defender's effects
 
             if multiplier == 0:
-                log_list.append(get_notification("COMBAT_NO_EFFECT"))
+                log_list.append(self._notify("COMBAT_NO_EFFECT"))
             else:
                 base_dmg = (power / 10) + (attack / 2 - defense / 4)
 
                 is_crit = False
                 crit_chance = skill_info.get('crit_chance', 0.05)
 
-                if random.random() <= crit_chance:
+                if self.rng.random() <= crit_chance:
                     is_crit = True
                     damage = max(1, int(base_dmg * 1.5 * multiplier))  # Crit damage is also affected by type
 
-                    log_list.append(get_notification(
+                    log_list.append(self._notify(
                         "COMBAT_CRITICAL_HIT",
                         attacker_name=attacker_name,
                         skill_name=skill_name,
@@ -327,7 +395,7 @@ class BattleState:
                     ))
                 else:
                     # This is the normal attack logic
-                    damage = max(1, int(base_dmg * multiplier * random.uniform(0.9, 1.1)))
+                    damage = max(1, int(base_dmg * multiplier * self.rng.uniform(0.9, 1.1)))
 
                     verb_options = (
                             NOTIFICATIONS["COMBAT_ACTION_VERBS"].get(skill_type) or
@@ -335,36 +403,34 @@ class BattleState:
                             NOTIFICATIONS["COMBAT_ACTION_VERBS"].get(skill_category) or
                             ["attacks {defender_name}"]
                     )
-                    verb_phrase = random.choice(verb_options).format(defender_name=defender_name)
-                    impact_phrase = random.choice(NOTIFICATIONS["COMBAT_IMPACT_PHRASES"]).format(damage=damage)
+                    verb_phrase = self.rng.choice(verb_options).format(defender_name=defender_name)
+                    impact_phrase = self.rng.choice(NOTIFICATIONS["COMBAT_IMPACT_PHRASES"]).format(damage=damage)
 
-                    template = random.choice(NOTIFICATIONS["COMBAT_SENTENCE_TEMPLATES"])
+                    template = self.rng.choice(NOTIFICATIONS["COMBAT_SENTENCE_TEMPLATES"])
                     log_list.append(template.format(
                         attacker_name=attacker_name, verb_phrase=verb_phrase, skill_name=skill_name,
                         impact_phrase=impact_phrase
                     ))
 
                     if multiplier > 1.0:
-                        log_list.append(get_notification("COMBAT_SUPER_EFFECTIVE", damage=damage))
+                        log_list.append(self._notify("COMBAT_SUPER_EFFECTIVE", damage=damage))
                     elif multiplier < 1.0:
-                        log_list.append(get_notification("COMBAT_NOT_VERY_EFFECTIVE", damage=damage))
+                        log_list.append(self._notify("COMBAT_NOT_VERY_EFFECTIVE", damage=damage))
 
                 # --- Mid-Calculation Hooks (e.g., Damage Caps) ---
                 defender_effects = self.wild_pet_effects if is_player else self.player_pet_effects
-                for effect in defender_effects:
-                    # Check for the on_damage_calculation trigger
-                    if "on_damage_calculation" in effect:
-                        calc_rules = effect["on_damage_calculation"]
-
-                        # Handle Damage Caps
-                        if "damage_cap" in calc_rules:
-                            cap_info = calc_rules["damage_cap"]
-                            if "percent_of_max_hp" in cap_info:
-                                cap_percent = cap_info["percent_of_max_hp"]
-                                max_damage = math.floor(defender.get('max_hp', 1) * cap_percent)
-                                if damage > max_damage:
-                                    log_list.append(f"› {defender_name}'s ward absorbed the blow, capping the damage!")
-                                    damage = max_damage  # Enforce the damage cap
+                for effect in defender_effects.subscribers(EVENT_ON_DAMAGE_CALCULATION):
+                    calc_rules = effect["on_damage_calculation"]
+
+                    # Handle Damage Caps
+                    if "damage_cap" in calc_rules:
+                        cap_info = calc_rules["damage_cap"]
+                        if "percent_of_max_hp" in cap_info:
+                            cap_percent = cap_info["percent_of_max_hp"]
+                            max_damage = math.floor(defender.get('max_hp', 1) * cap_percent)
+                            if damage > max_damage:
+                                log_list.append(f"› {defender_name}'s ward absorbed the blow, capping the damage!")
+                                damage = max_damage  # Enforce the damage cap
 
                 # --- on_being_hit ---
                 # This trigger now runs before damage is applied, and can modify the final damage.
@@ -375,7 +441,7 @@ class BattleState:
                     context={"damage": damage, "skill_info": skill_info}
                 )
                 # ---
-                defender_passive = defender.get('passive_ability')
+                defender_passive = defender.passive_ability
                 if isinstance(defender_passive, dict) and defender_passive.get('name') == "Solid Rock" and defender[
                     'current_hp'] == defender['max_hp']:
                     damage = min(damage, defender['max_hp'] - 1)
@@ -386,7 +452,7 @@ class BattleState:
                 if not is_player and 40 <= self.gloom_meter < 80:
                     bonus = max(1, int(damage * 0.15))
                     damage += bonus
-                    log_list.append(get_notification("COMBAT_GLOOM_MEDIUM"))
+                    log_list.append(self._notify("COMBAT_GLOOM_MEDIUM"))
 
                 defender['current_hp'] -= damage
 
@@ -420,31 +486,46 @@ class BattleState:
                 )
 
         # --- Defender's Passive on_hit (Runs for all move types) ---
-        defender_passive = defender.get('passive_ability')
+        defender_passive = defender.passive_ability
         passive_name = defender_passive.get('name') if isinstance(defender_passive, dict) else defender_passive
         if passive_name and passive_name in PASSIVE_HANDLERS_ON_HIT:
             handler = PASSIVE_HANDLERS_ON_HIT[passive_name]
             attacker_fx = self.player_pet_effects if is_player else self.wild_pet_effects
             await handler(attacker=attacker, defender=defender, turn_log_lines=log_list, skill_info=skill_info,
-                          attacker_effects_list=attacker_fx)
+                          attacker_effects_list=attacker_fx, battle_state=self)
 
         return defender['current_hp'] <= 0, "\n".join(log_list)
 
     # -------------------------
     # Round processing (keeps public flow similar to your prior code)
     # -------------------------
-    async def process_round(self, player_skill_id: str):
+    async def plan_ai_move(self) -> Optional[str]:
+        """
+        For elite encounters, the search AI's move for the coming round (see core/battle_ai.py).
+        None means process_round picks with get_ai_move as usual.
+        """
+        if not self.search_ai:
+            return None
+        from core.battle_ai import choose_search_move
+        return await choose_search_move(self)
+
+    @recorded_action("round")
+    async def process_round(self, player_skill_id: str, ai_skill_id: Optional[str] = None):
+        """
+        Plays one round. `ai_skill_id` is the wild pet's move when it was chosen beforehand
+        (plan_ai_move); it is part of the round's recorded input, so replays don't re-run the search.
+        """
         # -------------------------
         # Gloom Surge — fires BEFORE the round if meter hits 100
         # -------------------------
         if self.gloom_meter >= 100:
             surge_dmg = max(1, int(self.player_pet['max_hp'] * 0.4))
             self.player_pet['current_hp'] = max(0, self.player_pet['current_hp'] - surge_dmg)
-            self.turn_log.append(get_notification(
+            self.turn_log.append(self._notify(
                 "COMBAT_GLOOM_SURGE", pet_name=self.player_pet['name'], damage=surge_dmg
             ))
             self.gloom_meter = max(50, self.gloom_meter - 40)
-            self.turn_log.append(get_notification(
+            self.turn_log.append(self._notify(
                 "COMBAT_GLOOM_SURGE_RESETS", new_meter=self.gloom_meter
             ))
             if self.player_pet['current_hp'] <= 0:
@@ -452,15 +533,18 @@ class BattleState:
                 return {"log": "\n".join(self.turn_log), "is_over": True, "win": False}
 
         player_move = {"skill_id": player_skill_id}
-        try:
-            from utils.helpers import get_ai_move
-            ai_move = get_ai_move(self.wild_pet, self.player_pet, self.gloom_meter)
-        except Exception:
-            ai_move = {"skill_id": random.choice(list(PET_SKILLS.keys()))}
+        if ai_skill_id and ai_skill_id in self.wild_pet.get('skills', []):
+            ai_move = {"skill_id": ai_skill_id}
+        else:
+            try:
+                from utils.helpers import get_ai_move
+                ai_move = get_ai_move(self.wild_pet, self.player_pet, self.gloom_meter, rng=self.rng)
+            except Exception:
+                ai_move = {"skill_id": self.rng.choice(list(PET_SKILLS.keys()))}
 
         # Priority & order logic
-        player_skill_data = PET_SKILLS.get(player_move['skill_id'], {})
-        ai_skill_data = PET_SKILLS.get(ai_move['skill_id'], {})
+        player_skill_data = self.player_pet.skill(player_move['skill_id']) or {}
+        ai_skill_data = self.wild_pet.skill(ai_move['skill_id']) or {}
         player_has_priority = player_skill_data.get("special_flag") == "priority_move"
         ai_has_priority = ai_skill_data.get("special_flag") == "priority_move"
 
@@ -490,7 +574,7 @@ class BattleState:
                 continue  # Skip turn
 
             # --- Move Usage Condition Check ---
-            skill_info = PET_SKILLS.get(move['skill_id'], {})
+            skill_info = attacker.skill(move['skill_id']) or {}
 
             if "usage_condition" in skill_info:
                 condition = skill_info["usage_condition"]
@@ -512,7 +596,7 @@ class BattleState:
                 "on_action_attempt",
                 subject_pet=attacker,
                 source_pet=defender,
-                context={"skill_info": PET_SKILLS.get(move['skill_id'], {})}
+                context={"skill_info": skill_info}
             )
             if action_prevented:
                 self.turn_log.append(prevention_log)
@@ -528,7 +612,7 @@ class BattleState:
             skip_turn = False
 
             # 1. Flinch (one-turn skip, always consumed)
-            flinch_effect = next((e for e in attacker_effects if e.get('status_effect') == 'flinch'), None)
+            flinch_effect = attacker_effects.with_status('flinch')
             if flinch_effect:
                 self.turn_log.append(f"› {attacker_name} flinched and couldn't move!")
                 attacker_effects.remove(flinch_effect)
@@ -536,43 +620,43 @@ class BattleState:
 
             # --- Handle Stun, Petrified, Recharging ---
             # These are multi-turn skips that are NOT consumed until their duration expires.
-            stun_effect = next((e for e in attacker_effects if e.get('status_effect') == 'stun'), None)
+            stun_effect = attacker_effects.with_status('stun')
             if stun_effect:
                 self.turn_log.append(f"› {attacker_name} is stunned and can't act!")
                 skip_turn = True
 
-            petrified_effect = next((e for e in attacker_effects if e.get('status_effect') == 'petrified'), None)
+            petrified_effect = attacker_effects.with_status('petrified')
             if petrified_effect:
                 self.turn_log.append(f"› {attacker_name} is petrified and cannot move!")
                 skip_turn = True
 
-            recharging_effect = next((e for e in attacker_effects if e.get('status_effect') == 'recharging'), None)
+            recharging_effect = attacker_effects.with_status('recharging')
             if recharging_effect:
                 self.turn_log.append(f"› {attacker_name} is recharging and must wait!")
                 skip_turn = True
 
             # 2. Sleep (skip until duration expires)
-            sleep_effect = next((e for e in attacker_effects if e.get('status_effect') == 'sleep'), None)
+            sleep_effect = attacker_effects.with_status('sleep')
             if not skip_turn and sleep_effect:  # MODIFIED
                 self.turn_log.append(f"› {attacker_name} is fast asleep and can't move!")
                 skip_turn = True
 
             # 3. Frozen (same as sleep but could later add chance to thaw)
-            frozen_effect = next((e for e in attacker_effects if e.get('status_effect') == 'frozen'), None)
+            frozen_effect = attacker_effects.with_status('frozen')
             if not skip_turn and frozen_effect:  # MODIFIED
                 self.turn_log.append(f"› {attacker_name} is frozen solid and can't move!")
                 skip_turn = True
 
             # 4. Paralysis (chance to fail)
-            paralyze_effect = next((e for e in attacker_effects if e.get('status_effect') == 'paralyze'), None)
-            if not skip_turn and paralyze_effect and random.random() < 0.25:  # MODIFIED
+            paralyze_effect = attacker_effects.with_status('paralyze')
+            if not skip_turn and paralyze_effect and self.rng.random() < 0.25:  # MODIFIED
                 self.turn_log.append(f"› {attacker_name} is paralyzed! It couldn't move!")
                 skip_turn = True
 
             # 5. Confusion (chance to self-hit)
-            confuse_effect = next((e for e in attacker_effects if e.get('status_effect') == 'confuse'), None)
+            confuse_effect = attacker_effects.with_status('confuse')
             if not skip_turn and confuse_effect:  # MODIFIED
-                if random.random() < 0.33:  # 33% chance to self-hit
+                if self.rng.random() < 0.33:  # 33% chance to self-hit
                     damage = max(1, int(attacker['max_hp'] * 0.05))  # 5% max HP self-damage
                     attacker['current_hp'] -= damage
                     self.turn_log.append(f"› {attacker_name} is confused and hurt itself in its confusion! (-{damage} HP)")
@@ -662,10 +746,10 @@ class BattleState:
             return {"log": "\n".join(self.turn_log), "is_over": True, "win": False}
 
         # --- Gloom High Threshold: 25% chance of Gloom drain (80-99%) ---
-        if 80 <= self.gloom_meter < 100 and random.random() < 0.25:
+        if 80 <= self.gloom_meter < 100 and self.rng.random() < 0.25:
             drain_dmg = max(1, int(self.player_pet['max_hp'] * 0.05))
             self.player_pet['current_hp'] = max(0, self.player_pet['current_hp'] - drain_dmg)
-            self.turn_log.append(get_notification(
+            self.turn_log.append(self._notify(
                 "COMBAT_GLOOM_HIGH_STATUS",
                 pet_name=self.player_pet['name'],
                 amount=drain_dmg
@@ -677,6 +761,7 @@ class BattleState:
         self.turn_count += 1
         return {"log": "\n".join(self.turn_log), "is_over": False}
 
+    @recorded_action("send_out")
     async def set_active_player_pet(self, new_pet_id: int) -> str:
         """
         Swaps the player's active pet with one from the roster.
@@ -696,6 +781,7 @@ class BattleState:
 
         return log_message
 
+    @recorded_action("item")
     async def process_player_item_use(self, item_id: str):
         """
         Handles the logic for a player using an item during their turn.
@@ -741,6 +827,7 @@ class BattleState:
     # Other convenience methods (capture / flee / rewards)
     # Keep your existing implementations; simplified here for clarity.
     # -------------------------
+    @recorded_action("capture")
     async def attempt_capture(self, orb_id: str):
         await self.db_cog.remove_item_from_inventory(self.user_id, orb_id, 1)
         capture_info = await self.get_capture_info(orb_id)
@@ -748,7 +835,7 @@ class BattleState:
         orb_name = ITEMS.get(orb_id, {}).get('name', 'Orb')
         self.turn_log = [f"› You used a **{orb_name}**!"]
 
-        if random.randint(1, 100) <= rate:
+        if self.rng.randint(1, 100) <= rate:
             self.turn_log.append(f"› Gotcha! **{self.wild_pet['species']}** was caught!")
 
             # Extract the name from the passive ability dictionary if it exists
@@ -798,7 +885,7 @@ class BattleState:
         """
         # defensive: if DB cog missing or orb invalid, return safe defaults
         try:
-            player_data = await self.db_cog.get_player(self.user_id)
+            player_data = await self._read('get_player', self.user_id)
         except Exception:
             player_data = {"day_of_cycle": "day"}
 
@@ -880,9 +967,9 @@ class BattleState:
     async def process_ai_turn(self):
         try:
             from utils.helpers import get_ai_move
-            ai_move = get_ai_move(self.wild_pet, self.player_pet, self.gloom_meter)
+            ai_move = get_ai_move(self.wild_pet, self.player_pet, self.gloom_meter, rng=self.rng)
         except Exception:
-            ai_move = {"skill_id": random.choice(list(PET_SKILLS.keys()))}
+            ai_move = {"skill_id": self.rng.choice(list(PET_SKILLS.keys()))}
         fainted, attack_log = await self.perform_attack(self.wild_pet, self.player_pet, ai_move['skill_id'], is_player=False)
         self.turn_log.append(attack_log)
         if fainted:
@@ -894,9 +981,10 @@ class BattleState:
         self.turn_count += 1
         return {"log": "\n".join(self.turn_log), "is_over": False}
 
+    @recorded_action("flee")
     async def attempt_flee(self):
         # Check if the player's pet has a status that prevents fleeing.
-        is_trapped = any(eff.get("status_effect") == "tidal_locked" for eff in self.player_pet_effects)
+        is_trapped = self.player_pet_effects.has_status("tidal_locked")
 
         if is_trapped:
             log = [f"› You can't escape! Your pet is affected by Tidal Lock!"]
@@ -911,18 +999,19 @@ class BattleState:
         flee_chance = 50 + (player_speed - wild_speed)
         flee_chance = max(10, min(95, flee_chance))
 
-        if random.randint(1, 100) <= flee_chance:
-            return {"success": True, "log": [get_notification("FLEE_SUCCESS")]}
+        if self.rng.randint(1, 100) <= flee_chance:
+            return {"success": True, "log": [self._notify("FLEE_SUCCESS")]}
         else:
-            log = [get_notification("FLEE_FAILURE", wild_pet_species=self.wild_pet['species'])]
+            log = [self._notify("FLEE_FAILURE", wild_pet_species=self.wild_pet['species'])]
             self.turn_log.clear()
             ai_turn_result = await self.process_ai_turn()
             log.extend(ai_turn_result['log'] if isinstance(ai_turn_result['log'], list) else [ai_turn_result['log']])
             return {"success": False, "log": log, "is_over": ai_turn_result.get('is_over', False)}
 
+    @recorded_action("rewards")
     async def grant_battle_rewards(self):
         """Grants end-of-battle rewards like coins and items."""
-        coin_gain = random.randint(5, 15) * self.wild_pet['level']
+        coin_gain = self.rng.randint(5, 15) * self.wild_pet['level']
         await self.db_cog.add_coins(self.user_id, coin_gain)
 
         # The log list now only needs to mention coins.
@@ -946,18 +1035,18 @@ class BattleState:
             xp_gain += satiated_bonus_xp
 
         # Call the database function that now returns three values
-        updated_pet, leveled_up, skill_to_learn = await self.db_cog.add_xp(self.player_pet['pet_id'], xp_gain)
+        updated_pet, leveled_up, skill_to_learn = await self._read('add_xp', self.player_pet['pet_id'], xp_gain)
 
         if updated_pet:
-            self.player_pet = updated_pet  # Refresh the pet's stats in the battle
+            self.player_pet = BattlePet.wrap(updated_pet)  # Refresh the pet's stats in the battle
 
         self.turn_log.append(f"› Your pet gained {xp_gain} EXP!")
 
         if is_satiated:
-            self.turn_log.append(get_notification("BATTLE_REWARD_SATIATED_BONUS", bonus_xp=satiated_bonus_xp))
+            self.turn_log.append(self._notify("BATTLE_REWARD_SATIATED_BONUS", bonus_xp=satiated_bonus_xp))
 
         if leveled_up:
-            self.turn_log.append(get_notification("BATTLE_REWARD_LEVEL_UP", pet_name=self.player_pet['name'],
+            self.turn_log.append(self._notify("BATTLE_REWARD_LEVEL_UP", pet_name=self.player_pet['name'],
                                                   new_level=self.player_pet['level']))
 
             # --- Check for Evolution ---
@@ -991,13 +1080,14 @@ class BattleState:
                     self.player_pet['skills'] = new_skills
                     self.turn_log.append(f"› **{self.player_pet['name']} learned {skill_name}!**")
 
+    @recorded_action("switch")
     async def process_player_switch(self, new_pet_id: str):
         """
         Handles the logic for a player switching their active pet.
         Now includes on_switch_out and on_switch_in logic.
         """
         # Check if the CURRENT pet is trapped
-        is_trapped = any(eff.get("status_effect") == "tidal_locked" for eff in self.player_pet_effects)
+        is_trapped = self.player_pet_effects.has_status("tidal_locked")
         if is_trapped:
             return {"success": False,
                     "log": f"› **{self.player_pet['name']}** is trapped by Tidal Lock and cannot switch out!"}
@@ -1060,11 +1150,34 @@ class BattleState:
 
         return None
 
+    @recorded_action("choose_skill")
+    async def finalize_skill_choice(self, pet_id: int, chosen_skill: Optional[str]):
+        """Resolves a skill choice node: learns the chosen skill, or queues it if the pet's skills are full."""
+        self.pending_skill_choices.pop(pet_id, None)
+        if not chosen_skill:
+            self.turn_log.append(f"› **{self.player_pet['name']}** held off on learning a new skill.")
+            return
+
+        skill_name = PET_SKILLS.get(chosen_skill, {}).get('name', chosen_skill)
+        await self.db_cog.add_skill_to_library(pet_id, chosen_skill)
+
+        current_skills = self.player_pet.get('skills', [])
+        if len(current_skills) < 4:
+            new_skills = current_skills + [chosen_skill]
+            await self.db_cog.update_pet(pet_id, skills=new_skills)
+            self.player_pet['skills'] = new_skills
+            self.turn_log.append(f"› **{self.player_pet['name']} learned {skill_name}!**")
+        else:
+            # Pet is full — queue for replacement
+            self.pending_skill_learns[pet_id] = chosen_skill
+
+    @recorded_action("skip_skill")
     def clear_pending_skill_learn(self, pet_id: int):
         """Removes a pending skill learn from the queue."""
         if pet_id in self.pending_skill_learns:
             del self.pending_skill_learns[pet_id]
 
+    @recorded_action("evolve")
     async def finalize_evolution(self, pet_id: int):
         """Updates a pet's data after evolution and clears the pending action."""
         # This is a simplified evolution; you can add stat recalculations here
@@ -1076,11 +1189,12 @@ class BattleState:
             new_species = evo_data['species']
             await self.db_cog.update_pet(pet_id, species=new_species)
             # Refresh the pet data in the battle state
-            self.player_pet = await self.db_cog.get_pet(pet_id)
+            self.player_pet = BattlePet.wrap(await self._read('get_pet', pet_id))
 
         if pet_id in self.pending_evolutions:
             self.pending_evolutions.remove(pet_id)
 
+    @recorded_action("learn_skill")
     async def finalize_skill_learn(self, pet_id: int, new_skill: str, skill_to_forget: str):
         """Updates a pet's skill list and clears the pending action."""
         pet_data = self.player_pet  # Assuming only active pet
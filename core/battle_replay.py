@@ -0,0 +1,246 @@
+# core/battle_replay.py
+# Deterministic battle recording and replay.
+# Every BattleState owns a seeded random.Random, and every random draw in the engine, effect
+# handlers, AI and combat text goes through it. So a battle is fully described by:
+#   - its starting state (a to_snapshot() dict) and seed,
+#   - the player's inputs, in order (skill used, item used, switch, ...),
+#   - the answers to the few database reads whose results the engine uses (add_xp, get_pet, ...).
+# BattleLog records exactly that, as NDJSON (one JSON object per line):
+#   {"k": "start", "v": 1, "seed": ..., "user_id": ..., "state": {...}}
+#   {"k": "round", "args": {"player_skill_id": "ember"}, "db": [["add_xp", [...]]]}
+#   ...
+#   {"k": "end", "actions": 12, "results": "<sha1 of every action result>", "state": "<sha1 of final state>"}
+# replay_battle() feeds the inputs back into a fresh BattleState and checks both digests, so a
+# recorded production battle can be replayed bit-for-bit against a newer engine.
+# It does NOT handle Discord UI.
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+LOG_VERSION = 1
+
+# Database reads whose results feed back into the battle; their answers are stored in the log
+RECORDED_DB_CALLS = ("add_xp", "get_pet", "get_player")
+
+
+# default=str: database rows can carry datetimes, which the engine never reads
+_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _dumps(value) -> str:
+    return _ENCODER.encode(value)
+
+
+def _frozen(value):
+    """A JSON round-trip copy, so later in-place changes (e.g. to a skills list) don't leak into the log."""
+    return json.loads(_dumps(value))
+
+
+class _RawJSON(str):
+    """An already-serialized value, spliced into its entry's line as-is."""
+
+
+def _dumps_entry(entry: dict) -> str:
+    raw = {key: value for key, value in entry.items() if isinstance(value, _RawJSON)}
+    if not raw:
+        return _dumps(entry)
+    line = _dumps({key: value for key, value in entry.items() if key not in raw})
+    return line[:-1] + "".join(f',"{key}":{value}' for key, value in raw.items()) + "}"
+
+
+def state_digest(battle) -> str:
+    """sha1 of the battle's snapshot, in a key order that doesn't depend on how it was built."""
+    return hashlib.sha1(
+        json.dumps(battle.to_snapshot(), sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class BattleLog:
+    """Collects one battle's seed, starting state, inputs and database answers as it is played."""
+
+    def __init__(self, seed: int, user_id: int):
+        self.seed = seed
+        self.user_id = user_id
+        self.entries: List[dict] = []
+        self.started_at = time.time()
+        self._results = hashlib.sha1()
+        self._actions = 0
+        self._current: Optional[dict] = None  # the action being recorded right now
+
+    def begin_action(self, battle, kind: str, args: Dict[str, Any]) -> Optional[dict]:
+        if self._current is not None:
+            return None  # an action called from inside another is replayed by its caller
+        if not self.entries:
+            # The first action pins the starting state (after any from_snapshot restore). It is
+            # serialized right away, since the battle mutates the snapshot's lists in place.
+            self.entries.append({"k": "start", "v": LOG_VERSION, "seed": self.seed,
+                                 "user_id": self.user_id, "state": _RawJSON(_dumps(battle.to_snapshot()))})
+        entry = {"k": kind, "args": args}
+        self.entries.append(entry)
+        self._current = entry
+        return entry
+
+    def end_action(self, entry: Optional[dict], result):
+        if entry is None:
+            return
+        self._current = None
+        self._actions += 1
+        self._results.update(_dumps(result).encode())
+
+    def db_result(self, name: str, result):
+        if self._current is not None:
+            self._current.setdefault("db", []).append([name, _frozen(result)])
+
+    def finish(self, battle) -> dict:
+        return {"k": "end", "actions": self._actions, "results": self._results.hexdigest(),
+                "state": state_digest(battle)}
+
+    def to_ndjson(self, battle) -> str:
+        lines = [_dumps_entry(entry) for entry in self.entries]
+        lines.append(_dumps(self.finish(battle)))
+        return "\n".join(lines) + "\n"
+
+    def save(self, battle, directory: str) -> Optional[str]:
+        """Writes the log to `directory` as <user_id>-<started_at>-<seed>.ndjson. Returns the path."""
+        if not self.entries:
+            return None  # nothing was played
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.user_id}-{int(self.started_at)}-{self.seed}.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_ndjson(battle))
+        return path
+
+
+class NullLog(BattleLog):
+    """For battles that are never saved (e.g. AI search rollouts): records nothing."""
+
+    def __init__(self):
+        super().__init__(seed=0, user_id=0)
+
+    def begin_action(self, battle, kind: str, args: Dict[str, Any]) -> Optional[dict]:
+        return None
+
+    def db_result(self, name: str, result):
+        pass
+
+
+def recorded_action(kind: str):
+    """
+    Marks a BattleState method as a player input. Its arguments go into the battle's log, and
+    its result into the log's running digest. Works for async and plain methods.
+    """
+    def decorator(fn):
+        # Parameter names after self, so positional arguments can be logged by name
+        names = tuple(inspect.signature(fn).parameters)[1:]
+
+        def _begin(self, args, kwargs):
+            call_args = dict(zip(names, args))
+            call_args.update(kwargs)
+            return self.action_log.begin_action(self, kind, call_args)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(self, *args, **kwargs):
+                entry = _begin(self, args, kwargs)
+                result = await fn(self, *args, **kwargs)
+                self.action_log.end_action(entry, result)
+                return result
+        else:
+            @functools.wraps(fn)
+            def wrapper(self, *args, **kwargs):
+                entry = _begin(self, args, kwargs)
+                result = fn(self, *args, **kwargs)
+                self.action_log.end_action(entry, result)
+                return result
+        wrapper.recorded_kind = kind
+        return wrapper
+    return decorator
+
+
+# -------------------------
+# Replay
+# -------------------------
+class ReplayDatabase:
+    """Stands in for the Database cog during a replay: recorded reads are answered from the log."""
+
+    def __init__(self):
+        self.answers: List[Tuple[str, Any]] = []
+
+    def load(self, answers):
+        self.answers = [tuple(answer) for answer in answers or []]
+
+    def _answer(self, name):
+        if self.answers and self.answers[0][0] == name:
+            return self.answers.pop(0)[1]
+        raise ReplayMismatch(f"engine called {name}() but the log has {self.answers[:1] or 'no answer'}")
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            if name in RECORDED_DB_CALLS:
+                return self._answer(name)
+            return None  # writes (update_pet, add_coins, ...) have nothing to replay
+        return call
+
+
+class _ReplayBot:
+    def __init__(self, database: ReplayDatabase):
+        self.database = database
+
+    def get_cog(self, name):
+        return self.database if name == "Database" else None
+
+
+class ReplayMismatch(Exception):
+    """The engine did something the recorded battle didn't."""
+
+
+def read_log(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay_battle(entries: List[dict]) -> Tuple[Any, dict]:
+    """
+    Replays a recorded battle. Returns (battle, report) where report has the recorded and replayed
+    digests and "match" — True when every action result and the final state came out identical.
+    """
+    from core.battle_engine import BattleState  # the engine imports this module
+
+    start = entries[0]
+    if start.get("k") != "start" or start.get("v") != LOG_VERSION:
+        raise ReplayMismatch("not a version %s battle log" % LOG_VERSION)
+
+    database = ReplayDatabase()
+    battle = BattleState.from_snapshot(_ReplayBot(database), start["user_id"], start["state"], seed=start["seed"])
+    if battle is None:
+        raise ReplayMismatch("the starting snapshot is from an older layout")
+
+    methods = {}
+    for name, member in inspect.getmembers(BattleState):
+        if getattr(member, "recorded_kind", None):
+            methods[member.recorded_kind] = name
+
+    recorded_end = None
+    for entry in entries[1:]:
+        if entry["k"] == "end":
+            recorded_end = entry
+            break
+        database.load(entry.get("db"))
+        method = getattr(battle, methods[entry["k"]])
+        result = method(**entry["args"])
+        if inspect.isawaitable(result):
+            await result
+        if database.answers:
+            raise ReplayMismatch(f"{entry['k']} left recorded reads unused: {database.answers}")
+
+    replayed_end = battle.action_log.finish(battle)
+    report = {"recorded": recorded_end, "replayed": replayed_end,
+              "match": recorded_end is not None and
+                       (recorded_end["results"], recorded_end["state"]) ==
+                       (replayed_end["results"], replayed_end["state"])}
+    return battle, report
@@ -0,0 +1,361 @@
+# core/battle_types.py
+# Compact in-battle objects: pets and active effects as __slots__ classes instead of loose dicts.
+# Both keep a dict-compatible surface (pet['current_hp'], effect.get('duration'), 'x' in effect,
+# dict(effect), ...) so views, helpers and effect handlers that treat them as dicts keep working,
+# while the engine itself reads the typed fields directly.
+# EffectList keeps a pet's active effects grouped by event, status, stat and type, so the engine
+# looks up "effects that react to on_being_hit" or "the flinch effect" without scanning the list.
+# It does NOT handle Discord UI or persistence; to_dict() turns everything back into plain data.
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from data.skills import PET_SKILLS
+from core.effect_system import TRIGGER_EVENTS, compile_trigger
+
+class _Unset:
+    """
+    Marks a slot that the source dict never had, so `key in obj` and obj.get(key, default) behave
+    exactly as they did for the dict the object was built from. There is only ever one: copy,
+    deepcopy and pickle all hand back the same instance, so `is _UNSET` holds on copied battle state.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<unset>"
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return "_UNSET"  # pickled by reference to the module-level instance
+
+
+_UNSET = _Unset()
+
+
+class _SlotRecord:
+    """Dict-compatibility shim shared by BattlePet and ActiveEffect. Unknown keys live in `extra`."""
+
+    __slots__ = ("extra",)
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET: frozenset = frozenset()
+    DEFAULTS: Dict[str, Any] = {}  # fields that always exist, so the engine can read them as attributes
+
+    def _load(self, source):
+        extra = {}
+        field_set = self._FIELD_SET
+        defaults = self.DEFAULTS
+        for field in self.FIELDS:
+            setattr(self, field, defaults.get(field, _UNSET))
+        for key, value in source.items():
+            if key in field_set:
+                setattr(self, key, value)
+            else:
+                extra[key] = value
+        self.extra = extra
+
+    # --- Mapping interface ---
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._FIELD_SET:
+            if getattr(self, key) is _UNSET:
+                raise KeyError(key)
+            setattr(self, key, _UNSET)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key) is not _UNSET
+        return key in self.extra
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _UNSET else value
+        return self.extra.get(key, default)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, other=(), **kwargs):
+        items = other.items() if hasattr(other, "items") else other
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def keys(self) -> List[str]:
+        return [field for field in self.FIELDS if getattr(self, field) is not _UNSET] + list(self.extra)
+
+    def values(self) -> List[Any]:
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def to_dict(self) -> dict:
+        """Plain-dict copy, e.g. for snapshots or anything that JSON-encodes battle state."""
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not _UNSET}
+        data.update(self.extra)
+        return data
+
+    copy = to_dict
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+# -------------------------
+# Pets
+# -------------------------
+class BattlePet(_SlotRecord):
+    """
+    One pet in a battle. Built from a pets-table row (player pets) or a generated wild pet.
+    `skill_refs` holds the PET_SKILLS entries for the pet's skills, resolved once.
+    """
+
+    FIELDS = ("pet_id", "name", "species", "rarity", "pet_type", "level", "personality",
+              "current_hp", "max_hp", "attack", "defense", "special_attack", "special_defense", "speed",
+              "skills", "passive_ability", "is_gloom_touched", "hunger")
+    _FIELD_SET = frozenset(FIELDS)
+    DEFAULTS = {"passive_ability": None, "is_gloom_touched": False}
+    __slots__ = FIELDS + ("skill_refs",)
+
+    pet_id: Optional[int]
+    name: str
+    species: str
+    rarity: str
+    pet_type: Any  # a type name or a list of them
+    level: int
+    personality: str
+    current_hp: int
+    max_hp: int
+    attack: int
+    defense: int
+    special_attack: int
+    special_defense: int
+    speed: int
+    skills: List[str]
+    passive_ability: Any  # a passive name, its data dict, or None
+    is_gloom_touched: bool
+    hunger: int
+    skill_refs: Dict[str, dict]
+
+    def __init__(self, source):
+        self._load(source)
+        self.resolve_skills()
+
+    @classmethod
+    def wrap(cls, pet) -> "BattlePet":
+        return pet if isinstance(pet, cls) else cls(pet)
+
+    def __setitem__(self, key, value):
+        _SlotRecord.__setitem__(self, key, value)
+        if key == "skills":
+            self.resolve_skills()
+
+    def resolve_skills(self):
+        skills = self.skills if self.skills is not _UNSET else ()
+        self.skill_refs = {skill_id: PET_SKILLS[skill_id] for skill_id in skills or () if skill_id in PET_SKILLS}
+
+    def skill(self, skill_id: str) -> Optional[dict]:
+        """The skill's data — from the pre-resolved refs, falling back to PET_SKILLS for anything else."""
+        return self.skill_refs.get(skill_id) or PET_SKILLS.get(skill_id)
+
+    @property
+    def is_player(self) -> bool:
+        # Same rule as effect_system.is_player_pet: only owned pets have a pet_id
+        return self.pet_id is not _UNSET and bool(self.pet_id)
+
+
+# -------------------------
+# Active effects
+# -------------------------
+class ActiveEffect(_SlotRecord):
+    """
+    One status / stat change / field effect on a pet. Trigger blocks (on_being_hit, ...) and any
+    other keys from the skill data stay in `extra`. `triggers` maps each event the effect reacts
+    to onto its compiled condition predicate, built once when the effect is applied.
+    The indexed keys (type, status_effect, stat and the trigger blocks) must not change once the
+    effect is in an EffectList; duration, modifier and the rest can be updated freely.
+    """
+
+    FIELDS = ("type", "status_effect", "stat", "modifier", "duration", "blocks_action")
+    _FIELD_SET = frozenset(FIELDS)
+    __slots__ = FIELDS + ("triggers",)
+
+    type: str
+    status_effect: str
+    stat: str
+    modifier: float
+    duration: int
+    blocks_action: bool
+    triggers: Dict[str, Callable[[dict], bool]]
+
+    def __init__(self, source):
+        self._load(source)
+        if self.type == "stat_change" and self.modifier is _UNSET:
+            self.modifier = 1.0  # so stat math can read .modifier directly
+        self.triggers = {event: compile_trigger(self.extra[event])
+                         for event in TRIGGER_EVENTS if self.extra.get(event)}
+
+    @classmethod
+    def wrap(cls, effect) -> "ActiveEffect":
+        return effect if isinstance(effect, cls) else cls(effect)
+
+
+class EffectList(list):
+    """
+    A pet's (or a field side's) active effects, in application order, plus lookup buckets kept
+    in step with every add and remove:
+      by_event  — {trigger event: [effects]}
+      by_status — {status_effect: [effects]}
+      by_stat   — {stat: [stat_change effects]}
+      by_type   — {effect type: [effects]}
+    Plain dicts added with append/extend/insert are wrapped into ActiveEffects.
+    """
+
+    def __init__(self, effects: Iterable = ()):
+        super().__init__(ActiveEffect.wrap(effect) for effect in effects)
+        self._reindex()
+
+    # --- Buckets ---
+    def _reindex(self):
+        self.by_event: Dict[str, List[ActiveEffect]] = {}
+        self.by_status: Dict[str, List[ActiveEffect]] = {}
+        self.by_stat: Dict[str, List[ActiveEffect]] = {}
+        self.by_type: Dict[str, List[ActiveEffect]] = {}
+        for effect in self:
+            self._index(effect)
+
+    def _index(self, effect: ActiveEffect):
+        for event in effect.triggers:
+            self.by_event.setdefault(event, []).append(effect)
+        if effect.status_effect is not _UNSET:
+            self.by_status.setdefault(effect.status_effect, []).append(effect)
+        if effect.type is not _UNSET:
+            self.by_type.setdefault(effect.type, []).append(effect)
+            if effect.type == "stat_change" and effect.stat is not _UNSET:
+                self.by_stat.setdefault(effect.stat, []).append(effect)
+
+    def _unindex(self, effect: ActiveEffect):
+        for bucket in self._buckets_of(effect):
+            for index, member in enumerate(bucket):
+                if member is effect:
+                    del bucket[index]
+                    break
+
+    def _buckets_of(self, effect: ActiveEffect):
+        for event in effect.triggers:
+            yield self.by_event.get(event, ())
+        if effect.status_effect is not _UNSET:
+            yield self.by_status.get(effect.status_effect, ())
+        if effect.type is not _UNSET:
+            yield self.by_type.get(effect.type, ())
+            if effect.type == "stat_change" and effect.stat is not _UNSET:
+                yield self.by_stat.get(effect.stat, ())
+
+    def subscribers(self, event: str) -> List[ActiveEffect]:
+        return self.by_event.get(event) or []
+
+    def with_status(self, status: str) -> Optional[ActiveEffect]:
+        """The first active effect with this status_effect, or None."""
+        bucket = self.by_status.get(status)
+        return bucket[0] if bucket else None
+
+    def has_status(self, status: str) -> bool:
+        return bool(self.by_status.get(status))
+
+    def stat_changes(self, stat: str) -> List[ActiveEffect]:
+        return self.by_stat.get(stat) or []
+
+    def of_type(self, effect_type: str) -> List[ActiveEffect]:
+        return self.by_type.get(effect_type) or []
+
+    def to_dicts(self) -> List[dict]:
+        return [effect.to_dict() for effect in self]
+
+    # --- list API, kept in step with the buckets ---
+    def append(self, effect):
+        effect = ActiveEffect.wrap(effect)
+        super().append(effect)
+        self._index(effect)
+
+    def extend(self, effects):
+        for effect in effects:
+            self.append(effect)
+
+    def __iadd__(self, effects):
+        self.extend(effects)
+        return self
+
+    def insert(self, index, effect):
+        super().insert(index, ActiveEffect.wrap(effect))
+        self._reindex()  # keep bucket order matching list order
+
+    def remove(self, effect):
+        super().remove(effect)
+        self._unindex(effect)
+
+    def pop(self, index=-1):
+        effect = super().pop(index)
+        self._unindex(effect)
+        return effect
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            super().__setitem__(index, [ActiveEffect.wrap(effect) for effect in value])
+        else:
+            super().__setitem__(index, ActiveEffect.wrap(value))
+        self._reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._reindex()
+
+    def reverse(self):
+        super().reverse()
+        self._reindex()
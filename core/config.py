@@ -15,10 +15,63 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
+# --- Event-loop monitoring ---
+LOOP_LAG_SAMPLE_SECONDS = float(os.getenv("LOOP_LAG_SAMPLE_SECONDS", "0.5"))
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", "100"))
+METRICS_REPORT_MINUTES = float(os.getenv("METRICS_REPORT_MINUTES", "15"))
+
+# --- Interaction acknowledgement guard (see utils/interaction_guard.py) ---
+# Discord drops interactions not acknowledged within 3 seconds; the guard defers them at this point
+ACK_DEADLINE_SECONDS = float(os.getenv("ACK_DEADLINE_SECONDS", "2.0"))
+# Whether an app command the guard defers "thinks" privately; its first reply inherits this.
+# Every command answers privately; one that posts publicly opts out with @ack_deadline(ephemeral=False)
+ACK_AUTO_EPHEMERAL = os.getenv("ACK_AUTO_EPHEMERAL", "true").lower() in ("1", "true", "yes")
+
+# --- Spectator panels ---
+SPECTATOR_REFRESH_SECONDS = float(os.getenv("SPECTATOR_REFRESH_SECONDS", "3"))
+LIVE_BATTLE_BOARD = os.getenv("LIVE_BATTLE_BOARD", "false").lower() in ("1", "true", "yes")
+
+# --- Battle replay logs ---
+# Directory for per-battle replay logs (see core/battle_replay.py); empty = don't write them
+BATTLE_LOG_DIR = os.getenv("BATTLE_LOG_DIR", "")
+
+# --- Worker pools for CPU-heavy work (see core/executor.py) ---
+EXECUTOR_THREADS = int(os.getenv("EXECUTOR_THREADS", "4"))
+EXECUTOR_PROCESSES = int(os.getenv("EXECUTOR_PROCESSES", "2"))
+
+# --- Search AI for elite encounters (see core/battle_ai.py) ---
+SEARCH_AI_ENABLED = os.getenv("SEARCH_AI_ENABLED", "false").lower() in ("1", "true", "yes")
+SEARCH_AI_BUDGET_MS = float(os.getenv("SEARCH_AI_BUDGET_MS", "200"))
+# Battles in locations with at least this much Gloom count as elite
+SEARCH_AI_MIN_GLOOM = int(os.getenv("SEARCH_AI_MIN_GLOOM", "25"))
+
 if not DISCORD_TOKEN:
     raise ValueError("⚠️ DISCORD_TOKEN is missing! Check your .env file.")
 
 if GUILD_IDS:
     GUILD_IDS = [int(g.strip()) for g in GUILD_IDS.split(",")]
 else:
-    GUILD_IDS = []
\ No newline at end of file
+    GUILD_IDS = []
+
+# --- Per-player Inventory cache (see Database.get_inventory) ---
+INVENTORY_CACHE_SIZE = int(os.getenv("INVENTORY_CACHE_SIZE", "5000"))
+# Inventory changes made outside the bot process (story API, raw SQL) show up after at most this
+# long: nothing notifies the bot of them. Writes inside the bot invalidate immediately.
+INVENTORY_CACHE_TTL_SECONDS = float(os.getenv("INVENTORY_CACHE_TTL_SECONDS", "300"))
+
+# --- Bulk live-ops runs (see core/liveops.py) ---
+LIVEOPS_BATCH_SIZE = int(os.getenv("LIVEOPS_BATCH_SIZE", "500"))
+# Rows written per second across a run; 0 = unlimited
+LIVEOPS_MAX_ROWS_PER_SECOND = float(os.getenv("LIVEOPS_MAX_ROWS_PER_SECOND", "2000"))
+# A run waits while the pool has this many connections or fewer to spare
+LIVEOPS_MIN_FREE_CONNECTIONS = int(os.getenv("LIVEOPS_MIN_FREE_CONNECTIONS", "2"))
+
+# --- World maintenance ticks (see core/maintenance.py) ---
+MAINTENANCE_CHUNK_SIZE = int(os.getenv("MAINTENANCE_CHUNK_SIZE", "5000"))
+# Energy given back to every player below max_energy, every ENERGY_REGEN_MINUTES; 0 = off (the default:
+# turning it on is a balance change)
+ENERGY_REGEN_AMOUNT = int(os.getenv("ENERGY_REGEN_AMOUNT", "0"))
+ENERGY_REGEN_MINUTES = float(os.getenv("ENERGY_REGEN_MINUTES", "10"))
+# Hunger every main pet loses every HUNGER_DECAY_MINUTES; 0 = off
+HUNGER_DECAY_AMOUNT = int(os.getenv("HUNGER_DECAY_AMOUNT", "0"))
+HUNGER_DECAY_MINUTES = float(os.getenv("HUNGER_DECAY_MINUTES", "60"))
@@ -0,0 +1,69 @@
+# core/crafting.py
+# Tracks which recipes a player can craft, and how many times, as their inventory changes.
+# It does NOT handle Discord UI, only the underlying bookkeeping.
+
+from typing import Dict, List
+
+from data.recipes import RECIPES
+
+
+def build_ingredient_index(recipes: dict = RECIPES) -> Dict[str, List[str]]:
+    """Builds {ingredient_id: [recipe_id, ...]} — which recipes care about a given item."""
+    index = {}
+    for recipe_id, recipe_data in recipes.items():
+        for ingredient_id in recipe_data.get("ingredients", {}):
+            index.setdefault(ingredient_id, []).append(recipe_id)
+    return index
+
+
+# RECIPES is static, so one shared index is enough for every player
+INGREDIENT_INDEX = build_ingredient_index()
+
+
+def count_craftable(recipe_data: dict, quantities: Dict[str, int]) -> int:
+    """How many times a recipe can be crafted from the given {item_id: quantity} map."""
+    ingredients = recipe_data.get("ingredients", {})
+    if not ingredients:
+        return 0
+    return min(quantities.get(ingredient_id, 0) // required
+               for ingredient_id, required in ingredients.items() if required > 0)
+
+
+class CraftableTracker:
+    """
+    Keeps a max-craftable count for every recipe.
+    When one item's quantity changes, only the recipes that use that item are re-evaluated,
+    so "can I craft this?" and "how many?" are plain dict lookups.
+    """
+
+    def __init__(self, quantities: Dict[str, int], recipes: dict = RECIPES,
+                 ingredient_index: Dict[str, List[str]] = None):
+        self.recipes = recipes
+        self.ingredient_index = ingredient_index if ingredient_index is not None else INGREDIENT_INDEX
+        self.quantities = quantities  # the owner's live {item_id: quantity} map
+        self.max_counts = {}          # {recipe_id: times craftable}, only for recipes with a count > 0
+        self.rebuild()
+
+    def rebuild(self):
+        """Evaluates every recipe from scratch (used once, when the inventory is loaded)."""
+        self.max_counts = {}
+        for recipe_id, recipe_data in self.recipes.items():
+            self._evaluate(recipe_id, recipe_data)
+
+    def item_changed(self, item_id: str):
+        """Re-evaluates just the recipes that use `item_id` as an ingredient."""
+        for recipe_id in self.ingredient_index.get(item_id, ()):
+            self._evaluate(recipe_id, self.recipes[recipe_id])
+
+    def _evaluate(self, recipe_id: str, recipe_data: dict):
+        count = count_craftable(recipe_data, self.quantities)
+        if count > 0:
+            self.max_counts[recipe_id] = count
+        else:
+            self.max_counts.pop(recipe_id, None)
+
+    def max_craftable(self, recipe_id: str) -> int:
+        return self.max_counts.get(recipe_id, 0)
+
+    def can_craft(self, recipe_id: str) -> bool:
+        return recipe_id in self.max_counts
@@ -0,0 +1,134 @@
+# core/dialogue.py
+# Compiles the NPC dialogue trees in data/dialogues.py into predicate checks, once, at import.
+# Each compiled tree knows which player facts its conditions read, so the resolver fetches only
+# those facts (in one query) and then picks the node in a single pass.
+# It does NOT handle Discord UI, only condition evaluation.
+
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from data.dialogues import DIALOGUES
+from utils.constants import CREST_RANKS
+
+# Player facts a condition can depend on (see Database.get_dialogue_facts):
+#   flags  — set of flag names
+#   items  — set of owned item ids
+#   quests — {quest_id: progress dict} for every row in player_quests
+#   time   — the player's day_of_cycle
+#   crests — number of crests earned
+FACT_FLAGS, FACT_ITEMS, FACT_QUESTS, FACT_TIME, FACT_CRESTS = "flags", "items", "quests", "time", "crests"
+
+REQUIRED_KEYS = ("required_flag", "required_item", "required_quest_status",
+                 "required_quest_step", "required_time", "required_rank")
+
+# A rank requirement is just a minimum crest count, since CREST_RANKS is ordered by crest_count
+_RANK_MIN_CRESTS = {r["rank"]: r["crest_count"] for r in CREST_RANKS}
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+# -------------------------
+# Condition compilers — one per required_* key. Each returns (check, fact it reads).
+# -------------------------
+def _compile_flag(flag) -> Tuple[Predicate, str]:
+    return (lambda facts: flag in facts[FACT_FLAGS]), FACT_FLAGS
+
+
+def _compile_item(item_id) -> Tuple[Predicate, str]:
+    return (lambda facts: item_id in facts[FACT_ITEMS]), FACT_ITEMS
+
+
+def _compile_quest_status(req) -> Tuple[Predicate, str]:
+    quest_id, status = req["quest_id"], req["status"]
+    if status == "active":
+        # "active" → the quest is in the player's quest list right now
+        return (lambda facts: quest_id in facts[FACT_QUESTS]), FACT_QUESTS
+    # "completed"/"failed" → persistent flag set after the quest ends
+    flag = f"quest_{quest_id}_{status}"
+    return (lambda facts: flag in facts[FACT_FLAGS]), FACT_FLAGS
+
+
+def _compile_quest_step(req) -> Tuple[Predicate, str]:
+    quest_id, step = req["quest_id"], req["step"]
+
+    def check(facts):
+        quests = facts[FACT_QUESTS]
+        return quest_id in quests and (quests[quest_id] or {}).get("count", 0) == step
+    return check, FACT_QUESTS
+
+
+def _compile_time(phases) -> Tuple[Predicate, str]:
+    phases = frozenset(phases)
+    return (lambda facts: facts[FACT_TIME] in phases), FACT_TIME
+
+
+def _compile_rank(rank) -> Tuple[Predicate, str]:
+    min_crests = _RANK_MIN_CRESTS.get(rank, 0)  # unknown ranks never block, as before
+    return (lambda facts: facts[FACT_CRESTS] >= min_crests), FACT_CRESTS
+
+
+_CONDITION_COMPILERS = {
+    "required_flag": _compile_flag,
+    "required_item": _compile_item,
+    "required_quest_status": _compile_quest_status,
+    "required_quest_step": _compile_quest_step,
+    "required_time": _compile_time,
+    "required_rank": _compile_rank,
+}
+
+
+class CompiledDialogue:
+    """One NPC's dialogue tree, with every conditional node turned into a list of checks."""
+
+    def __init__(self, npc_id: str, npc_data: dict):
+        self.npc_id = npc_id
+        self.npc_data = npc_data
+        self.conditional_nodes: List[Tuple[dict, List[Predicate]]] = []
+        self.grant_quest_nodes: List[dict] = []  # unconditional grant_quest fallbacks
+        self.default_node: Optional[dict] = None
+        self.needs: Set[str] = set()
+
+        for node in npc_data.get("dialogue_tree", []):
+            checks = []
+            for key in REQUIRED_KEYS:
+                if key in node:
+                    check, fact = _CONDITION_COMPILERS[key](node[key])
+                    checks.append(check)
+                    self.needs.add(fact)
+            if checks:
+                self.conditional_nodes.append((node, checks))
+            elif node.get("action") == "grant_quest":
+                self.grant_quest_nodes.append(node)
+            if self.default_node is None and "default" in node:
+                self.default_node = node
+
+        if self.grant_quest_nodes:
+            self.needs.add(FACT_QUESTS)
+
+    def resolve(self, facts: Dict[str, Any]) -> Optional[dict]:
+        """First conditional node whose checks all pass, else a grant_quest fallback, else the default."""
+        for node, checks in self.conditional_nodes:
+            if all(check(facts) for check in checks):
+                return node
+        for node in self.grant_quest_nodes:
+            if node.get("quest_id") not in facts[FACT_QUESTS]:
+                return node
+        return self.default_node
+
+
+def compile_dialogues(dialogues: dict = DIALOGUES) -> Dict[str, CompiledDialogue]:
+    return {npc_id: CompiledDialogue(npc_id, npc_data) for npc_id, npc_data in dialogues.items()}
+
+
+COMPILED_DIALOGUES = compile_dialogues()
+
+
+async def get_dialogue_node(db_cog, user_id: int, npc_id: str) -> Tuple[Optional[dict], dict]:
+    """
+    Resolves the active dialogue node for an NPC. Returns (node, npc_data), matching what the
+    town and remnant views expect. Only the facts this NPC's conditions use are fetched.
+    """
+    compiled = COMPILED_DIALOGUES.get(npc_id)
+    if compiled is None:
+        return None, {}
+    facts = await db_cog.get_dialogue_facts(user_id, compiled.needs)
+    return compiled.resolve(facts), compiled.npc_data
@@ -3,7 +3,7 @@
 # Central "Effect Engine" for handling skill and passive effects.
 import random
 import math
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from data.skills import PET_SKILLS
 
@@ -33,6 +33,20 @@ EVENT_ON_ATTACK_HIT = "on_attack_hit"
 EVENT_ON_NEXT_DAMAGE_RECEIVED = "on_next_damage_received"
 EVENT_ON_ACTION_ATTEMPT = "on_action_attempt"
 EVENT_ON_Faint = "on_faint"
+EVENT_ON_SWITCH_OUT = "on_switch_out"
+EVENT_ON_SWITCH_IN = "on_switch_in"
+EVENT_ON_DAMAGE_CALCULATION = "on_damage_calculation"
+EVENT_ON_EVADE = "on_evade"
+EVENT_ON_HEAL_RECEIVED = "on_heal_received"
+EVENT_ON_OPPONENT_ACTION = "on_opponent_action"
+
+# Every key an active effect can carry to react to a battle event. Effects subscribe to the events
+# they carry when they are applied (see battle_types.EffectList) and unsubscribe when they expire.
+TRIGGER_EVENTS = (
+    EVENT_ON_ACTION_ATTEMPT, EVENT_ON_BEING_HIT, EVENT_ON_ATTACK_HIT, EVENT_ON_TURN_END,
+    EVENT_ON_NEXT_DAMAGE_RECEIVED, EVENT_ON_Faint, EVENT_ON_SWITCH_OUT, EVENT_ON_SWITCH_IN,
+    EVENT_ON_DAMAGE_CALCULATION, EVENT_ON_EVADE, EVENT_ON_HEAL_RECEIVED, EVENT_ON_OPPONENT_ACTION,
+)
 
 # =================================================================================
 #  REGISTRATION HELPERS
@@ -47,6 +61,7 @@ def register_effect(effect_type: str):
     return _wrap
 
 def register_condition(cond_key: str):
+    """Decorator to register a trigger-condition compiler: (condition value) -> predicate(context) -> bool."""
     def _wrap(fn):
         CONDITION_HANDLERS[cond_key] = fn
         return fn
@@ -59,6 +74,10 @@ def is_player_pet(pet: dict) -> bool:
     """Detect player pet vs wild by presence of pet_id."""
     return bool(pet.get("pet_id"))
 
+def battle_rng(battle_state=None):
+    """The battle's own random stream (see BattleState.rng); the global one outside a battle."""
+    return getattr(battle_state, "rng", None) or random
+
 def normalize_effects(effects):
     """Ensure skill['effect'] is always a list of effect dicts."""
     if effects is None:
@@ -84,7 +103,8 @@ def is_debuff(effect: dict) -> bool:
 
     return False
 
-def choose_verb(skill_info: dict, attacker_name: str, defender_name: str, NOTIFICATIONS: Optional[dict] = None) -> str:
+def choose_verb(skill_info: dict, attacker_name: str, defender_name: str, NOTIFICATIONS: Optional[dict] = None,
+                rng=random) -> str:
     """
     Choose an action verb phrase based on priority.
     Pass NOTIFICATIONS dict if you want notification lookups.
@@ -105,18 +125,18 @@ def choose_verb(skill_info: dict, attacker_name: str, defender_name: str, NOTIFI
     )
 
     try:
-        verb_phrase = random.choice(verb_options).format(defender_name=defender_name)
+        verb_phrase = rng.choice(verb_options).format(defender_name=defender_name)
     except Exception:
         verb_phrase = f"attacks {defender_name}"
 
     return verb_phrase
 
-def choose_template(NOTIFICATIONS: Optional[dict] = None):
+def choose_template(NOTIFICATIONS: Optional[dict] = None, rng=random):
     templates = (NOTIFICATIONS.get("COMBAT_SENTENCE_TEMPLATES")
                  if NOTIFICATIONS else None)
     if not templates:
         templates = ["› {attacker_name} {verb_phrase} with **{skill_name}**{impact_phrase}"]
-    return random.choice(templates)
+    return rng.choice(templates)
 
 def compute_base_damage(power: float, attack: float, defense: float) -> int:
     """Centralized damage formula. Ensures at least 1 dama  ge."""
@@ -134,11 +154,63 @@ def format_pet_name(pet: dict, is_player: bool = False, is_wild: bool = False) -
 def is_status_effect(effect: dict) -> bool:
     return effect.get("type") == "status"
 
+# =================================================================================
+#  TRIGGER CONDITIONS
+#  A trigger block (e.g. an effect's "on_being_hit") may carry if_* conditions. They are compiled
+#  into one predicate when the effect is applied, so dispatch is a single call per subscriber.
+#  Predicates take the trigger_event context: {"skill_info": ..., "damage": ..., ...}.
+# =================================================================================
+
+@register_condition("if_move_category")
+def _compile_if_move_category(category):
+    return lambda context: context.get("skill_info", {}).get("category") == category
+
+
+@register_condition("if_attack_category")
+def _compile_if_attack_category(category):
+    return lambda context: context.get("skill_info", {}).get("category") == category
+
+
+@register_condition("if_attack_type")
+def _compile_if_attack_type(required_types):
+    if not isinstance(required_types, list):
+        required_types = [required_types]
+    return lambda context: context.get("skill_info", {}).get("type") in required_types
+
+
+@register_condition("if_attack_damaging")
+def _compile_if_attack_damaging(required):
+    if not required:
+        return None  # "if_attack_damaging": false places no condition
+    return lambda context: context.get("damage", 0) > 0
+
+
+def _always(context) -> bool:
+    return True
+
+
+def compile_trigger(trigger_data) -> Callable[[dict], bool]:
+    """Turns a trigger block's if_* conditions into one predicate over the event context."""
+    if not isinstance(trigger_data, dict):
+        return _always
+    checks = []
+    for cond_key, compiler in CONDITION_HANDLERS.items():
+        if cond_key in trigger_data:
+            check = compiler(trigger_data[cond_key])
+            if check is not None:
+                checks.append(check)
+    if not checks:
+        return _always
+    if len(checks) == 1:
+        return checks[0]
+    return lambda context: all(check(context) for check in checks)
+
 # =================================================================================
 # GENERIC ACTION-BLOCKING STATUS HANDLER
 # =================================================================================\
 
-def check_and_consume_action_blockers(effects_list: List[dict], pet: dict, turn_log_lines: List[str]) -> bool:
+def check_and_consume_action_blockers(effects_list: List[dict], pet: dict, turn_log_lines: List[str],
+                                      rng=random) -> bool:
     """Checks for statuses that block action (flinch, sleep, stun, etc.), applies chance logic,
     executes optional on_block behavior, decrements duration, and returns True if action is blocked."""
     for effect in effects_list[:]:
@@ -148,7 +220,7 @@ def check_and_consume_action_blockers(effects_list: List[dict], pet: dict, turn_
 
         # Roll chance (default 100%)
         block_chance = effect.get("block_chance", 1.0)
-        if random.random() <= block_chance:
+        if rng.random() <= block_chance:
             pet_name = format_pet_name(pet)
             msg = effect.get("block_message", f"› {pet_name} couldn't act!")
             turn_log_lines.append(msg.replace("{pet_name}", pet_name))
@@ -244,7 +316,7 @@ async def handle_status(target: dict, target_effects_list: List[dict], effect_da
     duration = effect_data.get("duration", 1)
     chance = effect_data.get("chance", 1.0)
 
-    if random.random() > chance:
+    if battle_rng(battle_state).random() > chance:
         return False
 
     active = dict(effect_data)
@@ -298,7 +370,7 @@ async def handle_stat_change(target: dict,
     # --- END NEW BLOCK ---
 
     tgt = format_pet_name(target)
-    if random.random() <= chance:
+    if battle_rng(kwargs.get("battle_state")).random() <= chance:
         if isinstance(stat, list):
             for s in stat:
                 target_effects_list.append(
@@ -348,15 +420,16 @@ async def handle_remove_buff(target: dict,
         return False
 
     # Optionally remove a specific stat if provided
+    rng = battle_rng(kwargs.get("battle_state"))
     stat_to_remove = effect_data.get("stat")
     if stat_to_remove:
         targeted = [b for b in buffs_found if b.get("stat") == stat_to_remove]
         if targeted:
-            buff_to_remove = random.choice(targeted)
+            buff_to_remove = rng.choice(targeted)
         else:
-            buff_to_remove = random.choice(buffs_found)
+            buff_to_remove = rng.choice(buffs_found)
     else:
-        buff_to_remove = random.choice(buffs_found)
+        buff_to_remove = rng.choice(buffs_found)
 
     try:
         target_effects_list.remove(buff_to_remove)
@@ -439,7 +512,7 @@ async def handle_steal_buff(target: dict,
         return False
 
     # Choose a random buff to steal
-    buff_to_steal = random.choice(buffs_on_target)
+    buff_to_steal = battle_rng(battle_state).choice(buffs_on_target)
 
     # Remove the buff from the target
     try:
@@ -547,9 +620,9 @@ async def handle_team_cleanse(target: dict,
 # =================================================================================
 
 async def handle_flame_body(attacker: dict, defender: dict, turn_log_lines: List[str],
-                            attacker_effects_list: List[dict], **kwargs):
+                            attacker_effects_list: List[dict], battle_state=None, **kwargs):
     """Handles the Flame Body passive. 30% chance to burn on physical contact."""
-    if random.random() < 0.3:  # 30% chance to trigger
+    if battle_rng(battle_state).random() < 0.3:  # 30% chance to trigger
         turn_log_lines.append(f"› {defender.get('name', defender.get('species','Defender'))}'s Flame Body burned the attacker!")
         # Delegate to the registered apply_status handler
         await handle_status(
@@ -559,6 +632,7 @@ async def handle_flame_body(attacker: dict, defender: dict, turn_log_lines: List
             turn_log_lines=turn_log_lines,
             damage_dealt=0,
             attacker=defender,
+            battle_state=battle_state,
         )
 
 async def handle_fortress_form(defender: dict, turn_log_lines: List[str], **kwargs):
@@ -586,10 +660,7 @@ async def tick_effects_for_pet(
 ) -> bool:
     is_null_field_active = False
     if battle_state:
-        is_null_field_active = any(
-            eff.get("status_effect") == "null_field"
-            for eff in battle_state.field_effects["player"]
-        )
+        is_null_field_active = battle_state.field_effects["player"].has_status("null_field")
 
     if is_null_field_active:
         for effect in effects_list[:]:
@@ -605,43 +676,41 @@ async def tick_effects_for_pet(
     pet_name = format_pet_name(pet, is_player=is_player)
     fainted = False
 
-    for effect in effects_list[:]:
-        etype = effect.get("type")
-
-        if etype == "status":
-            if effect.get("blocks_action", False):
-                if 'duration' in effect and effect['duration'] != -1:
-                    effect['duration'] -= 1
-                    if effect['duration'] <= 0:
-                        try:
-                            effects_list.remove(effect)
-                        except ValueError:
-                            pass
-                        turn_log_lines.append(
-                            f"› {pet_name} is no longer {effect.get('status_effect')}."
-                        )
-                        continue
-
-            on_turn_end = effect.get("on_turn_end")
-            if on_turn_end:
-                et = on_turn_end.get("type")
-                if et == "dot":
-                    damage = on_turn_end.get("damage_per_turn", 5)
-                    pet['current_hp'] = max(0, pet['current_hp'] - damage)
-                    turn_log_lines.append(
-                        f"› {pet_name} took {damage} damage from {effect.get('status_effect')}!"
-                    )
-                elif et == "heal":
-                    heal_amount = math.floor(
-                        pet.get('max_hp', 1) * on_turn_end.get("amount_percent", 0)
-                    )
-                    pet['current_hp'] = min(
-                        pet['max_hp'],
-                        pet['current_hp'] + heal_amount
-                    )
+    # Only statuses tick here; copy the bucket since expiring effects are removed as we go
+    for effect in list(effects_list.of_type("status")):
+        if effect.get("blocks_action", False):
+            if 'duration' in effect and effect['duration'] != -1:
+                effect['duration'] -= 1
+                if effect['duration'] <= 0:
+                    try:
+                        effects_list.remove(effect)
+                    except ValueError:
+                        pass
                     turn_log_lines.append(
-                        f"› {pet_name} recovered {heal_amount} HP from a lingering effect!"
+                        f"› {pet_name} is no longer {effect.get('status_effect')}."
                     )
+                    continue
+
+        on_turn_end = effect.get("on_turn_end")
+        if on_turn_end:
+            et = on_turn_end.get("type")
+            if et == "dot":
+                damage = on_turn_end.get("damage_per_turn", 5)
+                pet['current_hp'] = max(0, pet['current_hp'] - damage)
+                turn_log_lines.append(
+                    f"› {pet_name} took {damage} damage from {effect.get('status_effect')}!"
+                )
+            elif et == "heal":
+                heal_amount = math.floor(
+                    pet.get('max_hp', 1) * on_turn_end.get("amount_percent", 0)
+                )
+                pet['current_hp'] = min(
+                    pet['max_hp'],
+                    pet['current_hp'] + heal_amount
+                )
+                turn_log_lines.append(
+                    f"› {pet_name} recovered {heal_amount} HP from a lingering effect!"
+                )
 
     return fainted
 
@@ -0,0 +1,157 @@
+# core/executor.py
+# Worker pools for CPU-heavy work, so it never runs on the event loop that acknowledges interactions.
+# Two shared pools:
+#   thread_pool  — for work that releases the GIL (compression, hashing, file and socket I/O,
+#                  C-accelerated encoders) or calls blocking libraries.
+#   process_pool — for pure-Python work (battle search, content validation, large JSON exports),
+#                  which a thread would only slow the loop down with.
+# Use them with `await thread_pool.run(fn, *args)` or decorate a module-level function with
+# @offload("process") / @offload("thread") to make it awaitable.
+# Each pool keeps at most `max_pending` jobs in its executor; a burst beyond that waits on the
+# loop (cheaply) instead of queueing unbounded work in the workers. A job keeps its slot until it
+# has actually finished, even if its caller stopped waiting (asyncio.wait_for timing out), so
+# abandoned jobs can't pile up past the limit. Every pool reports executor.<name>.queue_depth,
+# .wait_ms (submit → start) and .run_ms histograms.
+# Worker processes are started with forkserver (spawn off POSIX), never fork: by the time the
+# first job arrives the bot has its gateway and executor threads and open sockets, and forking a
+# multi-threaded process can deadlock the child. Workers import the main module, so bot.py only
+# runs the bot under `if __name__ == "__main__"`.
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from core import config
+from core.metrics import get_histogram
+
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _timed_call(fn, args, kwargs):
+    """Runs in the worker. Returns (start time, run seconds, result) so the caller can split wait from run."""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time() - started, result
+
+
+class WorkPool:
+    """One lazily started executor plus its metrics."""
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_pending: Optional[int] = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"unknown pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * 2
+        self.pending = 0   # jobs handed to the executor and not finished yet
+        self.waiting = 0   # jobs held back on the loop because max_pending was reached
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.depth_histogram = get_histogram(f"executor.{name}.queue_depth", QUEUE_DEPTH_BUCKETS, unit="")
+        self.wait_histogram = get_histogram(f"executor.{name}.wait_ms")
+        self.run_histogram = get_histogram(f"executor.{name}.run_ms")
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            else:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context(method))
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Runs fn(*args, **kwargs) in the pool. For the process pool, fn and its arguments must pickle."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        self.depth_histogram.observe(self.pending + self.waiting)
+
+        submitted = time.time()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            job = self._get_executor().submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            self._job_done()
+            raise
+        # Released when the job ends, not when the caller stops waiting. Cancelling the caller
+        # cancels a job that hasn't started yet; a running one keeps its slot until it's done.
+        job.add_done_callback(lambda _: self._release_from(loop))
+        started, run_seconds, result = await asyncio.wrap_future(job)
+        self.wait_histogram.observe(max(0.0, started - submitted) * 1000)
+        self.run_histogram.observe(run_seconds * 1000)
+        return result
+
+    def _release_from(self, loop: asyncio.AbstractEventLoop):
+        # Done callbacks run in the worker thread (or the executor's management thread)
+        try:
+            loop.call_soon_threadsafe(self._job_done)
+        except RuntimeError:
+            pass  # the loop is closed: nobody is left to use the slot
+
+    def _job_done(self):
+        self.pending -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "kind": self.kind, "workers": self.max_workers,
+                "pending": self.pending, "waiting": self.waiting}
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# Shared by every cog and the battle engine
+thread_pool = WorkPool("threads", "thread", config.EXECUTOR_THREADS)
+process_pool = WorkPool("processes", "process", config.EXECUTOR_PROCESSES)
+POOLS = {"thread": thread_pool, "process": process_pool}
+
+
+def _call_original(module: str, qualname: str, args, kwargs):
+    """Process-pool trampoline: looks the decorated function up by name and calls the undecorated one."""
+    target = importlib.import_module(module)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target.__wrapped__(*args, **kwargs)
+
+
+def offload(kind: str = "process"):
+    """
+    Makes a plain module-level function awaitable in the given pool:
+
+        @offload("process")
+        def build_report(rows): ...
+
+        report = await build_report(rows)
+
+    The undecorated function stays available as `build_report.__wrapped__` for direct calls.
+    """
+    pool = POOLS[kind]
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if kind == "process":
+                # The module attribute is now this wrapper, so the worker resolves fn by name
+                return await pool.run(_call_original, fn.__module__, fn.__qualname__, args, kwargs)
+            return await pool.run(fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def shutdown_pools(wait: bool = False):
+    for pool in POOLS.values():
+        pool.shutdown(wait=wait)
@@ -3,6 +3,7 @@
 # It does NOT handle Discord commands, only the underlying mechanics.
 
 from data.items import ITEMS  # We import our item data from the data layer
+from core.crafting import CraftableTracker
 
 
 class Item:
@@ -84,4 +85,138 @@ class Bag:
         return [
             {'item_id': item.item_id, 'quantity': item.quantity}
             for item in self.items.values()
-        ]
\ No newline at end of file
+        ]
+
+# -------------------------
+# Inventory (aggregated, cached view of a player's bag)
+# -------------------------
+# The bag UI shows these filters. Orbs are Consumables with 'orb_data', but get their own tab.
+BAG_FILTERS = ["Consumables", "Gear", "Crafting Materials", "Orbs", "Key Items"]
+
+_BUCKETS_BY_ITEM = {}  # {item_id: [filter names]} — ITEMS is static, so this only fills once per id
+
+
+def get_item_buckets(item_id: str) -> list:
+    """Returns the bag filters an item is listed under (an item can appear under several)."""
+    buckets = _BUCKETS_BY_ITEM.get(item_id)
+    if buckets is None:
+        base_item_data = ITEMS.get(item_id, {})
+        category = base_item_data.get('category')
+        categories = category if isinstance(category, list) else [category]
+        buckets = []
+        for name in categories:
+            if name == "Consumables" and 'orb_data' in base_item_data:
+                buckets.append("Orbs")
+            elif name:
+                buckets.append(name)
+        _BUCKETS_BY_ITEM[item_id] = buckets
+    return buckets
+
+
+class Inventory(Bag):
+    """
+    A Bag built from the player's inventory rows, with the aggregates every UI needs kept up to date.
+    - rows: {row_key: row} — one row per DB row. Stackable items are keyed by item_id; unique items
+      (with item_data, e.g. Skill Tomes) get their own key like 'skill_tome:2'.
+    - quantities: {item_id: total quantity}
+    - buckets: {filter name: [row_key, ...]}
+    - crafting: CraftableTracker with how many times each recipe can be crafted right now
+    - sellable: [row_key, ...] for items that have a shop price
+    """
+
+    def __init__(self, owner_id: int, items_data: list = None):
+        self.rows = {}
+        self.quantities = {}
+        self.buckets = {name: [] for name in BAG_FILTERS}
+        self.sellable = []
+        self._next_unique = 0
+        self.crafting = None
+        super().__init__(owner_id)
+        for row in items_data or []:
+            self.add_item(row['item_id'], row['quantity'], row.get('item_data'))
+        self.crafting = CraftableTracker(self.quantities)
+
+    def add_item(self, item_id: str, quantity: int = 1, item_data: dict = None):
+        """Adds a stack (or a unique instance, if item_data is given) and updates the aggregates."""
+        if quantity <= 0:
+            return
+        super().add_item(item_id, quantity)
+
+        row_key = self._find_row_key(item_id, item_data)
+        if row_key is not None:
+            self.rows[row_key]['quantity'] += quantity
+        else:
+            if item_data:
+                self._next_unique += 1
+                row_key = f"{item_id}:{self._next_unique}"
+            else:
+                row_key = item_id
+            self.rows[row_key] = {'item_id': item_id, 'quantity': quantity, 'item_data': item_data}
+            for bucket in get_item_buckets(item_id):
+                self.buckets.setdefault(bucket, []).append(row_key)
+            if (ITEMS.get(item_id, {}).get('price') or 0) > 0:
+                self.sellable.append(row_key)
+
+        self.quantities[item_id] = self.quantities.get(item_id, 0) + quantity
+        if self.crafting:
+            self.crafting.item_changed(item_id)
+
+    def remove_item(self, item_id: str, quantity: int = 1, item_data: dict = None):
+        """Removes from a specific row (matched on item_data) and drops it once it hits zero."""
+        if quantity <= 0:
+            return
+        row_key = self._find_row_key(item_id, item_data)
+        if row_key is None:
+            return
+        super().remove_item(item_id, quantity)
+
+        row = self.rows[row_key]
+        removed = min(quantity, row['quantity'])
+        row['quantity'] -= removed
+        if row['quantity'] <= 0:
+            del self.rows[row_key]
+            for bucket in get_item_buckets(item_id):
+                self.buckets[bucket].remove(row_key)
+            if row_key in self.sellable:
+                self.sellable.remove(row_key)
+
+        remaining = self.quantities.get(item_id, 0) - removed
+        if remaining > 0:
+            self.quantities[item_id] = remaining
+        else:
+            self.quantities.pop(item_id, None)
+        if self.crafting:
+            self.crafting.item_changed(item_id)
+
+    def _find_row_key(self, item_id: str, item_data: dict = None):
+        if not item_data:
+            return item_id if item_id in self.rows else None
+        for row_key, row in self.rows.items():
+            if row['item_id'] == item_id and row['item_data'] == item_data:
+                return row_key
+        return None
+
+    # --- Lookups used by the views ---
+    def get_row(self, row_key: str) -> dict | None:
+        return self.rows.get(row_key)
+
+    def get_quantity(self, item_id: str) -> int:
+        return self.quantities.get(item_id, 0)
+
+    def has_item(self, item_id: str) -> bool:
+        return item_id in self.quantities
+
+    @property
+    def craftable(self):
+        """Recipe ids that can be crafted at least once (supports `in` and iteration)."""
+        return self.crafting.max_counts.keys()
+
+    def max_craftable(self, recipe_id: str) -> int:
+        return self.crafting.max_craftable(recipe_id)
+
+    def in_bucket(self, name: str) -> list[tuple[str, dict]]:
+        """Returns [(row_key, row), ...] for one bag filter, in the order they were added."""
+        return [(row_key, self.rows[row_key]) for row_key in self.buckets.get(name, [])]
+
+    def sellable_rows(self) -> list[tuple[str, dict]]:
+        return [(row_key, self.rows[row_key]) for row_key in self.sellable]
@@ -0,0 +1,228 @@
+# core/liveops.py
+# Bulk live-ops: grant an item, coins or a flag to every player matching a filter, for events.
+# The per-user admin commands cost several queries per player; a bulk run instead works in
+# batches of LIVEOPS_BATCH_SIZE players, each batch one transaction of set-based statements
+# (an INSERT ... SELECT over unnest() of the batch's ids, an UPDATE ... WHERE user_id = ANY()).
+# Players are walked in user_id order with a keyset cursor, so a batch never rescans earlier ones.
+# A run never competes with the game for connections:
+#   - it holds one pool connection per batch and gives it back in between;
+#   - a token bucket caps the rows written per second (LIVEOPS_MAX_ROWS_PER_SECOND);
+#   - before each batch it waits until the pool has LIVEOPS_MIN_FREE_CONNECTIONS to spare.
+# Every run can be a dry run (count the targets, write nothing). A run with a key records
+# `liveops:<key>` on each player in the same transaction as the grant and skips players that
+# already have it, so an interrupted run can simply be started again. Batches set app.bulk, so the
+# API gets one '*' player_state NOTIFY per batch instead of one per player (migration 018).
+# It does NOT touch Discord; cogs/admin.py owns the /liveops command and progress messages.
+
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from core import config
+from core.metrics import get_histogram
+
+RUN_FLAG_PREFIX = "liveops:"
+OPERATIONS = ("grant_item", "add_coins", "set_flag")
+
+
+class PlayerFilter:
+    """Which players a run targets. Every condition given must hold; no conditions = everyone."""
+
+    def __init__(self, has_flags: Sequence[str] = (), lacks_flags: Sequence[str] = (),
+                 locations: Sequence[str] = (), quest_id: Optional[str] = None,
+                 quest_status: Optional[str] = None):
+        self.has_flags = list(has_flags)
+        self.lacks_flags = list(lacks_flags)
+        self.locations = list(locations)
+        self.quest_id = quest_id
+        self.quest_status = quest_status  # with quest_id: its progress status; alone: any quest's
+
+    def to_sql(self, first_param: int = 1) -> Tuple[str, List[Any]]:
+        """A WHERE condition on `players p` and its arguments, numbered from $first_param."""
+        clauses: List[str] = []
+        args: List[Any] = []
+
+        def param(value) -> str:
+            args.append(value)
+            return f"${first_param + len(args) - 1}"
+
+        if self.has_flags:
+            # Every listed flag: count the matches
+            clauses.append(f"(SELECT COUNT(*) FROM player_flags f WHERE f.player_id = p.user_id "
+                           f"AND f.flag = ANY({param(self.has_flags)}::text[])) = {len(set(self.has_flags))}")
+        if self.lacks_flags:
+            clauses.append(f"NOT EXISTS (SELECT 1 FROM player_flags f WHERE f.player_id = p.user_id "
+                           f"AND f.flag = ANY({param(self.lacks_flags)}::text[]))")
+        if self.locations:
+            clauses.append(f"p.current_location = ANY({param(self.locations)}::text[])")
+        if self.quest_id or self.quest_status:
+            quest = ["q.user_id = p.user_id"]
+            if self.quest_id:
+                quest.append(f"q.quest_id = {param(self.quest_id)}")
+            if self.quest_status:
+                quest.append(f"q.progress->>'status' = {param(self.quest_status)}")
+            clauses.append(f"EXISTS (SELECT 1 FROM player_quests q WHERE {' AND '.join(quest)})")
+        return (" AND ".join(clauses) or "TRUE"), args
+
+    def describe(self) -> str:
+        parts = []
+        if self.has_flags:
+            parts.append(f"flags {', '.join(self.has_flags)}")
+        if self.lacks_flags:
+            parts.append(f"without {', '.join(self.lacks_flags)}")
+        if self.locations:
+            parts.append(f"in {', '.join(self.locations)}")
+        if self.quest_id or self.quest_status:
+            parts.append(f"quest {self.quest_id or 'any'}" + (f" {self.quest_status}" if self.quest_status else ""))
+        return "; ".join(parts) or "all players"
+
+
+class BulkOperation:
+    """One change applied to a batch of players by set-based statements."""
+
+    def __init__(self, op: str, value: str, quantity: int = 1):
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown live-ops operation: {op}")
+        if op == "grant_item" and quantity < 1:
+            raise ValueError(f"grant_item quantity must be at least 1, got {quantity}")
+        self.op = op
+        self.value = value
+        self.quantity = quantity
+
+    def describe(self) -> str:
+        if self.op == "grant_item":
+            return f"{self.quantity}x {self.value}"
+        if self.op == "add_coins":
+            return f"{self.value} coins"
+        return f"flag {self.value}"
+
+    async def apply(self, con, user_ids: List[int]) -> None:
+        if self.op == "grant_item":
+            await con.execute(
+                """INSERT INTO inventory (player_id, item_id, qty)
+                   SELECT id, $2, $3 FROM unnest($1::bigint[]) AS id
+                   ON CONFLICT (player_id, item_id) DO UPDATE SET qty = inventory.qty + EXCLUDED.qty""",
+                user_ids, self.value, self.quantity
+            )
+        elif self.op == "add_coins":
+            await con.execute("UPDATE players SET coins = coins + $2 WHERE user_id = ANY($1::bigint[])",
+                              user_ids, int(self.value))
+        else:
+            await insert_flag(con, user_ids, self.value)
+
+
+async def insert_flag(con, user_ids: List[int], flag: str) -> None:
+    await con.execute(
+        """INSERT INTO player_flags (player_id, flag)
+           SELECT id, $2 FROM unnest($1::bigint[]) AS id ON CONFLICT DO NOTHING""",
+        user_ids, flag
+    )
+
+
+class RateLimiter:
+    """Token bucket: acquire(n) waits until n tokens are available. rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self, n: float = 1.0) -> float:
+        """Takes n tokens (a batch larger than the bucket just waits longer). Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= n
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / self.rate
+        await asyncio.sleep(delay)
+        return delay
+
+
+class LiveOpsRun:
+    """A bulk run over the players matching a filter. Use count() for a dry run, then run()."""
+
+    def __init__(self, pool, player_filter: PlayerFilter, operation: BulkOperation,
+                 run_key: Optional[str] = None, batch_size: Optional[int] = None,
+                 max_rows_per_second: Optional[float] = None):
+        self.pool = pool
+        self.filter = player_filter
+        self.operation = operation
+        self.run_flag = f"{RUN_FLAG_PREFIX}{run_key}" if run_key else None
+        self.batch_size = max(1, batch_size or config.LIVEOPS_BATCH_SIZE)
+        rate = config.LIVEOPS_MAX_ROWS_PER_SECOND if max_rows_per_second is None else max_rows_per_second
+        self.limiter = RateLimiter(rate, burst=max(rate, self.batch_size))
+        self.total: Optional[int] = None
+        self.done = 0
+        self.batches = 0
+        self.throttled_seconds = 0.0
+        self.cancelled = False
+        self.batch_histogram = get_histogram("liveops.batch_ms")
+
+    def _where(self, first_param: int) -> Tuple[str, List[Any]]:
+        where, args = self.filter.to_sql(first_param)
+        if self.run_flag:
+            # Players this run already reached (an earlier, interrupted attempt) are skipped
+            args.append(self.run_flag)
+            where += (f" AND NOT EXISTS (SELECT 1 FROM player_flags r WHERE r.player_id = p.user_id "
+                      f"AND r.flag = ${first_param + len(args) - 1})")
+        return where, args
+
+    async def count(self) -> int:
+        """Dry run: how many players the run would change. Writes nothing."""
+        where, args = self._where(1)
+        self.total = await self.pool.fetchval(f"SELECT COUNT(*) FROM players p WHERE {where}", *args)
+        return self.total
+
+    def cancel(self):
+        """Stops the run after the batch in progress; batches already written stay written."""
+        self.cancelled = True
+
+    async def _wait_for_pool(self):
+        """Leaves the game at least LIVEOPS_MIN_FREE_CONNECTIONS connections before taking one."""
+        while not self.cancelled:
+            free = self.pool.get_max_size() - self.pool.get_size() + self.pool.get_idle_size()
+            if free > config.LIVEOPS_MIN_FREE_CONNECTIONS:
+                return
+            self.throttled_seconds += 0.2
+            await asyncio.sleep(0.2)
+
+    async def run(self, on_batch: Optional[Callable[["LiveOpsRun", List[int]], Awaitable[None]]] = None) -> int:
+        """
+        Applies the operation batch by batch. on_batch(run, user_ids) is awaited after each committed
+        batch (progress reports, per-user cache invalidation). Returns the number of players changed.
+        """
+        if self.total is None:
+            await self.count()
+        where, args = self._where(3)
+        select_batch = (f"SELECT p.user_id FROM players p WHERE p.user_id > $1 AND {where} "
+                        f"ORDER BY p.user_id LIMIT $2")
+        last_id = -(2 ** 63)
+        while not self.cancelled:
+            await self._wait_for_pool()
+            if self.cancelled:
+                break
+            started = time.perf_counter()
+            async with self.pool.acquire() as con:
+                async with con.transaction():
+                    await con.execute("SET LOCAL app.bulk = 'on'")  # no player_state NOTIFY per row
+                    user_ids = [r["user_id"] for r in await con.fetch(select_batch, last_id, self.batch_size, *args)]
+                    if not user_ids:
+                        break
+                    await self.operation.apply(con, user_ids)
+                    if self.run_flag:
+                        await insert_flag(con, user_ids, self.run_flag)
+                    await con.execute("SELECT pg_notify('player_state', '*')")
+            self.batch_histogram.observe((time.perf_counter() - started) * 1000)
+            last_id = user_ids[-1]
+            self.done += len(user_ids)
+            self.batches += 1
+            if on_batch:
+                await on_batch(self, user_ids)
+            self.throttled_seconds += await self.limiter.acquire(len(user_ids))
+        return self.done
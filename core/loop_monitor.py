@@ -0,0 +1,134 @@
+# core/loop_monitor.py
+# Watches the asyncio event loop that every cog shares.
+# Two signals are collected:
+#   1. Loop lag — a sampler sleeps for a fixed interval and measures how late it wakes up.
+#   2. Slow callbacks — every loop callback is timed (asyncio debug-style), and any that run longer
+#      than the threshold are tagged with the view/cog method that was executing.
+# It does NOT import discord; tagging works on any class defined under the `cogs` package.
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+from core.metrics import get_histogram
+
+LOOP_LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_ORIGINAL_HANDLE_RUN = asyncio.events.Handle._run
+_active_monitor: Optional["LoopMonitor"] = None
+
+
+def _timed_handle_run(handle):
+    """Replacement for asyncio.Handle._run that times each callback."""
+    monitor = _active_monitor
+    if monitor is None:
+        return _ORIGINAL_HANDLE_RUN(handle)
+    start = time.perf_counter()
+    try:
+        return _ORIGINAL_HANDLE_RUN(handle)
+    finally:
+        elapsed = time.perf_counter() - start
+        if elapsed >= monitor.slow_callback_seconds:
+            monitor._record_slow_callback(handle, elapsed)
+
+
+class LoopMonitor:
+    """Samples event-loop lag and records slow callbacks, tagged by the view or cog responsible."""
+
+    def __init__(self, sample_interval: float = 0.5, slow_callback_ms: float = 100,
+                 tag_modules: Tuple[str, ...] = ("cogs.",), recent_limit: int = 50):
+        self.sample_interval = sample_interval
+        self.slow_callback_seconds = slow_callback_ms / 1000
+        self.tag_modules = tag_modules
+
+        self.lag_histogram = get_histogram("loop.lag_ms", LOOP_LAG_BUCKETS_MS)
+        self.slow_histogram = get_histogram("loop.slow_callback_ms")
+        self.slow_by_tag: Dict[str, Dict[str, float]] = {}  # {tag: {"count": n, "max_ms": x, "total_ms": y}}
+        self.recent_slow = deque(maxlen=recent_limit)       # (tag, duration_ms, unix_time)
+
+        self._sampler_task: Optional[asyncio.Task] = None
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self):
+        """Installs the callback timer and starts the lag sampler on the running loop."""
+        global _active_monitor
+        _active_monitor = self
+        asyncio.events.Handle._run = _timed_handle_run
+        if self._sampler_task is None or self._sampler_task.done():
+            self._sampler_task = asyncio.get_running_loop().create_task(
+                self._sample_lag(), name="loop-monitor-sampler")
+
+    def stop(self):
+        global _active_monitor
+        if _active_monitor is self:
+            _active_monitor = None
+            asyncio.events.Handle._run = _ORIGINAL_HANDLE_RUN
+        if self._sampler_task:
+            self._sampler_task.cancel()
+            self._sampler_task = None
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.sample_interval
+            await asyncio.sleep(self.sample_interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.lag_histogram.observe(lag_ms)
+
+    # -------------------------
+    # Slow callback tagging
+    # -------------------------
+    def _record_slow_callback(self, handle, elapsed: float):
+        duration_ms = elapsed * 1000
+        tag = self._describe_handle(handle)
+        self.slow_histogram.observe(duration_ms)
+
+        stats = self.slow_by_tag.setdefault(tag, {"count": 0, "max_ms": 0.0, "total_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        self.recent_slow.append((tag, round(duration_ms, 1), time.time()))
+        print(f"⚠️ Slow callback: {tag} blocked the event loop for {duration_ms:.0f}ms")
+
+    def _describe_handle(self, handle) -> str:
+        callback = getattr(handle, "_callback", None)
+        task = getattr(callback, "__self__", None)
+        if isinstance(task, asyncio.Task):
+            return self._tag_from_coroutine(task.get_coro()) or task.get_name()
+        return getattr(callback, "__qualname__", None) or repr(callback)
+
+    def _tag_from_coroutine(self, coro) -> Optional[str]:
+        """
+        Walks the chain of awaiting coroutines and returns the innermost frame that belongs to a
+        view or cog (e.g. 'CombatView.get_battle_embed'). Falls back to the outer coroutine's name.
+        """
+        tag = None
+        outer_name = getattr(coro, "__qualname__", None)
+        while coro is not None:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is not None:
+                owner = frame.f_locals.get("self")
+                if owner is not None and type(owner).__module__.startswith(self.tag_modules):
+                    tag = f"{type(owner).__name__}.{frame.f_code.co_name}"
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        return tag or outer_name
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "loop_lag": self.lag_histogram.snapshot(),
+            "slow_callbacks": self.slow_histogram.snapshot(),
+            "slow_by_tag": {
+                tag: {**stats, "avg_ms": round(stats["total_ms"] / stats["count"], 1)}
+                for tag, stats in self.slow_by_tag.items()
+            },
+        }
+
+    def worst_offenders(self, limit: int = 5) -> list:
+        """Returns [(tag, stats), ...] sorted by total time spent blocking the loop."""
+        return sorted(self.slow_by_tag.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)[:limit]
@@ -0,0 +1,120 @@
+# core/maintenance.py
+# World-wide maintenance ticks: energy regeneration, hunger decay and the like, applied to every
+# player by set-based SQL instead of per-user read/modify/write loops.
+# A tick is one statement per chunk of MAINTENANCE_CHUNK_SIZE players (walked in user_id order),
+# each chunk its own short transaction, so row locks are held briefly and game writes interleave.
+# Several bot processes (shards) may schedule the same tick; each run:
+#   - takes a session advisory lock keyed on the tick name (pg_try_advisory_lock), so only one
+#     process runs it at a time — the others skip;
+#   - checks maintenance_ticks.last_run_at (migration 017), so a process that gets the lock right
+#     after another finished doesn't apply the tick twice.
+# Chunks run with app.bulk set, so they don't send a player_state NOTIFY per row; a run that changed
+# players sends one '*' notification at the end instead (migration 018).
+# Every run records its duration in the maintenance.<tick>_ms histogram and in maintenance_ticks.
+# It does NOT schedule anything; cogs/maintenance.py owns the loop.
+
+from __future__ import annotations
+import datetime
+import time
+from typing import Any, Dict, List, Optional
+
+from core import config
+from core.metrics import get_histogram
+
+# A process that finds the tick ran less than this share of its interval ago skips it
+_RECENT_RUN_SHARE = 0.9
+
+
+class MaintenanceTick:
+    """
+    One periodic world update. `select` picks candidate players (its WHERE must end the query,
+    the chunk cursor is ANDed on); `update` changes them, joining the CTE `chunk`. $3 is `amount`.
+    """
+
+    def __init__(self, name: str, interval_minutes: float, amount: int, select: str, update: str,
+                 notify: bool = True):
+        self.name = name
+        self.notify = notify  # whether `update` changes what the story API serves
+        self.interval = datetime.timedelta(minutes=interval_minutes)
+        self.amount = amount
+        self.sql = f"""
+            WITH chunk AS ({select} AND players.user_id > $1 ORDER BY players.user_id LIMIT $2),
+                 changed AS ({update} RETURNING 1)
+            SELECT (SELECT max(user_id) FROM chunk) AS last_id, (SELECT count(*) FROM changed) AS changed"""
+        self.histogram = get_histogram(f"maintenance.{name}_ms", (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000))
+        self.next_run = 0.0  # time.monotonic() this process next tries it
+        self.last: Dict[str, Any] = {}
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.amount > 0 and self.interval.total_seconds() > 0
+
+    def due(self, now: float) -> bool:
+        return self.enabled and now >= self.next_run
+
+    async def run(self, pool, chunk_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Runs the tick on every player, unless another process holds it or just ran it. Returns the run's stats."""
+        self.next_run = time.monotonic() + self.interval.total_seconds()
+        chunk_size = chunk_size or config.MAINTENANCE_CHUNK_SIZE
+        async with pool.acquire() as con:
+            if not await con.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", f"maintenance:{self.name}"):
+                self.skipped += 1
+                return None
+            try:
+                recent = await con.fetchval(
+                    "SELECT now() - last_run_at < $2 FROM maintenance_ticks WHERE name = $1",
+                    self.name, self.interval * _RECENT_RUN_SHARE
+                )
+                if recent:
+                    self.skipped += 1
+                    return None
+
+                started = time.perf_counter()
+                last_id, changed, chunks = -(2 ** 63), 0, 0
+                while True:
+                    async with con.transaction():
+                        # No player_state NOTIFY per row (migration 018)
+                        await con.execute("SET LOCAL app.bulk = 'on'")
+                        row = await con.fetchrow(self.sql, last_id, chunk_size, self.amount)
+                    if row["last_id"] is None:
+                        break
+                    last_id = row["last_id"]
+                    changed += row["changed"]
+                    chunks += 1
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if changed and self.notify:
+                    await con.execute("SELECT pg_notify('player_state', '*')")
+
+                await con.execute(
+                    """INSERT INTO maintenance_ticks (name, last_run_at, last_changed, last_ms)
+                       VALUES ($1, now(), $2, $3)
+                       ON CONFLICT (name) DO UPDATE
+                       SET last_run_at = now(), last_changed = EXCLUDED.last_changed, last_ms = EXCLUDED.last_ms""",
+                    self.name, changed, elapsed_ms
+                )
+            finally:
+                await con.execute("SELECT pg_advisory_unlock(hashtext($1))", f"maintenance:{self.name}")
+
+        self.histogram.observe(elapsed_ms)
+        self.last = {"changed": changed, "chunks": chunks, "ms": round(elapsed_ms, 1), "at": time.time()}
+        return self.last
+
+
+def default_ticks() -> List[MaintenanceTick]:
+    return [
+        MaintenanceTick(
+            "energy_regen", config.ENERGY_REGEN_MINUTES, config.ENERGY_REGEN_AMOUNT,
+            select="SELECT user_id FROM players WHERE energy < max_energy",
+            update="UPDATE players p SET energy = LEAST(p.max_energy, p.energy + $3) "
+                   "FROM chunk WHERE p.user_id = chunk.user_id",
+        ),
+        MaintenanceTick(
+            # Only main pets: the pet a player travels with is the one that gets hungry
+            "hunger_decay", config.HUNGER_DECAY_MINUTES, config.HUNGER_DECAY_AMOUNT,
+            select="SELECT user_id, main_pet_id FROM players WHERE main_pet_id IS NOT NULL",
+            update="UPDATE pets SET hunger = GREATEST(0, pets.hunger - $3) "
+                   "FROM chunk WHERE pets.pet_id = chunk.main_pet_id AND pets.hunger > 0",
+            notify=False,  # the story API doesn't serve hunger
+        ),
+    ]
@@ -0,0 +1,114 @@
+# core/metrics.py
+# Lightweight in-process metrics shared by the bot and the API.
+# No external dependencies — snapshots are plain dicts, so they can be printed to the console,
+# shown in an admin command, or asserted on in a load test.
+
+import bisect
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+# Millisecond buckets that cover everything from a fast callback to a missed interaction deadline.
+DEFAULT_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """A fixed-bucket histogram. Each bucket counts observations <= its upper bound."""
+
+    def __init__(self, name: str, buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS_MS, unit: str = "ms"):
+        self.name = name
+        self.unit = unit
+        self.bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()  # executor threads can observe too
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # One extra slot at the end for observations above the last bound
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, p: float) -> float:
+        """Estimates the p-th percentile (0-100) as the upper bound of the bucket it falls in."""
+        if self.count == 0:
+            return 0.0
+        rank = self.count * (p / 100)
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= rank and bucket_count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {str(bound): c for bound, c in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "name": self.name,
+            "unit": self.unit,
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+# --- Global registry ---
+HISTOGRAMS: Dict[str, Histogram] = {}
+
+
+def get_histogram(name: str, buckets: Optional[Iterable[float]] = None, unit: str = "ms") -> Histogram:
+    """Returns the histogram registered under `name`, creating it on first use."""
+    histogram = HISTOGRAMS.get(name)
+    if histogram is None:
+        histogram = Histogram(name, buckets or DEFAULT_LATENCY_BUCKETS_MS, unit)
+        HISTOGRAMS[name] = histogram
+    return histogram
+
+
+def snapshot_all() -> Dict[str, Dict[str, Any]]:
+    return {name: h.snapshot() for name, h in sorted(HISTOGRAMS.items())}
+
+
+def format_report(prefix: str = "") -> str:
+    """One line per histogram, e.g. for the console or an admin embed."""
+    lines = []
+    for name, snap in snapshot_all().items():
+        if prefix and not name.startswith(prefix):
+            continue
+        unit = snap["unit"]
+        lines.append(
+            f"{name}: n={snap['count']} avg={snap['avg']}{unit} p50≤{snap['p50']}{unit} "
+            f"p95≤{snap['p95']}{unit} p99≤{snap['p99']}{unit} max={snap['max']}{unit}"
+        )
+    return "\n".join(lines) or "No metrics recorded yet."
+
+
+def render_prometheus() -> str:
+    """Renders every histogram in the Prometheus text exposition format."""
+    lines = []
+    for name, h in sorted(HISTOGRAMS.items()):
+        metric = name.replace(".", "_").replace("-", "_")
+        lines.append(f"# TYPE {metric} histogram")
+        running = 0
+        for bound, bucket_count in zip(h.bounds, h.counts):
+            running += bucket_count
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {running}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+        lines.append(f"{metric}_sum {h.total}")
+        lines.append(f"{metric}_count {h.count}")
+    return "\n".join(lines) + "\n"
@@ -1,62 +1,157 @@
 # core/narrative.py
+# Story steps and their effects. Steps come precompiled from core/story_graph.py (per-step option
+# lookups, next tables, text formatters); sections other than the default load lazily from the library.
+# Effects are not executed one await at a time: Narrative.plan_effects compiles them into an
+# EffectPlan that groups the writes by table (players row, flags, inventory, pets), and the
+# repository runs the whole plan in one transaction with Repository.apply_batch — all flags in
+# one multi-row insert, all items in one upsert — so a scene that grants rewards is all-or-nothing.
 from __future__ import annotations
 from typing import Dict, Any, List, Optional
 from .repository import Repository
+from .story_graph import CompiledSection, CompiledStep, StoryLibrary, compile_section
+
+
+class EffectPlan:
+    """
+    Pending writes for one player, grouped by table. Works on the player's loaded copy, so later
+    effects (and the response) see earlier ones: spend_energy checks energy already spent.
+    """
+
+    def __init__(self, player: Dict[str, Any]):
+        self.player = player
+        # The step the player was loaded at; apply_batch writes nothing if it has moved on
+        self.expected_step_id: Optional[str] = player.get("story_step_id")
+        self.fields: Dict[str, Any] = {}   # players columns: name, section_id, story_step_id
+        self.energy_reset = False          # restore to max_energy before applying energy_delta
+        self.energy_delta = 0
+        self.flags: List[str] = []
+        self.items: Dict[str, int] = {}    # item_id -> qty, summed so the upsert touches each row once
+        self.pets: List[str] = []          # species, in grant order
+        self.main_pet_species: Optional[str] = None  # resolved after the pets are inserted
+
+    def __bool__(self) -> bool:
+        return bool(self.fields or self.energy_reset or self.energy_delta
+                    or self.flags or self.items or self.pets or self.main_pet_species)
+
+    def set_story_state(self, section_id: str, step_id: str):
+        self.player["section_id"] = self.fields["section_id"] = section_id
+        self.player["story_step_id"] = self.fields["story_step_id"] = step_id
+
+    def set_name(self, name: str):
+        self.player["name"] = self.fields["name"] = name
+
+    def set_flag(self, flag: str):
+        flags = self.player.setdefault("flags", set())
+        if flag not in flags:
+            flags.add(flag)
+            self.flags.append(flag)
+
+    def add_item(self, item_id: str, qty: int = 1):
+        self.items[item_id] = self.items.get(item_id, 0) + qty
+
+    def add_pet(self, species: str):
+        self.pets.append(species)
+
+    def set_main_pet_by_species(self, species: str):
+        self.player["main_pet_species"] = self.main_pet_species = species
+
+    def restore_energy_full(self):
+        self.player["energy"] = int(self.player.get("max_energy", self.player.get("energy", 0)))
+        self.energy_reset, self.energy_delta = True, 0
+
+    def spend_energy(self, amount: int) -> bool:
+        current = int(self.player.get("energy", 0))
+        if current < amount:
+            return False
+        self.player["energy"] = current - amount
+        self.energy_delta -= amount
+        return True
+
+
+# Shown for step ids the story doesn't have (content removed, or a section not written yet)
+MISSING_STEP = {"id": "missing", "type": "narration",
+                "text": "⚠️ This part of the story is under construction."}
+
 
 class Narrative:
-    def __init__(self, story: Dict[str, Any], repo: Repository):
+    def __init__(self, story: Dict[str, Any], repo: Repository, library: Optional[StoryLibrary] = None):
         self.story = story
         self.repo = repo
-        self._steps = {s["id"]: s for s in story.get("steps", [])}
+        self.library = library
+        self.default_section = compile_section(story)
+        self._missing = CompiledStep(MISSING_STEP, self.default_section.id)
 
     def first_step_id(self) -> str:
-        return self.story.get("steps", [])[0]["id"]
+        return self.default_section.first_step_id
 
-    def get_step(self, step_id: str) -> Dict[str, Any]:
-        step = self._steps.get(step_id)
-        if not step:
-            # Graceful fallback for missing content
-            return {"id": "missing", "type": "narration",
-                    "text": "⚠️ This part of the story is under construction."}
-        return step
+    def section(self, section_id: Optional[str] = None) -> Optional[CompiledSection]:
+        """The compiled section; other sections come from the library, compiled on first use."""
+        if not section_id or section_id == self.default_section.id:
+            return self.default_section
+        return self.library.get(section_id) if self.library else None
 
-    async def apply_effects(self, user_id: int, effects: Optional[List[Dict[str, Any]]], *, modal_value: str | None = None):
+    def compiled_step(self, step_id: str, section_id: Optional[str] = None) -> CompiledStep:
+        section = self.section(section_id)
+        step = section.get(step_id) if section else None
+        # Graceful fallback for missing content
+        return step or self._missing
+
+    def get_step(self, step_id: str, section_id: Optional[str] = None) -> Dict[str, Any]:
+        return self.compiled_step(step_id, section_id).step
+
+    def plan_effects(self, plan: EffectPlan, effects: Optional[List[Dict[str, Any]]], *,
+                     modal_value: str | None = None) -> EffectPlan:
         for eff in effects or []:
             op = eff.get("op")
 
             if op == "grant_pet":
-                await self.repo.add_pet(user_id, eff["pet_id"])
+                plan.add_pet(eff["pet_id"])
 
             elif op == "grant_item":
-                await self.repo.add_item(user_id, eff["item_id"], eff.get("qty", 1))
+                plan.add_item(eff["item_id"], eff.get("qty", 1))
 
             elif op == "set_flag":
-                await self.repo.set_flag(user_id, eff["flag"])
+                plan.set_flag(eff["flag"])
 
             elif op == "set_name_from_modal":
                 # pull the text the user typed in the modal
                 if modal_value:
-                    await self.repo.update_player_name(user_id, modal_value)
+                    plan.set_name(modal_value)
 
             elif op == "set_main_pet_by_species":
                 # optional op: set player's main pet to the first pet matching species
-                await self.repo.set_main_pet_by_species(user_id, eff["pet_id"])
+                plan.set_main_pet_by_species(eff["pet_id"])
 
             elif op == "goto":
                 # effects: {"op":"goto", "section":"section_1", "step":"intro_1"}
-                await self.repo.set_story_state(user_id, eff["section"], eff["step"])
+                plan.set_story_state(eff["section"], eff["step"])
 
             elif op == "restore_energy_full":
-                await self.repo.restore_energy_full(user_id)
+                plan.restore_energy_full()
 
             elif op == "spend_energy":
                 amt = int(eff.get("amount", 1))
-                ok = await self.repo.spend_energy(user_id, amt)
-                if not ok:
+                if not plan.spend_energy(amt):
                     # Soft failure: mark a flag so the step text can acknowledge it if desired
-                    await self.repo.set_flag(user_id, "no_energy")
+                    plan.set_flag("no_energy")
 
             # Add more ops over time; engine stays the same.
+        return plan
+
+    async def _load_plan(self, user_id: int) -> Optional[EffectPlan]:
+        player = await self.repo.get_player(user_id)
+        if not player:
+            return None
+        player = dict(player, flags=set(player.get("flags") or []))
+        return EffectPlan(player)
+
+    async def apply_effects(self, user_id: int, effects: Optional[List[Dict[str, Any]]], *, modal_value: str | None = None):
+        plan = await self._load_plan(user_id)
+        if plan is None:
+            return
+        self.plan_effects(plan, effects, modal_value=modal_value)
+        if plan:
+            await self.repo.apply_batch(user_id, plan)
 
     async def choose(self, user_id: int, current_step_id: str, choice_id: str) -> str:
         step = self.get_step(current_step_id)
@@ -64,13 +159,18 @@ class Narrative:
             return current_step_id  # no-op
 
         # find selected option
-        chosen = next((o for o in step.get("options", []) if o["id"] == choice_id), None)
+        chosen = self.compiled_step(current_step_id).option_by_id.get(choice_id)
         if not chosen:
             return current_step_id
 
-        await self.apply_effects(user_id, chosen.get("effects"))
+        plan = await self._load_plan(user_id)
+        if plan is None:
+            return current_step_id
+        self.plan_effects(plan, chosen.get("effects"))
 
         # next step resolution: prefer option.next, else step.next, else stay
         next_id = chosen.get("next") or step.get("next") or current_step_id
-        await self.repo.set_story_state(user_id, self.story["id"], next_id)
-        return next_id
\ No newline at end of file
+        plan.set_story_state(self.story["id"], next_id)
+        if not await self.repo.apply_batch(user_id, plan):
+            return current_step_id
+        return next_id
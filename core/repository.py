@@ -1,9 +1,16 @@
 # core/repository.py
 from __future__ import annotations
-from typing import Protocol, Dict, Any, List, Optional, Set
+from typing import Protocol, Callable, Dict, Any, List, Optional, Set, TYPE_CHECKING
 import asyncio
+from collections import OrderedDict
 from data.pets import PET_DATABASE
 
+if TYPE_CHECKING:
+    from .narrative import EffectPlan
+
+# Flags written by the starter scene; a story reset clears them
+STARTER_FLAG_PREFIXES = ("starter_pet:", "starter_talent:")
+
 # ---------- Protocol (engine uses only this) ----------
 class Repository(Protocol):
     async def get_player(self, user_id: int) -> Optional[Dict[str, Any]]: ...
@@ -14,20 +21,30 @@ class Repository(Protocol):
     async def set_flag(self, user_id: int, flag: str) -> None: ...
     async def get_story_state(self, user_id: int) -> Dict[str, Any]: ...
     async def set_story_state(self, user_id: int, section_id: str, step_id: str) -> None: ...
+    async def apply_batch(self, user_id: int, plan: EffectPlan) -> bool: ...
+    async def reset_story(self, user_id: int, section_id: str, step_id: str) -> None: ...
 
 # ---------- In-memory (dev / tests) ----------
 class MemoryRepository:
     def __init__(self):
         self.players: Dict[int, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _touch(p: Dict[str, Any]) -> None:
+        # Mirrors the players.state_version triggers (migration 015)
+        p["state_version"] = p.get("state_version", 0) + 1
+
     async def update_player_name(self, user_id: int, name: str) -> None:
         p = self.players[user_id]
         p["name"] = name
+        self._touch(p)
 
     async def set_main_pet_by_species(self, user_id: int, pet_species: str) -> None:
         p = self.players[user_id]
         for pet in p["pets"]:
             if pet.get("pet_id") == pet_species:
                 p["main_pet_species"] = pet_species
+                self._touch(p)
                 return
     async def get_player(self, user_id: int) -> Optional[Dict[str, Any]]:
         return self.players.get(user_id)
@@ -42,7 +59,9 @@ class MemoryRepository:
             "inventory": [],
             "pets": [],
             "energy": defaults.get("energy", 10),
+            "max_energy": defaults.get("max_energy", 10),
             "warp_unlocks": set(),
+            "state_version": 0,
         }
         return self.players[user_id]
 
@@ -51,6 +70,7 @@ class MemoryRepository:
             await self.create_player(user_id, data)
         else:
             self.players[user_id].update(data)
+            self._touch(self.players[user_id])
 
     async def add_item(self, user_id: int, item_id: str, qty: int = 1) -> None:
         p = self.players[user_id]
@@ -67,7 +87,10 @@ class MemoryRepository:
         p["pets"].append({"pet_id": pet_id, "nickname": None})
 
     async def set_flag(self, user_id: int, flag: str) -> None:
-        self.players[user_id]["flags"].add(flag)
+        p = self.players[user_id]
+        if flag not in p["flags"]:
+            p["flags"].add(flag)
+            self._touch(p)
 
     async def get_story_state(self, user_id: int) -> Dict[str, Any]:
         p = self.players[user_id]
@@ -77,6 +100,7 @@ class MemoryRepository:
         p = self.players[user_id]
         p["section_id"] = section_id
         p["story_step_id"] = step_id
+        self._touch(p)
 
     async def get_session_message_id(self, user_id: int) -> int | None:
         return self.players[user_id].get("session_message_id")
@@ -110,11 +134,49 @@ class MemoryRepository:
         await self.save_player(user_id, p)
         return True
 
+    async def apply_batch(self, user_id: int, plan: EffectPlan) -> bool:
+        """Applies an EffectPlan, unless the player has moved past plan.expected_step_id."""
+        p = self.players.get(user_id)
+        if not p or p.get("story_step_id") != plan.expected_step_id:
+            return False
+        self._touch(p)
+        p.update(plan.fields)
+        if plan.energy_reset or plan.energy_delta:
+            mx = int(p.get("max_energy", p.get("energy", 0)))
+            base = mx if plan.energy_reset else int(p.get("energy", 0))
+            p["energy"] = max(0, min(base + plan.energy_delta, mx))
+        p["flags"].update(plan.flags)
+        for item_id, qty in plan.items.items():
+            await self.add_item(user_id, item_id, qty)
+        for species in plan.pets:
+            await self.add_pet(user_id, species)
+        if plan.main_pet_species:
+            await self.set_main_pet_by_species(user_id, plan.main_pet_species)
+        return True
+
+    async def reset_story(self, user_id: int, section_id: str, step_id: str) -> None:
+        """Back to the given step with no pets, no main pet and no starter choices."""
+        p = self.players.get(user_id)
+        if not p:
+            return
+        p["pets"] = []
+        p["main_pet_species"] = None
+        p["flags"] = {f for f in p["flags"] if not f.startswith(STARTER_FLAG_PREFIXES)}
+        p["section_id"] = section_id
+        p["story_step_id"] = step_id
+        self._touch(p)
+
 # ---------- Your real DB repo (skeleton) ----------
 class SqlRepository:
     def __init__(self, pool):
         self.pool = pool
         self._player_pk = None
+        # Called with the user id after a write to that player's inventory (the bot drops its cached Inventory)
+        self.on_inventory_change: List[Callable[[int], None]] = []
+
+    def _inventory_changed(self, user_id: int) -> None:
+        for hook in self.on_inventory_change:
+            hook(user_id)
 
     async def update_player_name(self, user_id: int, name: str) -> None:
         async with self.pool.acquire() as con:
@@ -125,29 +187,30 @@ class SqlRepository:
 
     async def set_main_pet_by_species(self, user_id: int, species: str):
         async with self.pool.acquire() as con:
-            # Look up the actual pet_id so the old cogs (which use main_pet_id) also work
-            pet_id = await con.fetchval(
-                "SELECT pet_id FROM pets WHERE player_id=$1 AND species=$2 ORDER BY pet_id DESC LIMIT 1",
-                user_id, species
-            )
-            await con.execute(
-                "UPDATE players SET main_pet_species=$2, main_pet_id=$3 WHERE user_id=$1",
-                user_id, species, pet_id
-            )
+            await self._set_main_pet_by_species(con, user_id, species)
+
+    async def _set_main_pet_by_species(self, con, user_id: int, species: str):
+        # Look up the actual pet_id so the old cogs (which use main_pet_id) also work
+        await con.execute(
+            """UPDATE players SET main_pet_species=$2,
+                      main_pet_id=(SELECT pet_id FROM pets WHERE player_id=$1 AND species=$2
+                                   ORDER BY pet_id DESC LIMIT 1)
+               WHERE user_id=$1""",
+            user_id, species
+        )
 
     async def get_player(self, user_id: int):
         async with self.pool.acquire() as con:
+            # One round trip: the flags ride along as an array
             row = await con.fetchrow(
                 """SELECT user_id, username, section_id, story_step_id,
-                          energy, max_energy, main_pet_species
+                          energy, max_energy, main_pet_species, state_version,
+                          ARRAY(SELECT flag FROM player_flags WHERE player_id = players.user_id) AS flags
                    FROM players WHERE user_id=$1""",
                 user_id,
             )
             if not row:
                 return None
-            flags = {r["flag"] for r in await con.fetch(
-                "SELECT flag FROM player_flags WHERE player_id=$1", user_id
-            )}
             return {
                 "id": row["user_id"],
                 "name": row["username"],
@@ -156,7 +219,8 @@ class SqlRepository:
                 "energy": row["energy"],
                 "max_energy": row["max_energy"],
                 "main_pet_species": row["main_pet_species"],
-                "flags": flags,
+                "state_version": row["state_version"],
+                "flags": set(row["flags"]),
             }
 
     async def create_player(self, user_id: int, defaults: dict):
@@ -203,14 +267,29 @@ class SqlRepository:
                    DO UPDATE SET qty = inventory.qty + EXCLUDED.qty""",
                 user_id, item_id, qty
             )
+        self._inventory_changed(user_id)
 
     async def add_pet(self, player_id: int, species: str):
+        async with self.pool.acquire() as con:
+            await con.execute(self._INSERT_PET, *self._pet_row(player_id, species))
+
+    _INSERT_PET = """INSERT INTO pets
+               (player_id, name, species, rarity, pet_type,
+                current_hp, max_hp, attack, defense,
+                special_attack, special_defense, speed,
+                base_hp, base_attack, base_defense,
+                base_special_attack, base_special_defense, base_speed,
+                skills, passive_ability)
+               VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14,$15,$16,$17,$18,$19,$20)"""
+
+    def _pet_row(self, player_id: int, species: str) -> tuple:
+        """Rolls a new level-1 pet of the species: the argument tuple for _INSERT_PET."""
         import random, math
         pet_data = PET_DATABASE.get(species, {})
         rarity = pet_data.get("rarity", "Common")
         pet_type = pet_data.get("pet_type", "Normal")
-        if isinstance(pet_type, list):
-            pet_type = "/".join(pet_type)
+        if not isinstance(pet_type, list):
+            pet_type = [pet_type]  # pets.pet_type is a JSONB array
 
         # Roll real base stats from the stat ranges at level 1
         stat_ranges = pet_data.get("base_stat_ranges", {})
@@ -234,27 +313,17 @@ class SqlRepository:
         if not skills:
             skills = ["scratch"]  # universal fallback
 
-        import json
         passive = pet_data.get("passive_ability")
         passive_name = passive.get("name") if isinstance(passive, dict) else passive
 
-        async with self.pool.acquire() as con:
-            await con.execute(
-                """INSERT INTO pets
-                   (player_id, name, species, rarity, pet_type,
-                    current_hp, max_hp, attack, defense,
-                    special_attack, special_defense, speed,
-                    base_hp, base_attack, base_defense,
-                    base_special_attack, base_special_defense, base_speed,
-                    skills, passive_ability)
-                   VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14,$15,$16,$17,$18,$19,$20)""",
-                player_id, species, species, rarity, pet_type,
-                hp, hp, attack, defense,
-                sp_atk, sp_def, speed,
-                hp, attack, defense,
-                sp_atk, sp_def, speed,
-                json.dumps(skills), passive_name
-            )
+        return (
+            player_id, species, species, rarity, pet_type,
+            hp, hp, attack, defense,
+            sp_atk, sp_def, speed,
+            hp, attack, defense,
+            sp_atk, sp_def, speed,
+            skills, passive_name
+        )
 
     async def set_flag(self, user_id: int, flag: str):
         async with self.pool.acquire() as con:
@@ -331,6 +400,153 @@ class SqlRepository:
             )
             return row is not None
 
+    async def apply_batch(self, user_id: int, plan: EffectPlan) -> bool:
+        """
+        Runs an EffectPlan in one transaction, one statement per table. The players row is updated
+        first, guarded on story_step_id, which also row-locks it: a concurrent request for the same
+        step finds the step already moved and writes nothing. Returns False in that case.
+        """
+        args = (user_id, plan.expected_step_id, plan.fields.get("name"), plan.fields.get("section_id"),
+                plan.fields.get("story_step_id"), plan.energy_reset, plan.energy_delta)
+        async with self.pool.acquire() as con:
+            if not (plan.flags or plan.items or plan.pets or plan.main_pet_species):
+                # A single statement is atomic on its own; skip the BEGIN/COMMIT round trips
+                return not (await con.execute(self._GUARDED_PLAYER_UPDATE, *args)).endswith(" 0")
+            async with con.transaction():
+                if (await con.execute(self._GUARDED_PLAYER_UPDATE, *args)).endswith(" 0"):
+                    return False
+                if plan.flags:
+                    await con.execute(
+                        """INSERT INTO player_flags (player_id, flag)
+                           SELECT $1::bigint, unnest($2::text[])
+                           ON CONFLICT DO NOTHING""",
+                        user_id, plan.flags
+                    )
+                if plan.items:
+                    await con.execute(
+                        """INSERT INTO inventory (player_id, item_id, qty)
+                           SELECT $1::bigint, t.item_id, t.qty FROM unnest($2::text[], $3::int[]) AS t(item_id, qty)
+                           ON CONFLICT (player_id, item_id)
+                           DO UPDATE SET qty = inventory.qty + EXCLUDED.qty""",
+                        user_id, list(plan.items), list(plan.items.values())
+                    )
+                if plan.pets:
+                    await con.executemany(self._INSERT_PET, [self._pet_row(user_id, species) for species in plan.pets])
+                if plan.main_pet_species:
+                    await self._set_main_pet_by_species(con, user_id, plan.main_pet_species)
+        if plan.items:
+            self._inventory_changed(user_id)
+        return True
+
+    _GUARDED_PLAYER_UPDATE = """
+        UPDATE players
+           SET username=COALESCE($3, username),
+               section_id=COALESCE($4, section_id),
+               story_step_id=COALESCE($5, story_step_id),
+               energy=CASE WHEN $6 OR $7 <> 0
+                           THEN LEAST(max_energy, GREATEST(0, (CASE WHEN $6 THEN max_energy ELSE energy END) + $7))
+                           ELSE energy END
+         WHERE user_id=$1 AND story_step_id IS NOT DISTINCT FROM $2"""
+
+    async def reset_story(self, user_id: int, section_id: str, step_id: str) -> None:
+        async with self.pool.acquire() as con:
+            pk = await self._get_player_pk(con)
+            async with con.transaction():
+                await con.execute("DELETE FROM pets WHERE player_id=$1", user_id)
+                await con.execute(
+                    "DELETE FROM player_flags WHERE player_id=$1 "
+                    "AND (flag LIKE 'starter_pet:%' OR flag LIKE 'starter_talent:%')",
+                    user_id
+                )
+                await con.execute(
+                    f"UPDATE players SET section_id=$2, story_step_id=$3, main_pet_species=NULL WHERE {pk}=$1",
+                    user_id, section_id, step_id
+                )
+
+    async def prepare(self) -> None:
+        """Resolves the schema lookups once, at startup, instead of inside the first request."""
+        async with self.pool.acquire() as con:
+            await self._get_player_pk(con)
+
     async def delete_player(self, user_id: int) -> None:
         async with self.pool.acquire() as con:
-            await con.execute("DELETE FROM players WHERE user_id = $1", user_id)
\ No newline at end of file
+            await con.execute("DELETE FROM players WHERE user_id = $1", user_id)
+        self._inventory_changed(user_id)
+
+
+# ---------- Read-through player cache (story API) ----------
+class CachedRepository:
+    """
+    Wraps a repository with an LRU of get_player results, so the API's read-mostly endpoints
+    (GET /story/step, /player/state) skip the database for players that haven't changed.
+    Each API worker keeps its own cache; they stay coherent because every change to a player —
+    from this worker, another worker or the Discord bot — arrives as a player_state NOTIFY
+    (migrations 015/016) and invalidate() drops the entry; a bulk write's single notification
+    (migration 018) empties the cache through invalidate_all(). Writes through this wrapper invalidate
+    immediately. A guarded write against a stale copy is rejected by apply_batch, and the
+    rejection invalidates too, so the retry reads the database.
+    While the NOTIFY connection is down nothing would invalidate, so set_listening(False) empties
+    the cache and every read goes to the database until set_listening(True).
+    """
+
+    # Methods that change a player: their first argument is the user id
+    _WRITES = frozenset({
+        "create_player", "save_player", "add_item", "add_pet", "set_flag", "set_story_state",
+        "update_player_name", "set_main_pet_by_species", "restore_energy_full", "add_energy",
+        "spend_energy", "apply_batch", "reset_story", "delete_player",
+    })
+
+    def __init__(self, inner, max_entries: int = 10000):
+        self.inner = inner
+        self.max_entries = max_entries
+        self._players: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._epoch = 0  # bumped by every invalidation; a load that overlapped one isn't cached
+        self.bypass = False
+        self.hits = 0
+        self.misses = 0
+
+    async def get_player(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.bypass:
+            self.misses += 1
+            return await self.inner.get_player(user_id)
+        cached = self._players.get(user_id)
+        if cached is not None:
+            self._players.move_to_end(user_id)
+            self.hits += 1
+            return dict(cached, flags=set(cached["flags"]))
+        self.misses += 1
+        epoch = self._epoch
+        player = await self.inner.get_player(user_id)
+        if player is not None and epoch == self._epoch:
+            self._players[user_id] = dict(player, flags=set(player.get("flags") or []))
+            if len(self._players) > self.max_entries:
+                self._players.popitem(last=False)
+        return player
+
+    def invalidate(self, user_id: int) -> None:
+        self._epoch += 1
+        self._players.pop(user_id, None)
+
+    def invalidate_all(self) -> None:
+        self._epoch += 1
+        self._players.clear()
+
+    def set_listening(self, listening: bool) -> None:
+        """Hooked to EventHub.on_listening: changes can be missed while False, so nothing is cached then."""
+        self.invalidate_all()
+        self.bypass = not listening
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.inner, name)
+        if name not in self._WRITES:
+            return attr
+
+        async def write(user_id, *args, **kwargs):
+            try:
+                return await attr(user_id, *args, **kwargs)
+            finally:
+                self.invalidate(user_id)
+        return write
+
+    def stats(self) -> dict:
+        return {"entries": len(self._players), "hits": self.hits, "misses": self.misses, "bypass": self.bypass}
\ No newline at end of file
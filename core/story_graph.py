@@ -0,0 +1,213 @@
+# core/story_graph.py
+# Story compiler: turns a section's step list into a CompiledSection once, instead of re-deriving
+# things on every request.
+#   - steps indexed by id, with each step's option lookup ({option_id: option}) and its next table
+#     (every step it can lead to: next, option next, goto inside the section)
+#   - reachability from the first step, so validation can report steps nothing leads to
+#   - text templates compiled into formatters: the {player_name} substitution is a join over
+#     pre-split parts, not a str.replace() scan per request
+# StoryLibrary finds every section — the Python modules under data/section_N/story.py and the JSON
+# files under data/story/ — and compiles each one lazily, the first time it is asked for. Compiled
+# sections are cached by (section id, content hash): an edited JSON file is recompiled on the next
+# lookup, an unchanged one (or one touched without changes) is not.
+# It does NOT touch the database or apply effects; core/narrative.py does that.
+
+from __future__ import annotations
+import hashlib
+import importlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from core.validator import validate_story
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+STORY_JSON_DIR = DATA_DIR / "story"
+
+# Placeholders story text may use; any other braces are literal text
+_PLACEHOLDER = re.compile(r"\{(player_name)\}")
+TEMPLATE_DEFAULTS = {"player_name": "Adventurer"}
+
+
+def compile_template(text: Optional[str]) -> Callable[..., str]:
+    """A formatter for text: render(player_name=...) -> str. Constant text returns itself."""
+    text = text or ""
+    parts = _PLACEHOLDER.split(text)
+    if len(parts) == 1:
+        return lambda **values: text
+
+    # Pre-split at the placeholders: rendering only concatenates, no scan of the text
+    if len(parts) == 3:
+        head, field, tail = parts
+        default = TEMPLATE_DEFAULTS.get(field, "")
+        return lambda **values: head + (values.get(field) or default) + tail
+
+    fields = tuple(zip(range(1, len(parts), 2), parts[1::2]))
+
+    def render(**values) -> str:
+        out = list(parts)
+        for index, field in fields:
+            out[index] = values.get(field) or TEMPLATE_DEFAULTS.get(field, "")
+        return "".join(out)
+    return render
+
+
+class CompiledStep:
+    __slots__ = ("id", "type", "step", "next_id", "options", "option_by_id",
+                 "targets", "exits", "render_text", "text_fields", "prompt")
+
+    def __init__(self, step: Dict[str, Any], section_id: str):
+        self.id: str = step["id"]
+        self.type: Optional[str] = step.get("type")
+        self.step = step
+        self.next_id: Optional[str] = step.get("next")
+        options = step.get("options") or []
+        self.options: Tuple[Tuple[str, str], ...] = tuple((o["id"], o["label"]) for o in options)
+        self.option_by_id: Dict[str, Dict[str, Any]] = {o["id"]: o for o in options}
+        self.render_text = compile_template(step.get("text"))
+        # The placeholders the text uses: what a rendered copy of this step depends on
+        self.text_fields: Tuple[str, ...] = tuple(dict.fromkeys(_PLACEHOLDER.findall(step.get("text") or "")))
+        self.prompt: Optional[str] = step.get("prompt")
+
+        targets: List[str] = []
+        exits: List[Tuple[str, str]] = []
+        if self.next_id:
+            targets.append(self.next_id)
+        for option in options:
+            if option.get("next"):
+                targets.append(option["next"])
+        for effects in [step.get("effects")] + [o.get("effects") for o in options]:
+            for eff in effects or []:
+                if eff.get("op") == "goto":
+                    if eff.get("section") == section_id:
+                        targets.append(eff["step"])
+                    else:
+                        exits.append((eff.get("section"), eff.get("step")))
+        self.targets: Tuple[str, ...] = tuple(dict.fromkeys(targets))
+        self.exits: Tuple[Tuple[str, str], ...] = tuple(exits)
+
+
+class CompiledSection:
+    def __init__(self, story: Dict[str, Any], content_hash: str = ""):
+        self.story = story
+        self.id: str = story.get("id", "")
+        self.title: str = story.get("title", "")
+        self.content_hash = content_hash
+        self.errors: List[str] = validate_story(story)
+
+        self.steps: Dict[str, CompiledStep] = {}
+        for step in story.get("steps") or []:
+            if isinstance(step, dict) and step.get("id") and step["id"] not in self.steps:
+                self.steps[step["id"]] = CompiledStep(step, self.id)
+        self.first_step_id: Optional[str] = next(iter(self.steps), None)
+        self.next_table: Dict[str, Tuple[str, ...]] = {sid: s.targets for sid, s in self.steps.items()}
+        self.reachable: FrozenSet[str] = self._reachable_from(self.first_step_id)
+        self.unreachable: List[str] = [sid for sid in self.steps if sid not in self.reachable]
+
+    def _reachable_from(self, start: Optional[str]) -> FrozenSet[str]:
+        seen = set()
+        stack = [start] if start else []
+        while stack:
+            sid = stack.pop()
+            if sid in seen or sid not in self.steps:
+                continue
+            seen.add(sid)
+            stack.extend(self.next_table[sid])
+        return frozenset(seen)
+
+    def get(self, step_id: str) -> Optional[CompiledStep]:
+        return self.steps.get(step_id)
+
+
+def compile_section(story: Dict[str, Any]) -> CompiledSection:
+    return CompiledSection(story, content_hash(story))
+
+
+def content_hash(story: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(story, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# -------------------------
+# Section sources
+# -------------------------
+class StoryLibrary:
+    """Every story section, compiled on first use and cached by (section id, content hash)."""
+
+    def __init__(self, data_dir: Path = DATA_DIR, json_dir: Path = STORY_JSON_DIR):
+        self.data_dir = data_dir
+        self.json_dir = json_dir
+        self._compiled: Dict[Tuple[str, str], CompiledSection] = {}
+        self._current: Dict[str, CompiledSection] = {}
+        self._json_seen: Dict[str, Tuple[int, int]] = {}  # section id -> (mtime_ns, size) last hashed
+
+    def section_ids(self) -> List[str]:
+        ids = [p.parent.name for p in sorted(self.data_dir.glob("section_*/story.py"))]
+        ids += [p.stem for p in sorted(self.json_dir.glob("*.json")) if p.stem not in ids]
+        return ids
+
+    def get(self, section_id: str) -> Optional[CompiledSection]:
+        """The compiled section, or None if it has no content (yet)."""
+        section = self._current.get(section_id)
+        path = self.json_dir / f"{section_id}.json"
+        if section is not None and not self._json_changed(section_id, path):
+            return section
+
+        story = self._load_module(section_id)
+        if story is None:
+            story = self._load_json(section_id, path)
+        if story is None:
+            self._current.pop(section_id, None)
+            return None
+
+        key = (section_id, content_hash(story))
+        section = self._compiled.get(key)
+        if section is None:
+            section = self._compiled[key] = CompiledSection(story, key[1])
+        self._current[section_id] = section
+        return section
+
+    def compile_all(self) -> Dict[str, CompiledSection]:
+        sections = {}
+        for section_id in self.section_ids():
+            section = self.get(section_id)
+            if section is not None:
+                sections[section_id] = section
+        return sections
+
+    def _load_module(self, section_id: str) -> Optional[Dict[str, Any]]:
+        if not (self.data_dir / section_id / "story.py").exists():
+            return None
+        return getattr(importlib.import_module(f"data.{section_id}.story"), "STORY", None)
+
+    def _json_changed(self, section_id: str, path: Path) -> bool:
+        """Only JSON sections can change at runtime; a stat() decides whether to re-read the file."""
+        if section_id not in self._json_seen:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        return self._json_seen[section_id] != (stat.st_mtime_ns, stat.st_size)
+
+    def _load_json(self, section_id: str, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            stat = os.stat(path)
+            raw = path.read_bytes()
+        except OSError:
+            self._json_seen.pop(section_id, None)
+            return None
+        self._json_seen[section_id] = (stat.st_mtime_ns, stat.st_size)
+        if not raw.strip():
+            return None  # placeholder file, no content yet
+        try:
+            story = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"{path}: invalid JSON ({e})") from None
+        story.setdefault("id", section_id)
+        return story
+
+
+# Shared by the API and validation
+story_library = StoryLibrary()
@@ -0,0 +1,104 @@
+# core/time_advance.py
+# The consequences of resting (advancing one time phase), computed from one snapshot of the player.
+# compute_time_advance() is a pure function: snapshot in, TimeAdvance out — the new phase, every
+# time-sensitive quest's new progress (or failure), the restored energy and pet HP, and the log
+# lines. It reads no database and writes nothing, so it can be tested and benchmarked on plain
+# dicts (scripts/bench_time_advance.py).
+# Database.advance_time() takes the snapshot with one query and persists a TimeAdvance with a
+# handful of batched statements, all in one transaction.
+
+from __future__ import annotations
+import math
+from typing import Any, Dict, List, Optional
+
+from data.quests import QUESTS
+from utils.helpers import get_notification
+
+TIME_CYCLE = ('morning', 'noon', 'evening', 'night')
+TIME_KEYS = {
+    'morning': 'TIME_ADVANCE_MORNING',
+    'noon':    'TIME_ADVANCE_NOON',
+    'evening': 'TIME_ADVANCE_EVENING',
+    'night':   'TIME_ADVANCE_NIGHT',
+}
+
+# quest_id -> quest data, for the quests a rest can run down; built once instead of scanning QUESTS per quest
+TIME_SENSITIVE_QUESTS: Dict[str, Dict[str, Any]] = {
+    quest_id: data
+    for town_quests in QUESTS.values()
+    for quest_id, data in town_quests.items()
+    if data.get('time_sensitive')
+}
+
+
+class TimeAdvance:
+    """Everything one rest changes. Applied by Database.advance_time()."""
+
+    __slots__ = ("new_time", "energy", "pet_id", "pet_hp", "quest_progress", "flags", "messages")
+
+    def __init__(self, new_time: str, energy: int):
+        self.new_time = new_time
+        self.energy = energy
+        self.pet_id: Optional[int] = None
+        self.pet_hp: Optional[int] = None
+        self.quest_progress: Dict[str, Dict[str, Any]] = {}  # quest_id -> new progress
+        self.flags: List[str] = []
+        self.messages: List[str] = []
+
+
+def next_time_of_day(current: Optional[str]) -> str:
+    """The phase after `current`; night wraps around to morning, unknown values count as morning."""
+    index = TIME_CYCLE.index(current) if current in TIME_CYCLE else 0
+    return TIME_CYCLE[(index + 1) % len(TIME_CYCLE)]
+
+
+def compute_time_advance(player: Dict[str, Any], quests: List[Dict[str, Any]],
+                         main_pet: Optional[Dict[str, Any]], restore_details: Dict[str, Any],
+                         rng=None) -> TimeAdvance:
+    """
+    player: day_of_cycle, energy, max_energy. quests: player_quests rows (quest_id, progress).
+    main_pet: pet_id, name, current_hp, max_hp, or None. rng picks the notification wording.
+    """
+    new_time = next_time_of_day(player.get('day_of_cycle', 'morning'))
+
+    # 1. The new phase
+    energy_to_restore = math.floor(player['max_energy'] * (restore_details.get('energy_restore_percent', 0) / 100))
+    result = TimeAdvance(new_time, min(player['max_energy'], player['energy'] + energy_to_restore))
+    result.messages.append(get_notification(TIME_KEYS.get(new_time, 'TIME_ADVANCE_MORNING'), rng=rng))
+
+    # 2. Time-sensitive quests run down by one tick
+    quest_messages = []
+    for quest in quests:
+        quest_id = quest['quest_id']
+        quest_data = TIME_SENSITIVE_QUESTS.get(quest_id)
+        progress = dict(quest.get('progress') or {})
+        if not quest_data or progress.get('status') == 'completed':
+            continue
+
+        ticks_remaining = progress.get('ticks_remaining', 1) - 1
+        if ticks_remaining <= 0:
+            # Time's up — the quest is closed and flagged as failed
+            result.quest_progress[quest_id] = {"status": "completed"}
+            result.flags.append(f"quest_{quest_id}_failed")
+            failure_message = quest_data.get('failure_dialogue', f"You failed the quest: **{quest_data['title']}**.")
+            quest_messages.append(f"⏰ {failure_message}")
+        else:
+            progress['ticks_remaining'] = ticks_remaining
+            result.quest_progress[quest_id] = progress
+            if ticks_remaining == 1:
+                quest_messages.append(f"⚠️ **{quest_data['title']}** is running out of time — one more rest and it will be gone!")
+
+    # 3. Restore player and pet
+    result.messages.append(get_notification(
+        "PLAYER_RESTORE_ENERGY", rng=rng, new_energy=result.energy, max_energy=player['max_energy']
+    ))
+    if main_pet:
+        health_to_restore = math.floor(main_pet['max_hp'] * (restore_details.get('health_restore_percent', 0) / 100))
+        result.pet_id = main_pet['pet_id']
+        result.pet_hp = min(main_pet['max_hp'], main_pet['current_hp'] + health_to_restore)
+        result.messages.append(get_notification(
+            "PET_RESTORE_HP", rng=rng, pet_name=main_pet['name'], new_hp=result.pet_hp, max_hp=main_pet['max_hp']
+        ))
+
+    result.messages.extend(quest_messages)
+    return result
@@ -0,0 +1,46 @@
+# core/unit_of_work.py
+# Request-scoped unit of work for the story API.
+# A story step used to cost about ten queries: ensure_player, get_story_state, one acquire per
+# narrative effect, set_story_state, then get_player/get_story_state again to serialize the reply.
+# StoryUnitOfWork loads the player once, compiles the step's effects into an EffectPlan against
+# that copy (Narrative.plan_effects), and writes the plan back with one repo.apply_batch() call —
+# one transaction — so a step is one read plus one write.
+# The write is guarded on the step the player was loaded at: if another request moved the story
+# on in between (a double-clicked choice), nothing is written and commit() returns False.
+# It does NOT know about HTTP; apps/api/server/main.py owns the request flow.
+
+from __future__ import annotations
+from typing import Any, Dict, Optional
+
+from core.narrative import EffectPlan
+
+
+class StoryUnitOfWork:
+    def __init__(self, repo, user_id: int):
+        self.repo = repo
+        self.user_id = user_id
+        self.player: Dict[str, Any] = {}
+        self.plan: Optional[EffectPlan] = None
+
+    async def load(self, defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Loads (or, given defaults, creates) the player and drops uncommitted changes. Returns the working copy."""
+        player = await self.repo.get_player(self.user_id)
+        if not player and defaults is not None:
+            player = await self.repo.create_player(self.user_id, defaults)
+        if not player:
+            raise LookupError(f"player {self.user_id} not found")
+        # A copy: MemoryRepository hands out its live dict, and nothing may change before commit()
+        self.player = dict(player)
+        self.player["flags"] = set(player.get("flags") or [])
+        self.player.setdefault("section_id", "section_0")
+        self.plan = EffectPlan(self.player)
+        return self.player
+
+    async def commit(self) -> bool:
+        """Writes the plan in one transaction. False if the story moved on since load()."""
+        if not self.plan:
+            return True
+        ok = await self.repo.apply_batch(self.user_id, self.plan)
+        if ok:
+            self.plan = EffectPlan(self.player)
+        return ok
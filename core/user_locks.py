@@ -0,0 +1,131 @@
+# core/user_locks.py
+# One lock per user, so a player's game actions run one at a time while different players' actions
+# still run side by side.
+# Without it, a double-click on explore, travel or buy runs two read-modify-write sequences on the
+# same player row at once (read energy, subtract, write back) and one of the writes is lost.
+#   async with user_locks.hold(user_id, "travel"):
+#       ...
+# or, on a view callback / cog method that takes the interaction:
+#   @user_locks.serialized("travel")
+#   async def select_callback(self, interaction): ...
+# Locks are re-entrant within a task (explore -> spend_resources takes the same lock twice) and
+# are dropped as soon as nobody holds or waits for them, so memory stays bounded by active users.
+# Never hold a user's lock while waiting for that user's input (a modal, a view.wait()) in a
+# callback whose follow-up buttons also take it.
+# It does NOT import discord; callbacks are matched by any argument with .user and .response.
+
+import asyncio
+import functools
+import time
+from typing import Dict, Optional
+
+from core.metrics import get_histogram
+
+
+class _UserLock:
+    __slots__ = ("lock", "owner", "depth", "refs", "action")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.owner: Optional[asyncio.Task] = None
+        self.depth = 0    # re-entrant holds by the owner task
+        self.refs = 0     # holders + waiters; the entry is dropped at zero
+        self.action = ""  # what the current holder is doing, for logs
+
+
+class _Hold:
+    """Async context manager returned by UserLockManager.hold()."""
+
+    __slots__ = ("manager", "user_id", "action", "entry", "reentered")
+
+    def __init__(self, manager: "UserLockManager", user_id: int, action: str):
+        self.manager = manager
+        self.user_id = user_id
+        self.action = action
+        self.entry: Optional[_UserLock] = None
+        self.reentered = False
+
+    async def __aenter__(self):
+        manager = self.manager
+        task = asyncio.current_task()
+        entry = manager._locks.get(self.user_id)
+        if entry is not None and entry.owner is task and task is not None:
+            entry.depth += 1
+            self.entry, self.reentered = entry, True
+            return self
+
+        if entry is None:
+            entry = manager._locks[self.user_id] = _UserLock()
+        entry.refs += 1
+        self.entry = entry
+        started = time.perf_counter()
+        try:
+            await entry.lock.acquire()
+        except BaseException:
+            manager._release_ref(self.user_id, entry)
+            raise
+        wait_ms = (time.perf_counter() - started) * 1000
+        manager.wait_histogram.observe(wait_ms)
+        if wait_ms >= manager.slow_wait_ms:
+            print(f"⏳ User {self.user_id} waited {wait_ms:.0f}ms for '{self.action}' "
+                  f"(lock held by '{entry.action}')")
+        entry.owner, entry.depth, entry.action = task, 1, self.action
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        entry = self.entry
+        entry.depth -= 1
+        if self.reentered:
+            return False
+        entry.owner, entry.action = None, ""
+        entry.lock.release()
+        self.manager._release_ref(self.user_id, entry)
+        return False
+
+
+class UserLockManager:
+    """Per-user re-entrant asyncio locks with wait-time metrics and automatic cleanup."""
+
+    def __init__(self, slow_wait_ms: float = 1000):
+        self.slow_wait_ms = slow_wait_ms
+        self.wait_histogram = get_histogram("user_lock.wait_ms")
+        self._locks: Dict[int, _UserLock] = {}
+
+    def hold(self, user_id: int, action: str = "") -> _Hold:
+        return _Hold(self, user_id, action)
+
+    def busy(self, user_id: int) -> bool:
+        """True if some other task is running an action for this user right now."""
+        entry = self._locks.get(user_id)
+        return entry is not None and entry.lock.locked() and entry.owner is not asyncio.current_task()
+
+    def _release_ref(self, user_id: int, entry: _UserLock):
+        entry.refs -= 1
+        if entry.refs <= 0 and self._locks.get(user_id) is entry:
+            del self._locks[user_id]
+
+    def serialized(self, action: str = ""):
+        """Decorator for callbacks/methods that take an interaction: runs them under the user's lock."""
+        def decorator(fn):
+            name = action or fn.__name__
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                interaction = next((a for a in args if hasattr(a, "user") and hasattr(a, "response")), None)
+                if interaction is None:
+                    return await fn(*args, **kwargs)
+                async with self.hold(interaction.user.id, name):
+                    return await fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._locks),
+            "held": sum(1 for entry in self._locks.values() if entry.lock.locked()),
+            "waiting": sum(max(0, entry.refs - 1) for entry in self._locks.values()),
+        }
+
+
+# Shared by every cog and view
+user_locks = UserLockManager()
@@ -94,7 +94,18 @@ def validate_story(story: Dict[str, Any]) -> List[str]:
 
 def validate_all() -> None:
     # Import here to avoid circulars
-    from data.section_0.story import STORY
-    problems = validate_story(STORY)
+    from core.story_graph import story_library
+    problems: List[str] = []
+    for section_id in story_library.section_ids():
+        try:
+            section = story_library.get(section_id)
+        except ValueError as e:
+            problems.append(str(e))
+            continue
+        if section is None:
+            continue  # no content yet
+        problems.extend(f"{section_id}: {err}" for err in section.errors)
+        if section.unreachable:
+            print(f"⚠️ Story {section_id}: unreachable steps: {', '.join(section.unreachable)}")
     if problems:
         raise ValueError("Data validation failed:\n- " + "\n- ".join(problems))
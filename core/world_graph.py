@@ -0,0 +1,143 @@
+# core/world_graph.py
+# The travel map as a graph, built once at load from data/towns.py and data/remnants.py.
+# Towns and remnants are nodes (wilds are not: they are entered from their town, not travelled to).
+# Each node keeps an adjacency array of (neighbour index, energy cost, requirement mask), where a
+# requirement mask has one bit per distinct connection_requirements flag, so "can this player take
+# this road" is one AND against the player's own mask instead of a dict lookup per menu entry.
+# Cheapest energy paths between every pair of nodes come from Floyd–Warshall, run once per
+# distinct player mask (a handful: the map has few gated roads) and cached.
+# A Route is a whole journey (stops, per-leg costs, total) validated in one pass: every leg must be
+# open to the player's flags. Charging its energy is the Database cog's job (Database.travel).
+# It does NOT touch Discord or the database.
+
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+INF = float("inf")
+
+
+class Route:
+    __slots__ = ("stops", "costs", "total")
+
+    def __init__(self, stops: List[str], costs: List[int]):
+        self.stops = stops        # start first, destination last
+        self.costs = costs        # energy per leg; len(costs) == len(stops) - 1
+        self.total = sum(costs)
+
+    @property
+    def destination(self) -> str:
+        return self.stops[-1]
+
+    @property
+    def via(self) -> List[str]:
+        return self.stops[1:-1]
+
+
+class WorldGraph:
+    def __init__(self, towns: Dict[str, Dict[str, Any]], remnants: Dict[str, Dict[str, Any]], default_cost: int):
+        self.locations = {**remnants, **{k: v for k, v in towns.items() if not v.get('is_wilds')}}
+        self.ids: List[str] = list(self.locations)
+        self.index: Dict[str, int] = {loc_id: i for i, loc_id in enumerate(self.ids)}
+        self.town_ids = frozenset(k for k, v in towns.items() if not v.get('is_wilds'))
+        self.requirement_bits: Dict[str, int] = {}
+
+        # adjacency[i] = [(j, cost, mask, label)], in the order the data lists the connections
+        self.adjacency: List[List[Tuple[int, int, int, str]]] = []
+        for loc_id in self.ids:
+            data = self.locations[loc_id]
+            costs = data.get('connection_costs', {})
+            reqs = data.get('connection_requirements', {})
+            edges = []
+            for to_id, label in data.get('connections', {}).items():
+                if to_id not in self.index:
+                    continue  # wilds, or a location that doesn't exist yet
+                mask = self._bit(reqs[to_id]) if to_id in reqs else 0
+                edges.append((self.index[to_id], costs.get(to_id, default_cost), mask, label))
+            self.adjacency.append(edges)
+        self._all_pairs: Dict[int, Tuple[List[List[float]], List[List[int]]]] = {}
+
+    def _bit(self, flag: str) -> int:
+        if flag not in self.requirement_bits:
+            self.requirement_bits[flag] = 1 << len(self.requirement_bits)
+        return self.requirement_bits[flag]
+
+    def player_mask(self, flags: Iterable[str]) -> int:
+        bits = self.requirement_bits
+        mask = 0
+        for flag in flags or ():
+            mask |= bits.get(flag, 0)
+        return mask
+
+    def name(self, loc_id: str) -> str:
+        return self.locations.get(loc_id, {}).get('name', loc_id)
+
+    def exits(self, loc_id: str, flags: Iterable[str]) -> List[Tuple[str, str, int]]:
+        """The roads out of loc_id open to these flags: [(destination id, label, energy cost)]."""
+        i = self.index.get(loc_id)
+        if i is None:
+            return []
+        mask = self.player_mask(flags)
+        return [(self.ids[j], label, cost) for j, cost, need, label in self.adjacency[i] if need & mask == need]
+
+    # -------------------------
+    # Cheapest paths
+    # -------------------------
+    def _paths(self, mask: int) -> Tuple[List[List[float]], List[List[int]]]:
+        """Floyd–Warshall over the roads open to `mask`: (dist, next hop), cached per mask."""
+        cached = self._all_pairs.get(mask)
+        if cached is not None:
+            return cached
+        n = len(self.ids)
+        dist = [[0 if i == j else INF for j in range(n)] for i in range(n)]
+        nxt = [[j if i == j else -1 for j in range(n)] for i in range(n)]
+        for i, edges in enumerate(self.adjacency):
+            for j, cost, need, _ in edges:
+                if need & mask == need and cost < dist[i][j]:
+                    dist[i][j] = cost
+                    nxt[i][j] = j
+        for k in range(n):
+            dist_k = dist[k]
+            for i in range(n):
+                d_ik = dist[i][k]
+                if d_ik == INF:
+                    continue
+                dist_i, nxt_i = dist[i], nxt[i]
+                for j in range(n):
+                    through = d_ik + dist_k[j]
+                    if through < dist_i[j]:
+                        dist_i[j] = through
+                        nxt_i[j] = nxt_i[k]
+        self._all_pairs[mask] = (dist, nxt)
+        return dist, nxt
+
+    def route(self, from_id: str, to_id: str, flags: Iterable[str]) -> Optional[Route]:
+        """The cheapest journey from from_id to to_id on roads open to these flags, or None."""
+        i, j = self.index.get(from_id), self.index.get(to_id)
+        if i is None or j is None or i == j:
+            return None
+        dist, nxt = self._paths(self.player_mask(flags))
+        if dist[i][j] == INF:
+            return None
+        stops, costs = [from_id], []
+        while i != j:
+            hop = nxt[i][j]
+            costs.append(min(cost for k, cost, _, _ in self.adjacency[i] if k == hop))
+            stops.append(self.ids[hop])
+            i = hop
+        return Route(stops, costs)
+
+    def validate(self, route: Route, flags: Iterable[str]) -> Optional[str]:
+        """None if every leg of the route is a road open to these flags, else why not."""
+        mask = self.player_mask(flags)
+        for (a, b), cost in zip(zip(route.stops, route.stops[1:]), route.costs):
+            i, j = self.index.get(a), self.index.get(b)
+            if i is None or j is None:
+                return f"{a} → {b} is not on the map"
+            if not any(k == j and c == cost and need & mask == need for k, c, need, _ in self.adjacency[i]):
+                return f"the road from {self.name(a)} to {self.name(b)} is closed to you"
+        return None
+
+    def journeys(self, from_id: str, town_ids: Sequence[str], flags: Iterable[str]) -> List[Route]:
+        """Cheapest routes from from_id to each of town_ids that can be reached, cheapest first."""
+        routes = [self.route(from_id, town_id, flags) for town_id in town_ids if town_id in self.town_ids]
+        return sorted((r for r in routes if r), key=lambda r: r.total)
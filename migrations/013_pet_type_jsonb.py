@@ -0,0 +1,28 @@
+# migrations/013_pet_type_jsonb.py
+
+async def apply(conn):
+    """
+    Migration 013: Converts pets.pet_type from TEXT to a JSONB array.
+
+    pet_type was stored three different ways: a plain type ("Fire"), a JSON-encoded list
+    ('["Fire", "Dragon"]') or a slash-joined string ("Fire/Dragon") from the story repository.
+    Every row becomes a real array so the pool's JSONB codec hands back a list.
+    """
+    data_type = await conn.fetchval(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = 'pets' AND column_name = 'pet_type'"
+    )
+    if data_type == 'jsonb':
+        return
+
+    await conn.execute("""
+        ALTER TABLE pets
+        ALTER COLUMN pet_type TYPE JSONB USING (
+            CASE
+                WHEN pet_type IS NULL OR pet_type = '' THEN '[]'::jsonb
+                WHEN left(pet_type, 1) = '[' THEN pet_type::jsonb
+                WHEN position('/' IN pet_type) > 0 THEN to_jsonb(string_to_array(pet_type, '/'))
+                ELSE jsonb_build_array(pet_type)
+            END
+        )
+    """)
+    await conn.execute("ALTER TABLE pets ALTER COLUMN pet_type SET DEFAULT '[]'::jsonb")
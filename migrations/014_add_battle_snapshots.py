@@ -0,0 +1,19 @@
+# migrations/014_add_battle_snapshots.py
+
+async def apply(conn):
+    """
+    Migration 014: Adds battle_snapshots, one row per player with a battle in progress.
+
+    The full BattleState (rosters, effects, gloom meter, turn count, pending learns) is written
+    as JSONB at every round boundary, so a battle can be resumed with /resume after a restart,
+    a deploy, or the combat view timing out. The row is deleted when the battle ends.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS battle_snapshots (
+            player_id BIGINT PRIMARY KEY,
+            origin_location_id TEXT,
+            turn_count INTEGER NOT NULL DEFAULT 1,
+            state JSONB NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
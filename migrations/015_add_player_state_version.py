@@ -0,0 +1,45 @@
+# migrations/015_add_player_state_version.py
+
+async def apply(conn):
+    """
+    Migration 015: Adds players.state_version, a counter bumped by every change to the player.
+
+    The story API uses it as the ETag of /player/state, so a client that already has the current
+    state gets a 304 instead of the full payload. Triggers keep it honest for every writer (the
+    bot's cogs as well as the API): any UPDATE that changes a players row bumps it, and so does
+    adding or removing one of the player's flags.
+    """
+    await conn.execute("ALTER TABLE players ADD COLUMN IF NOT EXISTS state_version BIGINT NOT NULL DEFAULT 0")
+
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION bump_player_state_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.state_version := OLD.state_version + 1;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    await conn.execute("DROP TRIGGER IF EXISTS players_state_version ON players")
+    await conn.execute("""
+        CREATE TRIGGER players_state_version
+        BEFORE UPDATE ON players
+        FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+        EXECUTE FUNCTION bump_player_state_version()
+    """)
+
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION bump_player_state_version_from_flags() RETURNS trigger AS $$
+        BEGIN
+            UPDATE players SET state_version = state_version + 1
+             WHERE user_id = CASE WHEN TG_OP = 'DELETE' THEN OLD.player_id ELSE NEW.player_id END;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    await conn.execute("DROP TRIGGER IF EXISTS player_flags_state_version ON player_flags")
+    await conn.execute("""
+        CREATE TRIGGER player_flags_state_version
+        AFTER INSERT OR DELETE ON player_flags
+        FOR EACH ROW
+        EXECUTE FUNCTION bump_player_state_version_from_flags()
+    """)
@@ -0,0 +1,21 @@
+# migrations/016_notify_player_state.py
+
+async def apply(conn):
+    """
+    Migration 016: Announces every player state change on the 'player_state' NOTIFY channel.
+
+    The state_version trigger from migration 015 now also sends pg_notify('player_state', user_id).
+    API workers LISTEN on it and push the new state to that player's connected web clients over
+    server-sent events, so a change made by the Discord bot (energy spent exploring, a flag set)
+    shows up in the browser without polling. Notifications are delivered at commit, once per
+    transaction and player.
+    """
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION bump_player_state_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.state_version := OLD.state_version + 1;
+            PERFORM pg_notify('player_state', NEW.user_id::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
@@ -0,0 +1,19 @@
+# migrations/017_add_maintenance_ticks.py
+
+async def apply(conn):
+    """
+    Migration 017: Adds maintenance_ticks, one row per world-wide maintenance tick.
+
+    The maintenance scheduler (cogs/maintenance.py) records when each tick (energy regen, hunger
+    decay) last ran, how many rows it changed and how long it took. When several bot processes
+    schedule the same tick, the one that comes second sees the recent last_run_at and skips it,
+    so a tick is never applied twice in one interval.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_ticks (
+            name TEXT PRIMARY KEY,
+            last_run_at TIMESTAMPTZ NOT NULL,
+            last_changed INTEGER NOT NULL DEFAULT 0,
+            last_ms DOUBLE PRECISION NOT NULL DEFAULT 0
+        )
+    """)
@@ -0,0 +1,33 @@
+# migrations/018_notify_served_player_changes.py
+
+async def apply(conn):
+    """
+    Migration 018: Sends the 'player_state' NOTIFY only for changes the story API serves.
+
+    Migration 016 notified on every players UPDATE, so a bulk write (a maintenance tick, a live-ops
+    grant) sent one notification per row and made every API worker reload those players. Now:
+      - a transaction that runs SET LOCAL app.bulk = 'on' sends none; the bulk writer
+        (core/maintenance.py, core/liveops.py) sends one pg_notify('player_state', '*') instead,
+        and each API worker drops its whole player cache and reloads its connected clients;
+      - otherwise only a change to a served column (name, energy, max energy, story position,
+        main pet species) or to the player's flags (which bump state_version explicitly) notifies.
+    state_version is still bumped by every change, so the /player/state ETag stays exact.
+    """
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION bump_player_state_version() RETURNS trigger AS $$
+        BEGIN
+            IF coalesce(current_setting('app.bulk', true), '') <> 'on' AND (
+                   NEW.state_version IS DISTINCT FROM OLD.state_version
+                OR NEW.username IS DISTINCT FROM OLD.username
+                OR NEW.energy IS DISTINCT FROM OLD.energy
+                OR NEW.max_energy IS DISTINCT FROM OLD.max_energy
+                OR NEW.section_id IS DISTINCT FROM OLD.section_id
+                OR NEW.story_step_id IS DISTINCT FROM OLD.story_step_id
+                OR NEW.main_pet_species IS DISTINCT FROM OLD.main_pet_species) THEN
+                PERFORM pg_notify('player_state', NEW.user_id::text);
+            END IF;
+            NEW.state_version := OLD.state_version + 1;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
@@ -0,0 +1,53 @@
+# scripts/bench_time_advance.py
+# Times compute_time_advance(), the pure part of a rest, on synthetic players.
+# No Discord or database needed.
+#
+#   python scripts/bench_time_advance.py --rests 100000 --quests 3 --seed 7
+#
+# The database side of a rest is one snapshot query plus up to four batched statements in one
+# transaction (Database.advance_time); this measures everything in between.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.time_advance import TIME_CYCLE, TIME_SENSITIVE_QUESTS, compute_time_advance  # noqa: E402
+
+
+def make_snapshot(rng: random.Random, quest_count: int):
+    max_energy = rng.choice((50, 100, 150))
+    player = {"day_of_cycle": rng.choice(TIME_CYCLE), "energy": rng.randint(0, max_energy), "max_energy": max_energy}
+    quest_ids = list(TIME_SENSITIVE_QUESTS) or ["none"]
+    quests = [{"quest_id": rng.choice(quest_ids),
+               "progress": {"status": "in_progress", "count": 0, "ticks_remaining": rng.randint(1, 3)}}
+              for _ in range(quest_count)]
+    max_hp = rng.randint(20, 120)
+    pet = {"pet_id": 1, "name": "Bench", "current_hp": rng.randint(1, max_hp), "max_hp": max_hp}
+    return player, quests, pet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the pure part of a rest.")
+    parser.add_argument("--rests", type=int, default=100000)
+    parser.add_argument("--quests", type=int, default=2, help="time-sensitive quests per player")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    snapshots = [make_snapshot(rng, args.quests) for _ in range(min(args.rests, 1000))]
+    restore = {"energy_restore_percent": 50, "health_restore_percent": 100}
+
+    started = time.perf_counter()
+    for i in range(args.rests):
+        player, quests, pet = snapshots[i % len(snapshots)]
+        compute_time_advance(player, quests, pet, restore, rng=rng)
+    elapsed = time.perf_counter() - started
+    print(f"{args.rests} rests in {elapsed:.3f}s — {elapsed / args.rests * 1e6:.2f}µs per rest "
+          f"({args.quests} time-sensitive quest(s) each)")
+
+
+if __name__ == "__main__":
+    main()
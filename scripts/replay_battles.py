@@ -0,0 +1,61 @@
+# scripts/replay_battles.py
+# Replays recorded battle logs (BATTLE_LOG_DIR, or simulate_battles.py --record) through the
+# current engine and checks each one ends in exactly the recorded state.
+#
+#   python scripts/replay_battles.py battle_logs/
+#
+# A mismatch means the engine now plays the same inputs differently — expected after a balance
+# change, a regression otherwise. The timing line makes a fixed-workload benchmark: the same
+# logs replay the same rounds on every run.
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.battle_replay import read_log, replay_battle  # noqa: E402
+
+
+async def main(paths, verbose: bool):
+    matched, mismatched, failed, actions, elapsed = 0, [], {}, 0, 0.0
+    for path in paths:
+        entries = read_log(path)
+        started = time.perf_counter()
+        try:
+            _, report = await replay_battle(entries)
+        except Exception as e:
+            key = f"{type(e).__name__}: {e}"
+            failed.setdefault(key, []).append(path)
+            continue
+        elapsed += time.perf_counter() - started
+        actions += len(entries) - 2  # minus the start and end lines
+        if report["match"]:
+            matched += 1
+        else:
+            mismatched.append(path)
+            if verbose:
+                print(f"  mismatch: {path}\n    recorded {report['recorded']}\n    replayed {report['replayed']}")
+
+    per_action_us = elapsed / max(1, actions) * 1_000_000
+    print(f"{len(paths)} logs, {actions} actions replayed in {elapsed:.3f}s ({per_action_us:.1f} µs/action)")
+    print(f"  {matched} matched, {len(mismatched)} mismatched, {sum(len(p) for p in failed.values())} failed")
+    for path in mismatched if not verbose else ():
+        print(f"  mismatch: {path}")
+    for key, failed_paths in failed.items():
+        print(f"  {len(failed_paths)} failed — {key} (e.g. {failed_paths[0]})")
+    return not mismatched and not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded battle logs")
+    parser.add_argument("paths", nargs="+", help="log files or directories of *.ndjson logs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print both digests for mismatches")
+    args = parser.parse_args()
+    files = []
+    for path in args.paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.ndjson"))) if os.path.isdir(path) else [path])
+    ok = asyncio.run(main(files, args.verbose))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,131 @@
+# scripts/simulate_battles.py
+# Runs headless battles through BattleState and reports how long a round takes.
+# No Discord or database needed — reward calls go to a small offline stand-in.
+#
+#   python scripts/simulate_battles.py --battles 2000 --seed 7
+#   python scripts/simulate_battles.py --battles 200 --seed 7 --record battle_logs/sim
+#
+# Run it before and after a change to the battle engine to compare the per-round time.
+# --record writes each battle's replay log, for scripts/replay_battles.py.
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.pets import PET_DATABASE  # noqa: E402
+from core.battle_engine import BattleState  # noqa: E402
+
+
+class _OfflineDatabase:
+    """Just enough of the Database cog for process_round: rewards are accepted and dropped."""
+
+    async def add_xp(self, pet_id, amount):
+        return None, False, None
+
+    async def add_coins(self, user_id, amount):
+        return None
+
+    async def remove_item_from_inventory(self, user_id, item_id, quantity=1):
+        return None
+
+
+class _OfflineBot:
+    def __init__(self):
+        self.database = _OfflineDatabase()
+
+    def get_cog(self, name):
+        return self.database if name == 'Database' else None
+
+
+def make_pet(species: str, level: int, pet_id=None) -> dict:
+    """Builds a pet the same way /explore builds a wild encounter."""
+    base = PET_DATABASE[species]
+    base_stats = {stat: random.randint(low, high) for stat, (low, high) in base["base_stat_ranges"].items()}
+    growth = base["growth_rates"]
+    stats = {stat: math.floor(base_stats[stat] + (level - 1) * growth[stat]) for stat in base_stats}
+    skills = []
+    for required_level, entry in base.get('skill_tree', {}).items():
+        if level >= int(required_level):
+            if isinstance(entry, list):
+                skills.extend(entry)
+            elif isinstance(entry, dict) and "choice" in entry:
+                skills.append(random.choice(entry['choice']))
+    pet = {
+        "species": species, "rarity": base['rarity'], "pet_type": base['pet_type'], "level": level,
+        "personality": base.get('personality', 'Aggressive'),
+        "current_hp": stats['hp'], "max_hp": stats['hp'],
+        "attack": stats['attack'], "defense": stats['defense'],
+        "special_attack": stats['special_attack'], "special_defense": stats['special_defense'],
+        "speed": stats['speed'], "skills": skills[-4:] or ["pound"],
+        "passive_ability": base.get('passive_ability'),
+        "is_gloom_touched": base.get('is_gloom_touched', False),
+    }
+    if pet_id is not None:
+        pet.update({"pet_id": pet_id, "name": species, "hunger": 50})
+    return pet
+
+
+async def run_battle(bot, species_pool, max_rounds: int, record_dir=None):
+    """Plays one battle with random moves. Returns (rounds played, seconds spent in process_round)."""
+    roster = [make_pet(random.choice(species_pool), random.randint(5, 15), pet_id=i + 1) for i in range(3)]
+    wild = make_pet(random.choice(species_pool), random.randint(5, 15))
+    battle = BattleState(bot, user_id=1, player_roster=roster, opponent_roster=[wild])
+
+    rounds, elapsed = 0, 0.0
+    while rounds < max_rounds:
+        skill_id = random.choice(battle.player_pet['skills'])
+        started = time.perf_counter()
+        result = await battle.process_round(skill_id)
+        elapsed += time.perf_counter() - started
+        rounds += 1
+        if result.get("is_over"):
+            break
+        if result.get("switch_required"):
+            if result.get("fainted_side") == "opponent":
+                break
+            next_pet = next((p for p in battle.player_roster if p['current_hp'] > 0), None)
+            if next_pet is None:
+                break
+            await battle.set_active_player_pet(next_pet['pet_id'])
+    if record_dir:
+        battle.action_log.save(battle, record_dir)
+    return rounds, elapsed
+
+
+async def main(battles: int, max_rounds: int, record_dir=None):
+    bot = _OfflineBot()
+    species_pool = [name for name, data in PET_DATABASE.items()
+                    if data.get("base_stat_ranges") and data.get("growth_rates")]
+    total_rounds, total_time = 0, 0.0
+    errors = {}  # {"ExceptionType: message": count} — battles the engine itself crashed in
+    for _ in range(battles):
+        try:
+            rounds, elapsed = await run_battle(bot, species_pool, max_rounds, record_dir)
+        except Exception as e:
+            key = f"{type(e).__name__}: {e}"
+            errors[key] = errors.get(key, 0) + 1
+            continue
+        total_rounds += rounds
+        total_time += elapsed
+    per_round_us = total_time / max(1, total_rounds) * 1_000_000
+    print(f"{battles} battles, {total_rounds} rounds, {total_time:.3f}s in process_round "
+          f"({per_round_us:.1f} µs/round)")
+    for key, count in sorted(errors.items(), key=lambda item: -item[1]):
+        print(f"  {count} battle(s) aborted — {key}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless battle simulator")
+    parser.add_argument("--battles", type=int, default=1000)
+    parser.add_argument("--max-rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", metavar="DIR", default=None, help="write a replay log per battle to DIR")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    asyncio.run(main(args.battles, args.max_rounds, args.record))
@@ -0,0 +1,6 @@
+# test/conftest.py
+# core/config.py refuses to load without a bot token; the tests never connect to Discord.
+
+import os
+
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
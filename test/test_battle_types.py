@@ -0,0 +1,34 @@
+# test/test_battle_types.py
+# BattlePet / ActiveEffect (core/battle_types.py): the dict-compatible surface survives copying.
+
+import copy
+import pickle
+
+from core.battle_types import ActiveEffect, BattlePet
+
+
+def _pet():
+    # No personality, pet_id or hunger: those slots stay unset
+    return BattlePet({"name": "Pip", "species": "Pyrelisk", "level": 3, "current_hp": 20, "max_hp": 30,
+                      "skills": [], "nickname": "pipsqueak"})
+
+
+def test_unset_slots_read_like_missing_keys():
+    pet = _pet()
+    assert "personality" not in pet
+    assert pet.get("personality", "none") == "none"
+    assert pet["nickname"] == "pipsqueak"
+    assert not pet.is_player
+    assert "personality" not in pet.to_dict()
+
+
+def test_unset_slots_survive_deepcopy_and_pickle():
+    pet = _pet()
+    effect = ActiveEffect({"type": "status_effect", "status_effect": "burn", "duration": 2})
+    for clone in (copy.copy, copy.deepcopy, lambda obj: pickle.loads(pickle.dumps(obj))):
+        pet_clone, effect_clone = clone(pet), clone(effect)
+        assert "personality" not in pet_clone
+        assert pet_clone.get("personality") is None
+        assert pet_clone.to_dict() == pet.to_dict()
+        assert "stat" not in effect_clone
+        assert effect_clone.get("modifier", 1.0) == 1.0
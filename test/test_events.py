@@ -0,0 +1,56 @@
+# test/test_events.py
+# EventHub (apps/api/server/events.py): player_state notifications reaching the player cache and
+# connected clients, per player or for a whole bulk write.
+
+import asyncio
+
+from apps.api.server.events import EventHub
+from core.repository import CachedRepository, MemoryRepository
+
+
+def _setup():
+    repo = CachedRepository(MemoryRepository())
+    hub = EventHub()
+    hub.on_change.append(repo.invalidate)
+    hub.on_change_all.append(repo.invalidate_all)
+    refreshed = []
+
+    async def refresh(user_id):
+        refreshed.append(user_id)
+    hub.refresh = refresh
+    return repo, hub, refreshed
+
+
+async def _cache_players(repo, *user_ids):
+    for user_id in user_ids:
+        await repo.create_player(user_id, {})
+        await repo.get_player(user_id)
+
+
+def test_player_notification_drops_that_player_only():
+    repo, hub, refreshed = _setup()
+
+    async def scenario():
+        await _cache_players(repo, 1, 2)
+        hub.subscribe(1)
+        hub._on_notify(None, 0, "player_state", "1")
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert repo.stats()["entries"] == 1
+    assert refreshed == [1]
+
+
+def test_bulk_notification_empties_the_cache_and_reloads_connected_players():
+    repo, hub, refreshed = _setup()
+
+    async def scenario():
+        await _cache_players(repo, 1, 2, 3)
+        hub.subscribe(1)
+        hub.subscribe(3)
+        hub._on_notify(None, 0, "player_state", "*")
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert repo.stats()["entries"] == 0
+    assert sorted(refreshed) == [1, 3]
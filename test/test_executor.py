@@ -0,0 +1,36 @@
+# test/test_executor.py
+# WorkPool (core/executor.py): a job keeps its max_pending slot until it finishes, even when the
+# caller stops waiting for it.
+
+import asyncio
+import time
+
+import pytest
+
+from core.executor import WorkPool
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_run_returns_the_result_and_frees_the_slot():
+    pool = WorkPool("t", "thread", max_workers=1, max_pending=1)
+    assert asyncio.run(pool.run(_slow, 0)) == 0
+    assert pool.pending == 0
+
+
+def test_timed_out_job_keeps_its_slot_until_it_ends():
+    pool = WorkPool("t", "thread", max_workers=1, max_pending=1)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run(_slow, 0.2), timeout=0.01)
+        assert pool.pending == 1  # the worker is still running it
+        started = time.monotonic()
+        await pool.run(_slow, 0)  # waits for the slot
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.1
+    assert pool.pending == 0
@@ -0,0 +1,83 @@
+# test/test_interaction_guard.py
+# AckGuard (utils/interaction_guard.py): what a slow app command's reply looks like after the guard
+# deferred it. The first followup after a "thinking" defer takes the defer's visibility.
+
+import asyncio
+
+import discord
+
+from utils import interaction_guard
+from utils.interaction_guard import AckGuard, ack_deadline
+
+
+class _Followup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, *args, **kwargs):
+        self.sent.append(kwargs)
+
+
+class _Response:
+    def __init__(self, parent):
+        self._parent = parent
+        self.deferred = None
+
+    def is_done(self):
+        return self.deferred is not None
+
+
+class _Interaction:
+    type = discord.InteractionType.application_command
+    token = "token"
+
+    def __init__(self, callback):
+        self.extras = {}
+        self.created_at = discord.utils.utcnow()
+        self.command = type("Command", (), {"callback": callback, "qualified_name": "slow"})()
+        self.response = _Response(self)
+        self.followup = _Followup()
+
+
+async def _slow_command(interaction, guard, ephemeral):
+    """Lets the guard defer it, then replies the way the handler would."""
+    guard.watch(interaction)
+    await asyncio.sleep(0.05)
+    await guard.respond("send_message", interaction.response, ("menu",), {"ephemeral": ephemeral})
+
+
+def _run(callback, guard, ephemeral, monkeypatch):
+    async def fake_defer(response, **kwargs):
+        response.deferred = kwargs
+
+    monkeypatch.setitem(interaction_guard._ORIGINALS, "defer", fake_defer)
+    interaction = _Interaction(callback)
+    asyncio.run(_slow_command(interaction, guard, ephemeral))
+    return interaction
+
+
+async def _private_command(interaction):
+    pass
+
+
+@ack_deadline(ephemeral=False)
+async def _public_command(interaction):
+    pass
+
+
+def test_private_reply_stays_private_by_default(monkeypatch):
+    interaction = _run(_private_command, AckGuard(deadline_seconds=0), True, monkeypatch)
+    assert interaction.response.deferred == {"ephemeral": True, "thinking": True}
+    assert interaction.followup.sent == [{"ephemeral": True, "wait": True}]
+
+
+def test_public_command_opts_out(monkeypatch):
+    interaction = _run(_public_command, AckGuard(deadline_seconds=0), False, monkeypatch)
+    assert interaction.response.deferred == {"ephemeral": False, "thinking": True}
+    assert interaction.followup.sent == [{"ephemeral": False, "wait": True}]
+
+
+def test_mismatched_reply_reports_the_visibility_it_really_gets(monkeypatch, capsys):
+    interaction = _run(_private_command, AckGuard(deadline_seconds=0), False, monkeypatch)
+    assert interaction.followup.sent == [{"ephemeral": True, "wait": True}]
+    assert "ack_deadline(ephemeral=...)" in capsys.readouterr().out
@@ -0,0 +1,33 @@
+# test/test_inventory.py
+# Inventory (core/inventory.py): the aggregates kept for the bag, shop and crafting UIs.
+
+from core.inventory import Inventory
+from data.items import ITEMS
+
+
+def test_every_item_can_be_held():
+    # Items without a shop price (price None, e.g. old_satchel) must not break the sellable list
+    inventory = Inventory(1, [{'item_id': item_id, 'quantity': 1, 'item_data': None} for item_id in ITEMS])
+    assert set(inventory.quantities) == set(ITEMS)
+    sellable = {inventory.rows[row_key]['item_id'] for row_key in inventory.sellable}
+    assert sellable == {item_id for item_id, data in ITEMS.items() if (data.get('price') or 0) > 0}
+
+
+def test_unpriced_item_is_not_sellable():
+    inventory = Inventory(1, [{'item_id': 'old_satchel', 'quantity': 1, 'item_data': None}])
+    assert inventory.quantities == {'old_satchel': 1}
+    assert inventory.sellable == []
+
+
+def test_unique_items_get_their_own_rows():
+    tome = {'skill_id': 'tackle'}
+    inventory = Inventory(1, [{'item_id': 'old_satchel', 'quantity': 2, 'item_data': None}])
+    inventory.add_item('skill_tome', 1, tome)
+    inventory.add_item('skill_tome', 1, {'skill_id': 'ember'})
+    assert inventory.quantities['skill_tome'] == 2
+    assert len([key for key in inventory.rows if key.startswith('skill_tome:')]) == 2
+
+    inventory.remove_item('skill_tome', 1, tome)
+    inventory.remove_item('old_satchel', 2)
+    assert inventory.quantities.get('skill_tome') == 1
+    assert 'old_satchel' not in inventory.rows
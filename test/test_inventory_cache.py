@@ -0,0 +1,57 @@
+# test/test_inventory_cache.py
+# The Database cog's Inventory cache (cogs/database.py): a load that overlapped a write isn't kept.
+
+import asyncio
+
+from cogs.database import Database
+
+
+class _Pool:
+    """Rows in a dict; fetch can be held open to let a write land mid-load."""
+
+    def __init__(self):
+        self.rows = {}
+        self.release_fetch = None
+
+    async def fetch(self, query, user_id):
+        snapshot = [{"item_id": item_id, "quantity": qty, "item_data": None} for item_id, qty in self.rows.items()]
+        if self.release_fetch is not None:
+            await self.release_fetch.wait()
+        return snapshot
+
+    async def execute(self, query, user_id, item_id, qty, *args):
+        self.rows[item_id] = self.rows.get(item_id, 0) + qty
+
+
+def test_load_that_overlapped_a_write_is_not_cached():
+    pool = _Pool()
+    db = Database(bot=None, pool=pool)
+
+    async def scenario():
+        pool.release_fetch = asyncio.Event()
+        load = asyncio.create_task(db.get_inventory(1))
+        await asyncio.sleep(0)  # the load has read the empty inventory
+        await db.add_item_to_inventory(1, "potion", 2)
+        pool.release_fetch.set()
+        stale = await load
+        pool.release_fetch = None
+        return stale, await db.get_inventory(1)
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale.quantities.get("potion", 0) == 0
+    assert fresh.quantities["potion"] == 2
+    assert db._inventory_loads == {}
+
+
+def test_quiet_load_is_cached_and_kept_current():
+    pool = _Pool()
+    pool.rows["potion"] = 1
+    db = Database(bot=None, pool=pool)
+
+    async def scenario():
+        first = await db.get_inventory(1)
+        await db.add_item_to_inventory(1, "potion", 1)
+        return first, await db.get_inventory(1)
+
+    first, second = asyncio.run(scenario())
+    assert second is first and second.quantities["potion"] == 2
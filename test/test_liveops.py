@@ -0,0 +1,18 @@
+# test/test_liveops.py
+# BulkOperation (core/liveops.py): what a live-ops run is allowed to apply.
+
+import pytest
+
+from core.liveops import BulkOperation
+
+
+def test_grant_item_needs_a_positive_quantity():
+    assert BulkOperation("grant_item", "potion", 3).describe() == "3x potion"
+    for quantity in (0, -2):
+        with pytest.raises(ValueError):
+            BulkOperation("grant_item", "potion", quantity)
+
+
+def test_unknown_operation_is_rejected():
+    with pytest.raises(ValueError):
+        BulkOperation("delete_everything", "x")
@@ -0,0 +1,37 @@
+# test/test_message_editor.py
+# MessageEditScheduler (utils/message_editor.py): which rate-limit bucket an edit waits on.
+
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from utils.message_editor import MessageEditScheduler
+
+
+class _InteractionMessage(discord.InteractionMessage):
+    """An interaction response without a live connection: edits are recorded, not sent."""
+
+    def __init__(self, message_id, channel_id, interaction_id):
+        self.id = message_id
+        self.channel = SimpleNamespace(id=channel_id)
+        self.interaction_metadata = SimpleNamespace(id=interaction_id)
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+
+def test_interaction_edits_do_not_wait_on_a_busy_channel():
+    scheduler = MessageEditScheduler(debounce=0)
+    channel_message = SimpleNamespace(id=1, channel=SimpleNamespace(id=5))
+    reply = _InteractionMessage(2, 5, interaction_id=99)
+
+    async def scenario():
+        scheduler._bucket_for(channel_message).tokens = 0  # the channel has used up its edits
+        await asyncio.wait_for(scheduler.edit(reply, content="hi"), timeout=0.5)
+
+    asyncio.run(scenario())
+    assert reply.edits == [{"content": "hi"}]
+    assert scheduler._bucket_for(reply) is not scheduler._bucket_for(channel_message)
+    assert scheduler._bucket_for(reply) is scheduler._bucket_for(_InteractionMessage(3, 5, interaction_id=99))
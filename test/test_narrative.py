@@ -0,0 +1,88 @@
+# test/test_narrative.py
+# EffectPlan (core/narrative.py) and MemoryRepository.apply_batch: effects compiled into one batch.
+
+import asyncio
+
+from core.narrative import EffectPlan, Narrative
+from core.repository import MemoryRepository
+
+STORY = {"id": "section_t", "title": "Test", "steps": [
+    {"id": "start", "type": "narration", "text": "Hello", "next": "end"},
+    {"id": "end", "type": "narration", "text": "Bye"},
+]}
+
+
+def _repo_with_player(**defaults):
+    repo = MemoryRepository()
+    asyncio.run(repo.create_player(1, {"story_step_id": "start", "energy": 5, "max_energy": 10, **defaults}))
+    return repo
+
+
+def _plan(repo, effects):
+    player = asyncio.run(repo.get_player(1))
+    plan = EffectPlan(dict(player, flags=set(player["flags"])))
+    return Narrative(STORY, repo).plan_effects(plan, effects)
+
+
+def test_empty_plan_is_falsy():
+    repo = _repo_with_player()
+    assert not _plan(repo, [])
+    assert _plan(repo, [{"op": "set_flag", "flag": "met_galen"}])
+
+
+def test_plan_groups_writes_and_later_effects_see_earlier_ones():
+    repo = _repo_with_player(flags=["already"])
+    plan = _plan(repo, [
+        {"op": "grant_item", "item_id": "potion", "qty": 2},
+        {"op": "grant_item", "item_id": "potion"},
+        {"op": "set_flag", "flag": "already"},
+        {"op": "set_flag", "flag": "new"},
+        {"op": "spend_energy", "amount": 4},
+        {"op": "spend_energy", "amount": 4},  # only 1 left: soft failure
+    ])
+    assert plan.items == {"potion": 3}
+    assert plan.flags == ["new", "no_energy"]
+    assert plan.energy_delta == -4
+    assert plan.player["energy"] == 1
+    # Nothing is written until the plan is applied
+    assert asyncio.run(repo.get_player(1))["energy"] == 5
+
+
+def test_apply_batch_writes_the_whole_plan():
+    repo = _repo_with_player()
+    plan = _plan(repo, [
+        {"op": "grant_pet", "pet_id": "Pyrelisk"},
+        {"op": "set_main_pet_by_species", "pet_id": "Pyrelisk"},
+        {"op": "grant_item", "item_id": "potion", "qty": 2},
+        {"op": "set_flag", "flag": "starter_pet:Pyrelisk"},
+        {"op": "spend_energy", "amount": 2},
+    ])
+    plan.set_story_state("section_t", "end")
+    assert asyncio.run(repo.apply_batch(1, plan))
+
+    player = asyncio.run(repo.get_player(1))
+    assert player["story_step_id"] == "end"
+    assert player["energy"] == 3
+    assert player["inventory"] == [{"item_id": "potion", "qty": 2}]
+    assert [pet["pet_id"] for pet in player["pets"]] == ["Pyrelisk"]
+    assert player["main_pet_species"] == "Pyrelisk"
+    assert "starter_pet:Pyrelisk" in player["flags"]
+
+
+def test_restore_then_spend_is_capped_at_max_energy():
+    repo = _repo_with_player(energy=2)
+    plan = _plan(repo, [{"op": "restore_energy_full"}, {"op": "spend_energy", "amount": 3}])
+    assert asyncio.run(repo.apply_batch(1, plan))
+    assert asyncio.run(repo.get_player(1))["energy"] == 7
+
+
+def test_apply_batch_rejects_a_plan_for_a_step_the_player_has_left():
+    repo = _repo_with_player()
+    plan = _plan(repo, [{"op": "set_flag", "flag": "late"}])
+    asyncio.run(repo.set_story_state(1, "section_t", "end"))
+    version = asyncio.run(repo.get_player(1))["state_version"]
+
+    assert not asyncio.run(repo.apply_batch(1, plan))
+    player = asyncio.run(repo.get_player(1))
+    assert "late" not in player["flags"]
+    assert player["state_version"] == version
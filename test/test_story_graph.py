@@ -0,0 +1,50 @@
+# test/test_story_graph.py
+# compile_section (core/story_graph.py): step lookups, next tables, reachability and text templates.
+
+from core.story_graph import compile_section, compile_template
+
+STORY = {"id": "section_t", "title": "Test", "steps": [
+    {"id": "intro", "type": "narration", "text": "Welcome, {player_name}!", "next": "pick"},
+    {"id": "pick", "type": "choice", "text": "Choose.", "options": [
+        {"id": "left", "label": "Left", "next": "cave"},
+        {"id": "right", "label": "Right", "effects": [
+            {"op": "goto", "section": "section_t", "step": "camp"},
+            {"op": "goto", "section": "section_2", "step": "intro_1"},
+        ]},
+    ]},
+    {"id": "cave", "type": "narration", "text": "{player_name} and {player_name}'s {shadow}"},
+    {"id": "camp", "type": "narration", "text": "Rest."},
+    {"id": "orphan", "type": "narration", "text": "Nothing leads here."},
+]}
+
+
+def test_steps_are_indexed_with_their_options():
+    section = compile_section(STORY)
+    assert section.first_step_id == "intro"
+    pick = section.get("pick")
+    assert pick.options == (("left", "Left"), ("right", "Right"))
+    assert pick.option_by_id["left"]["next"] == "cave"
+    assert section.get("missing") is None
+
+
+def test_next_table_covers_next_options_and_gotos():
+    section = compile_section(STORY)
+    assert section.next_table["intro"] == ("pick",)
+    assert section.next_table["pick"] == ("cave", "camp")
+    assert section.get("pick").exits == (("section_2", "intro_1"),)  # other sections are exits
+    assert section.reachable == {"intro", "pick", "cave", "camp"}
+    assert section.unreachable == ["orphan"]
+
+
+def test_templates_substitute_player_name_only():
+    section = compile_section(STORY)
+    assert section.get("intro").render_text(player_name="Ria") == "Welcome, Ria!"
+    assert section.get("intro").render_text() == "Welcome, Adventurer!"
+    assert section.get("cave").render_text(player_name="Ria") == "Ria and Ria's {shadow}"
+    assert section.get("cave").text_fields == ("player_name",)
+    assert compile_template(None)() == ""
+
+
+def test_content_hash_follows_content():
+    assert compile_section(STORY).content_hash == compile_section(dict(STORY)).content_hash
+    assert compile_section(STORY).content_hash != compile_section(dict(STORY, title="Other")).content_hash
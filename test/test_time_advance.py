@@ -0,0 +1,67 @@
+# test/test_time_advance.py
+# compute_time_advance (core/time_advance.py): one rest, computed from plain dicts.
+
+import random
+
+from core.time_advance import TIME_CYCLE, compute_time_advance, next_time_of_day
+
+RESTORE = {"energy_restore_percent": 50, "health_restore_percent": 25}
+
+
+def _player(**overrides):
+    return {"day_of_cycle": "morning", "energy": 4, "max_energy": 10, **overrides}
+
+
+def _pet(**overrides):
+    return {"pet_id": 7, "name": "Pip", "current_hp": 10, "max_hp": 40, **overrides}
+
+
+def test_phases_cycle_and_night_wraps_to_morning():
+    assert [next_time_of_day(phase) for phase in TIME_CYCLE] == ["noon", "evening", "night", "morning"]
+    assert next_time_of_day(None) == "noon"  # unknown counts as morning
+    assert compute_time_advance(_player(day_of_cycle="night"), [], None, RESTORE).new_time == "morning"
+
+
+def test_energy_and_hp_restore_up_to_their_caps():
+    result = compute_time_advance(_player(), [], _pet(), RESTORE)
+    assert result.energy == 9          # 4 + 50% of 10
+    assert (result.pet_id, result.pet_hp) == (7, 20)  # 10 + 25% of 40
+
+    result = compute_time_advance(_player(energy=8), [], _pet(current_hp=35), RESTORE)
+    assert result.energy == 10
+    assert result.pet_hp == 40
+
+
+def test_no_main_pet_leaves_pet_fields_empty():
+    result = compute_time_advance(_player(), [], None, RESTORE)
+    assert result.pet_id is None and result.pet_hp is None
+
+
+def test_time_sensitive_quest_ticks_down_then_fails():
+    quests = [{"quest_id": "sunk_cost", "progress": {"status": "in_progress", "ticks_remaining": 2}}]
+    result = compute_time_advance(_player(), quests, None, RESTORE)
+    assert result.quest_progress == {"sunk_cost": {"status": "in_progress", "ticks_remaining": 1}}
+    assert result.flags == []
+    assert any("running out of time" in message for message in result.messages)
+    assert quests[0]["progress"]["ticks_remaining"] == 2  # the snapshot is not modified
+
+    quests = [{"quest_id": "sunk_cost", "progress": {"status": "in_progress", "ticks_remaining": 1}}]
+    result = compute_time_advance(_player(), quests, None, RESTORE)
+    assert result.quest_progress == {"sunk_cost": {"status": "completed"}}
+    assert result.flags == ["quest_sunk_cost_failed"]
+    assert result.messages[-1].startswith("⏰")  # quest news comes after the restore lines
+
+
+def test_completed_and_untimed_quests_are_left_alone():
+    quests = [
+        {"quest_id": "sunk_cost", "progress": {"status": "completed"}},
+        {"quest_id": "not_time_sensitive", "progress": {"ticks_remaining": 1}},
+    ]
+    result = compute_time_advance(_player(), quests, None, RESTORE)
+    assert result.quest_progress == {} and result.flags == []
+
+
+def test_same_rng_same_messages():
+    first = compute_time_advance(_player(), [], _pet(), RESTORE, rng=random.Random(3))
+    second = compute_time_advance(_player(), [], _pet(), RESTORE, rng=random.Random(3))
+    assert first.messages == second.messages
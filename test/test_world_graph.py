@@ -0,0 +1,59 @@
+# test/test_world_graph.py
+# WorldGraph (core/world_graph.py): cheapest routes on the roads a player's flags open.
+
+from core.world_graph import Route, WorldGraph
+
+TOWNS = {
+    "a": {"name": "Aston", "connections": {"r": "Road to the ruin", "c": "Long road", "b": "Gate", "a_wilds": "Wilds"},
+          "connection_costs": {"r": 5, "c": 20, "b": 1}, "connection_requirements": {"b": "gate_open"}},
+    "b": {"name": "Brill", "connections": {"a": "Gate", "c": "Shortcut"}, "connection_costs": {"c": 1}},
+    "c": {"name": "Crewe", "connections": {"r": "Back road"}},
+    "a_wilds": {"name": "Wilds", "is_wilds": True, "connections": {"a": "Back"}},
+}
+REMNANTS = {
+    "r": {"name": "Ruin", "connections": {"a": "Road", "c": "Road"}, "connection_costs": {"c": 5}},
+}
+
+
+def _graph():
+    return WorldGraph(TOWNS, REMNANTS, default_cost=3)
+
+
+def test_wilds_are_not_nodes_and_gated_exits_need_their_flag():
+    graph = _graph()
+    assert "a_wilds" not in graph.index
+    assert graph.exits("a", set()) == [("r", "Road to the ruin", 5), ("c", "Long road", 20)]
+    assert ("b", "Gate", 1) in graph.exits("a", {"gate_open"})
+    assert graph.exits("a_wilds", set()) == []
+
+
+def test_route_takes_the_cheapest_open_path():
+    graph = _graph()
+    route = graph.route("a", "c", set())
+    assert (route.stops, route.costs, route.total) == (["a", "r", "c"], [5, 5], 10)
+    assert route.via == ["r"] and route.destination == "c"
+
+    route = graph.route("a", "c", {"gate_open", "unrelated_flag"})
+    assert (route.stops, route.total) == (["a", "b", "c"], 2)
+
+
+def test_unreachable_or_same_place_has_no_route():
+    graph = _graph()
+    assert graph.route("a", "b", set()) is None
+    assert graph.route("a", "a", set()) is None
+    assert graph.route("a", "nowhere", set()) is None
+
+
+def test_validate_rechecks_every_leg():
+    graph = _graph()
+    route = graph.route("a", "c", {"gate_open"})
+    assert graph.validate(route, {"gate_open"}) is None
+    assert "closed" in graph.validate(route, set())
+    assert "closed" in graph.validate(Route(["a", "r"], [1]), set())  # wrong cost for the road
+    assert "not on the map" in graph.validate(Route(["a", "nowhere"], [1]), set())
+
+
+def test_journeys_only_go_to_towns_cheapest_first():
+    graph = _graph()
+    routes = graph.journeys("a", ["c", "b", "r", "a"], {"gate_open"})
+    assert [(route.destination, route.total) for route in routes] == [("b", 1), ("c", 2)]
@@ -0,0 +1,33 @@
+# utils/checks.py
+# Checks for slash commands. `commands.is_owner()` only guards prefix commands — on an
+# app_commands.command it is silently ignored — so admin slash commands use owner_only() instead.
+
+import discord
+from discord import app_commands
+
+
+class NotOwner(app_commands.CheckFailure):
+    """Raised by owner_only() when someone other than the bot owner runs the command."""
+
+
+def owner_only():
+    """
+    Restricts a slash command to the bot owner(s), and hides it from everyone but
+    server administrators in the command picker.
+    """
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if await interaction.client.is_owner(interaction.user):
+            return True
+        raise NotOwner("This is an admin-only command.")
+
+    def decorator(func):
+        func = app_commands.check(predicate)(func)
+        return app_commands.default_permissions(administrator=True)(func)
+    return decorator
+
+
+async def reply_not_owner(interaction: discord.Interaction):
+    if interaction.response.is_done():
+        await interaction.followup.send("This is an admin-only command.", ephemeral=True)
+    else:
+        await interaction.response.send_message("This is an admin-only command.", ephemeral=True)
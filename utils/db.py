@@ -0,0 +1,40 @@
+# utils/db.py
+# Shared asyncpg setup used by the bot (Database cog) and the story API.
+# Every pool is created with JSON/JSONB codecs registered, so JSON columns go in and come out as
+# Python objects — callers never json.dumps/json.loads by hand.
+
+import asyncpg
+
+try:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def json_dumps(value) -> str:
+        return orjson.dumps(value, option=_ORJSON_OPTIONS).decode()
+
+    json_loads = orjson.loads
+
+except ImportError:  # orjson is optional — fall back to the stdlib
+    import json
+
+    _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    json_dumps = _encoder.encode
+    json_loads = json.loads
+
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """Registers the JSON codecs on a new pool connection (asyncpg `init=` hook)."""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json_dumps,
+            decoder=json_loads,
+            schema="pg_catalog",
+            format="text",
+        )
+
+
+async def create_pool(**kwargs) -> asyncpg.Pool:
+    """asyncpg.create_pool with the shared connection setup applied."""
+    return await asyncpg.create_pool(init=init_connection, **kwargs)
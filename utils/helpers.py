@@ -189,11 +189,13 @@ def get_status_bar(player_data: dict, main_pet_data: dict) -> str:
             f"❤️ Pet HP: {pet_current_hp}/{pet_max_hp} | 🍔 Pet Hunger: {pet_hunger}/100")
 
 
-def get_ai_move(ai_pet, player_pet, gloom_meter):
+def get_ai_move(ai_pet, player_pet, gloom_meter, rng=None):
     """
     Determines the AI's move based on its personality and the state of the battle.
     Now with unique logic for each archetype.
+    `rng` is the battle's random stream (defaults to the global one).
     """
+    rng = rng or random
     personality = ai_pet.get("personality", "Aggressive")
     available_skills = ai_pet.get("skills", ["scratch"])
 
@@ -217,7 +219,7 @@ def get_ai_move(ai_pet, player_pet, gloom_meter):
 
     elif personality == "Tactical":
         # If health is low, it has a 50% chance to try and heal or use a status move.
-        if (ai_pet["current_hp"] / ai_pet["max_hp"]) < 0.5 and random.random() < 0.5:
+        if (ai_pet["current_hp"] / ai_pet["max_hp"]) < 0.5 and rng.random() < 0.5:
             for skill_id in available_skills:
                 skill_category = PET_SKILLS.get(skill_id, {}).get("category")
                 if skill_category == "Status":
@@ -264,7 +266,7 @@ def get_ai_move(ai_pet, player_pet, gloom_meter):
     elif personality == "Guardian":
         # Uses defensive buffs first; only attacks when low HP or no buffs available
         self_hp_percent = ai_pet['current_hp'] / ai_pet['max_hp'] if ai_pet.get('max_hp', 1) > 0 else 1
-        if self_hp_percent > 0.3 and random.random() < 0.6:
+        if self_hp_percent > 0.3 and rng.random() < 0.6:
             for skill_id in available_skills:
                 skill = PET_SKILLS.get(skill_id, {})
                 if skill.get('category') != 'Status':
@@ -326,7 +328,10 @@ def get_type_multiplier(attack_type: str, defender_types: list, active_effects:
         active_effects = []
 
     # --- NEW: Type Alteration Status Check ---
-    is_earthbound = any(eff.get("status_effect") == "earthbound" for eff in active_effects)  #
+    if hasattr(active_effects, "has_status"):  # a battle EffectList, indexed by status
+        is_earthbound = active_effects.has_status("earthbound")
+    else:
+        is_earthbound = any(eff.get("status_effect") == "earthbound" for eff in active_effects)
 
     # Create a local copy to modify for this calculation only
     local_defender_types = list(defender_types) if isinstance(defender_types, list) else [defender_types]
@@ -508,10 +513,11 @@ async def check_quest_progress(bot, user_id, action_type, context=None, channel=
     return messages_to_return
 
 
-def get_notification(key: str, **kwargs) -> str:
+def get_notification(key: str, rng=None, **kwargs) -> str:
     """
     Fetches a random notification template by its key, formats it with
     the provided arguments, and returns the final string.
+    Battles pass their own `rng` so combat text is reproducible.
     """
     templates = NOTIFICATIONS.get(key)
     if not templates:
@@ -521,7 +527,7 @@ def get_notification(key: str, **kwargs) -> str:
     if isinstance(templates, str):
         templates = [templates]
 
-    template = random.choice(templates)
+    template = (rng or random).choice(templates)
     try:
         return template.format(**kwargs)
     except KeyError as e:
@@ -0,0 +1,374 @@
+# utils/interaction_guard.py
+# Makes sure every interaction is acknowledged inside Discord's 3-second window, and measures how
+# close each handler cuts it.
+# The guard is middleware rather than a per-callback decorator: it watches every app command,
+# component and modal interaction from the moment it arrives. If the handler hasn't acknowledged
+# it by ACK_DEADLINE_SECONDS, the guard defers it. Any response call the handler makes afterwards
+# is redirected to match, so existing callbacks need no changes:
+#   response.defer()         -> no-op (already deferred)
+#   response.send_message()  -> followup.send()
+#   response.edit_message()  -> edit_original_response()
+# Per handler (e.g. 'TravelView.select_callback' or '/explore') it records time-to-ack and
+# time-to-first-response (the first thing the user actually sees), plus how often the guard had
+# to step in. Use @ack_deadline(seconds) on a callback to give it its own deadline, or
+# @ack_deadline(None) for callbacks that must answer themselves (e.g. ones that open a modal).
+# An app command the guard defers shows "thinking" privately by default (ACK_AUTO_EPHEMERAL: every
+# command in the bot answers privately), and the command's first reply inherits that visibility
+# whatever it asks for. A command that posts publicly says so with @ack_deadline(ephemeral=False);
+# a reply whose visibility doesn't match the defer's is logged, so a missing annotation shows up.
+# Tagging view and modal callbacks hooks View/Modal._scheduled_task, which is discord.py-internal.
+# If their signatures ever change the hooks are left out, and so is auto-acknowledging components
+# and modals (their per-callback deadlines, like the modal openers' None, could not be read).
+
+import asyncio
+import inspect
+import time
+from typing import Any, Dict, Optional
+
+import discord
+from discord.interactions import InteractionResponse
+
+from core import config
+from core.metrics import get_histogram
+
+_STATE_KEY = "_ack_guard"
+_TAG_KEY = "ack_tag"
+_DEADLINE_KEY = "ack_deadline"
+_NO_DEADLINE = object()
+_GUARD_DEFAULT = object()
+TOKEN_LIFETIME_SECONDS = 15 * 60
+
+_ORIGINALS = {
+    "defer": InteractionResponse.defer,
+    "send_message": InteractionResponse.send_message,
+    "edit_message": InteractionResponse.edit_message,
+    "send_modal": InteractionResponse.send_modal,
+}
+_ORIGINAL_EDIT_ORIGINAL = discord.Interaction.edit_original_response
+_ORIGINAL_WEBHOOK_SEND = discord.Webhook.send
+_ORIGINAL_VIEW_TASK = getattr(discord.ui.View, "_scheduled_task", None)
+_ORIGINAL_MODAL_TASK = getattr(discord.ui.Modal, "_scheduled_task", None)
+_active_guard: Optional["AckGuard"] = None
+
+
+def _can_hook_callbacks() -> bool:
+    """True if View/Modal._scheduled_task still look like what the tagging hooks were written against."""
+    try:
+        view_params = list(inspect.signature(_ORIGINAL_VIEW_TASK).parameters)
+        modal_params = list(inspect.signature(_ORIGINAL_MODAL_TASK).parameters)
+    except (TypeError, ValueError):
+        return False
+    return view_params == ["self", "item", "interaction"] and modal_params[:2] == ["self", "interaction"]
+
+
+_HOOK_CALLBACKS = _can_hook_callbacks()
+
+
+def ack_deadline(seconds: Optional[float] = _GUARD_DEFAULT, ephemeral: Optional[bool] = None):
+    """
+    Per-callback settings for the ack guard. seconds: its own deadline; None = never auto-acknowledge
+    this callback. ephemeral (app commands): whether the guard's defer, and so the first reply, is private.
+    """
+    def decorator(fn):
+        if seconds is not _GUARD_DEFAULT:
+            fn.__ack_deadline__ = _NO_DEADLINE if seconds is None else seconds
+        if ephemeral is not None:
+            fn.__ack_ephemeral__ = ephemeral
+        return fn
+    return decorator
+
+
+def _callback_function(callback):
+    # ui.button/select decorators wrap the function; callbacks assigned by hand are bound methods
+    fn = getattr(callback, "callback", None) or callback
+    return getattr(fn, "__func__", fn)
+
+
+class _PendingAck:
+    """What the guard tracks for one interaction until its first response."""
+
+    __slots__ = ("created_at", "received", "lock", "started", "auto", "ephemeral", "acked_ms", "responded")
+
+    def __init__(self, created_at):
+        self.created_at = created_at  # Discord's clock starts from the interaction's snowflake time
+        self.received = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.started = False      # an acknowledgement is on its way (handler's or the guard's)
+        self.auto = False         # the guard deferred it
+        self.ephemeral: Optional[bool] = None  # visibility of the guard's "thinking" defer (app commands)
+        self.acked_ms: Optional[float] = None
+        self.responded = False
+
+    def elapsed(self) -> float:
+        return max(0.0, (discord.utils.utcnow() - self.created_at).total_seconds())
+
+    def elapsed_ms(self) -> float:
+        return self.elapsed() * 1000
+
+
+class AckGuard:
+    """Auto-acknowledges slow interactions and keeps per-handler ack timings."""
+
+    def __init__(self, deadline_seconds: float = 2.0, auto_ephemeral: bool = True):
+        self.deadline_seconds = deadline_seconds
+        self.auto_ephemeral = auto_ephemeral  # app commands the guard defers show "thinking" privately
+        self.ack_histogram = get_histogram("interaction.ack_ms")
+        self.first_response_histogram = get_histogram("interaction.first_response_ms")
+        # {tag: {"count", "auto_acks", "ack_total_ms", "ack_max_ms", "responses", "first_total_ms", "first_max_ms"}}
+        self.by_tag: Dict[str, Dict[str, float]] = {}
+        self._awaiting_first: Dict[str, tuple] = {}  # {interaction token: (interaction, pending)} after a defer
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def install(self):
+        global _active_guard
+        _active_guard = self
+        for name in _ORIGINALS:
+            setattr(InteractionResponse, name, _patched_response(name))
+        discord.Interaction.edit_original_response = _patched_edit_original
+        discord.Webhook.send = _patched_webhook_send
+        if _HOOK_CALLBACKS:
+            discord.ui.View._scheduled_task = _patched_view_task
+            discord.ui.Modal._scheduled_task = _patched_modal_task
+        else:
+            print(f"⚠️ Ack guard: discord.py {discord.__version__} internals changed; "
+                  f"components and modals are timed but never auto-acknowledged")
+
+    def uninstall(self):
+        global _active_guard
+        if _active_guard is not self:
+            return
+        _active_guard = None
+        for name, original in _ORIGINALS.items():
+            setattr(InteractionResponse, name, original)
+        discord.Interaction.edit_original_response = _ORIGINAL_EDIT_ORIGINAL
+        discord.Webhook.send = _ORIGINAL_WEBHOOK_SEND
+        if _HOOK_CALLBACKS:
+            discord.ui.View._scheduled_task = _ORIGINAL_VIEW_TASK
+            discord.ui.Modal._scheduled_task = _ORIGINAL_MODAL_TASK
+
+    def watch(self, interaction: discord.Interaction):
+        """Call for every incoming interaction (the Monitor cog does, from on_interaction)."""
+        pending = self._pending_for(interaction)
+        if pending is None:
+            return
+        self._prune()
+        asyncio.create_task(self._deadline(interaction, pending))
+
+    @staticmethod
+    def _pending_for(interaction: discord.Interaction) -> Optional[_PendingAck]:
+        # Fast handlers can answer before on_interaction reaches watch(), so either side may create it
+        if interaction.type not in (discord.InteractionType.application_command,
+                                    discord.InteractionType.component,
+                                    discord.InteractionType.modal_submit):
+            return None  # autocomplete and pings can't be deferred
+        pending = interaction.extras.get(_STATE_KEY)
+        if pending is None:
+            pending = interaction.extras[_STATE_KEY] = _PendingAck(interaction.created_at)
+        return pending
+
+    # -------------------------
+    # Auto-acknowledgement
+    # -------------------------
+    def _deadline_for(self, interaction: discord.Interaction) -> Optional[float]:
+        if interaction.type != discord.InteractionType.application_command and not _HOOK_CALLBACKS:
+            return None  # can't see the callback, so can't tell whether it must answer itself
+        deadline = interaction.extras.get(_DEADLINE_KEY)
+        if deadline is None and interaction.type == discord.InteractionType.application_command:
+            command = interaction.command
+            deadline = getattr(getattr(command, "callback", None), "__ack_deadline__", None)
+        if deadline is _NO_DEADLINE:
+            return None
+        return deadline if deadline is not None else self.deadline_seconds
+
+    async def _deadline(self, interaction: discord.Interaction, pending: _PendingAck):
+        # Tags and per-callback deadlines are set once the view starts the callback; give it a tick
+        await asyncio.sleep(0)
+        deadline = self._deadline_for(interaction)
+        if deadline is None:
+            return
+        await asyncio.sleep(max(0.0, deadline - pending.elapsed()))
+        async with pending.lock:
+            if pending.started or interaction.response.is_done():
+                return
+            pending.started = pending.auto = True
+            try:
+                if interaction.type == discord.InteractionType.application_command:
+                    callback = getattr(interaction.command, "callback", None)
+                    pending.ephemeral = getattr(callback, "__ack_ephemeral__", self.auto_ephemeral)
+                    await _ORIGINALS["defer"](interaction.response, ephemeral=pending.ephemeral, thinking=True)
+                else:
+                    await _ORIGINALS["defer"](interaction.response)
+            except discord.HTTPException as e:
+                pending.started = pending.auto = False
+                pending.ephemeral = None
+                print(f"⚠️ Ack guard could not defer {self.tag_for(interaction)}: {e}")
+                return
+        self._record_ack(interaction, pending)
+        self._awaiting_first[interaction.token] = (interaction, pending)
+        print(f"⏱️ Ack guard deferred {self.tag_for(interaction)} after {pending.acked_ms:.0f}ms")
+
+    async def respond(self, name: str, response: InteractionResponse, args, kwargs):
+        """Runs in place of InteractionResponse.<name> while the guard is installed."""
+        interaction = response._parent
+        pending = self._pending_for(interaction)
+        original = _ORIGINALS[name]
+        if pending is None:
+            return await original(response, *args, **kwargs)
+
+        async with pending.lock:
+            if pending.auto:
+                return await self._after_auto_ack(name, interaction, pending, response, args, kwargs)
+            pending.started = True
+            result = await original(response, *args, **kwargs)
+
+        if pending.acked_ms is None:
+            self._record_ack(interaction, pending)
+        if name == "defer":
+            self._awaiting_first[interaction.token] = (interaction, pending)
+        else:
+            self._record_first_response(interaction, pending)
+        return result
+
+    async def _after_auto_ack(self, name, interaction, pending: _PendingAck, response, args, kwargs):
+        if name == "defer":
+            return None
+        if name == "send_modal":
+            return await _ORIGINALS[name](response, *args, **kwargs)  # can't follow a defer; raises
+        delete_after = kwargs.pop("delete_after", None)
+        if name == "send_message":
+            if pending.ephemeral is not None:
+                # The first followup after a "thinking" defer takes the defer's visibility
+                if kwargs.get("ephemeral", False) != pending.ephemeral:
+                    print(f"⚠️ Ack guard: {self.tag_for(interaction)} replied "
+                          f"{'privately' if kwargs.get('ephemeral') else 'publicly'} after a "
+                          f"{'private' if pending.ephemeral else 'public'} auto-defer; "
+                          f"set @ack_deadline(ephemeral=...) on it")
+                kwargs["ephemeral"] = pending.ephemeral
+            message = await interaction.followup.send(*args, wait=True, **kwargs)
+        else:  # edit_message
+            kwargs.pop("suppress_embeds", None)
+            message = await interaction.edit_original_response(*args, **kwargs)
+        if delete_after is not None and message is not None:
+            await message.delete(delay=delete_after)
+        return None
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def tag_for(self, interaction: discord.Interaction) -> str:
+        tag = interaction.extras.get(_TAG_KEY)
+        if tag:
+            return tag
+        if interaction.type == discord.InteractionType.application_command and interaction.command:
+            return f"/{interaction.command.qualified_name}"
+        custom_id = (interaction.data or {}).get("custom_id", "?")
+        return f"{interaction.type.name}:{custom_id}"
+
+    def _stats(self, interaction) -> Dict[str, float]:
+        return self.by_tag.setdefault(self.tag_for(interaction), {
+            "count": 0, "auto_acks": 0, "ack_total_ms": 0.0, "ack_max_ms": 0.0,
+            "responses": 0, "first_total_ms": 0.0, "first_max_ms": 0.0,
+        })
+
+    def _record_ack(self, interaction, pending: _PendingAck):
+        pending.acked_ms = ack_ms = pending.elapsed_ms()
+        self.ack_histogram.observe(ack_ms)
+        stats = self._stats(interaction)
+        stats["count"] += 1
+        stats["auto_acks"] += 1 if pending.auto else 0
+        stats["ack_total_ms"] += ack_ms
+        stats["ack_max_ms"] = max(stats["ack_max_ms"], ack_ms)
+
+    def _record_first_response(self, interaction, pending: _PendingAck):
+        if pending.responded:
+            return
+        pending.responded = True
+        self._awaiting_first.pop(interaction.token, None)
+        first_ms = pending.elapsed_ms()
+        self.first_response_histogram.observe(first_ms)
+        stats = self._stats(interaction)
+        stats["responses"] += 1
+        stats["first_total_ms"] += first_ms
+        stats["first_max_ms"] = max(stats["first_max_ms"], first_ms)
+
+    def first_response_by_token(self, token: Optional[str]):
+        entry = self._awaiting_first.get(token) if token else None
+        if entry:
+            self._record_first_response(*entry)
+
+    def _prune(self):
+        # Tokens expire after 15 minutes; drop deferred interactions that never sent anything
+        now = time.monotonic()
+        for token, (_, pending) in list(self._awaiting_first.items()):
+            if now - pending.received > TOKEN_LIFETIME_SECONDS:
+                del self._awaiting_first[token]
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ack": self.ack_histogram.snapshot(),
+            "first_response": self.first_response_histogram.snapshot(),
+            "by_tag": {
+                tag: {**stats,
+                      "ack_avg_ms": round(stats["ack_total_ms"] / stats["count"], 1) if stats["count"] else 0.0,
+                      "first_avg_ms": round(stats["first_total_ms"] / stats["responses"], 1)
+                      if stats["responses"] else 0.0}
+                for tag, stats in self.by_tag.items()
+            },
+        }
+
+    def slowest_handlers(self, limit: int = 5) -> list:
+        """Returns [(tag, stats), ...] with the slowest acknowledgements first."""
+        return sorted(self.by_tag.items(), key=lambda kv: kv[1]["ack_max_ms"], reverse=True)[:limit]
+
+
+# -------------------------
+# Patched discord.py entry points
+# -------------------------
+def _patched_response(name: str):
+    original = _ORIGINALS[name]
+
+    async def patched(response, *args, **kwargs):
+        if _active_guard is None:
+            return await original(response, *args, **kwargs)
+        return await _active_guard.respond(name, response, args, kwargs)
+
+    patched.__name__ = patched.__qualname__ = name
+    return patched
+
+
+async def _patched_edit_original(interaction, *args, **kwargs):
+    result = await _ORIGINAL_EDIT_ORIGINAL(interaction, *args, **kwargs)
+    if _active_guard is not None:
+        _active_guard.first_response_by_token(interaction.token)
+    return result
+
+
+async def _patched_webhook_send(webhook, *args, **kwargs):
+    result = await _ORIGINAL_WEBHOOK_SEND(webhook, *args, **kwargs)
+    if _active_guard is not None:
+        _active_guard.first_response_by_token(webhook.token)  # interaction followups use its token
+    return result
+
+
+async def _patched_view_task(view, item, interaction):
+    fn = _callback_function(item.callback)
+    interaction.extras[_TAG_KEY] = f"{type(view).__name__}.{getattr(fn, '__name__', 'callback')}"
+    if hasattr(fn, "__ack_deadline__"):
+        interaction.extras[_DEADLINE_KEY] = fn.__ack_deadline__
+    return await _ORIGINAL_VIEW_TASK(view, item, interaction)
+
+
+async def _patched_modal_task(modal, interaction, *args, **kwargs):
+    interaction.extras[_TAG_KEY] = f"{type(modal).__name__}.on_submit"
+    if hasattr(type(modal).on_submit, "__ack_deadline__"):
+        interaction.extras[_DEADLINE_KEY] = type(modal).on_submit.__ack_deadline__
+    return await _ORIGINAL_MODAL_TASK(modal, interaction, *args, **kwargs)
+
+
+# Installed by the Monitor cog
+ack_guard = AckGuard(deadline_seconds=config.ACK_DEADLINE_SECONDS, auto_ephemeral=config.ACK_AUTO_EPHEMERAL)
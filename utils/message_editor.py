@@ -0,0 +1,151 @@
+# utils/message_editor.py
+# Coalesces Discord message edits.
+# Every edit for a message goes through one scheduler:
+#   - edits requested close together are merged (later keyword arguments win, so the latest
+#     embed/view/content is what gets sent) and sent as a single API call after a short debounce;
+#   - each channel has its own token bucket, so a busy channel with many battles doesn't burst
+#     past Discord's per-channel edit limit and get 429s that stall every view behind it.
+#     Interaction responses and followups (ephemeral ones included) are edited through the
+#     interaction's webhook, which Discord limits separately, so they get a bucket per interaction
+#     instead of using up the channel's. Idle buckets are dropped once there are many of them.
+
+import asyncio
+import time
+from typing import Dict, Hashable, Optional
+
+import discord
+
+from core.metrics import get_histogram
+
+EDIT_DEBOUNCE_SECONDS = 0.1
+CHANNEL_EDITS_PER_WINDOW = 5      # Discord allows roughly 5 message edits per channel per 5 seconds
+CHANNEL_WINDOW_SECONDS = 5.0
+_PRUNE_BUCKETS_AT = 1000          # past this many buckets, idle ones are dropped
+
+_edit_wait_histogram = get_histogram("discord.edit_wait_ms")
+_edits_merged_histogram = get_histogram("discord.edits_merged", buckets=(1, 2, 3, 5, 10, 25), unit="")
+
+
+class ChannelBucket:
+    """A simple token bucket: `capacity` edits per `window` seconds, refilled continuously."""
+
+    def __init__(self, capacity: int = CHANNEL_EDITS_PER_WINDOW, window: float = CHANNEL_WINDOW_SECONDS):
+        self.capacity = capacity
+        self.refill_rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.refill_rate)
+
+    def idle(self, now: float) -> bool:
+        """Full again and nobody waiting: dropping it loses nothing."""
+        refilled = self.tokens + (now - self.updated_at) * self.refill_rate
+        return refilled >= self.capacity and not self._lock.locked()
+
+
+class _PendingEdit:
+    """Everything queued for one message since its last flush."""
+
+    def __init__(self, message):
+        self.message = message
+        self.kwargs = {}
+        self.requests = 0
+        self.first_requested_at = time.perf_counter()
+        self.future = asyncio.get_running_loop().create_future()
+        # Mark errors as retrieved; fire-and-forget callers still see them in the console
+        self.future.add_done_callback(_log_edit_error)
+
+
+def _log_edit_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        error = future.exception()
+        if not isinstance(error, discord.NotFound):
+            print(f"--- [MESSAGE EDIT ERROR] --- {type(error).__name__}: {error}")
+
+
+class MessageEditScheduler:
+    """Debounces and merges edits per message, and rate-limits them per channel."""
+
+    def __init__(self, debounce: float = EDIT_DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self.pending: Dict[int, _PendingEdit] = {}   # {message_id: edits waiting to be sent}
+        self.workers: Dict[int, asyncio.Task] = {}   # {message_id: flush task}
+        self.buckets: Dict[Hashable, ChannelBucket] = {}  # {channel_id or interaction key: bucket}
+
+    def schedule(self, message, **kwargs) -> Optional[asyncio.Future]:
+        """
+        Queues an edit without waiting for it. Returns a future that resolves once an edit
+        containing these changes has been sent (or None if there is no message to edit).
+        """
+        if message is None:
+            return None
+        message_id = message.id
+        pending = self.pending.get(message_id)
+        if pending is None:
+            pending = self.pending[message_id] = _PendingEdit(message)
+        pending.message = message
+        pending.kwargs.update(kwargs)
+        pending.requests += 1
+
+        worker = self.workers.get(message_id)
+        if worker is None or worker.done():
+            self.workers[message_id] = asyncio.create_task(self._flush(message_id), name=f"edit-{message_id}")
+        return pending.future
+
+    async def edit(self, message, **kwargs):
+        """Queues an edit and waits until it has been sent. Raises whatever message.edit raised."""
+        future = self.schedule(message, **kwargs)
+        if future is not None:
+            return await future
+
+    def _bucket_for(self, message) -> ChannelBucket:
+        key = _bucket_key(message)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= _PRUNE_BUCKETS_AT:
+                now = time.monotonic()
+                self.buckets = {k: b for k, b in self.buckets.items() if not b.idle(now)}
+            bucket = self.buckets[key] = ChannelBucket()
+        return bucket
+
+    async def _flush(self, message_id: int):
+        # Keep flushing while edits keep arriving, so a message never has two edits in flight
+        while message_id in self.pending:
+            await asyncio.sleep(self.debounce)
+            await self._bucket_for(self.pending[message_id].message).acquire()
+            pending = self.pending.pop(message_id, None)
+            if pending is None:
+                break
+            _edit_wait_histogram.observe((time.perf_counter() - pending.first_requested_at) * 1000)
+            _edits_merged_histogram.observe(pending.requests)
+            try:
+                result = await pending.message.edit(**pending.kwargs)
+            except Exception as e:
+                pending.future.set_exception(e)
+            else:
+                pending.future.set_result(result)
+        self.workers.pop(message_id, None)
+
+
+def _bucket_key(message) -> Hashable:
+    if isinstance(message, (discord.InteractionMessage, discord.WebhookMessage)):
+        # Edited through the interaction webhook, not the channel: rate-limited per interaction
+        metadata = getattr(message, "interaction_metadata", None)
+        if metadata is not None:
+            return ("interaction", metadata.id)
+        return ("webhook", message.id)
+    return getattr(getattr(message, "channel", None), "id", 0)
+
+
+# Shared by every view — edits to the same message must go through one scheduler to be merged
+edit_scheduler = MessageEditScheduler()
@@ -0,0 +1,185 @@
+# utils/spectator.py
+# Channel-level fan-out for the public side of battles.
+# Every battle turn produces a new spectator embed, but nobody needs to see more than one refresh
+# every few seconds. The broadcaster keeps only the newest embed per panel and sends it at most
+# once per SPECTATOR_REFRESH_SECONDS. Final results (battle over, victory posts) skip the
+# throttle, and while one is being posted, routine refreshes in that channel wait behind it.
+# With LIVE_BATTLE_BOARD enabled, battles in a channel share one rolling "live battles" message
+# instead of each having its own panel.
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import discord
+
+from core import config
+from utils.message_editor import edit_scheduler
+
+BOARD_TITLE = "⚔️ Live Battles"
+
+
+class _ThrottledSlot:
+    """Holds the latest payload for one panel/board and sends it no more than once per interval."""
+
+    def __init__(self, broadcaster: "SpectatorBroadcaster", channel_id: int, interval: float,
+                 send: Callable[[object], Awaitable[None]]):
+        self.broadcaster = broadcaster
+        self.channel_id = channel_id
+        self.interval = interval
+        self.send = send
+        self.payload = None
+        self.final = False
+        self.last_sent = 0.0
+        self.closed = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def push(self, payload, final: bool = False):
+        if self.closed:
+            return
+        self.payload = payload
+        if final:
+            self.final = True
+            self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def close(self):
+        """Drops anything still queued; an edit already in flight is allowed to finish."""
+        self.closed = True
+        self.payload = None
+        self._wake.set()
+
+    async def _run(self):
+        while self.payload is not None and not self.closed:
+            if not self.final:
+                delay = self.last_sent + self.interval - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                if not self.final:
+                    await self.broadcaster.wait_for_priority(self.channel_id)
+            self._wake.clear()
+            if self.closed or self.payload is None:
+                break
+            payload, self.payload, self.final = self.payload, None, False
+            try:
+                await self.send(payload)
+            except discord.NotFound:
+                self.closed = True
+            except Exception as e:
+                print(f"--- [SPECTATOR ERROR] --- {type(e).__name__}: {e}")
+            self.last_sent = time.monotonic()
+
+
+class _Board:
+    """One rolling message per channel listing every battle in progress there."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.message = None
+        self.entries: Dict[int, str] = {}  # {user_id: one-line battle summary}
+
+    def render(self) -> discord.Embed:
+        description = "\n".join(self.entries.values()) or "*No battles in progress.*"
+        return discord.Embed(title=BOARD_TITLE, description=description[:4000], color=discord.Color.dark_red())
+
+    async def send(self, embed: discord.Embed):
+        if self.message is not None:
+            try:
+                await edit_scheduler.edit(self.message, embed=embed)
+                return
+            except discord.NotFound:
+                self.message = None  # someone deleted the board; post a fresh one
+        self.message = await self.channel.send(embed=embed)
+
+
+class SpectatorBroadcaster:
+    """Throttles spectator panel refreshes per message and prioritises final results per channel."""
+
+    def __init__(self, refresh_seconds: float = 3.0, live_board: bool = False):
+        self.refresh_seconds = refresh_seconds
+        self.live_board = live_board
+        self.panels: Dict[int, _ThrottledSlot] = {}       # {message_id: slot}
+        self.boards: Dict[int, _Board] = {}               # {channel_id: board}
+        self.board_slots: Dict[int, _ThrottledSlot] = {}  # {channel_id: slot}
+        self._priority_count: Dict[int, int] = {}
+        self._priority_clear: Dict[int, asyncio.Event] = {}
+
+    # --- Per-battle panels ---
+    def update_panel(self, message, embed: discord.Embed, final: bool = False):
+        """Queues a spectator panel refresh. Only the newest embed is sent when the panel is next due."""
+        if message is None:
+            return
+        slot = self.panels.get(message.id)
+        if slot is None or slot.closed:
+            channel_id = getattr(message.channel, "id", 0)
+
+            async def send(payload, message=message):
+                await edit_scheduler.edit(message, embed=payload)
+
+            slot = self.panels[message.id] = _ThrottledSlot(self, channel_id, self.refresh_seconds, send)
+        slot.push(embed, final=final)
+
+    def close_panel(self, message):
+        """Call before deleting a panel so queued refreshes don't try to edit a deleted message."""
+        if message is None:
+            return
+        slot = self.panels.pop(message.id, None)
+        if slot:
+            slot.close()
+
+    # --- Shared live board ---
+    def set_board_entry(self, channel, user_id: int, line: str):
+        board = self._board_for(channel)
+        board.entries[user_id] = line
+        self._board_slot(channel).push(board)
+
+    def remove_board_entry(self, channel, user_id: int):
+        board = self.boards.get(channel.id)
+        if board and board.entries.pop(user_id, None) is not None:
+            self._board_slot(channel).push(board, final=True)
+
+    def _board_for(self, channel) -> _Board:
+        board = self.boards.get(channel.id)
+        if board is None:
+            board = self.boards[channel.id] = _Board(channel)
+        return board
+
+    def _board_slot(self, channel) -> _ThrottledSlot:
+        slot = self.board_slots.get(channel.id)
+        if slot is None or slot.closed:
+            async def send(board):
+                await board.send(board.render())
+
+            slot = self.board_slots[channel.id] = _ThrottledSlot(self, channel.id, self.refresh_seconds, send)
+        return slot
+
+    # --- Final results ---
+    async def post_result(self, channel, **kwargs):
+        """Sends a final-result message (e.g. a public victory) ahead of routine refreshes in the channel."""
+        channel_id = channel.id
+        self._priority_count[channel_id] = self._priority_count.get(channel_id, 0) + 1
+        event = self._priority_clear.setdefault(channel_id, asyncio.Event())
+        event.clear()
+        try:
+            return await channel.send(**kwargs)
+        finally:
+            self._priority_count[channel_id] -= 1
+            if self._priority_count[channel_id] <= 0:
+                self._priority_count.pop(channel_id, None)
+                event.set()
+
+    async def wait_for_priority(self, channel_id: int):
+        if self._priority_count.get(channel_id):
+            await self._priority_clear[channel_id].wait()
+
+
+# Shared by every CombatView
+spectator_broadcaster = SpectatorBroadcaster(
+    refresh_seconds=config.SPECTATOR_REFRESH_SECONDS,
+    live_board=config.LIVE_BATTLE_BOARD,
+)